@@ -106,6 +106,8 @@ async def create_indexes():
         await db.leads.create_index("source")
         await db.leads.create_index("status")
         await db.leads.create_index("created_at")
+        await db.leads.create_index([("created_at", -1), ("_id", -1)])  # Keyset (cursor) pagination
+        await db.leads.create_index("search_keys")  # Indexed prefix/token lead search
         await db.leads.create_index("updated_at")
         
         # 🆕 NEW: Indexes for new optional fields
@@ -229,6 +231,35 @@ async def create_indexes():
         await bulk_whatsapp_collection.create_index([("status", 1), ("cancelled_at", 1)])  # Old cancelled jobs
         
         logger.info("✅ Bulk WhatsApp Jobs indexes created")
+        
+        # Per-recipient state and chunk leases (resumable dispatch)
+        await db.bulk_whatsapp_recipients.create_index([("job_id", 1), ("index", 1)], unique=True)
+        await db.bulk_whatsapp_recipients.create_index([("job_id", 1), ("chunk", 1), ("status", 1)])
+        await db.bulk_whatsapp_chunks.create_index([("job_id", 1), ("chunk", 1)], unique=True)
+        await db.bulk_whatsapp_chunks.create_index([("job_id", 1), ("status", 1), ("lease_expires_at", 1)])
+        logger.info("✅ Bulk WhatsApp recipient/chunk indexes created")
+        
+        # Email dispatch: scheduler due scan and recovery of expired dispatch leases
+        await db.crm_lead_emails.create_index("email_id")
+        await db.crm_lead_emails.create_index([("status", 1), ("is_scheduled", 1), ("scheduled_time", 1)])
+        await db.crm_lead_emails.create_index([("status", 1), ("dispatch_lease_until", 1)])
+        logger.info("✅ Email dispatch indexes created")
+        
+        # Local TATA call record warehouse (admin call analytics)
+        await db.call_records.create_index("call_key", unique=True)
+        await db.call_records.create_index([("call_date", -1)])
+        await db.call_records.create_index([("agent_number", 1), ("call_date", -1)])
+        await db.call_records.create_index([("date", 1), ("hour", 1)])
+        await db.call_records.create_index([("direction", 1), ("call_date", -1)])
+        await db.call_records.create_index([("call_id", 1)])
+        logger.info("✅ Call records indexes created")
+
+        # Hourly/daily call rollups maintained from call_records
+        await db.call_rollups_hourly.create_index([("agent_number", 1), ("date", 1), ("hour", 1)], unique=True)
+        await db.call_rollups_hourly.create_index([("date", 1), ("hour", 1)])
+        await db.call_rollups_daily.create_index([("agent_number", 1), ("date", 1)], unique=True)
+        await db.call_rollups_daily.create_index([("date", 1)])
+        logger.info("✅ Call rollup indexes created")
 
         logger.info("🤖 Creating Automation Campaigns collection indexes...")
 
@@ -413,6 +444,11 @@ async def create_indexes():
         
         logger.info("✅ Enhanced Activities indexes created")
         
+        # Bucketed timeline: bucket append upserts and newest-first day scans
+        await db.lead_timeline_buckets.create_index([("lead_id", 1), ("day", -1), ("count", 1)])
+        await db.lead_timeline_buckets.create_index([("lead_id", 1), ("end", -1)])
+        logger.info("✅ Timeline bucket indexes created")
+        
         # ============================================================================
         # 🆕 NEW: LEAD_COUNTERS COLLECTION INDEXES
         # ============================================================================
@@ -456,6 +492,9 @@ async def create_indexes():
             await db.lead_documents.create_index("status")
             await db.lead_documents.create_index([("lead_id", 1), ("document_type", 1)])
             await db.lead_documents.create_index([("status", 1), ("created_at", -1)])
+            await db.lead_documents.create_index([("grid_file_id", 1), ("is_active", 1)])
+            # Content-hash deduplication of GridFS document files
+            await db["documents.files"].create_index([("metadata.sha256", 1), ("length", 1)])
             logger.info("✅ Documents indexes created")
         except:
             logger.info("ℹ️ Documents collection not yet created - indexes will be created when collection exists")
@@ -496,6 +535,8 @@ async def get_collection_stats():
             "sources",
             "lead_tasks",
             "lead_activities",
+            "lead_timeline_buckets",
+            "lead_timeline_entries",
             "lead_counters",
             "whatsapp_messages",  # WhatsApp messages collection
             "bulk_whatsapp_jobs",
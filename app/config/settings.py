@@ -51,6 +51,14 @@ class Settings(BaseSettings):
     zeptomail_token: str = ""
     max_bulk_recipients: int = 500
     email_rate_limit: int = 100
+    email_requests_per_second: float = 100.0  # ZeptoMail requests (batch or single), shared by every send in the process
+    email_rate_limit_burst: int = 10
+    email_send_concurrency: int = 10
+    zeptomail_batch_enabled: bool = True
+    zeptomail_batch_size: int = 100  # Recipients per batch template request
+    email_progress_flush_size: int = 50
+    email_progress_flush_seconds: float = 1.0
+    email_dispatch_lease_seconds: int = 120
     min_schedule_minutes: int = 5
     max_schedule_days: int = 30
 
@@ -107,6 +115,77 @@ class Settings(BaseSettings):
     allowed_file_types: List[str] = ["image/jpeg", "image/png", "application/pdf", "text/csv"]
     upload_directory: str = "uploads/"
     
+    # In-memory user directory cache
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_entries: int = 5000
+    user_cache_check_seconds: float = 5.0  # How often workers check for user changes made elsewhere
+    
+    # TATA agent -> CRM user directory: how often workers check the shared version
+    agent_directory_check_seconds: float = 5.0
+    
+    # Per-user accessible lead sets: version check interval, max age, cached users
+    lead_access_check_seconds: float = 5.0
+    lead_access_ttl_seconds: int = 300
+    lead_access_max_users: int = 1000
+    
+    # Authentication hot path
+    auth_principal_cache_ttl_seconds: int = 15
+    token_blacklist_refresh_seconds: int = 5
+    token_blacklist_full_reload_seconds: int = 300  # Backstop for entries the incremental refresh missed
+    last_activity_flush_seconds: int = 30
+    
+    # Batched lead_activities writer: flush on size or interval, bounded buffer
+    activity_log_flush_seconds: float = 1.0
+    activity_log_flush_size: int = 200
+    activity_log_max_buffer: int = 5000
+    
+    # Bucketed lead timeline: max activities per (lead, day) bucket document
+    timeline_bucket_size: int = 200
+    
+    # Materialized lead statistics (lead_stats) reconciliation interval
+    lead_stats_reconcile_minutes: int = 30
+    
+    # Real-time event fan-out across workers: memory | mongo_capped | mongo_change_stream
+    realtime_broker_backend: str = "memory"
+    realtime_capped_collection_size_mb: int = 16
+    
+    # Bulk WhatsApp dispatch (provider limits are per account, shared by all jobs)
+    whatsapp_rate_limit_per_second: float = 10.0
+    whatsapp_rate_limit_burst: int = 10
+    whatsapp_http_max_connections: int = 50
+    bulk_progress_flush_seconds: float = 2.0
+    bulk_progress_flush_size: int = 100
+    bulk_cancel_check_seconds: float = 2.0
+    bulk_recipient_chunk_size: int = 200
+    bulk_chunk_lease_seconds: int = 120
+    bulk_job_recovery_minutes: int = 2
+    
+    # Pooled outbound HTTP clients (per provider)
+    outbound_http_max_connections: int = 20
+    outbound_keepalive_seconds: float = 30.0
+    outbound_http2: bool = True
+    outbound_http_max_retries: int = 2
+    outbound_retry_backoff_seconds: float = 0.5
+    outbound_breaker_failure_threshold: int = 5
+    outbound_breaker_reset_seconds: float = 30.0
+    
+    # Local TATA call record warehouse (call_records) catch-up sync
+    call_records_sync_minutes: int = 5
+    call_records_backfill_days: int = 90
+    call_records_sync_overlap_minutes: int = 60
+    
+    # Concurrent TATA call record pagination
+    tata_cdr_fetch_concurrency: int = 4
+    tata_cdr_fetch_max_retries: int = 3
+    tata_cdr_fetch_backoff_seconds: float = 1.0
+    
+    # CV extraction process pool
+    cv_extraction_workers: int = 2
+    cv_extraction_max_queue: int = 16
+    cv_extraction_timeout_seconds: float = 60.0
+    cv_max_pdf_pages: int = 20
+    cv_batch_max_files: int = 20
+    
     # Redis Configuration (optional)
     redis_url: str = "redis://localhost:6379"
     redis_db: int = 0
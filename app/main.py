@@ -31,6 +31,9 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting LeadG CRM API...")
     await connect_to_mongo()
     
+    # Pooled outbound HTTP clients (used by schedulers started below)
+    await start_outbound_http()
+    
     # Setup default stages if none exist
     await setup_default_stages()
     logger.info("✅ Default stages setup completed")
@@ -82,6 +85,27 @@ async def lifespan(app: FastAPI):
     await initialize_realtime_whatsapp_service()
     logger.info("✅ Real-time WhatsApp service initialized")
     
+    # Start cross-worker real-time event broker
+    await start_realtime_broker()
+    
+    # Start write-behind last_activity flusher
+    await start_last_activity_writer()
+    logger.info("✅ last_activity writer started")
+    
+    # Start batched lead_activities writer
+    await start_activity_log_writer()
+    logger.info("✅ Activity log writer started")
+    
+    # Start periodic lead_stats reconciliation
+    await start_lead_stats_reconciliation()
+    logger.info("✅ Lead stats reconciliation started")
+    
+    # Start TATA call record catch-up sync (local call_records warehouse)
+    await start_call_record_sync()
+    
+    # Start CV extraction worker processes
+    await start_cv_extraction_pool()
+    
     logger.info("✅ Application startup complete")
     
     yield
@@ -102,10 +126,35 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error stopping campaign cron: {e}")
     
+    # Stop email scheduling and let in-flight dispatches finish
+    await stop_email_scheduler()
+    
+    # Stop TATA call record sync
+    await stop_call_record_sync()
+    
+    # Stop CV extraction worker processes
+    await stop_cv_extraction_pool()
+    
+    # Stop lead_stats reconciliation
+    await stop_lead_stats_reconciliation()
+    
     # Cleanup real-time connections
     await cleanup_realtime_connections()
     logger.info("✅ Real-time connections cleaned up")
     
+    # Stop real-time event broker
+    await stop_realtime_broker()
+    
+    # Close pooled outbound HTTP clients once nothing above can still use them
+    await stop_outbound_http()
+    
+    # Flush buffered timeline activities and last_activity updates before the database closes
+    await stop_activity_log_writer()
+    logger.info("✅ Activity log writer flushed")
+    
+    await stop_last_activity_writer()
+    logger.info("✅ last_activity writer flushed")
+    
     await close_mongo_connection()
     logger.info("✅ Application shutdown complete")
 
@@ -204,6 +253,17 @@ async def start_email_scheduler():
         logger.warning(f"⚠️ Failed to start email scheduler: {e}")
         logger.info("📧 Email functionality will work without scheduling")
 
+async def stop_email_scheduler():
+    """Stop the email scheduler and wait for in-flight email dispatches"""
+    try:
+        from .services.email_scheduler import email_scheduler
+        from .services.email_dispatcher import email_dispatcher
+        await email_scheduler.stop_scheduler()
+        if not await email_dispatcher.drain():
+            logger.warning(f"⚠️ {email_dispatcher.active_sends} email dispatches still running, they resume after their lease expires")
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping email scheduler: {e}")
+
 async def check_email_configuration():
     """Check email (ZeptoMail) configuration on startup"""
     try:
@@ -297,6 +357,118 @@ async def initialize_realtime_whatsapp_service():
         logger.warning(f"⚠️ Failed to initialize real-time WhatsApp service: {e}")
         logger.info("📱 WhatsApp will work without real-time notifications")
 
+async def start_realtime_broker():
+    """Start the real-time event broker used for cross-worker SSE fan-out"""
+    try:
+        from .services.realtime_service import realtime_manager
+        await realtime_manager.start_broker()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start real-time broker, events stay worker-local: {e}")
+
+async def stop_realtime_broker():
+    """Stop the real-time event broker"""
+    try:
+        from .services.realtime_service import realtime_manager
+        await realtime_manager.stop_broker()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping real-time broker: {e}")
+
+async def start_outbound_http():
+    """Create the pooled per-provider outbound HTTP clients"""
+    try:
+        from .services.outbound_http import outbound_http
+        await outbound_http.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start outbound HTTP clients: {e}")
+
+async def stop_outbound_http():
+    """Close the pooled outbound HTTP clients"""
+    try:
+        from .services.outbound_http import outbound_http
+        await outbound_http.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing outbound HTTP clients: {e}")
+
+async def start_last_activity_writer():
+    """Start the write-behind buffer for users.last_activity"""
+    try:
+        from .services.auth_session_service import last_activity_writer
+        await last_activity_writer.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start last_activity writer: {e}")
+
+async def stop_last_activity_writer():
+    """Stop the last_activity writer and flush pending updates"""
+    try:
+        from .services.auth_session_service import last_activity_writer
+        await last_activity_writer.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping last_activity writer: {e}")
+
+async def start_activity_log_writer():
+    """Start the batched writer for lead_activities"""
+    try:
+        from .services.activity_log_service import activity_log
+        await activity_log.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start activity log writer: {e}")
+
+async def stop_activity_log_writer():
+    """Stop the activity log writer and flush buffered activities"""
+    try:
+        from .services.activity_log_service import activity_log
+        await activity_log.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping activity log writer: {e}")
+
+async def start_lead_stats_reconciliation():
+    """Start the periodic lead_stats counter reconciliation"""
+    try:
+        from .services.lead_stats_service import lead_stats_service
+        await lead_stats_service.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start lead stats reconciliation: {e}")
+
+async def stop_lead_stats_reconciliation():
+    """Stop the periodic lead_stats counter reconciliation"""
+    try:
+        from .services.lead_stats_service import lead_stats_service
+        await lead_stats_service.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping lead stats reconciliation: {e}")
+
+async def start_call_record_sync():
+    """Start the periodic TATA call record catch-up sync"""
+    try:
+        from .services.call_record_store import call_record_store
+        await call_record_store.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start call record sync, call analytics use the TATA API: {e}")
+
+async def stop_call_record_sync():
+    """Stop the periodic TATA call record catch-up sync"""
+    try:
+        from .services.call_record_store import call_record_store
+        await call_record_store.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping call record sync: {e}")
+
+async def start_cv_extraction_pool():
+    """Start the CV extraction process pool"""
+    try:
+        from .services.cv_extraction_pool import cv_extraction_pool
+        await cv_extraction_pool.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to start CV extraction pool, workers start on first upload: {e}")
+
+async def stop_cv_extraction_pool():
+    """Stop the CV extraction process pool"""
+    try:
+        from .services.cv_extraction_pool import cv_extraction_pool
+        await cv_extraction_pool.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping CV extraction pool: {e}")
+
 async def cleanup_realtime_connections():
     """Cleanup all real-time connections on application shutdown"""
     try:
@@ -367,6 +539,15 @@ async def health_check():
         ]
     }
 
+# Outbound integration health: per-provider latency, errors, pool saturation, breakers
+@app.get("/health/outbound")
+async def outbound_health_check():
+    from .services.outbound_http import outbound_http
+    return {
+        "status": "healthy",
+        "providers": outbound_http.get_stats()
+    }
+
 # Root endpoint with admin dashboard
 @app.get("/")
 async def root():
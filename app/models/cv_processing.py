@@ -157,6 +157,29 @@ class CVUploadResponse(BaseModel):
             }
         }
 
+class CVBatchUploadResponse(BaseModel):
+    """Response after a batch CV upload"""
+    success: bool
+    message: str
+    total_files: int
+    processed_count: int
+    failed_count: int
+    results: List[Dict[str, Any]] = Field(default_factory=list, description="Per-file outcome (filename, success, message, processing_id, status)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "success": True,
+                "message": "Processed 2 of 2 CVs",
+                "total_files": 2,
+                "processed_count": 2,
+                "failed_count": 0,
+                "results": [
+                    {"filename": "john_doe.pdf", "success": True, "message": "CV processed successfully", "processing_id": "cv_20250901_001", "status": "pending_review"}
+                ]
+            }
+        }
+
 class CVExtractionUpdateRequest(BaseModel):
     """Request to update extracted CV data"""
     name: Optional[str] = Field(None, max_length=100)
@@ -5,10 +5,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from typing import Dict, Any, Optional, List
 import logging
+import calendar
 from datetime import datetime, timedelta
 from collections import defaultdict
 from ..utils.performance_calculator import performance_calculator
 from ..services.tata_admin_service import tata_admin_service
+from ..services.agent_directory_service import agent_directory
+from ..services.call_record_store import call_record_store
+from ..services.call_rollup_service import call_rollup_service
+from ..utils.call_rollups import rollups_from_records, merge_totals
 from ..services.analytics_service import analytics_service
 from ..services.tata_auth_service import tata_auth_service
 from ..models.admin_dashboard import (
@@ -126,10 +131,9 @@ async def get_admin_call_dashboard(
         individual_user_filter = None
         if user_id:
             # Find user's agent for filtering
-            for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-                if mapping.get("user_id") == user_id:
-                    individual_user_filter = mapping.get("tata_agent_id")
-                    break
+            user_mapping = agent_directory.get_by_user_id(user_id)
+            if user_mapping:
+                individual_user_filter = user_mapping.get("tata_agent_id")
             filter_info = {"applied": False, "scope": "all_users"}
             if individual_user_filter:
                 tata_params['agents'] = individual_user_filter
@@ -170,16 +174,8 @@ async def get_admin_call_dashboard(
                 if user_role != "admin":
                     user_id_list = [current_user_id]  # Force to current user only
                 
-                tata_agent_ids = []
-                
-                for uid in user_id_list:
-                    # Find the TATA agent ID for this user
-                    for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-                        if mapping.get("user_id") == uid:
-                            tata_agent_id = mapping.get("tata_agent_id")
-                            if tata_agent_id:
-                                tata_agent_ids.append(tata_agent_id)
-                                break
+                # Find the TATA agent ID for each user
+                tata_agent_ids = agent_directory.get_agent_ids_for_users(user_id_list)
                 
                 # 🔥 CRITICAL SECURITY FIX: Handle non-TATA users
                 if user_role != "admin" and not tata_agent_ids:
@@ -459,14 +455,7 @@ async def get_recent_calls(
             if user_role != "admin":
                 user_id_list = [current_user_id]
             
-            tata_agent_ids = []
-            for user_id in user_id_list:
-                for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-                    if mapping.get("user_id") == user_id:
-                        tata_agent_id = mapping.get("tata_agent_id")
-                        if tata_agent_id:
-                            tata_agent_ids.append(tata_agent_id)
-                        break
+            tata_agent_ids = agent_directory.get_agent_ids_for_users(user_id_list)
 
             #  Handle non-TATA users
             if user_role != "admin" and not tata_agent_ids:
@@ -582,11 +571,10 @@ async def get_user_call_performance(
         # Find user's agent number
         user_agent_number = None
         user_name = "Unknown"
-        for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-            if mapping.get("user_id") == user_id:
-                user_agent_number = mapping.get("tata_agent_id")
-                user_name = mapping.get("user_name", "Unknown")
-                break
+        user_mapping = agent_directory.get_by_user_id(user_id)
+        if user_mapping:
+            user_agent_number = user_mapping.get("tata_agent_id")
+            user_name = user_mapping.get("user_name", "Unknown")
         
         if not user_agent_number:
             raise HTTPException(
@@ -706,7 +694,15 @@ async def get_weekly_performers(
         week_start = today - timedelta(days=today.weekday()) - timedelta(weeks=week_offset)
         week_end = week_start + timedelta(days=6)
         
-        # Implementation continues...
+        rankings = await tata_admin_service.get_weekly_performers_optimized(week_start, week_end, top_n)
+        
+        return PerformanceRankingResponse(
+            success=True,
+            period="weekly",
+            rankings=rankings,
+            total_users=len(rankings),
+            date_range=f"{week_start.strftime('%Y-%m-%d')} to {week_end.strftime('%Y-%m-%d')}"
+        )
         
     except HTTPException:
         raise
@@ -747,7 +743,16 @@ async def get_monthly_performers(
                 detail="Month must be between 1 and 12"
             )
         
-        # Implementation continues...
+        rankings = await tata_admin_service.get_monthly_performers_optimized(year, month, top_n)
+        last_day = calendar.monthrange(year, month)[1]
+        
+        return PerformanceRankingResponse(
+            success=True,
+            period="monthly",
+            rankings=rankings,
+            total_users=len(rankings),
+            date_range=f"{year}-{month:02d}-01 to {year}-{month:02d}-{last_day:02d}"
+        )
         
     except HTTPException:
         raise
@@ -794,11 +799,10 @@ async def play_user_recording(
         # Find user details
         user_name = "Unknown"
         user_agent_number = None
-        for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-            if mapping.get("user_id") == recording_request.user_id:
-                user_name = mapping.get("user_name", "Unknown")
-                user_agent_number = mapping.get("tata_agent_id") 
-                break
+        user_mapping = agent_directory.get_by_user_id(recording_request.user_id)
+        if user_mapping:
+            user_name = user_mapping.get("user_name", "Unknown")
+            user_agent_number = user_mapping.get("tata_agent_id")
         
         # Use provided date range or smart fallback
         if date_from and date_to:
@@ -999,11 +1003,10 @@ async def get_user_recordings(
         # Find user's agent number
         user_agent_number = None
         user_name = "Unknown"
-        for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-            if mapping.get("user_id") == user_id:
-                user_agent_number = mapping.get("tata_agent_id")
-                user_name = mapping.get("user_name", "Unknown")
-                break
+        user_mapping = agent_directory.get_by_user_id(user_id)
+        if user_mapping:
+            user_agent_number = user_mapping.get("tata_agent_id")
+            user_name = user_mapping.get("user_name", "Unknown")
         
         if not user_agent_number:
             available_users = [
@@ -1218,13 +1221,12 @@ async def get_recording_details(
         user_info = {"user_id": "unknown", "user_name": "Unknown"}
         
         await tata_admin_service.initialize_agent_mapping()
-        for agent, mapping in tata_admin_service.agent_user_mapping.items():
-            if agent == agent_number:
-                user_info = {
-                    "user_id": mapping.get("user_id", "unknown"),
-                    "user_name": mapping.get("user_name", "Unknown")
-                }
-                break
+        mapping = agent_directory.get_by_agent_number(agent_number)
+        if mapping:
+            user_info = {
+                "user_id": mapping.get("user_id", "unknown"),
+                "user_name": mapping.get("user_name", "Unknown")
+            }
         
         # Role-based access control
         if user_role != "admin":
@@ -1402,16 +1404,8 @@ async def get_summary_statistics(
             if user_role != "admin":
                 user_list = [current_user_id]  # Override with current user only
             
-            agent_ids = []
-            
             # Map user_ids to agent_numbers
-            for user_id_item in user_list:
-                for _, mapping in tata_admin_service.agent_user_mapping.items():
-                    if mapping.get("user_id") == user_id_item:
-                        tata_agent_id = mapping.get("tata_agent_id")
-                        if tata_agent_id:
-                            agent_ids.append(tata_agent_id)
-                        break
+            agent_ids = agent_directory.get_agent_ids_for_users(user_list)
 
             # Only apply agent filter if we found matching agent numbers
             if agent_ids:
@@ -1464,33 +1458,52 @@ async def get_summary_statistics(
                     "role_restricted": user_role != "admin"
                 }
         
-        # Use TATA API to fetch summary data
-        tata_response = await tata_admin_service.fetch_call_records_with_filters(
-            params=tata_params
-        )
+        # Pre-aggregated hourly rollups cover the whole range when call_records is
+        # synced; otherwise aggregate one page of TATA API records in memory
+        rollups = None
+        agent_numbers = None
+        if tata_params.get('agents'):
+            agent_numbers = tata_admin_service.resolve_agent_numbers(tata_params['agents'])
+        if not tata_params.get('agents') or agent_numbers is not None:
+            try:
+                rollups = await call_rollup_service.get_hourly_rollups(from_date, to_date, agent_numbers)
+            except Exception as e:
+                logger.warning(f"Call rollups unavailable for summary stats: {e}")
         
-        if not tata_response.get("success"):
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"TATA API call failed: {tata_response.get('error')}"
+        if rollups is not None:
+            data_source = "call_rollups"
+            total_count = None
+        else:
+            data_source = "tata_api_server_side"
+            tata_response = await tata_admin_service.fetch_call_records_with_filters(
+                params=tata_params
             )
+            
+            if not tata_response.get("success"):
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"TATA API call failed: {tata_response.get('error')}"
+                )
+            
+            # Extract call records
+            tata_data = tata_response.get("data", {})
+            call_records = tata_data.get("results", [])
+            total_count = tata_data.get("count", 0)
+            rollups = rollups_from_records(call_records)
         
-        # Extract call records
-        tata_data = tata_response.get("data", {})
-        call_records = tata_data.get("results", [])
-        total_count = tata_data.get("count", 0)
-        
-        logger.info(f"Analyzing {len(call_records)} call records - Scope: {filter_info.get('scope')}")
+        logger.info(f"Analyzing {len(rollups)} hourly call rollups ({data_source}) - Scope: {filter_info.get('scope')}")
         
         # Calculate basic statistics
-        total_calls = len(call_records)
-        total_answered = sum(1 for r in call_records if r.get("status") == "answered")
-        total_missed = total_calls - total_answered
-        total_duration = sum(r.get("call_duration", 0) for r in call_records if r.get("status") == "answered")
-        total_recordings = sum(1 for r in call_records if r.get("recording_url"))
+        totals = merge_totals(rollups)
+        total_calls = totals["total_calls"]
+        total_answered = totals["answered_calls"]
+        total_missed = totals["missed_calls"]
+        total_duration = totals["total_duration"]
+        total_recordings = totals["recordings"]
+        if total_count is None:
+            total_count = total_calls
         # Get unique users
-        unique_agents = set(r.get("agent_number") for r in call_records if r.get("agent_number"))
-        unique_users = len(unique_agents)
+        unique_users = len(totals["agents"])
         
         # Calculate number of days in the date range
         date_range_start = datetime.strptime(date_from, "%Y-%m-%d")
@@ -1503,14 +1516,12 @@ async def get_summary_statistics(
         success_rate = (total_answered / total_calls * 100) if total_calls > 0 else 0
         
         # Calculate trends
-        trend_data = performance_calculator.calculate_trend_analysis(call_records, days_in_range)
+        trend_data = performance_calculator.calculate_trend_analysis_from_rollups(rollups, days_in_range)
         
         # Calculate comprehensive peak hours analysis
-        comprehensive_peak_hours = performance_calculator.calculate_comprehensive_peak_hours(
-            call_records=call_records
-        )
+        comprehensive_peak_hours = performance_calculator.calculate_comprehensive_peak_hours_from_rollups(rollups)
 
-        basic_peak_hours = performance_calculator.calculate_peak_hours(call_records)
+        basic_peak_hours = performance_calculator.calculate_peak_hours_from_rollups(rollups)
     
         # Combine peak hours data
         combined_peak_hours = {
@@ -1533,56 +1544,7 @@ async def get_summary_statistics(
         
         chart_data = {}
         
-        user_stats_dict = {}
-
-        # Process call records to build user statistics (add this entire block)
-        for record in call_records:
-            agent_number = record.get("agent_number", "")
-            if not agent_number:
-                continue
-            
-            # Map agent to user
-            user_mapping = tata_admin_service.map_agent_to_user(agent_number)
-            user_id = user_mapping.get("user_id")
-            
-            if not user_id or user_id.startswith("unknown_"):
-                continue
-            
-            # Initialize user stats if not exists
-            if user_id not in user_stats_dict:
-                user_stats_dict[user_id] = {
-                    "user_id": user_id,
-                    "user_name": user_mapping.get("user_name", "Unknown"),
-                    "agent_number": agent_number,
-                    "total_calls": 0,
-                    "answered_calls": 0,
-                    "missed_calls": 0,
-                    "total_duration": 0,
-                    "recordings_count": 0
-                }
-            
-            # Update stats
-            stats = user_stats_dict[user_id]
-            stats["total_calls"] += 1
-            
-            if record.get("status") == "answered":
-                stats["answered_calls"] += 1
-                stats["total_duration"] += record.get("call_duration", 0)
-            else:
-                stats["missed_calls"] += 1
-            
-            if record.get("recording_url"):
-                stats["recordings_count"] += 1
-
-        # Calculate success rates
-        for user_id, stats in user_stats_dict.items():
-            stats["success_rate"] = round(
-                (stats["answered_calls"] / stats["total_calls"]) * 100, 2
-            ) if stats["total_calls"] > 0 else 0.0
-            
-            stats["avg_call_duration"] = round(
-                stats["total_duration"] / stats["answered_calls"], 2
-            ) if stats["answered_calls"] > 0 else 0.0
+        user_stats_dict = tata_admin_service.calculate_user_stats_from_rollups(rollups)
 
         requested_charts = [c.strip() for c in charts.split(",")] if charts and charts != "all" else [
             "gauge", "scatter", "trends", "heatmap", "duration", "peaks", "matrix"
@@ -1608,20 +1570,20 @@ async def get_summary_statistics(
                 )
 
         if "trends" in requested_charts:
-            trend_data["temporal_trends"] = analytics_service.calculate_temporal_trends(
-                call_records=call_records,
+            trend_data["temporal_trends"] = analytics_service.calculate_temporal_trends_from_rollups(
+                rollups=rollups,
                 date_from=date_from,
                 date_to=date_to
             )
 
         if "heatmap" in requested_charts:
-            trend_data["hourly_heatmap"] = analytics_service.generate_hourly_heatmap(call_records)
+            trend_data["hourly_heatmap"] = analytics_service.generate_hourly_heatmap_from_rollups(rollups)
 
         if "duration" in requested_charts:
-            trend_data["duration_distribution"] = analytics_service.calculate_duration_distribution(call_records)
+            trend_data["duration_distribution"] = analytics_service.calculate_duration_distribution_from_rollups(rollups)
 
         if "peaks" in requested_charts:
-            trend_data["peak_hours_analysis"] = analytics_service.analyze_peak_hours(call_records)
+            trend_data["peak_hours_analysis"] = analytics_service.analyze_peak_hours_from_rollups(rollups)
 
         if "trends" in requested_charts and trend_data.get("temporal_trends"):
             trend_data["historical_analysis"] = analytics_service.calculate_historical_trends(
@@ -1666,7 +1628,7 @@ async def get_summary_statistics(
             "trends": trend_data,
             "peak_hours": combined_peak_hours,
             "optimization_info": {
-                "filtering_method": "tata_api_server_side",
+                "filtering_method": data_source,
                 "records_analyzed": total_calls,
                 "total_available": total_count,
                 "role_based_filtering": user_role != "admin"  
@@ -1685,7 +1647,7 @@ async def get_summary_statistics(
                 "scope": filter_info.get("scope", "all_users"),
                 "user_filter_applied": filter_info.get("applied", False),
                 "filtered_user_count": filter_info.get("user_count", 0),
-                "filtering_method": "tata_api_server_side",
+                "filtering_method": data_source,
                 "days_in_range": days_in_range
             }
         )
@@ -1735,11 +1697,11 @@ async def export_call_data(
         if user_ids:
             await tata_admin_service.initialize_agent_mapping()
             user_list = [uid.strip() for uid in user_ids.split(",")]
-            agent_numbers = []
-            for user_id in user_list:
-                for agent_number, mapping in tata_admin_service.agent_user_mapping.items():
-                    if mapping.get("user_id") == user_id:
-                        agent_numbers.append(agent_number)
+            agent_numbers = [
+                mapping["agent_number"]
+                for user_id in user_list
+                for mapping in agent_directory.get_all_by_user_id(user_id)
+            ]
             if agent_numbers:
                 tata_params['agents'] = ",".join(agent_numbers)
         
@@ -1824,6 +1786,44 @@ async def export_call_data(
             detail=f"Failed to export call data: {str(e)}"
         )
 
+# =============================================================================
+# LOCAL CALL RECORD WAREHOUSE (call_records)
+# =============================================================================
+
+@router.get("/call-records/sync-status")
+async def get_call_record_sync_status(
+    current_user: Dict = Depends(get_current_active_user)
+):
+    """Watermark, record count and last run of the local call record sync (admin only)"""
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    try:
+        return {"success": True, **(await call_record_store.get_stats())}
+    except Exception as e:
+        logger.error(f"Error getting call record sync status: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get call record sync status: {str(e)}"
+        )
+
+@router.post("/call-records/sync")
+async def run_call_record_sync(
+    current_user: Dict = Depends(get_current_active_user)
+):
+    """Run the TATA call record catch-up sync now (admin only)"""
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    try:
+        result = await call_record_store.sync_since_watermark()
+        logger.info(f"Admin {current_user.get('email')} triggered call record sync: {result.get('records', 0)} records")
+        return result
+    except Exception as e:
+        logger.error(f"Error running call record sync: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sync call records: {str(e)}"
+        )
+
 # =============================================================================
 # ADMIN ACTIVITY LOGS ENDPOINT
 # =============================================================================
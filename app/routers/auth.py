@@ -17,6 +17,9 @@ logger = logging.getLogger(__name__)
 from ..config.database import get_database
 from ..utils.security import security, verify_password, get_password_hash
 from ..utils.dependencies import get_current_active_user, get_admin_user
+from ..services.user_directory_service import user_directory
+from ..services.lead_stats_service import lead_stats_service
+from ..services.lead_access_service import lead_access_index
 from ..schemas.auth import (
     LoginRequest, LoginResponse, RegisterResponse,
     RefreshTokenRequest, RefreshTokenResponse,
@@ -194,6 +197,7 @@ async def login_user(request: Request, login_data: LoginRequest):
             {"_id": user["_id"]},
             {"$set": update_data}
         )
+        await user_directory.notify_changed(user["_id"])
         
         logger.warning(f"Failed login attempt for {login_data.email}. Attempts: {failed_attempts}")
         raise HTTPException(
@@ -243,6 +247,7 @@ async def login_user(request: Request, login_data: LoginRequest):
             "$inc": {"login_count": 1}
         }
     )
+    await user_directory.notify_changed(user["_id"])
     
     # 🆕 NEW: Auto-sync with Tata agents during login
     calling_status = {
@@ -269,6 +274,7 @@ async def login_user(request: Request, login_data: LoginRequest):
                     }
                 }
             )
+            await user_directory.notify_changed(user["_id"])
             
             logger.info(f"Tata auto-sync completed for {user['email']}: {calling_status.get('sync_status')}")
             
@@ -770,6 +776,7 @@ async def force_tata_sync(
                 }
             }
         )
+        await user_directory.notify_changed(user_id)
         
         return {
             "success": True,
@@ -1196,6 +1203,7 @@ async def update_user_departments(
                 }
             }
         )
+        await user_directory.notify_changed(user_id)
         
         if update_result.modified_count == 0:
             raise HTTPException(
@@ -1431,6 +1439,8 @@ async def delete_user(
                     }
                 }
             )
+            lead_stats_service.mark_dirty()
+            await lead_access_index.notify_changed([user_email])
             logger.info(f"Reassigned {assigned_leads} leads to {current_admin_email}")
         
         # Step 2: Update tasks - preserve data but mark user as deleted
@@ -1472,6 +1482,7 @@ async def delete_user(
                 }
             }
         )
+        await user_directory.notify_changed(user_to_delete["_id"])
         
         if deletion_result.modified_count == 0:
             raise HTTPException(
@@ -1571,6 +1582,7 @@ async def update_user_departments(
                 }
             }
         )
+        await user_directory.notify_changed(user_id)
         
         if update_result.modified_count == 0:
             raise HTTPException(
@@ -1805,6 +1817,8 @@ async def delete_user(
                     }
                 }
             )
+            lead_stats_service.mark_dirty()
+            await lead_access_index.notify_changed([user_email])
             logger.info(f"Reassigned {assigned_leads} leads to {current_admin_email}")
         
         # Step 2: Update tasks - preserve data but mark user as deleted
@@ -1846,6 +1860,7 @@ async def delete_user(
                 }
             }
         )
+        await user_directory.notify_changed(user_to_delete["_id"])
         
         if deletion_result.modified_count == 0:
             raise HTTPException(
@@ -2004,6 +2019,7 @@ async def force_tata_sync(
                 }
             }
         )
+        await user_directory.notify_changed(user_id)
         
         return {
             "success": True,
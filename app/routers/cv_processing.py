@@ -8,6 +8,7 @@ import logging
 
 from ..models.cv_processing import (
     CVUploadResponse,
+    CVBatchUploadResponse,
     CVExtractionUpdateRequest,
     CVToLeadRequest,
     CVToLeadResponse,
@@ -15,7 +16,9 @@ from ..models.cv_processing import (
     CVProcessingStatsResponse,
     CVProcessingStatus
 )
+from ..config.settings import settings
 from ..services.cv_processing_service import cv_processing_service
+from ..services.cv_extraction_pool import cv_extraction_pool
 from ..utils.dependencies import get_current_active_user, get_user_with_single_lead_permission, get_user_with_bulk_lead_permission
 
 logger = logging.getLogger(__name__)
@@ -27,6 +30,26 @@ router = APIRouter()
 # CV UPLOAD ENDPOINTS
 # ============================================================================
 
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """Read an upload in chunks, rejecting it as soon as it exceeds the CV size limit"""
+    max_bytes = cv_processing_service.extraction_service.max_file_size
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{file.filename or 'File'} exceeds the {max_bytes // (1024 * 1024)}MB limit"
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 @router.post("/upload", response_model=CVUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_cv(
     file: UploadFile = File(..., description="CV file (PDF or DOCX, max 10MB)"),
@@ -50,7 +73,7 @@ async def upload_cv(
             )
         
         # Read file content
-        file_content = await file.read()
+        file_content = await _read_upload(file)
         
         if not file_content:
             raise HTTPException(
@@ -69,7 +92,7 @@ async def upload_cv(
         
         if not result["success"]:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE if result.get("busy") else status.HTTP_400_BAD_REQUEST,
                 detail=result["message"]
             )
         
@@ -91,6 +114,59 @@ async def upload_cv(
             detail=f"CV upload failed: {str(e)}"
         )
 
+@router.post("/upload/batch", response_model=CVBatchUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_cv_batch(
+    files: List[UploadFile] = File(..., description="CV files (PDF or DOCX, max 10MB each)"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """
+    Upload and process several CV files at once
+    
+    **Permissions**: All authenticated users can upload CVs
+    **File Requirements**: PDF or DOCX files, maximum 10MB each
+    **Processing**: Files are extracted in parallel across the extraction workers;
+    each file reports its own outcome
+    """
+    try:
+        if not files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No files provided"
+            )
+        
+        if len(files) > settings.cv_batch_max_files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many files: maximum {settings.cv_batch_max_files} CVs per batch"
+            )
+        
+        logger.info(f"CV batch upload of {len(files)} files requested by: {current_user.get('email')}")
+        
+        batch = []
+        for file in files:
+            batch.append((
+                await _read_upload(file),
+                file.filename or "unknown.pdf",
+                file.content_type or "application/pdf"
+            ))
+        
+        result = await cv_processing_service.process_uploaded_cv_batch(
+            files=batch,
+            uploaded_by=str(current_user["_id"]),
+            uploaded_by_email=current_user["email"]
+        )
+        
+        return CVBatchUploadResponse(**result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in CV batch upload: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"CV batch upload failed: {str(e)}"
+        )
+
 # ============================================================================
 # CV EXTRACTION MANAGEMENT ENDPOINTS
 # ============================================================================
@@ -498,7 +574,8 @@ async def cv_processing_health_check():
                 "total_uploads": stats.total_uploads,
                 "processing_count": stats.processing_count,
                 "success_rate": stats.success_rate
-            }
+            },
+            "extraction_pool": cv_extraction_pool.get_stats()
         }
         
     except Exception as e:
@@ -1,10 +1,9 @@
 # app/routers/documents.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from fastapi.responses import StreamingResponse
-from typing import Optional, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.responses import StreamingResponse, Response
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from bson import ObjectId
-import io
 import logging
 
 from app.decorators.timezone_decorator import convert_dates_to_ist
@@ -549,28 +548,81 @@ async def get_document(
         logger.error(f"Error getting document: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_byte_range(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" / "bytes=start-" / "bytes=-suffix" range.
+    Returns None for no (or an unsupported multi-) range; raises 416 when unsatisfiable.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+        else:
+            start = max(0, file_size - int(end_text))
+            end = file_size - 1
+    except ValueError:
+        return None
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, min(end, file_size - 1)
+
 @router.get("/{document_id}/download")
 async def download_document(
     document_id: str,
+    request: Request,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Download document file from GridFS
     - Users can download from their assigned leads only
     - Admins can download from any lead
-    - Returns file as streaming response
+    - Streams the file chunk by chunk from GridFS
+    - Supports Range (single range, 206) and ETag / If-None-Match (304)
     """
     try:
-        file_data = await get_document_service().download_document(document_id, current_user)
+        document_service = get_document_service()
+        file_data = await document_service.download_document(
+            document_id, current_user, if_none_match=request.headers.get("if-none-match")
+        )
+        etag = file_data["etag"]
+        if file_data.get("not_modified"):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        file_size = file_data["file_size"]
+        headers = {
+            "Content-Disposition": f"attachment; filename=\"{file_data['filename']}\"",
+            "Accept-Ranges": "bytes",
+            "ETag": etag
+        }
         
-        # Create streaming response
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range == etag:
+            byte_range = _parse_byte_range(request.headers.get("range"), file_size)
+        
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                document_service.read_file_range(file_data["stream"], start, end),
+                status_code=206,
+                media_type=file_data["mime_type"],
+                headers=headers
+            )
+        
+        headers["Content-Length"] = str(file_size)
         return StreamingResponse(
-            io.BytesIO(file_data["content"]),
+            document_service.read_file_range(file_data["stream"]),
             media_type=file_data["mime_type"],
-            headers={
-                "Content-Disposition": f"attachment; filename=\"{file_data['filename']}\"",
-                "Content-Length": str(file_data["file_size"])
-            }
+            headers=headers
         )
         
     except HTTPException:
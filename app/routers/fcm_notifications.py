@@ -9,6 +9,7 @@ import logging
 
 from ..utils.dependencies import get_current_user
 from ..config.database import get_database
+from ..services.user_directory_service import user_directory
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["FCM Notifications"])
@@ -92,6 +93,7 @@ async def register_fcm_token(
             {"email": user_email},
             {"$set": update_data}
         )
+        await user_directory.notify_changed(email=user_email)
         
         if result.matched_count == 0:
             raise HTTPException(
@@ -155,6 +157,7 @@ async def update_fcm_token(
             {"email": user_email},
             {"$set": update_data}
         )
+        await user_directory.notify_changed(email=user_email)
         
         if result.matched_count == 0:
             raise HTTPException(
@@ -216,6 +219,7 @@ async def remove_fcm_token(
                 }
             }
         )
+        await user_directory.notify_changed(email=user_email)
         
         if result.matched_count == 0:
             raise HTTPException(
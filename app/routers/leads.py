@@ -10,10 +10,21 @@ from ..services.tata_call_service import tata_call_service
 from app.decorators.timezone_decorator import convert_lead_dates, convert_dates_to_ist
 from ..services.user_lead_array_service import user_lead_array_service
 from ..services.lead_assignment_service import lead_assignment_service
+from ..services.assignment_planner_service import load_round_robin_planner
+from ..services.lead_stats_service import lead_stats_service
+from ..services.user_directory_service import (
+    UserDirectoryLoader, load_user_directory_for_leads, format_user_display_name, user_directory
+)
 from app.services import lead_category_service
 from ..services.lead_category_service import lead_category_service
 from ..config.database import get_database
+from ..services.activity_log_service import activity_log
 from ..utils.dependencies import get_current_active_user, get_admin_user, get_user_with_single_lead_permission, get_user_with_bulk_lead_permission
+from ..utils.pagination import fetch_keyset_page, build_cursor_pagination, lead_count_cache, InvalidCursorError
+from ..services.lead_duplicate_service import BatchDuplicateChecker
+from ..services.lead_search_service import (
+    lead_search_service, build_lead_search_query, build_lead_search_keys, needs_search_key_refresh
+)
 
 # Updated imports with new models
 from ..models.lead import (
@@ -147,68 +158,24 @@ async def bulk_assign_leads_selective(
         failed_assignments = []
         successfully_assigned = 0
         
-        # Process each valid lead
-        for lead_id in existing_lead_ids:
-            try:
-                # Get next assignee based on method
-                if request.assignment_method == "selected_users":
-                    assignee = await lead_assignment_service.get_next_assignee_selective_round_robin(
-                        request.selected_user_emails
-                    )
-                else:  # all_users
-                    assignee = await lead_assignment_service.get_next_assignee_round_robin()
-                
-                if assignee:
-                    # Assign the lead
-                    success = await lead_assignment_service.assign_lead_to_user(
-                        lead_id=lead_id,
-                        user_email=assignee,
-                        assigned_by=admin_email,
-                        reason=f"Bulk assignment ({request.assignment_method})"
-                    )
-                    
-                    if success:
-                        assignment_summary.append({
-                            "lead_id": lead_id,
-                            "assigned_to": assignee,
-                            "status": "success"
-                        })
-                        successfully_assigned += 1
-                    else:
-                        failed_assignments.append({
-                            "lead_id": lead_id,
-                            "error": "Failed to update lead assignment"
-                        })
-                        assignment_summary.append({
-                            "lead_id": lead_id,
-                            "assigned_to": None,
-                            "status": "failed",
-                            "error": "Assignment update failed"
-                        })
-                else:
-                    failed_assignments.append({
-                        "lead_id": lead_id,
-                        "error": "No assignee available"
-                    })
-                    assignment_summary.append({
-                        "lead_id": lead_id,
-                        "assigned_to": None,
-                        "status": "failed",
-                        "error": "No assignee available"
-                    })
-            
-            except Exception as e:
-                logger.error(f"Error assigning lead {lead_id}: {str(e)}")
+        # Plan every assignee in memory, then write leads and user arrays in bulk
+        results = await lead_assignment_service.assign_leads_round_robin(
+            lead_ids=existing_lead_ids,
+            assigned_by=admin_email,
+            reason=f"Bulk assignment ({request.assignment_method})",
+            selected_user_emails=request.selected_user_emails if request.assignment_method == "selected_users" else None
+        )
+        
+        for result in results:
+            if result["status"] == "success":
+                assignment_summary.append(result)
+                successfully_assigned += 1
+            else:
                 failed_assignments.append({
-                    "lead_id": lead_id,
-                    "error": str(e)
-                })
-                assignment_summary.append({
-                    "lead_id": lead_id,
-                    "assigned_to": None,
-                    "status": "failed",
-                    "error": str(e)
+                    "lead_id": result["lead_id"],
+                    "error": result["error"]
                 })
+                assignment_summary.append(result)
         
         # Add failed assignments for invalid lead IDs
         for invalid_id in invalid_lead_ids:
@@ -445,6 +412,7 @@ async def get_assignable_users_with_details(
 @router.get("/assignment/round-robin-preview")
 async def preview_round_robin_assignment(
     selected_users: Optional[str] = Query(None, description="Comma-separated list of user emails for selective round robin"),
+    count: int = Query(5, ge=1, le=1000, description="Number of upcoming assignments to preview"),
     current_user: dict = Depends(get_admin_user)
 ):
     """Preview next assignments in round robin without actually assigning (Admin only)"""
@@ -453,25 +421,21 @@ async def preview_round_robin_assignment(
         if selected_users:
             selected_user_emails = [email.strip() for email in selected_users.split(",") if email.strip()]
         
-        # Get next few assignments
-        preview_assignments = []
-        for i in range(5):  # Preview next 5 assignments
-            if selected_user_emails:
-                next_user = await lead_assignment_service.get_next_assignee_selective_round_robin(
-                    selected_user_emails
-                )
-            else:
-                next_user = await lead_assignment_service.get_next_assignee_round_robin()
-            
-            preview_assignments.append({
+        # The planner never writes, so this is the exact plan a bulk run would use now
+        planner = await load_round_robin_planner(selected_user_emails)
+        preview_assignments = [
+            {
                 "position": i + 1,
                 "would_assign_to": next_user
-            })
+            }
+            for i, next_user in enumerate(planner.plan(count))
+        ]
         
         return {
             "assignment_method": "selected_users" if selected_user_emails else "all_users",
             "selected_users": selected_user_emails,
             "preview_assignments": preview_assignments,
+            "projected_loads": planner.get_projected_loads(),
             "note": "This is a preview - no actual assignments were made"
         }
     
@@ -540,12 +504,15 @@ async def get_leads_with_multi_assignment_info(
         skip = (page - 1) * limit
         leads = await db.leads.find(query_filters).skip(skip).limit(limit).to_list(None)
         
+        # Resolve all user names on this page with a single query
+        user_loader = await load_user_directory_for_leads(leads, db)
+        
         # Convert to extended response format with proper processing
         extended_leads = []
         for lead in leads:
             try:
                 # Process the lead through the standard processing function first
-                processed_lead = await process_lead_for_response(lead, db, current_user)
+                processed_lead = await process_lead_for_response(lead, db, current_user, user_loader)
                 
                 # Create the extended lead response
                 extended_lead = LeadResponseExtended(
@@ -621,10 +588,18 @@ async def get_leads_with_multi_assignment_info(
 # HELPER FUNCTIONS
 # ============================================================================
 
-async def process_lead_for_response(lead: Dict[str, Any], db, current_user: Dict[str, Any] = None) -> Dict[str, Any]:
+async def process_lead_for_response(
+    lead: Dict[str, Any],
+    db,
+    current_user: Dict[str, Any] = None,
+    user_loader: Optional[UserDirectoryLoader] = None
+) -> Dict[str, Any]:
     """
     Process a lead document for API response with complete data transformation
     This function ensures all leads are properly formatted for Pydantic validation
+    
+    Pass a preloaded `user_loader` when processing a page of leads so user names
+    are resolved from memory instead of one query per lead.
     """
     try:
         # Basic field transformations
@@ -665,43 +640,22 @@ async def process_lead_for_response(lead: Dict[str, Any], db, current_user: Dict
         lead["co_assignees_names"] = lead.get("co_assignees_names", [])
         lead["is_multi_assigned"] = lead.get("is_multi_assigned", False)
         
-        # Fetch user info for created_by
-        # FIXED CODE with ObjectId validation
+        # Resolve user names from the per-request directory (one $in query per page)
+        if user_loader is None:
+            user_loader = await load_user_directory_for_leads([lead], db)
+        
         created_by = lead.get("created_by")
-        user = None
-        if created_by:
-            if ObjectId.is_valid(created_by):
-                # created_by is a valid ObjectId
-                user = await db.users.find_one({"_id": ObjectId(created_by)})
-            else:
-                # created_by is likely an email address (legacy data)
-                user = await db.users.find_one({"email": created_by})
-        if user:
-            full_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
-            lead["created_by_name"] = full_name if full_name else user.get('email', 'Unknown User')
-        else:
-            lead["created_by_name"] = "Unknown User"
+        lead["created_by_name"] = format_user_display_name(
+            user_loader.get_by_reference(created_by), "Unknown User"
+        )
         
-        # Fetch assigned user info
+        # Assigned user info
         if lead.get("assigned_to"):
-            assigned_user = await db.users.find_one({"email": lead["assigned_to"]})
-            if assigned_user:
-                full_name = f"{assigned_user.get('first_name', '')} {assigned_user.get('last_name', '')}".strip()
-                lead["assigned_to_name"] = full_name if full_name else assigned_user.get('email', 'Unknown')
-            else:
-                lead["assigned_to_name"] = lead["assigned_to"]
+            lead["assigned_to_name"] = user_loader.get_name_by_email(lead["assigned_to"])
         
-        # Fetch co-assignee names
+        # Co-assignee names
         if lead.get("co_assignees"):
-            co_assignee_names = []
-            for email in lead["co_assignees"]:
-                user = await db.users.find_one({"email": email})
-                if user:
-                    full_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
-                    co_assignee_names.append(full_name if full_name else email)
-                else:
-                    co_assignee_names.append(email)
-            lead["co_assignees_names"] = co_assignee_names
+            lead["co_assignees_names"] = user_loader.get_names_by_emails(lead["co_assignees"])
         
         return lead
         
@@ -1112,10 +1066,16 @@ async def get_leads(
     updated_to: Optional[str] = Query(None),       
     last_contacted_from: Optional[str] = Query(None),  
     last_contacted_to: Optional[str] = Query(None),    
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response (keyset pagination)"),
+    use_cursor: bool = Query(False, description="Use keyset pagination starting from the first page"),
+    include_total: bool = Query(True, description="Include total count (cached in cursor mode)"),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """
     Get leads with comprehensive filtering support
+    
+    Pass `use_cursor=true` (or a `cursor`) for keyset pagination; the response then
+    carries `next_cursor`/`prev_cursor` instead of page numbers.
     """
     try:
         logger.info(f"Get leads requested by: {current_user.get('email')}")
@@ -1211,17 +1171,9 @@ async def get_leads(
             if date_query:
                 query["last_contacted"] = date_query
         
-        # Handle search
-        if search:
-            search_condition = {
-                "$or": [
-                    {"name": {"$regex": search, "$options": "i"}},
-                    {"email": {"$regex": search, "$options": "i"}},
-                    {"lead_id": {"$regex": search, "$options": "i"}},
-                    {"contact_number": {"$regex": search, "$options": "i"}},
-                    {"phone_number": {"$regex": search, "$options": "i"}}
-                ]
-            }
+        # Handle search (indexed prefix match on search_keys)
+        if search and search.strip():
+            search_condition = build_lead_search_query(search)
             if "$and" in query:
                 query["$and"].append(search_condition)
             elif "$or" in query:
@@ -1231,16 +1183,28 @@ async def get_leads(
         
         logger.info(f"Final query: {query}")  # 🔍 Debug log
         
-        total = await db.leads.count_documents(query)
-        skip = (page - 1) * limit
+        cursor_mode = bool(cursor) or use_cursor
+        if cursor_mode:
+            try:
+                page_result = await fetch_keyset_page(db.leads, query, limit, cursor)
+            except InvalidCursorError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            leads = page_result["documents"]
+            total = await lead_count_cache.count(db.leads, query) if include_total else None
+        else:
+            total = await db.leads.count_documents(query)
+            skip = (page - 1) * limit
+            
+            leads = await db.leads.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(None)
         
-        leads = await db.leads.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(None)
+        # Resolve all user names on this page with a single query
+        user_loader = await load_user_directory_for_leads(leads, db)
         
         # Process leads with migration support
         processed_leads = []
         for lead in leads:
             try:
-                processed_lead = await process_lead_for_response(lead, db, current_user)
+                processed_lead = await process_lead_for_response(lead, db, current_user, user_loader)
                 processed_leads.append(processed_lead)
             except Exception as e:
                 logger.error(f"Failed to process lead {lead.get('lead_id', 'unknown')}: {e}")
@@ -1251,9 +1215,10 @@ async def get_leads(
         
         logger.info(f"Successfully processed {len(final_leads)} leads out of {len(leads)} total")
         
-        return {
-            "leads": final_leads,
-            "pagination": {
+        if cursor_mode:
+            pagination = build_cursor_pagination(page_result, limit, total)
+        else:
+            pagination = {
                 "page": page,
                 "limit": limit,
                 "total": total,
@@ -1261,8 +1226,14 @@ async def get_leads(
                 "has_next": page * limit < total,
                 "has_prev": page > 1
             }
+        
+        return {
+            "leads": final_leads,
+            "pagination": pagination
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get leads error: {e}")
         raise HTTPException(
@@ -1289,10 +1260,16 @@ async def get_my_leads(
     updated_to: Optional[str] = Query(None),      
     last_contacted_from: Optional[str] = Query(None), 
     last_contacted_to: Optional[str] = Query(None),   
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response (keyset pagination)"),
+    use_cursor: bool = Query(False, description="Use keyset pagination starting from the first page"),
+    include_total: bool = Query(True, description="Include total count (cached in cursor mode)"),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """
     Get leads assigned to current user with filtering support
+    
+    Pass `use_cursor=true` (or a `cursor`) for keyset pagination; the response then
+    carries `next_cursor`/`prev_cursor` instead of page numbers.
     """
     try:
         db = get_database()
@@ -1367,18 +1344,9 @@ async def get_my_leads(
             if date_query:
                 filters.append({"last_contacted": date_query})
         
-        # Handle search
-        if search:
-            search_condition = {
-                "$or": [
-                    {"name": {"$regex": search, "$options": "i"}},
-                    {"email": {"$regex": search, "$options": "i"}},
-                    {"lead_id": {"$regex": search, "$options": "i"}},
-                    {"contact_number": {"$regex": search, "$options": "i"}},
-                    {"phone_number": {"$regex": search, "$options": "i"}}
-                ]
-            }
-            filters.append(search_condition)
+        # Handle search (indexed prefix match on search_keys)
+        if search and search.strip():
+            filters.append(build_lead_search_query(search))
         
         # 🔧 FIXED: Combine base query with filters using $and
         if filters:
@@ -1386,16 +1354,28 @@ async def get_my_leads(
         else:
             query = base_user_query
         
-        total = await db.leads.count_documents(query)
-        skip = (page - 1) * limit
+        cursor_mode = bool(cursor) or use_cursor
+        if cursor_mode:
+            try:
+                page_result = await fetch_keyset_page(db.leads, query, limit, cursor)
+            except InvalidCursorError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            leads = page_result["documents"]
+            total = await lead_count_cache.count(db.leads, query) if include_total else None
+        else:
+            total = await db.leads.count_documents(query)
+            skip = (page - 1) * limit
+            
+            leads = await db.leads.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(None)
         
-        leads = await db.leads.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(None)
+        # Resolve all user names on this page with a single query
+        user_loader = await load_user_directory_for_leads(leads, db)
         
         # Process leads with migration support
         processed_leads = []
         for lead in leads:
             try:
-                processed_lead = await process_lead_for_response(lead, db, current_user)
+                processed_lead = await process_lead_for_response(lead, db, current_user, user_loader)
                 processed_leads.append(processed_lead)
             except Exception as e:
                 logger.error(f"Failed to process lead {lead.get('lead_id', 'unknown')}: {e}")
@@ -1404,9 +1384,10 @@ async def get_my_leads(
         # Convert ObjectIds before response
         final_leads = convert_objectid_to_str(processed_leads)
         
-        return {
-            "leads": final_leads,
-            "pagination": {
+        if cursor_mode:
+            pagination = build_cursor_pagination(page_result, limit, total)
+        else:
+            pagination = {
                 "page": page,
                 "limit": limit,
                 "total": total,
@@ -1414,8 +1395,14 @@ async def get_my_leads(
                 "has_next": page * limit < total,
                 "has_prev": page > 1
             }
+        
+        return {
+            "leads": final_leads,
+            "pagination": pagination
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get my leads error: {e}")
         raise HTTPException(
@@ -1429,72 +1416,37 @@ async def get_lead_stats(
     include_multi_assignment_stats: bool = Query(True, description="Include multi-assignment statistics"),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Get lead statistics with enhanced breakdown support"""
+    """Get lead statistics with enhanced breakdown support (served from lead_stats counters)"""
     try:
         db = get_database()
         user_role = current_user.get("role", "user")
         user_email = current_user.get("email")
+        scope = "involved" if include_multi_assignment_stats else "primary"
         
-        # Base query based on role
         if user_role != "admin":
-            if include_multi_assignment_stats:
-                base_query = {
-                    "$or": [
-                        {"assigned_to": user_email},
-                        {"co_assignees": user_email}
-                    ]
-                }
-            else:
-                base_query = {"assigned_to": user_email}
+            # Regular users: one document read
+            user_stats = await lead_stats_service.get_user_stats(user_email, include_multi_assignment_stats)
+            total_leads = user_stats["total"]
+            status_breakdown = user_stats["status_breakdown"]
+            stage_breakdown = user_stats["stage_breakdown"]
+            my_leads = total_leads
+            unassigned_leads = 0
+            all_stats = None
         else:
-            base_query = {}
-        
-        # Get total leads
-        total_leads = await db.leads.count_documents(base_query)
-        
-        # Get status breakdown
-        status_pipeline = [
-            {"$match": base_query},
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        status_result = await db.leads.aggregate(status_pipeline).to_list(None)
-        
-        # Get stage breakdown
-        stage_pipeline = [
-            {"$match": base_query},
-            {"$group": {"_id": "$stage", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        stage_result = await db.leads.aggregate(stage_pipeline).to_list(None)
-        
-        # Process breakdowns into dictionaries
-        status_breakdown = {item["_id"]: item["count"] for item in status_result if item["_id"]}
-        stage_breakdown = {item["_id"]: item["count"] for item in stage_result if item["_id"]}
+            # Admins: global and per-user counters in one query
+            all_stats = await lead_stats_service.get_all_stats()
+            total_leads = all_stats["global"]["total"]
+            status_breakdown = all_stats["global"]["status_breakdown"]
+            stage_breakdown = all_stats["global"]["stage_breakdown"]
+            my_stats = all_stats["users"].get(user_email)
+            my_leads = my_stats[scope]["total"] if my_stats else 0
+            unassigned_leads = all_stats["global"]["unassigned"]
         
         # Calculate core metrics
         dnp_count = status_breakdown.get("dnp", 0)
         counseled_count = status_breakdown.get("counselled", 0)
         conversion_rate = round((counseled_count / total_leads * 100), 1) if total_leads > 0 else 0.0
         
-        # Calculate my_leads and unassigned_leads
-        if user_role != "admin":
-            my_leads = total_leads
-            unassigned_leads = 0
-        else:
-            if include_multi_assignment_stats:
-                my_leads_count = await db.leads.count_documents({
-                    "$or": [
-                        {"assigned_to": user_email},
-                        {"co_assignees": user_email}
-                    ]
-                })
-            else:
-                my_leads_count = await db.leads.count_documents({"assigned_to": user_email})
-            
-            my_leads = my_leads_count
-            unassigned_leads = await db.leads.count_documents({"assigned_to": None})
-        
         # Build response
         response_data = {
             "total_leads": total_leads,
@@ -1509,50 +1461,38 @@ async def get_lead_stats(
         
         # Add assignment stats for admins
         if user_role == "admin" and include_multi_assignment_stats:
-            # Get workload distribution with enhanced user details
-            workload_pipeline = [
-                {"$match": {"assigned_to": {"$ne": None}}},
-                {"$group": {"_id": "$assigned_to", "total_leads": {"$sum": 1}}},
-                {"$sort": {"total_leads": -1}}
-            ]
-            workload_result = await db.leads.aggregate(workload_pipeline).to_list(None)
+            # Workload distribution from per-user primary counters
+            workload = sorted(
+                (
+                    (email, user_stats["primary"])
+                    for email, user_stats in all_stats["users"].items()
+                    if user_stats["primary"]["total"] > 0
+                ),
+                key=lambda item: item[1]["total"],
+                reverse=True
+            )
             
-            # Enhanced workload distribution array
-            enhanced_workload = []
+            user_loader = UserDirectoryLoader(db)
+            for email, _ in workload:
+                user_loader.add_email(email)
+            await user_loader.load()
             
-            for item in workload_result:
-                user_email = item["_id"]
-                total_leads = item["total_leads"]
-                
-                # Get user details
-                user = await db.users.find_one({"email": user_email})
-                user_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else user_email.split('@')[0]
-                
-                # Get DNP count for this user from stage breakdown
-                dnp_count = await db.leads.count_documents({
-                    "assigned_to": user_email,
-                    "stage": "dnp"
-                })
-                
-                # Get Counselled count for this user from stage breakdown  
-                counselled_count = await db.leads.count_documents({
-                    "assigned_to": user_email,
-                    "stage": "counselled"
-                })
+            enhanced_workload = []
+            for email, primary in workload:
+                user = user_loader.get_by_email(email)
+                user_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else email.split('@')[0]
                 
                 enhanced_workload.append({
                     "name": user_name,
-                    "email": user_email,
-                    "total_leads": total_leads,
-                    "dnp_count": dnp_count,
-                    "counselled_count": counselled_count
+                    "email": email,
+                    "total_leads": primary["total"],
+                    "dnp_count": primary["stage_breakdown"].get("dnp", 0),
+                    "counselled_count": primary["stage_breakdown"].get("counselled", 0)
                 })
             
-            multi_assigned_count = await db.leads.count_documents({"is_multi_assigned": True})
-            
             # Calculate balance score
-            if workload_result:
-                counts = [item["total_leads"] for item in workload_result]
+            if workload:
+                counts = [primary["total"] for _, primary in workload]
                 avg_leads = sum(counts) / len(counts)
                 variance = sum((x - avg_leads) ** 2 for x in counts) / len(counts)
                 balance_score = max(0, 100 - (variance / avg_leads * 10)) if avg_leads > 0 else 100
@@ -1561,7 +1501,7 @@ async def get_lead_stats(
                 balance_score = 100
             
             response_data["assignment_stats"] = {
-                "multi_assigned_leads": multi_assigned_count,
+                "multi_assigned_leads": all_stats["global"]["multi_assigned"],
                 "workload_distribution": enhanced_workload,
                 "average_leads_per_user": round(avg_leads, 1),
                 "assignment_balance_score": round(balance_score, 1)
@@ -1959,6 +1899,10 @@ async def update_lead_universal(
         # Add timestamp
         update_data["updated_at"] = datetime.utcnow()
         
+        # Keep indexed search keys in step with name/email/phone changes
+        if needs_search_key_refresh(update_data):
+            update_data["search_keys"] = build_lead_search_keys({**lead, **update_data})
+        
         # Perform the actual database update
         result = await db.leads.update_one(
             {"lead_id": lead_id},
@@ -1971,6 +1915,8 @@ async def update_lead_universal(
                 detail="Lead not found for update"
             )
         
+        await lead_stats_service.record_update(lead, update_data)
+        
         logger.info(f"✅ Lead {lead_id} updated in database successfully")
         
         # Enhanced user array updates for multi-assignment
@@ -2032,7 +1978,7 @@ async def update_lead_universal(
                     "metadata": activity["metadata"]
                 }
                 
-                await db.lead_activities.insert_one(activity_doc)
+                await activity_log.log(activity_doc)
                 logger.info(f"✅ Activity logged: {activity['activity_type']} for lead {lead_id}")
                 
             except Exception as activity_error:
@@ -2102,6 +2048,8 @@ async def delete_lead(
                 detail="Lead not found"
             )
         
+        await lead_stats_service.record_deleted(lead)
+        
         # Remove from all assignees' arrays
         try:
             # Remove from primary assignee's array
@@ -2199,21 +2147,19 @@ async def check_duplicates_batch(
     try:
         logger.info(f"Duplicate check for {len(leads_data)} leads by {current_user.get('email')}")
         
-        # Import the lead service to use existing duplicate check method
-        from ..services.lead_service import lead_service
-        
         duplicates = []
         
-        # Check each lead for duplicates using existing method
+        # Resolve every email/phone in the upload with a couple of $in queries
+        duplicate_checker = await BatchDuplicateChecker(get_database()).load(leads_data)
+        
         for index, lead_info in enumerate(leads_data):
-            email = lead_info.get("email", "").strip()
-            contact_number = lead_info.get("contact_number", "").strip()
+            email = (lead_info.get("email") or "").strip()
+            contact_number = (lead_info.get("contact_number") or "").strip()
             
             if not email and not contact_number:
                 continue  # Skip if no email or phone to check
             
-            # Use your existing duplicate check method
-            duplicate_check = await lead_service.check_duplicate_lead(
+            duplicate_check = duplicate_checker.check(
                 email=email if email else None,
                 contact_number=contact_number if contact_number else None
             )
@@ -2227,8 +2173,17 @@ async def check_duplicates_batch(
                     "existing_lead_name": duplicate_check.get("existing_lead_name", "Unknown"),
                     "duplicate_field": duplicate_check.get("duplicate_field"),
                     "duplicate_value": duplicate_check.get("duplicate_value"),
+                    "duplicate_of_index": duplicate_check.get("duplicate_of_index"),
                     "message": duplicate_check.get("message")
                 })
+            else:
+                # Later rows repeating this one are duplicates within the upload
+                duplicate_checker.register(email, contact_number, {
+                    "name": lead_info.get("name", "Unknown"),
+                    "email": email,
+                    "contact_number": contact_number,
+                    "batch_index": index
+                })
         
         logger.info(f"Found {len(duplicates)} duplicates out of {len(leads_data)} checked")
         
@@ -2301,11 +2256,14 @@ async def get_my_leads_fast(
         leads_cursor = db.leads.find({"lead_id": {"$in": all_lead_ids}})
         leads = await leads_cursor.to_list(None)
         
+        # Resolve all user names with a single query
+        user_loader = await load_user_directory_for_leads(leads, db)
+        
         # Process leads with migration support
         clean_leads = []
         for lead in leads:
             try:
-                processed_lead = await process_lead_for_response(lead, db, current_user)
+                processed_lead = await process_lead_for_response(lead, db, current_user, user_loader)
                 clean_leads.append(processed_lead)
             except Exception as e:
                 logger.error(f"Error processing lead {lead.get('lead_id', 'unknown')}: {e}")
@@ -2413,6 +2371,78 @@ async def get_admin_user_lead_stats(
             detail=f"Failed to get admin stats: {str(e)}"
         )
 
+@router.post("/admin/rebuild-search-keys")
+async def rebuild_lead_search_keys(
+    only_missing: bool = Query(True, description="Only backfill leads without search keys"),
+    current_user: Dict[str, Any] = Depends(get_admin_user)
+):
+    """Backfill the indexed search keys used by lead search"""
+    try:
+        logger.info(f"Search key rebuild requested by admin: {current_user.get('email')}")
+        
+        result = await lead_search_service.backfill_search_keys(only_missing=only_missing)
+        if not result.get("success"):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to rebuild search keys: {result.get('error')}"
+            )
+        
+        return {
+            "success": True,
+            "message": f"Search keys rebuilt for {result['updated']} leads",
+            "updated_leads": result["updated"],
+            "batches": result["batches"],
+            "only_missing": only_missing
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Search key rebuild error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to rebuild search keys: {str(e)}"
+        )
+
+
+@router.post("/admin/reconcile-stats")
+async def reconcile_lead_stats(
+    current_user: Dict[str, Any] = Depends(get_admin_user)
+):
+    """Rebuild the lead_stats counters from the leads collection"""
+    try:
+        logger.info(f"Lead stats reconciliation requested by admin: {current_user.get('email')}")
+        
+        result = await lead_stats_service.reconcile()
+        if result.get("skipped"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=result.get("error")
+            )
+        if not result.get("success"):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to reconcile lead stats: {result.get('error')}"
+            )
+        
+        return {
+            "success": True,
+            "message": f"Lead stats rebuilt for {result['total_leads']} leads",
+            "total_leads": result["total_leads"],
+            "users": result["users"],
+            "corrected_documents": result["corrected_documents"],
+            "skipped_counters": result["skipped_counters"]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Lead stats reconciliation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to reconcile lead stats: {str(e)}"
+        )
+
 @router.post("/admin/sync-user-arrays")
 async def sync_user_arrays(
     current_user: Dict[str, Any] = Depends(get_admin_user)
@@ -2461,6 +2491,7 @@ async def sync_user_arrays(
                     }
                 }
             )
+            await user_directory.notify_changed(user["_id"])
             sync_count += 1
         
         logger.info(f"✅ Enhanced sync completed for {sync_count} users")
@@ -2532,32 +2563,50 @@ async def bulk_assign_leads(
         db = get_database()
         admin_email = current_user.get("email")
         
-        results = []
-        successful_assignments = 0
-        failed_assignments = 0
+        # Check which leads exist with one query
+        existing_leads = await db.leads.find(
+            {"lead_id": {"$in": bulk_assign.lead_ids}},
+            {"lead_id": 1}
+        ).to_list(None)
+        existing_lead_ids = {lead["lead_id"] for lead in existing_leads}
         
+        results_by_lead = {}
+        to_assign = []
         for lead_id in bulk_assign.lead_ids:
-            try:
-                # Check if lead exists
-                lead = await db.leads.find_one({"lead_id": lead_id})
-                if not lead:
-                    results.append({
-                        "lead_id": lead_id,
-                        "status": "failed",
-                        "error": "Lead not found"
-                    })
-                    failed_assignments += 1
-                    continue
-                
-                # Get next assignee using round robin
-                if bulk_assign.assignment_method == "round_robin":
-                    assignee = await lead_assignment_service.get_next_assignee_round_robin()
-                elif bulk_assign.assignment_method == "specific_user":
-                    assignee = bulk_assign.assigned_to
-                else:
-                    assignee = None
-                
-                if assignee:
+            if lead_id in existing_lead_ids:
+                to_assign.append(lead_id)
+            else:
+                results_by_lead[lead_id] = {
+                    "lead_id": lead_id,
+                    "status": "failed",
+                    "error": "Lead not found"
+                }
+        
+        if bulk_assign.assignment_method == "round_robin":
+            # Plan every assignee in memory, then write leads and user arrays in bulk
+            for result in await lead_assignment_service.assign_leads_round_robin(
+                lead_ids=to_assign,
+                assigned_by=admin_email,
+                reason="Bulk assignment"
+            ):
+                if result["status"] != "success":
+                    result.pop("assigned_to", None)
+                    if result.get("error") != "No assignee available":
+                        result["error"] = "Assignment failed"
+                results_by_lead[result["lead_id"]] = result
+        else:
+            for lead_id in to_assign:
+                try:
+                    assignee = bulk_assign.assigned_to if bulk_assign.assignment_method == "specific_user" else None
+                    
+                    if not assignee:
+                        results_by_lead[lead_id] = {
+                            "lead_id": lead_id,
+                            "status": "failed",
+                            "error": "No assignee available"
+                        }
+                        continue
+                    
                     # Assign the lead
                     success = await lead_assignment_service.assign_lead_to_user(
                         lead_id=lead_id,
@@ -2567,35 +2616,29 @@ async def bulk_assign_leads(
                     )
                     
                     if success:
-                        results.append({
+                        results_by_lead[lead_id] = {
                             "lead_id": lead_id,
                             "status": "success",
                             "assigned_to": assignee
-                        })
-                        successful_assignments += 1
+                        }
                     else:
-                        results.append({
+                        results_by_lead[lead_id] = {
                             "lead_id": lead_id,
                             "status": "failed",
                             "error": "Assignment failed"
-                        })
-                        failed_assignments += 1
-                else:
-                    results.append({
+                        }
+                        
+                except Exception as e:
+                    logger.error(f"Error assigning lead {lead_id}: {str(e)}")
+                    results_by_lead[lead_id] = {
                         "lead_id": lead_id,
                         "status": "failed",
-                        "error": "No assignee available"
-                    })
-                    failed_assignments += 1
-                    
-            except Exception as e:
-                logger.error(f"Error assigning lead {lead_id}: {str(e)}")
-                results.append({
-                    "lead_id": lead_id,
-                    "status": "failed",
-                    "error": str(e)
-                })
-                failed_assignments += 1
+                        "error": str(e)
+                    }
+        
+        results = [results_by_lead[lead_id] for lead_id in bulk_assign.lead_ids if lead_id in results_by_lead]
+        successful_assignments = sum(1 for result in results if result["status"] == "success")
+        failed_assignments = len(results) - successful_assignments
         
         return LeadBulkAssignResponse(
             success=failed_assignments == 0,
@@ -2662,6 +2705,8 @@ async def update_lead_status(
                 detail="Lead not found"
             )
         
+        await lead_stats_service.record_update(lead, update_data)
+        
         # Log activity
         try:
             user_id = current_user.get("_id") or current_user.get("id")
@@ -2686,7 +2731,7 @@ async def update_lead_status(
                 }
             }
             
-            await db.lead_activities.insert_one(activity_doc)
+            await activity_log.log(activity_doc)
             
         except Exception as activity_error:
             logger.error(f"Failed to log status change activity: {str(activity_error)}")
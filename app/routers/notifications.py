@@ -10,6 +10,7 @@ from ..utils.dependencies import get_current_user, get_admin_user
 from ..decorators.timezone_decorator import convert_notification_dates
 from ..config.database import get_database
 from ..services.realtime_service import realtime_manager
+from ..services.lead_access_service import lead_access_index
 from ..schemas.whatsapp_chat import (
     BulkUnreadStatusResponse,
     UnreadStatusSummary,
@@ -271,11 +272,7 @@ async def get_whatsapp_notification_analytics(
             base_filter = {}
             lead_filter = {}
         else:
-            base_filter = {
-                "$or": [
-                    {"lead_id": {"$in": await _get_user_lead_ids(user_email, db)}},
-                ]
-            }
+            base_filter = {"lead_id": {"$in": await _get_user_lead_ids(user_email, db)}}
             lead_filter = {
                 "$or": [
                     {"assigned_to": user_email},
@@ -395,17 +392,7 @@ async def get_whatsapp_notification_analytics(
 async def _get_user_lead_ids(user_email: str, db) -> List[str]:
     """Helper function to get lead IDs accessible by user"""
     try:
-        user_leads = await db.leads.find(
-            {
-                "$or": [
-                    {"assigned_to": user_email},
-                    {"co_assignees": user_email}
-                ]
-            },
-            {"lead_id": 1}
-        ).to_list(None)
-        
-        return [lead["lead_id"] for lead in user_leads]
+        return await lead_access_index.lead_ids(user_email)
         
     except Exception as e:
         logger.error(f"Error getting user lead IDs: {str(e)}")
@@ -598,12 +585,8 @@ async def admin_reset_lead_unread_status(
             }
         )
         
-        # Update real-time manager for all users
-        for user_email in realtime_manager.user_unread_leads:
-            realtime_manager.user_unread_leads[user_email].discard(lead_id)
-            
-            # Send real-time update
-            await realtime_manager.mark_lead_as_read(user_email, lead_id)
+        # Send real-time update to connected users on every worker
+        await realtime_manager.mark_lead_as_read_for_all(lead_id)
         
         return {
             "success": True,
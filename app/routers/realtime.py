@@ -376,8 +376,7 @@ async def get_user_unread_notifications(current_user: Dict[str, Any] = Depends(g
         
         # If user not connected, load from database
         if not connection_info.get("connected", False):
-            await realtime_manager._load_user_unread_leads(user_email)
-            unread_leads = list(realtime_manager.user_unread_leads.get(user_email, set()))
+            unread_leads = list(await realtime_manager._load_user_unread_leads(user_email))
         else:
             unread_leads = connection_info.get("unread_leads", [])
         
@@ -404,22 +403,18 @@ async def sync_unread_notifications(current_user: Dict[str, Any] = Depends(get_c
         user_email = current_user["email"]
         
         # Force reload unread leads from database
-        await realtime_manager._load_user_unread_leads(user_email)
-        
-        # Get updated unread leads
-        unread_leads = list(realtime_manager.user_unread_leads.get(user_email, set()))
-        
-        # If user has active connections, send sync notification
-        if user_email in realtime_manager.user_connections:
-            sync_notification = {
-                "type": "unread_leads_sync",
-                "unread_leads": unread_leads,
-                "total_unread_count": len(unread_leads),
-                "sync_timestamp": datetime.utcnow().isoformat(),
-                "sync_reason": "manual_sync"
-            }
-            
-            await realtime_manager._send_to_user(user_email, sync_notification)
+        unread_leads = list(await realtime_manager._load_user_unread_leads(user_email))
+        
+        # Send sync notification to the user's connections (on any worker)
+        sync_notification = {
+            "type": "unread_leads_sync",
+            "unread_leads": unread_leads,
+            "total_unread_count": len(unread_leads),
+            "sync_timestamp": datetime.utcnow().isoformat(),
+            "sync_reason": "manual_sync"
+        }
+        
+        await realtime_manager.send_to_user(user_email, sync_notification)
         
         return {
             "success": True,
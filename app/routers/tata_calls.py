@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 import json
 import re
 from ..config.database import get_database
+from ..services.activity_log_service import activity_log
 from fastapi import APIRouter, HTTPException, status, Depends, Request  # Add Request
 from typing import Optional, Dict, Any  
 
@@ -19,6 +20,7 @@ logger = logging.getLogger(__name__)
 # Import existing services
 from ..services.tata_user_service import tata_user_service
 from ..services.tata_call_service import tata_call_service
+from ..services.call_record_store import call_record_store
 from ..utils.dependencies import get_current_active_user
 
 # =============================================================================
@@ -248,6 +250,9 @@ async def handle_tata_webhook(request: Request):
         # Log parsed payload
         logger.info(f"Parsed webhook: {json.dumps(payload, indent=2, default=str)}")
         
+        # Keep the local call_records warehouse current
+        await call_record_store.ingest_webhook(payload)
+        
         # Process webhook and log to timeline
         await process_webhook_to_timeline(payload)
         
@@ -593,12 +598,13 @@ async def log_to_timeline_updated(lead_id: str, call_id: str, description: str,
             }
         }
         
-        # Insert into lead_activities collection
-        result = await db.lead_activities.insert_one(timeline_entry)
+        # Insert into lead_activities collection (synchronously: the webhook
+        # duplicate check above reads it back on TATA's retries)
+        activity_id = await activity_log.log(timeline_entry, sync=True)
         
-        if result.inserted_id:
+        if activity_id:
             logger.info(f"✅ Timeline entry created for lead {lead_id}: {description}")
-            logger.info(f"✅ Inserted with ID: {result.inserted_id}")
+            logger.info(f"✅ Inserted with ID: {activity_id}")
             logger.info(f"✅ Attribution: {created_by_name} ({'Lead' if call_direction == 'incoming' else 'Agent'})")
             if has_recording:
                 logger.info(f"✅ Recording available: {recording_url}")
@@ -3,10 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from app.decorators.timezone_decorator import convert_activity_dates, convert_dates_to_ist
-from app.utils.dependencies import get_current_user
+from app.utils.dependencies import get_current_user, get_admin_user
 from app.config.database import get_database
+from app.services.timeline_bucket_service import timeline_buckets
 from bson import ObjectId
 import logging
+import re
 
 router = APIRouter(prefix="/timeline", tags=["timeline"])
 logger = logging.getLogger(__name__)
@@ -131,48 +133,50 @@ async def get_lead_timeline(
     """
     try:
         # Check lead access permissions
-        await check_lead_access(lead_id, current_user)
+        lead = await check_lead_access(lead_id, current_user)
         
         db = get_database()
         
-        # Build base query - ONLY content activities for this lead
-        query = {
-            "lead_id": lead_id,
-            # "activity_type": {"$in": TIMELINE_CONTENT_ACTIVITIES}
-        }
-        
-        # Add activity type filter
-        if activity_type :
-            query["activity_type"] = activity_type
-        
-        # Add date range filter
-        if date_from or date_to:
-            date_filter = {}
-            if date_from:
-                try:
-                    date_filter["$gte"] = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                except ValueError:
-                    raise HTTPException(status_code=400, detail="Invalid date_from format")
-            if date_to:
-                try:
-                    date_filter["$lte"] = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                except ValueError:
-                    raise HTTPException(status_code=400, detail="Invalid date_to format")
-            query["created_at"] = date_filter
-        
-        # Add search filter
-        if search:
-            query["description"] = {"$regex": search, "$options": "i"}
-        
-        # Calculate pagination
-        skip = (page - 1) * limit
+        # Parse date range filter
+        parsed_from = parsed_to = None
+        if date_from:
+            try:
+                parsed_from = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date_from format")
+        if date_to:
+            try:
+                parsed_to = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date_to format")
         
-        # Get total count for pagination
-        total_count = await db.lead_activities.count_documents(query)
+        if lead.get("timeline_bucketed"):
+            # Bucketed timeline: totals from bucket headers, only the page's days loaded
+            raw_activities, total_count = await timeline_buckets.get_page(
+                lead_id, page, limit,
+                activity_type=activity_type, date_from=parsed_from, date_to=parsed_to, search=search
+            )
+        else:
+            # Lead not migrated to buckets yet: page lead_activities directly
+            query = {"lead_id": lead_id}
+            if activity_type:
+                query["activity_type"] = activity_type
+            if parsed_from or parsed_to:
+                date_filter = {}
+                if parsed_from:
+                    date_filter["$gte"] = parsed_from
+                if parsed_to:
+                    date_filter["$lte"] = parsed_to
+                query["created_at"] = date_filter
+            if search:
+                query["description"] = {"$regex": re.escape(search), "$options": "i"}
+            
+            skip = (page - 1) * limit
+            total_count = await db.lead_activities.count_documents(query)
+            raw_activities = await db.lead_activities.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
         
-        # Get activities with sorting (newest first)
         activities = []
-        async for activity in db.lead_activities.find(query).sort("created_at", -1).skip(skip).limit(limit):
+        for activity in raw_activities:
             # Don't format dates manually - let decorator handle it
             clean_activity = convert_objectid_to_str(activity)
             # Add timestamp field if it doesn't exist (use created_at)
@@ -221,34 +225,41 @@ async def get_timeline_stats(
     Get timeline statistics for a lead
     """
     try:
-        await check_lead_access(lead_id, current_user)
+        lead = await check_lead_access(lead_id, current_user)
         
         db = get_database()
         
         # Date range for stats
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        # Aggregation pipeline for stats
-        pipeline = [
-            {
-                "$match": {
-                    "lead_id": lead_id,
-                    # "activity_type": {"$in": TIMELINE_CONTENT_ACTIVITIES},
-                    "created_at": {"$gte": start_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$activity_type",
-                    "count": {"$sum": 1},
-                    "latest": {"$max": "$created_at"}
+        stats = {}
+        if lead.get("timeline_bucketed"):
+            # Per-type counts from bucket headers; only the oldest, partial day is scanned
+            type_stats = await timeline_buckets.get_type_stats(lead_id, start_date)
+        else:
+            # Lead not migrated to buckets yet: aggregate lead_activities
+            pipeline = [
+                {
+                    "$match": {
+                        "lead_id": lead_id,
+                        # "activity_type": {"$in": TIMELINE_CONTENT_ACTIVITIES},
+                        "created_at": {"$gte": start_date}
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": "$activity_type",
+                        "count": {"$sum": 1},
+                        "latest": {"$max": "$created_at"}
+                    }
                 }
-            }
-        ]
+            ]
+            type_stats = {}
+            async for stat in db.lead_activities.aggregate(pipeline):
+                type_stats[stat["_id"]] = {"count": stat["count"], "latest": stat["latest"]}
         
-        stats = {}
-        async for stat in db.lead_activities.aggregate(pipeline):
-            stats[stat["_id"]] = {
+        for activity_type, stat in type_stats.items():
+            stats[activity_type] = {
                 "count": stat["count"],
                 "latest": stat["latest"].isoformat() if stat["latest"] else None
             }
@@ -285,6 +296,39 @@ async def get_timeline_stats(
         logger.error(f"Timeline stats error for lead {lead_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/admin/migrate-buckets")
+async def migrate_timeline_buckets(
+    only_missing: bool = Query(True, description="Only migrate leads not bucketed yet (False re-checks every lead)"),
+    current_user: dict = Depends(get_admin_user)
+):
+    """
+    Copy existing lead_activities into the bucketed timeline.
+
+    Resumable: leads are marked as they finish, and activities already in a
+    bucket are skipped.
+    """
+    try:
+        logger.info(f"Timeline bucket migration requested by admin: {current_user.get('email')}")
+        
+        result = await timeline_buckets.migrate_all(only_missing=only_missing)
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=f"Timeline migration failed: {result.get('error')}")
+        
+        return {
+            "success": True,
+            "message": f"Timeline buckets built for {result['migrated_leads']} leads",
+            "migrated_leads": result["migrated_leads"],
+            "activities": result["activities"],
+            "failed_lead_ids": result["failed_lead_ids"],
+            "only_missing": only_missing
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Timeline bucket migration error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/activity-types")
 @convert_dates_to_ist()
 async def get_timeline_activity_types():
@@ -11,6 +11,8 @@ from ..utils.dependencies import get_current_user
 from ..config.settings import settings
 from ..config.database import get_database
 from ..services.whatsapp_message_service import whatsapp_message_service
+from ..services.outbound_http import outbound_http
+from ..services.lead_access_service import lead_access_index
 from ..schemas.whatsapp_chat import (
     SendChatMessageRequest, MarkMessagesReadRequest, ChatHistoryRequest,
     ActiveChatsRequest, WebhookPayloadRequest, WebhookProcessingResponse,
@@ -71,15 +73,16 @@ async def make_whatsapp_request(endpoint: str, params: Dict[str, Any]) -> Dict[s
     url = f"{WHATSAPP_CONFIG['base_url']}/{endpoint}"
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            # Try to parse JSON response
-            try:
-                return response.json()
-            except:
-                return {"status": "success", "message": response.text}
+        client = outbound_http.get("whatsapp")
+        # Sends are GET requests with side effects: never retry once sent
+        response = await client.get(url, params=params, retry=False)
+        response.raise_for_status()
+        
+        # Try to parse JSON response
+        try:
+            return response.json()
+        except:
+            return {"status": "success", "message": response.text}
                 
     except httpx.HTTPError as e:
         logger.error(f"WhatsApp API error: {str(e)}")
@@ -93,21 +96,21 @@ async def fetch_templates_from_cms() -> List[Dict[str, Any]]:
     url = f"{CMS_CONFIG['base_url']}/{CMS_CONFIG['templates_endpoint']}"
    
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-           
-            # Extract templates from Strapi response format
-            templates = data.get('data', [])
-           
-            # Filter only active templates
-            active_templates = [
-                template for template in templates
-                if template.get('Is_Active', False)
-            ]
-           
-            return active_templates
+        client = outbound_http.get("cms")
+        response = await client.get(url)
+        response.raise_for_status()
+        data = response.json()
+
+        # Extract templates from Strapi response format
+        templates = data.get('data', [])
+
+        # Filter only active templates
+        active_templates = [
+            template for template in templates
+            if template.get('Is_Active', False)
+        ]
+
+        return active_templates
            
     except Exception as e:
         logger.error(f"Failed to fetch templates from CMS: {str(e)}")
@@ -521,14 +524,7 @@ async def get_whatsapp_statistics(
             })
         else:
             # Regular user sees only their assigned leads' stats
-            user_leads = await db.leads.find({
-                "$or": [
-                    {"assigned_to": user_email},
-                    {"co_assignees": user_email}
-                ]
-            }).to_list(length=None)
-            
-            user_lead_ids = [lead["lead_id"] for lead in user_leads]
+            user_lead_ids = await lead_access_index.lead_ids(user_email)
             
             stats["total_messages"] = await db.whatsapp_messages.count_documents({
                 "lead_id": {"$in": user_lead_ids}
@@ -546,10 +542,13 @@ async def get_whatsapp_statistics(
                 "direction": "incoming",
                 "is_read": False
             })
-            stats["active_conversations"] = len([
-                lead for lead in user_leads 
-                if lead.get("whatsapp_message_count", 0) > 0
-            ])
+            stats["active_conversations"] = await db.leads.count_documents({
+                "$or": [
+                    {"assigned_to": user_email},
+                    {"co_assignees": user_email}
+                ],
+                "whatsapp_message_count": {"$gt": 0}
+            })
         
         # Messages today
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
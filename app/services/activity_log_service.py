@@ -0,0 +1,256 @@
+# app/services/activity_log_service.py - Batched writer for lead_activities
+"""
+Timeline activities used to be written with one insert_one per activity,
+inline in request handlers and bulk jobs (one round trip per recipient).
+
+ActivityLogWriter buffers activities in process and writes them with
+insert_many:
+
+- a flush runs when `flush_size` activities are buffered or every
+  `flush_seconds`, whichever comes first
+- the buffer is bounded by `max_buffer`; a caller that finds it full waits
+  for a flush (backpressure) instead of growing memory without limit
+- `_id` is assigned when an activity is logged, so callers get the id
+  immediately and a retried flush cannot insert the same activity twice
+- `sync=True` inserts directly and returns once the activity is stored, for
+  callers that read it back in the same request (duplicate checks)
+- if flushes keep failing while the buffer is full, log() raises after a few
+  attempts; callers already treat a failed activity write as non-fatal
+- every stored activity is also appended to the bucketed timeline
+  (timeline_bucket_service)
+- the lifespan hook stops the writer and flushes what is left before the
+  database connection closes; while the writer is not running every
+  activity is inserted directly
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from ..config.database import get_database
+from ..config.settings import settings
+from .timeline_bucket_service import timeline_buckets
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+# Flush attempts a caller makes on a full buffer before giving up
+BACKPRESSURE_ATTEMPTS = 3
+
+
+class ActivityLogWriter:
+    """Bounded write-behind buffer for lead_activities"""
+
+    def __init__(self, flush_seconds: float = 1.0, flush_size: int = 200, max_buffer: int = 5000):
+        self.flush_seconds = flush_seconds
+        self.flush_size = max(1, flush_size)
+        self.max_buffer = max(self.flush_size, max_buffer)
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+        # Metrics
+        self.logged_count = 0
+        self.written_count = 0
+        self.direct_count = 0
+        self.flush_count = 0
+        self.failed_flush_count = 0
+        self.backpressure_count = 0
+        self.dropped_count = 0
+        self.bucket_error_count = 0
+
+    # ============================================================================
+    # LOGGING
+    # ============================================================================
+
+    async def log(self, activity: Dict[str, Any], sync: bool = False) -> ObjectId:
+        """
+        Record one timeline activity and return its _id.
+
+        With sync=True (or while the writer is stopped) the activity is inserted
+        before returning; otherwise it is written by the next flush.
+        """
+        activity.setdefault("_id", ObjectId())
+        if sync or not self.is_running:
+            await get_database().lead_activities.insert_one(activity)
+            self.direct_count += 1
+            await self._append_to_buckets([activity])
+            return activity["_id"]
+
+        await self._wait_for_room(1)
+        self._buffer.append(activity)
+        self.logged_count += 1
+        if len(self._buffer) >= self.flush_size:
+            self._flush_requested.set()
+        return activity["_id"]
+
+    async def log_many(self, activities: List[Dict[str, Any]], sync: bool = False) -> List[ObjectId]:
+        """Record several activities; returns their _ids in order"""
+        if not activities:
+            return []
+        for activity in activities:
+            activity.setdefault("_id", ObjectId())
+        if sync or not self.is_running:
+            await get_database().lead_activities.insert_many(activities, ordered=False)
+            self.direct_count += len(activities)
+            await self._append_to_buckets(activities)
+            return [activity["_id"] for activity in activities]
+
+        for start in range(0, len(activities), self.flush_size):
+            chunk = activities[start:start + self.flush_size]
+            await self._wait_for_room(len(chunk))
+            self._buffer.extend(chunk)
+            self.logged_count += len(chunk)
+            if len(self._buffer) >= self.flush_size:
+                self._flush_requested.set()
+        return [activity["_id"] for activity in activities]
+
+    async def _wait_for_room(self, count: int) -> None:
+        """Backpressure: flush from the caller's task until `count` more fit"""
+        if len(self._buffer) + count <= self.max_buffer:
+            return
+        self.backpressure_count += 1
+        for _ in range(BACKPRESSURE_ATTEMPTS):
+            if not await self.flush():
+                # Database unavailable: hold the caller briefly before retrying
+                await asyncio.sleep(min(self.flush_seconds, 1.0))
+            if len(self._buffer) + count <= self.max_buffer:
+                return
+        raise RuntimeError(f"Activity log buffer full ({len(self._buffer)} pending) and flushes are failing")
+
+    # ============================================================================
+    # FLUSHING
+    # ============================================================================
+
+    async def flush(self) -> int:
+        """Write buffered activities with insert_many; returns how many were stored"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+
+            batch, self._buffer = self._buffer, []
+            retry: List[Dict[str, Any]] = []
+            try:
+                await get_database().lead_activities.insert_many(batch, ordered=False)
+                written = len(batch)
+            except BulkWriteError as e:
+                # Duplicate _ids were stored by an earlier, partly failed flush
+                write_errors = e.details.get("writeErrors", [])
+                retry = [
+                    batch[error["index"]] for error in write_errors
+                    if error.get("code") != DUPLICATE_KEY_ERROR
+                ]
+                written = len(batch) - len(retry)
+                if retry:
+                    self.failed_flush_count += 1
+                    logger.error(f"Error flushing activity log: {len(retry)} activities not written, retrying")
+                    self._requeue(retry)
+            except Exception as e:
+                self.failed_flush_count += 1
+                logger.error(f"Error flushing activity log ({len(batch)} activities): {e}")
+                self._requeue(batch)
+                return 0
+
+            self.flush_count += 1
+            self.written_count += written
+            if retry:
+                retry_ids = {activity["_id"] for activity in retry}
+                batch = [activity for activity in batch if activity["_id"] not in retry_ids]
+            await self._append_to_buckets(batch)
+            return written
+
+    async def _append_to_buckets(self, activities: List[Dict[str, Any]]) -> None:
+        """Copy stored activities to the bucketed timeline (lead_activities stays authoritative)"""
+        try:
+            await timeline_buckets.append(activities)
+        except Exception as e:
+            self.bucket_error_count += 1
+            logger.error(f"Error appending {len(activities)} activities to timeline buckets: {e}")
+
+    def _requeue(self, activities: List[Dict[str, Any]]) -> None:
+        """Put unwritten activities back in front; drop the oldest beyond max_buffer"""
+        self._buffer = activities + self._buffer
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            self._buffer = self._buffer[overflow:]
+            self.dropped_count += overflow
+            logger.error(f"❌ Activity log buffer full, dropped {overflow} activities")
+
+    # ============================================================================
+    # LIFECYCLE
+    # ============================================================================
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.is_running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(
+            f"📝 Activity log writer started: flush every {self.flush_seconds}s "
+            f"or {self.flush_size} activities, buffer {self.max_buffer}"
+        )
+
+    async def stop(self):
+        # New activities go straight to the database from here on
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._buffer and await self.flush():
+            pass
+        if self._buffer:
+            logger.error(f"❌ Activity log writer stopped with {len(self._buffer)} unwritten activities")
+        logger.info("🛑 Activity log writer stopped")
+
+    async def _flush_loop(self):
+        while self.is_running:
+            try:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_requested.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in activity log writer loop: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "buffered": len(self._buffer),
+            "max_buffer": self.max_buffer,
+            "flush_size": self.flush_size,
+            "flush_seconds": self.flush_seconds,
+            "logged": self.logged_count,
+            "written": self.written_count,
+            "direct_writes": self.direct_count,
+            "flushes": self.flush_count,
+            "failed_flushes": self.failed_flush_count,
+            "backpressure_waits": self.backpressure_count,
+            "dropped": self.dropped_count,
+            "bucket_errors": self.bucket_error_count
+        }
+
+
+# Global activity log writer
+activity_log = ActivityLogWriter(
+    flush_seconds=settings.activity_log_flush_seconds,
+    flush_size=settings.activity_log_flush_size,
+    max_buffer=settings.activity_log_max_buffer
+)
@@ -0,0 +1,221 @@
+# app/services/agent_directory_service.py - Process-wide TATA agent -> CRM user directory
+
+from typing import Dict, Any, Optional, List
+from bson import ObjectId
+import asyncio
+import logging
+import re
+import time
+
+from ..config.database import get_database
+from ..config.settings import settings
+from .user_directory_service import user_directory
+
+logger = logging.getLogger(__name__)
+
+VERSION_COLLECTION = "cache_versions"
+VERSION_ID = "agent_directory"
+
+
+def normalize_agent_number(agent_number: Any) -> str:
+    """'+91 98765-43210' / '919876543210' / '9876543210' -> '9876543210'"""
+    digits = re.sub(r"[^\d]", "", str(agent_number or ""))
+    return digits[-10:] if len(digits) > 10 else digits
+
+
+def _user_display_name(user: Dict[str, Any]) -> str:
+    return (
+        user.get('full_name') or
+        f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() or
+        user.get('username') or
+        user.get('email', '').split('@')[0] or
+        'Unknown'
+    )
+
+
+class AgentDirectory:
+    """
+    tata_user_mappings joined with their CRM users, indexed by agent number,
+    TATA agent id, CRM user id and email for O(1) lookups.
+
+    The directory is loaded once (one mappings read plus one users $in query)
+    and reloaded only when it changes. Writers to tata_user_mappings call
+    `notify_changed()`, which bumps a shared version document; every worker
+    compares its loaded version with it at most every
+    AGENT_DIRECTORY_CHECK_SECONDS in `ensure_loaded()`. User document writes
+    (name or email changes) reach it through user_directory invalidation.
+
+    Only mappings whose CRM user exists are included. Entries have the shape
+    TataAdminService.agent_user_mapping always had: {user_id, user_name,
+    user_email, tata_agent_id, tata_extension} plus the stored agent_number.
+    """
+
+    def __init__(self, check_seconds: float = 5.0):
+        self.check_seconds = check_seconds
+        self._by_raw_number: Dict[str, Dict[str, Any]] = {}
+        self._by_agent_number: Dict[str, Dict[str, Any]] = {}
+        self._by_agent_id: Dict[str, Dict[str, Any]] = {}
+        self._by_user_id: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_email: Dict[str, List[Dict[str, Any]]] = {}
+        self.version: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self._stale = True
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.load_count = 0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def _shared_version(self, db) -> int:
+        document = await db[VERSION_COLLECTION].find_one({"_id": VERSION_ID}, {"version": 1})
+        return (document or {}).get("version", 0)
+
+    async def ensure_loaded(self) -> None:
+        """Load the directory, or reload it when another worker changed the mappings"""
+        if not self._stale and time.monotonic() - self._checked_at < self.check_seconds:
+            return
+
+        async with self._lock:
+            if not self._stale and time.monotonic() - self._checked_at < self.check_seconds:
+                return
+            try:
+                db = get_database()
+                shared_version = await self._shared_version(db)
+                if self._stale or shared_version != self.version:
+                    await self._load(db, shared_version)
+            except Exception as e:
+                # Keep serving the previous directory; retry after the check interval
+                logger.error(f"Error loading agent directory: {str(e)}")
+            finally:
+                self._checked_at = time.monotonic()
+
+    async def _load(self, db, version: int) -> None:
+        mappings = await db.tata_user_mappings.find({}).to_list(None)
+
+        object_ids = list({
+            ObjectId(str(mapping["crm_user_id"])) for mapping in mappings
+            if mapping.get("tata_phone") and mapping.get("crm_user_id") and ObjectId.is_valid(str(mapping["crm_user_id"]))
+        })
+        users = {}
+        if object_ids:
+            async for user in db.users.find(
+                {"_id": {"$in": object_ids}},
+                {"first_name": 1, "last_name": 1, "full_name": 1, "username": 1, "email": 1}
+            ):
+                users[str(user["_id"])] = user
+
+        by_raw_number, by_agent_number, by_agent_id, by_user_id, by_email = {}, {}, {}, {}, {}
+        for mapping in mappings:
+            agent_number = mapping.get("tata_phone")
+            user = users.get(str(mapping.get("crm_user_id")))
+            if not agent_number or not user:
+                continue
+
+            entry = {
+                "user_id": str(mapping["crm_user_id"]),
+                "user_name": _user_display_name(user),
+                "user_email": user.get('email', ''),
+                "tata_agent_id": mapping.get("tata_agent_id"),
+                "tata_extension": mapping.get("tata_extension") or mapping.get("tata_caller_id"),
+                "agent_number": agent_number
+            }
+            by_raw_number[agent_number] = entry
+            by_agent_number.setdefault(normalize_agent_number(agent_number), entry)
+            if entry["tata_agent_id"]:
+                by_agent_id.setdefault(str(entry["tata_agent_id"]), entry)
+            by_user_id.setdefault(entry["user_id"], []).append(entry)
+            if entry["user_email"]:
+                by_email.setdefault(entry["user_email"].lower(), []).append(entry)
+
+        # Swap the indexes in one step so readers never see a partial directory
+        self._by_raw_number = by_raw_number
+        self._by_agent_number = by_agent_number
+        self._by_agent_id = by_agent_id
+        self._by_user_id = by_user_id
+        self._by_email = by_email
+        self.version = version
+        self.loaded_at = time.time()
+        self._stale = False
+        self.load_count += 1
+        logger.info(f"Agent directory loaded: {len(by_raw_number)} agents (version {version})")
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self) -> None:
+        """Reload on next ensure_loaded() in this worker"""
+        self._stale = True
+
+    async def notify_changed(self) -> None:
+        """Call after writing tata_user_mappings: reloads here and in every other worker"""
+        self._stale = True
+        try:
+            await get_database()[VERSION_COLLECTION].update_one(
+                {"_id": VERSION_ID},
+                {"$inc": {"version": 1}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error bumping agent directory version: {str(e)}")
+
+    def on_user_invalidated(self, user_id: Optional[str], email: Optional[str]) -> None:
+        """user_directory listener: a mapped user's name or email may have changed"""
+        if user_id is None and email is None:
+            self._stale = True
+        elif (user_id and str(user_id) in self._by_user_id) or (email and email.lower() in self._by_email):
+            self._stale = True
+
+    # ------------------------------------------------------------------
+    # Lookups (call ensure_loaded() first)
+    # ------------------------------------------------------------------
+
+    @property
+    def agent_user_mapping(self) -> Dict[str, Dict[str, Any]]:
+        """Stored agent number -> entry"""
+        return self._by_raw_number
+
+    def get_by_agent_number(self, agent_number: Any) -> Optional[Dict[str, Any]]:
+        if not agent_number:
+            return None
+        return self._by_raw_number.get(agent_number) or self._by_agent_number.get(normalize_agent_number(agent_number))
+
+    def get_by_agent_id(self, tata_agent_id: Any) -> Optional[Dict[str, Any]]:
+        return self._by_agent_id.get(str(tata_agent_id)) if tata_agent_id else None
+
+    def get_by_user_id(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        entries = self._by_user_id.get(str(user_id)) if user_id else None
+        return entries[0] if entries else None
+
+    def get_all_by_user_id(self, user_id: Any) -> List[Dict[str, Any]]:
+        return list(self._by_user_id.get(str(user_id), [])) if user_id else []
+
+    def get_by_email(self, email: Optional[str]) -> Optional[Dict[str, Any]]:
+        entries = self._by_email.get(email.lower()) if email else None
+        return entries[0] if entries else None
+
+    def get_agent_ids_for_users(self, user_ids: List[str]) -> List[str]:
+        """TATA agent ids of the given users (first mapping per user), skipping unmapped users"""
+        agent_ids = []
+        for user_id in user_ids:
+            entry = self.get_by_user_id(user_id)
+            if entry and entry.get("tata_agent_id"):
+                agent_ids.append(entry["tata_agent_id"])
+        return agent_ids
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "agents": len(self._by_raw_number),
+            "users": len(self._by_user_id),
+            "version": self.version,
+            "loads": self.load_count,
+            "stale": self._stale,
+            "check_seconds": self.check_seconds
+        }
+
+
+# Global shared agent directory
+agent_directory = AgentDirectory(check_seconds=settings.agent_directory_check_seconds)
+user_directory.add_invalidation_listener(agent_directory.on_user_invalidated)
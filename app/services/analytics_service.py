@@ -5,10 +5,15 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict
-import statistics
 from dataclasses import dataclass
 
+import numpy as np
+
+from ..utils.call_columns import read_answered_durations
+from ..utils.call_rollups import (
+    DURATION_BUCKETS, rollups_from_records, merge_by_date, merge_by_hour, merge_totals, histogram_quantile
+)
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -96,14 +101,10 @@ class AnalyticsService:
         try:
             scatter_data = []
             
-            for user in user_stats:
-                # Calculate efficiency score (composite metric)
-                efficiency_score = self._calculate_efficiency_score(
-                    success_rate=user.get("success_rate", 0),
-                    avg_duration=user.get("avg_call_duration", 0),
-                    total_calls=user.get("total_calls", 0)
-                )
-                
+            # Efficiency score (composite metric) for every user at once
+            efficiency_scores = self._calculate_efficiency_scores(user_stats).tolist()
+            
+            for user, efficiency_score in zip(user_stats, efficiency_scores):
                 scatter_data.append({
                     "user_id": user.get("user_id"),
                     "user_name": user.get("user_name"),
@@ -138,43 +139,21 @@ class AnalyticsService:
         Returns:
             Temporal trend data for charts
         """
+        return self.calculate_temporal_trends_from_rollups(rollups_from_records(call_records), date_from, date_to)
+    
+    def calculate_temporal_trends_from_rollups(
+        self, 
+        rollups: List[Dict[str, Any]],
+        date_from: str,
+        date_to: str
+    ) -> Dict[str, Any]:
+        """
+        Daily and hourly trends from call rollups (see utils/call_rollups)
+        """
         try:
-            # Group records by date and hour
-            daily_stats = defaultdict(lambda: {
-                "total_calls": 0, "answered_calls": 0, "total_duration": 0, "active_agents": set()
-            })
-            
-            hourly_stats = defaultdict(lambda: {
-                "calls": 0, "answered": 0, "total_duration": 0
-            })
-            
-            for record in call_records:
-                record_date = record.get("date", "")
-                record_time = record.get("time", "")
-                
-                if not record_date or not record_time:
-                    continue
-                
-                # Daily aggregation
-                daily_stats[record_date]["total_calls"] += 1
-                if record.get("status") == "answered":
-                    daily_stats[record_date]["answered_calls"] += 1
-                    daily_stats[record_date]["total_duration"] += record.get("call_duration", 0)
-                
-                # Track active agents per day
-                agent_number = record.get("agent_number", "")
-                if agent_number:
-                    daily_stats[record_date]["active_agents"].add(agent_number)
-                
-                # Hourly aggregation
-                try:
-                    hour = int(record_time.split(":")[0])
-                    hourly_stats[hour]["calls"] += 1
-                    if record.get("status") == "answered":
-                        hourly_stats[hour]["answered"] += 1
-                        hourly_stats[hour]["total_duration"] += record.get("call_duration", 0)
-                except (ValueError, IndexError):
-                    continue
+            # Each series counts the calls with its own key (date or hour)
+            daily_stats = merge_by_date(rollups)
+            hourly_stats = merge_by_hour(rollups)
             
             # Format daily series
             daily_series = []
@@ -189,7 +168,7 @@ class AnalyticsService:
                     "answered_calls": stats["answered_calls"],
                     "success_rate": round(success_rate, 1),
                     "avg_duration": round(avg_duration, 1),
-                    "active_agents": len(stats["active_agents"])
+                    "active_agents": len(stats["unique_agents"])
                 })
             
             # Format hourly series
@@ -197,7 +176,7 @@ class AnalyticsService:
             for hour in sorted(hourly_stats.keys()):
                 stats = hourly_stats[hour]
                 success_rate = (stats["answered"] / stats["calls"] * 100) if stats["calls"] > 0 else 0
-                avg_duration = (stats["total_duration"] / stats["answered"]) if stats["answered"] > 0 else 0
+                avg_duration = (stats["duration"] / stats["answered"]) if stats["answered"] > 0 else 0
                 
                 hourly_series.append({
                     "hour": hour,
@@ -233,22 +212,17 @@ class AnalyticsService:
         Returns:
             Heatmap data with intensity calculations
         """
+        return self.generate_hourly_heatmap_from_rollups(rollups_from_records(call_records))
+    
+    def generate_hourly_heatmap_from_rollups(
+        self, 
+        rollups: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Hour-by-hour activity heatmap from call rollups
+        """
         try:
-            hourly_data = defaultdict(lambda: {"calls": 0, "answered": 0})
-            
-            # Process records by hour
-            for record in call_records:
-                record_time = record.get("time", "")
-                if not record_time:
-                    continue
-                
-                try:
-                    hour = int(record_time.split(":")[0])
-                    hourly_data[hour]["calls"] += 1
-                    if record.get("status") == "answered":
-                        hourly_data[hour]["answered"] += 1
-                except (ValueError, IndexError):
-                    continue
+            hourly_data = merge_by_hour(rollups)
             
             # Calculate max calls for normalization
             max_calls = max([data["calls"] for data in hourly_data.values()], default=1)
@@ -301,13 +275,9 @@ class AnalyticsService:
             Duration distribution data
         """
         try:
-            # Filter answered calls only
-            answered_calls = [
-                record for record in call_records 
-                if record.get("status") == "answered" and record.get("call_duration", 0) > 0
-            ]
+            durations = read_answered_durations(call_records)
             
-            if not answered_calls:
+            if not len(durations):
                 return {
                     "buckets": [],
                     "avg_duration": 0,
@@ -315,45 +285,31 @@ class AnalyticsService:
                     "total_analyzed": 0
                 }
             
-            durations = [record.get("call_duration", 0) for record in answered_calls]
-            
-            # Define duration buckets
-            buckets = [
-                {"range": "0-30s", "min": 0, "max": 30},
-                {"range": "30-60s", "min": 30, "max": 60},
-                {"range": "60-120s", "min": 60, "max": 120},
-                {"range": "120-300s", "min": 120, "max": 300},
-                {"range": "300s+", "min": 300, "max": float('inf')}
-            ]
-            
             # Count durations in each bucket
             total_calls = len(durations)
+            edges = [lower for lower, _, _ in DURATION_BUCKETS] + [np.inf]
+            counts, _ = np.histogram(durations, bins=edges)
             bucket_data = []
             
-            for bucket in buckets:
-                count = sum(1 for d in durations if bucket["min"] <= d < bucket["max"])
-                percentage = (count / total_calls * 100) if total_calls > 0 else 0
-                
+            for (lower, _, label), count in zip(DURATION_BUCKETS, counts.tolist()):
                 bucket_data.append({
-                    "range": bucket["range"],
+                    "range": label,
                     "count": count,
-                    "percentage": round(percentage, 1),
-                    "is_quality": bucket["min"] >= self.thresholds.quality_duration_threshold
+                    "percentage": round(count / total_calls * 100, 1),
+                    "is_quality": lower >= self.thresholds.quality_duration_threshold
                 })
             
             # Calculate statistics
-            avg_duration = statistics.mean(durations)
-            quality_calls = sum(1 for d in durations if d >= self.thresholds.quality_duration_threshold)
-            quality_percentage = (quality_calls / total_calls * 100) if total_calls > 0 else 0
+            quality_calls = int(np.count_nonzero(durations >= self.thresholds.quality_duration_threshold))
             
             return {
                 "buckets": bucket_data,
-                "avg_duration": round(avg_duration, 1),
+                "avg_duration": round(float(durations.mean()), 1),
                 "quality_threshold": self.thresholds.quality_duration_threshold,
                 "quality_calls": quality_calls,
-                "quality_percentage": round(quality_percentage, 1),
+                "quality_percentage": round(quality_calls / total_calls * 100, 1),
                 "total_analyzed": total_calls,
-                "median_duration": round(statistics.median(durations), 1)
+                "median_duration": round(float(np.median(durations)), 1)
             }
             
         except Exception as e:
@@ -368,6 +324,62 @@ class AnalyticsService:
                 "median_duration": 0
             }
     
+    def calculate_duration_distribution_from_rollups(
+        self, 
+        rollups: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Call duration distribution from the rollup duration histograms.
+        The median is estimated within its histogram bucket.
+        """
+        try:
+            totals = merge_totals(rollups)
+            histogram = totals["duration_histogram"]
+            total_calls = sum(histogram)
+            
+            if not total_calls:
+                return {
+                    "buckets": [],
+                    "avg_duration": 0,
+                    "quality_threshold": self.thresholds.quality_duration_threshold,
+                    "total_analyzed": 0
+                }
+            
+            bucket_data = []
+            quality_calls = 0
+            for (lower, upper, label), count in zip(DURATION_BUCKETS, histogram):
+                is_quality = lower >= self.thresholds.quality_duration_threshold
+                if is_quality:
+                    quality_calls += count
+                bucket_data.append({
+                    "range": label,
+                    "count": count,
+                    "percentage": round(count / total_calls * 100, 1),
+                    "is_quality": is_quality
+                })
+            
+            return {
+                "buckets": bucket_data,
+                "avg_duration": round(totals["total_duration"] / total_calls, 1),
+                "quality_threshold": self.thresholds.quality_duration_threshold,
+                "quality_calls": quality_calls,
+                "quality_percentage": round(quality_calls / total_calls * 100, 1),
+                "total_analyzed": total_calls,
+                "median_duration": round(histogram_quantile(histogram, 0.5), 1)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error calculating duration distribution from rollups: {e}")
+            return {
+                "buckets": [],
+                "avg_duration": 0,
+                "quality_threshold": self.thresholds.quality_duration_threshold,
+                "quality_calls": 0,
+                "quality_percentage": 0,
+                "total_analyzed": 0,
+                "median_duration": 0
+            }
+    
     def analyze_peak_hours(
         self, 
         call_records: List[Dict[str, Any]]
@@ -381,22 +393,20 @@ class AnalyticsService:
         Returns:
             Peak hours analysis data
         """
+        return self.analyze_peak_hours_from_rollups(rollups_from_records(call_records))
+    
+    def analyze_peak_hours_from_rollups(
+        self, 
+        rollups: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Peak calling hours analysis from call rollups
+        """
         try:
-            hourly_stats = defaultdict(lambda: {"total": 0, "answered": 0})
-            
-            # Process records by hour
-            for record in call_records:
-                record_time = record.get("time", "")
-                if not record_time:
-                    continue
-                
-                try:
-                    hour = int(record_time.split(":")[0])
-                    hourly_stats[hour]["total"] += 1
-                    if record.get("status") == "answered":
-                        hourly_stats[hour]["answered"] += 1
-                except (ValueError, IndexError):
-                    continue
+            hourly_stats = {
+                hour: {"total": stats["calls"], "answered": stats["answered"]}
+                for hour, stats in merge_by_hour(rollups).items()
+            }
             
             # Calculate hourly performance and ranking
             hourly_data = []
@@ -479,18 +489,10 @@ class AnalyticsService:
             # Extract success rates for trend calculation
             success_rates = [day["success_rate"] for day in daily_series]
             
-            # Simple linear regression for trend
-            n = len(success_rates)
-            x_values = list(range(n))
-            
-            # Calculate slope
-            x_mean = statistics.mean(x_values)
-            y_mean = statistics.mean(success_rates)
-            
-            numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(x_values, success_rates))
-            denominator = sum((x - x_mean) ** 2 for x in x_values)
-            
-            slope = numerator / denominator if denominator != 0 else 0
+            # Simple linear regression for trend (least-squares slope over day index)
+            y_values = np.asarray(success_rates, dtype=float)
+            x_offsets = np.arange(len(y_values)) - (len(y_values) - 1) / 2
+            slope = float(np.dot(x_offsets, y_values - y_values.mean()) / np.dot(x_offsets, x_offsets))
             
             # Determine trend direction
             if slope > 1:
@@ -553,23 +555,17 @@ class AnalyticsService:
                 }
             
             # Calculate thresholds if not set (use medians)
-            call_volumes = [user.get("total_calls", 0) for user in user_stats]
-            efficiency_scores = [
-                self._calculate_efficiency_score(
-                    user.get("success_rate", 0),
-                    user.get("avg_call_duration", 0),
-                    user.get("total_calls", 0)
-                ) for user in user_stats
-            ]
+            call_volumes = np.array([user.get("total_calls", 0) for user in user_stats], dtype=float)
+            efficiency_scores = self._calculate_efficiency_scores(user_stats)
             
             volume_threshold = self.thresholds.volume_threshold
             efficiency_threshold = self.thresholds.efficiency_threshold
             
             # If thresholds are default, use data-driven thresholds
-            if volume_threshold == 30 and call_volumes:
-                volume_threshold = statistics.median(call_volumes)
-            if efficiency_threshold == 5.0 and efficiency_scores:
-                efficiency_threshold = statistics.median(efficiency_scores)
+            if volume_threshold == 30:
+                volume_threshold = float(np.median(call_volumes))
+            if efficiency_threshold == 5.0:
+                efficiency_threshold = float(np.median(efficiency_scores))
             
             # Categorize users into quadrants
             quadrants = {
@@ -579,13 +575,8 @@ class AnalyticsService:
                 "low_volume_low_efficiency": {"users": [], "color": "red"}
             }
             
-            for user in user_stats:
+            for user, efficiency in zip(user_stats, efficiency_scores.tolist()):
                 volume = user.get("total_calls", 0)
-                efficiency = self._calculate_efficiency_score(
-                    user.get("success_rate", 0),
-                    user.get("avg_call_duration", 0),
-                    user.get("total_calls", 0)
-                )
                 
                 user_data = {
                     "user_id": user.get("user_id"),
@@ -637,6 +628,28 @@ class AnalyticsService:
                 "summary": {"total_users": 0, "high_performers": 0, "need_coaching": 0}
             }
     
+    def _calculate_efficiency_scores(self, user_stats: List[Dict[str, Any]]) -> np.ndarray:
+        """Vectorized _calculate_efficiency_score over a list of user stats"""
+        success_rates = np.array([user.get("success_rate", 0) for user in user_stats], dtype=float)
+        avg_durations = np.array([user.get("avg_call_duration", 0) for user in user_stats], dtype=float)
+        total_calls = np.array([user.get("total_calls", 0) for user in user_stats], dtype=float)
+        
+        success_component = (success_rates / 100) * 4
+        duration_component = np.select(
+            [
+                avg_durations == 0,
+                (avg_durations >= 60) & (avg_durations <= 180),
+                (avg_durations >= 30) & (avg_durations < 60),
+                (avg_durations > 180) & (avg_durations <= 300)
+            ],
+            [0, 3, 2, 2],
+            default=1
+        )
+        volume_component = np.minimum(3, total_calls / 20)
+        
+        scores = (success_component * 0.5) + (duration_component * 0.3) + (volume_component * 0.2)
+        return np.where(total_calls == 0, 0.0, np.minimum(10.0, scores))
+    
     def _calculate_efficiency_score(
         self, 
         success_rate: float, 
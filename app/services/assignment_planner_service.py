@@ -0,0 +1,140 @@
+# app/services/assignment_planner_service.py - In-memory round-robin assignment planning
+"""
+Plan many round-robin assignments from a single read of the candidate users.
+
+`RoundRobinPlanner.load()` fetches the candidates with their
+`total_assigned_leads` and the time of their most recent lead, then keeps a
+min-heap keyed on (load, last_assigned_at). Each pick pops the least loaded
+user (ties go to whoever was assigned longest ago) and pushes them back with
+one more lead, so N assignments cost O(N log U) and no further queries.
+
+The planner never writes. Callers persist the outcome - lead updates plus one
+users bulk_write that applies each user's counter delta with a single $inc
+(see UserLeadArrayService.add_leads_to_user_arrays_bulk).
+"""
+
+import heapq
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..config.database import get_database
+from .user_directory_service import format_user_display_name
+
+logger = logging.getLogger(__name__)
+
+# Heap entry: (load, phase, last_assigned, email)
+# phase 0 = historical assignment (datetime), phase 1 = picked in this plan (tick)
+HeapEntry = Tuple[int, int, Any, str]
+
+
+class RoundRobinPlanner:
+    """Per-operation round-robin planner over a fixed set of candidate users"""
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
+        self._heap: List[HeapEntry] = []
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._initial_loads: Dict[str, int] = {}
+        self._deltas: Dict[str, int] = {}
+        self._tick = 0
+        self.selected_user_emails: Optional[List[str]] = None
+
+    async def load(self, selected_user_emails: Optional[List[str]] = None) -> "RoundRobinPlanner":
+        """Load candidates: the selected users, or every active user when none are given"""
+        self.selected_user_emails = selected_user_emails or None
+
+        user_query = {"role": "user", "is_active": True}
+        if self.selected_user_emails:
+            user_query["email"] = {"$in": self.selected_user_emails}
+
+        users = await self.db.users.find(
+            user_query,
+            {"email": 1, "first_name": 1, "last_name": 1, "total_assigned_leads": 1}
+        ).to_list(None)
+        self._users = {user["email"]: user for user in users if user.get("email")}
+
+        if not self._users:
+            logger.warning(f"No active users available for round-robin (selected: {self.selected_user_emails})")
+            return self
+
+        # Most recent lead per candidate in one pass over the (assigned_to, created_at) index
+        last_assigned = {email: datetime.min for email in self._users}
+        pipeline = [
+            {"$match": {"assigned_to": {"$in": list(self._users.keys())}}},
+            {"$sort": {"assigned_to": 1, "created_at": -1}},
+            {"$group": {"_id": "$assigned_to", "last_created_at": {"$first": "$created_at"}}}
+        ]
+        async for row in self.db.leads.aggregate(pipeline):
+            if isinstance(row.get("last_created_at"), datetime):
+                last_assigned[row["_id"]] = row["last_created_at"]
+
+        for email, user in self._users.items():
+            load = user.get("total_assigned_leads", 0) or 0
+            self._initial_loads[email] = load
+            self._heap.append((load, 0, last_assigned[email], email))
+        heapq.heapify(self._heap)
+
+        logger.info(f"Round-robin planner loaded {len(self._users)} candidate users")
+        return self
+
+    @property
+    def has_candidates(self) -> bool:
+        return bool(self._heap)
+
+    def _bump(self, email: str) -> None:
+        self._tick += 1
+        self._deltas[email] = self._deltas.get(email, 0) + 1
+
+    def next_assignee(self) -> Optional[str]:
+        """Pick the next assignee and count the lead against them"""
+        if not self._heap:
+            return None
+        load, _, _, email = heapq.heappop(self._heap)
+        self._bump(email)
+        heapq.heappush(self._heap, (load + 1, 1, self._tick, email))
+        return email
+
+    def plan(self, count: int) -> List[Optional[str]]:
+        """Pick `count` assignees in order"""
+        return [self.next_assignee() for _ in range(max(count, 0))]
+
+    def record(self, email: Optional[str]) -> None:
+        """Count a lead assigned outside the plan (e.g. manual) towards a candidate's load"""
+        if not email or email not in self._users:
+            return
+        for position, (load, _, _, candidate) in enumerate(self._heap):
+            if candidate == email:
+                self._bump(email)
+                self._heap[position] = (load + 1, 1, self._tick, email)
+                heapq.heapify(self._heap)
+                return
+
+    def get_user_name(self, email: Optional[str]) -> Optional[str]:
+        user = self._users.get(email) if email else None
+        return format_user_display_name(user, email) if user else None
+
+    @property
+    def deltas(self) -> Dict[str, int]:
+        """Leads counted against each user so far"""
+        return dict(self._deltas)
+
+    def get_projected_loads(self) -> List[Dict[str, Any]]:
+        """Current vs projected total_assigned_leads per candidate, least loaded first"""
+        projected = []
+        for email, initial in self._initial_loads.items():
+            delta = self._deltas.get(email, 0)
+            projected.append({
+                "email": email,
+                "name": self.get_user_name(email),
+                "current_leads": initial,
+                "planned_leads": delta,
+                "projected_leads": initial + delta
+            })
+        projected.sort(key=lambda entry: (entry["projected_leads"], entry["email"]))
+        return projected
+
+
+async def load_round_robin_planner(selected_user_emails: Optional[List[str]] = None, db=None) -> RoundRobinPlanner:
+    """Build and load a planner for the selected users (or all active users)"""
+    return await RoundRobinPlanner(db).load(selected_user_emails)
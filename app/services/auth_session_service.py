@@ -0,0 +1,242 @@
+# app/services/auth_session_service.py - Hot-path helpers for get_current_user
+"""
+Keeps per-request authentication work in memory:
+
+- PrincipalCache: short-TTL cache of the resolved user for an access token (jti)
+- TokenBlacklistMirror: local set of revoked jtis, refreshed incrementally from token_blacklist
+- LastActivityWriter: write-behind buffer that coalesces last_activity updates into one bulk_write
+"""
+
+import asyncio
+import copy
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from ..config.database import get_database
+from ..config.settings import settings
+from .user_directory_service import user_directory
+
+logger = logging.getLogger(__name__)
+
+# Incremental blacklist refreshes re-read this far behind the watermark, so
+# entries stamped by a worker with a lagging clock or committed late are not missed
+BLACKLIST_OVERLAP = timedelta(seconds=30)
+
+
+class PrincipalCache:
+    """Short-lived cache of authenticated users keyed by access-token jti"""
+
+    def __init__(self, ttl_seconds: int = 15, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # jti -> (expires_at, user_id, email, user_data)
+        self._entries: Dict[str, Tuple[float, str, Optional[str], Dict[str, Any]]] = {}
+
+    def get(self, jti: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not jti:
+            return None
+        entry = self._entries.get(jti)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._entries.pop(jti, None)
+            return None
+        return copy.deepcopy(entry[3])
+
+    def put(self, jti: Optional[str], user_data: Dict[str, Any]) -> None:
+        if not jti or self.ttl_seconds <= 0:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._prune()
+        self._entries[jti] = (
+            time.monotonic() + self.ttl_seconds,
+            str(user_data.get("_id")),
+            user_data.get("email"),
+            copy.deepcopy(user_data)
+        )
+
+    def invalidate_token(self, jti: Optional[str]) -> None:
+        if jti:
+            self._entries.pop(jti, None)
+
+    def invalidate_user(self, user_id: Optional[str] = None, email: Optional[str] = None) -> None:
+        """Drop every cached principal for a user (or everything when both are None)"""
+        if user_id is None and email is None:
+            self._entries.clear()
+            return
+        stale = [
+            jti for jti, (_, cached_id, cached_email, _) in self._entries.items()
+            if (user_id and cached_id == user_id) or (email and cached_email == email)
+        ]
+        for jti in stale:
+            self._entries.pop(jti, None)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [jti for jti, entry in self._entries.items() if entry[0] < now]
+        for jti in expired:
+            self._entries.pop(jti, None)
+        # Still full - drop the oldest half rather than growing unbounded
+        if len(self._entries) >= self.max_entries:
+            oldest = sorted(self._entries.items(), key=lambda item: item[1][0])
+            for jti, _ in oldest[: len(oldest) // 2]:
+                self._entries.pop(jti, None)
+
+
+class TokenBlacklistMirror:
+    """
+    In-memory mirror of the token_blacklist collection.
+
+    The first check loads every blacklisted jti; later refreshes fetch
+    entries stamped at or after the last seen `blacklisted_at` minus
+    BLACKLIST_OVERLAP (re-read entries are de-duplicated by token_jti).
+    Every `full_reload_seconds` the whole collection is read again, which
+    catches anything the overlap window still missed. Tokens revoked in this
+    process are added immediately, tokens revoked by another worker become
+    visible within `refresh_seconds`.
+    """
+
+    def __init__(self, refresh_seconds: int = 5, full_reload_seconds: int = 300):
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self._revoked: Dict[str, Optional[datetime]] = {}
+        self._watermark: Optional[datetime] = None
+        self._last_refresh: float = 0.0
+        self._last_full_reload: float = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def add(self, jti: str, expires_at: Optional[datetime] = None) -> None:
+        self._revoked[jti] = expires_at
+
+    async def refresh(self) -> None:
+        """Pull blacklist entries added since the last refresh"""
+        async with self._lock:
+            now = time.monotonic()
+            if self._loaded and now - self._last_refresh < self.refresh_seconds:
+                return
+
+            full_reload = not self._loaded or self._watermark is None or now - self._last_full_reload >= self.full_reload_seconds
+            query = {} if full_reload else {"blacklisted_at": {"$gte": self._watermark - BLACKLIST_OVERLAP}}
+
+            db = get_database()
+            cursor = db.token_blacklist.find(
+                query, {"token_jti": 1, "expires_at": 1, "blacklisted_at": 1}
+            )
+            async for entry in cursor:
+                self._revoked[entry["token_jti"]] = entry.get("expires_at")
+                blacklisted_at = entry.get("blacklisted_at")
+                if blacklisted_at and (self._watermark is None or blacklisted_at > self._watermark):
+                    self._watermark = blacklisted_at
+
+            self._prune_expired()
+            self._loaded = True
+            self._last_refresh = time.monotonic()
+            if full_reload:
+                self._last_full_reload = self._last_refresh
+
+    def _prune_expired(self) -> None:
+        now = datetime.utcnow()
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at and expires_at < now]
+        for jti in expired:
+            self._revoked.pop(jti, None)
+
+    async def is_blacklisted(self, jti: str) -> bool:
+        if jti in self._revoked:
+            return True
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing token blacklist mirror: {e}")
+            # Fall back to the authoritative check
+            from ..utils.security import security
+            return await security.is_token_blacklisted(jti)
+        return jti in self._revoked
+
+
+class LastActivityWriter:
+    """Write-behind buffer for users.last_activity"""
+
+    def __init__(self, flush_seconds: int = 30):
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self.flush_count = 0
+
+    def touch(self, user_id: str, when: Optional[datetime] = None) -> None:
+        """Record activity; only the latest timestamp per user is kept"""
+        self._pending[user_id] = when or datetime.utcnow()
+
+    async def flush(self) -> int:
+        """Write all buffered timestamps with a single bulk_write"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne({"_id": ObjectId(user_id)}, {"$max": {"last_activity": timestamp}})
+            for user_id, timestamp in pending.items()
+            if ObjectId.is_valid(user_id)
+        ]
+        if not operations:
+            return 0
+
+        try:
+            db = get_database()
+            await db.users.bulk_write(operations, ordered=False)
+            self.flush_count += 1
+            return len(operations)
+        except Exception as e:
+            logger.error(f"Error flushing last_activity updates: {e}")
+            # Put the timestamps back unless newer ones arrived meanwhile
+            for user_id, timestamp in pending.items():
+                if user_id not in self._pending or self._pending[user_id] < timestamp:
+                    self._pending[user_id] = timestamp
+            return 0
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info("🕒 last_activity writer started")
+
+    async def stop(self):
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("🛑 last_activity writer stopped")
+
+    async def _flush_loop(self):
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.flush_seconds)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in last_activity writer loop: {e}")
+
+
+# Global instances
+principal_cache = PrincipalCache(ttl_seconds=settings.auth_principal_cache_ttl_seconds)
+token_blacklist_mirror = TokenBlacklistMirror(
+    refresh_seconds=settings.token_blacklist_refresh_seconds,
+    full_reload_seconds=settings.token_blacklist_full_reload_seconds
+)
+last_activity_writer = LastActivityWriter(flush_seconds=settings.last_activity_flush_seconds)
+
+# Any write that invalidates a user also drops their cached principals
+user_directory.add_invalidation_listener(principal_cache.invalidate_user)
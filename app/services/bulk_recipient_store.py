@@ -0,0 +1,247 @@
+# app/services/bulk_recipient_store.py - Per-recipient state and chunk leases for bulk WhatsApp jobs
+"""
+Recipients of a bulk WhatsApp job live in their own collection, one document
+per recipient keyed by (job_id, index), instead of inside the job document.
+
+Recipients are grouped into fixed-size chunks (bulk_whatsapp_chunks). A worker
+claims a chunk with an atomic lease (find_one_and_update), sends the chunk's
+pending recipients, checkpoints their status in batches and marks the chunk
+done. Leases are renewed while a worker makes progress; a chunk whose lease
+expires (worker died) is claimed again and only its still-pending recipients
+are sent. Several workers can drain the same job in parallel.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Iterable
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..config.database import get_database
+from ..config.settings import settings
+from ..models.bulk_whatsapp import RecipientStatus
+
+logger = logging.getLogger(__name__)
+
+RECIPIENTS_COLLECTION = "bulk_whatsapp_recipients"
+CHUNKS_COLLECTION = "bulk_whatsapp_chunks"
+
+CHUNK_PENDING = "pending"
+CHUNK_LEASED = "leased"
+CHUNK_DONE = "done"
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class BulkRecipientStore:
+    """Recipient documents and chunk leases for bulk WhatsApp jobs"""
+
+    @property
+    def db(self):
+        return get_database()
+
+    @property
+    def recipients(self):
+        return self.db[RECIPIENTS_COLLECTION]
+
+    @property
+    def chunks(self):
+        return self.db[CHUNKS_COLLECTION]
+
+    # ============================================================================
+    # MATERIALIZATION
+    # ============================================================================
+
+    async def store_recipients(
+        self,
+        job_id: str,
+        recipients: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None
+    ) -> int:
+        """
+        Write a job's recipients and chunk documents. Idempotent: documents that
+        already exist (same job_id/index or job_id/chunk) are left untouched.
+
+        Returns:
+            Number of chunks for the job
+        """
+        chunk_size = max(1, chunk_size or settings.bulk_recipient_chunk_size)
+        now = datetime.utcnow()
+
+        recipient_docs = []
+        for index, recipient in enumerate(recipients):
+            doc = dict(recipient)
+            doc.setdefault("status", RecipientStatus.PENDING)
+            doc.update({
+                "job_id": job_id,
+                "index": index,
+                "chunk": index // chunk_size,
+                "updated_at": now
+            })
+            recipient_docs.append(doc)
+
+        chunk_count = (len(recipients) + chunk_size - 1) // chunk_size
+        chunk_docs = [
+            {
+                "job_id": job_id,
+                "chunk": chunk,
+                "start_index": chunk * chunk_size,
+                "end_index": min((chunk + 1) * chunk_size, len(recipients)),
+                "status": CHUNK_PENDING,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "attempts": 0,
+                "created_at": now,
+                "updated_at": now
+            }
+            for chunk in range(chunk_count)
+        ]
+
+        await self._insert_ignoring_duplicates(self.recipients, recipient_docs)
+        await self._insert_ignoring_duplicates(self.chunks, chunk_docs)
+
+        logger.info(f"📦 Stored {len(recipient_docs)} recipients in {chunk_count} chunks for job {job_id}")
+        return chunk_count
+
+    async def ensure_job_recipients(self, job: Dict[str, Any]) -> None:
+        """Move recipients embedded in a (legacy) job document into the store"""
+        if job.get("recipients_stored"):
+            return
+
+        await self.store_recipients(job["job_id"], job.get("recipients", []))
+        await self.db.bulk_whatsapp_jobs.update_one(
+            {"job_id": job["job_id"]},
+            {"$set": {"recipients_stored": True, "updated_at": datetime.utcnow()}}
+        )
+
+    async def _insert_ignoring_duplicates(self, collection, documents: List[Dict[str, Any]]) -> None:
+        if not documents:
+            return
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            other = [error for error in errors if error.get("code") != DUPLICATE_KEY_ERROR]
+            if other:
+                raise
+
+    # ============================================================================
+    # LEASES
+    # ============================================================================
+
+    async def claim_chunk(self, job_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next pending (or abandoned) chunk of a job"""
+        now = datetime.utcnow()
+        return await self.chunks.find_one_and_update(
+            {
+                "job_id": job_id,
+                "$or": [
+                    {"status": CHUNK_PENDING},
+                    {"status": CHUNK_LEASED, "lease_expires_at": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": CHUNK_LEASED,
+                    "lease_owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=settings.bulk_chunk_lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("chunk", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def renew_leases(self, job_id: str, owner: str, chunks: Iterable[int]) -> None:
+        chunks = list(chunks)
+        if not chunks:
+            return
+        now = datetime.utcnow()
+        await self.chunks.update_many(
+            {"job_id": job_id, "chunk": {"$in": chunks}, "lease_owner": owner, "status": CHUNK_LEASED},
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=settings.bulk_chunk_lease_seconds),
+                "updated_at": now
+            }}
+        )
+
+    async def complete_chunks(self, job_id: str, owner: str, chunks: Iterable[int]) -> None:
+        chunks = list(chunks)
+        if not chunks:
+            return
+        await self.chunks.update_many(
+            {"job_id": job_id, "chunk": {"$in": chunks}, "lease_owner": owner},
+            {"$set": {
+                "status": CHUNK_DONE,
+                "lease_expires_at": None,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    async def count_open_chunks(self, job_id: str) -> int:
+        """Chunks not yet done (pending or leased)"""
+        return await self.chunks.count_documents({"job_id": job_id, "status": {"$ne": CHUNK_DONE}})
+
+    async def has_claimable_chunks(self, job_id: str) -> bool:
+        now = datetime.utcnow()
+        chunk = await self.chunks.find_one(
+            {
+                "job_id": job_id,
+                "$or": [
+                    {"status": CHUNK_PENDING},
+                    {"status": CHUNK_LEASED, "lease_expires_at": {"$lt": now}}
+                ]
+            },
+            {"_id": 1}
+        )
+        return chunk is not None
+
+    # ============================================================================
+    # RECIPIENTS
+    # ============================================================================
+
+    async def get_pending_recipients(self, job_id: str, chunk: int) -> List[Dict[str, Any]]:
+        """Recipients of a chunk that still need to be sent"""
+        return await self.recipients.find(
+            {"job_id": job_id, "chunk": chunk, "status": RecipientStatus.PENDING}
+        ).sort("index", 1).to_list(None)
+
+    async def write_results(self, job_id: str, results: List[Dict[str, Any]]) -> None:
+        """
+        Checkpoint per-recipient results in one bulk_write
+
+        Args:
+            results: Dicts with "index" plus the fields to set
+        """
+        if not results:
+            return
+        now = datetime.utcnow()
+        operations = []
+        for result in results:
+            fields = {key: value for key, value in result.items() if key != "index"}
+            fields["updated_at"] = now
+            operations.append(UpdateOne({"job_id": job_id, "index": result["index"]}, {"$set": fields}))
+        await self.recipients.bulk_write(operations, ordered=False)
+
+    async def get_lead_ids(self, job_id: str) -> List[str]:
+        return await self.recipients.distinct("lead_id", {"job_id": job_id})
+
+    async def get_status_counts(self, job_id: str) -> Dict[str, int]:
+        pipeline = [
+            {"$match": {"job_id": job_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]
+        rows = await self.recipients.aggregate(pipeline).to_list(None)
+        return {row["_id"]: row["count"] for row in rows}
+
+    async def delete_jobs(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        await self.recipients.delete_many({"job_id": {"$in": job_ids}})
+        await self.chunks.delete_many({"job_id": {"$in": job_ids}})
+
+
+# Global store instance
+bulk_recipient_store = BulkRecipientStore()
@@ -2,6 +2,10 @@
 # 🆕 NEW FILE - Background processor for bulk WhatsApp jobs - RACE CONDITION FIXED
 
 import asyncio
+import os
+import socket
+import time
+import uuid
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from bson import ObjectId
@@ -9,17 +13,90 @@ import logging
 from fastapi import HTTPException
 
 from app.config.database import get_database
+from app.services.activity_log_service import activity_log
+from app.config.settings import settings
 from app.models.bulk_whatsapp import BulkJobStatus, MessageType, RecipientStatus
+from app.services.bulk_recipient_store import bulk_recipient_store
 from app.services.whatsapp_message_service import WhatsAppMessageService
+from app.utils.rate_limiter import TokenBucket
 from app.utils.timezone_helper import TimezoneHandler
 
 logger = logging.getLogger(__name__)
 
+# Provider rate limit is per account, so every job in this process shares it
+_whatsapp_rate_limiter: Optional[TokenBucket] = None
+
+def get_whatsapp_rate_limiter() -> TokenBucket:
+    """Get the process-wide token bucket for WhatsApp sends"""
+    global _whatsapp_rate_limiter
+    if _whatsapp_rate_limiter is None:
+        _whatsapp_rate_limiter = TokenBucket(
+            rate=settings.whatsapp_rate_limit_per_second,
+            capacity=settings.whatsapp_rate_limit_burst
+        )
+    return _whatsapp_rate_limiter
+
+
+class BulkDispatchRun:
+    """
+    In-memory state of one worker draining a job: its lease owner id, the
+    cached cancellation flag, leased chunks and the buffer of per-recipient
+    results (plus counter deltas) waiting to be checkpointed.
+    """
+    
+    def __init__(self, job: Dict[str, Any]):
+        self.job_id = job["job_id"]
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.cancelled = False
+        self.exhausted = False
+        
+        # Totals for this run (logging / active job view)
+        self.processed_count = 0
+        self.success_count = 0
+        self.failed_count = 0
+        
+        # Not yet flushed: (recipient, result document) and counter deltas
+        self.pending: List[tuple] = []
+        self.pending_success = 0
+        self.pending_failed = 0
+        
+        # Leased chunks: chunk -> recipients left to send; finished chunks awaiting flush
+        self.chunk_remaining: Dict[int, int] = {}
+        self.completed_chunks: set = set()
+        
+        self.claim_lock = asyncio.Lock()
+        self.flush_lock = asyncio.Lock()
+    
+    def start_chunk(self, chunk: int, recipient_count: int) -> None:
+        if recipient_count:
+            self.chunk_remaining[chunk] = recipient_count
+        else:
+            # Everything in it was sent before the previous lease expired
+            self.completed_chunks.add(chunk)
+    
+    def record(self, recipient: Dict[str, Any], recipient_result: Dict[str, Any]) -> None:
+        self.processed_count += 1
+        if recipient_result["status"] == RecipientStatus.SENT:
+            self.success_count += 1
+            self.pending_success += 1
+        else:
+            self.failed_count += 1
+            self.pending_failed += 1
+        self.pending.append((recipient, recipient_result))
+        
+        chunk = recipient.get("chunk")
+        if chunk in self.chunk_remaining:
+            self.chunk_remaining[chunk] -= 1
+            if self.chunk_remaining[chunk] <= 0:
+                del self.chunk_remaining[chunk]
+                self.completed_chunks.add(chunk)
+
+
 class BulkWhatsAppProcessor:
     def __init__(self):
         self.collection_name = "bulk_whatsapp_jobs"
         self.active_jobs = {}
-        # Remove self.whatsapp_service = WhatsAppMessageService() - use lazy loading
+        self._whatsapp_service: Optional[WhatsAppMessageService] = None
 
     @property
     def db(self):
@@ -28,8 +105,10 @@ class BulkWhatsAppProcessor:
     
     @property
     def whatsapp_service(self):
-        """Get WhatsApp service when needed (lazy initialization)"""
-        return WhatsAppMessageService() 
+        """Get WhatsApp service when needed (lazy initialization, reused across sends)"""
+        if self._whatsapp_service is None:
+            self._whatsapp_service = WhatsAppMessageService()
+        return self._whatsapp_service
     
     async def process_bulk_job(self, job_id: str) -> None:
         """
@@ -55,52 +134,52 @@ class BulkWhatsAppProcessor:
                 logger.warning(f"Job {job_id} already finished. Status: {current_status}")
                 return
             
-            # 🔧 FIXED: Allow PROCESSING status if recently set by scheduler
-            if current_status == BulkJobStatus.PROCESSING:
-                # Check if this is a recent status change (within last 10 seconds)
-                started_at = job.get("started_at")
-                if started_at:
-                    time_since_start = (datetime.utcnow() - started_at).total_seconds()
-                    if time_since_start < 10:
-                        logger.info(f"✅ Job {job_id} recently marked as processing ({time_since_start:.1f}s ago) by scheduler, proceeding")
-                    else:
-                        logger.warning(f"Job {job_id} already processing for {time_since_start:.1f}s, skipping to avoid duplicate")
-                        return
-                else:
-                    logger.info(f"✅ Job {job_id} marked as processing but no start time, proceeding")
-            
-            # 🔧 FIXED: Use atomic update to prevent duplicate processing
-            update_result = await self.db[self.collection_name].update_one(
-                {
-                    "job_id": job_id,
-                    "status": {"$in": [BulkJobStatus.PENDING, BulkJobStatus.PROCESSING]}
-                },
-                {
-                    "$set": {
-                        "status": BulkJobStatus.PROCESSING,
-                        "started_at": datetime.utcnow(),
-                        "updated_at": datetime.utcnow()
+            if job_id in self.active_jobs:
+                logger.info(f"Job {job_id} is already being dispatched by this worker")
+                return
+            
+            # Pending -> processing. A job that is already processing is joined:
+            # chunk leases stop two workers from sending the same recipients.
+            if current_status == BulkJobStatus.PENDING:
+                await self.db[self.collection_name].update_one(
+                    {"job_id": job_id, "status": BulkJobStatus.PENDING},
+                    {
+                        "$set": {
+                            "status": BulkJobStatus.PROCESSING,
+                            "started_at": datetime.utcnow(),
+                            "updated_at": datetime.utcnow()
+                        }
                     }
-                }
-            )
+                )
             
-            # Check if update succeeded (prevents duplicate execution)
-            if update_result.matched_count == 0:
-                logger.warning(f"Job {job_id} was already picked up by another process, skipping")
+            current = await self.db[self.collection_name].find_one({"job_id": job_id}, {"status": 1})
+            if not current or current.get("status") != BulkJobStatus.PROCESSING:
+                logger.warning(f"Job {job_id} is no longer processable (status: {current and current.get('status')}), skipping")
                 return
             
             logger.info(f"✅ Job {job_id} status confirmed as processing")
             
-            # 4. Track active job (same as your email activeJobs)
+            # 4. Track active job with its dispatch state (cancellation flag lives here)
+            run = BulkDispatchRun(job)
             self.active_jobs[job_id] = {
                 "started_at": datetime.utcnow(),
-                "status": "processing"
+                "status": "processing",
+                "run": run
             }
             
-            # 5. Process recipients in batches (SAME LOOP as your email)
-            await self._process_recipients_in_batches(job)
+            # 5. Dispatch recipients concurrently under the provider rate limit
+            await self._process_recipients_in_batches(job, run)
+            
+            # 6. Mark job as completed (a cancelled job keeps its cancelled status)
+            if run.cancelled:
+                logger.info(f"🛑 Bulk WhatsApp job {job_id} cancelled after {run.processed_count} messages")
+                return
+            
+            open_chunks = await bulk_recipient_store.count_open_chunks(job_id)
+            if open_chunks:
+                logger.info(f"Job {job_id}: {open_chunks} chunks still leased by other workers, leaving finalization to them")
+                return
             
-            # 6. Mark job as completed
             await self._finalize_job(job_id)
             
             logger.info(f"✅ Bulk WhatsApp job completed: {job_id}")
@@ -112,99 +191,209 @@ class BulkWhatsAppProcessor:
             # 7. Remove from active jobs (same as email)
             self.active_jobs.pop(job_id, None)
     
-    async def _process_recipients_in_batches(self, job: Dict[str, Any]) -> None:
+    async def _process_recipients_in_batches(self, job: Dict[str, Any], run: Optional[BulkDispatchRun] = None) -> None:
         """
-        Process recipients in batches with delays - SAME LOGIC as your email processor
+        Drain the job's recipient chunks with a concurrency window of
+        `batch_size` senders, paced by the shared provider token bucket.
+        
+        Senders lease chunks from the recipient store as they need work, so
+        other workers can drain the same job in parallel. Cancellation is read
+        from a cached flag (refreshed by a watcher task and set directly by
+        stop_job); recipient status, counters and activity logs are
+        checkpointed in periodic batches.
         
         Args:
             job: Job document from database
+            run: Dispatch state (created here when not supplied)
         """
         job_id = job["job_id"]
-        recipients = job.get("recipients", [])
-        batch_size = job.get("batch_size", 10)
-        delay_between_messages = job.get("delay_between_messages", 2)
+        run = run or BulkDispatchRun(job)
+        concurrency = max(1, job.get("batch_size", 10))
+        limiter = get_whatsapp_rate_limiter()
+        
+        # Jobs created before the recipient store keep recipients in the job document
+        await bulk_recipient_store.ensure_job_recipients(job)
+        
+        logger.info(
+            f"Dispatching job {job_id} ({job.get('total_recipients', 0)} recipients, "
+            f"concurrency {concurrency}, {limiter.rate:g} msg/s, lease owner {run.owner})"
+        )
         
-        logger.info(f"Processing {len(recipients)} recipients in batches of {batch_size}")
+        queue: asyncio.Queue = asyncio.Queue()
+        started = time.monotonic()
+        watcher = asyncio.create_task(self._watch_cancellation(run))
+        flusher = asyncio.create_task(self._periodic_flush(job, run))
+        senders = [
+            asyncio.create_task(self._sender_lane(job, run, queue, limiter))
+            for _ in range(concurrency)
+        ]
         
-        success_count = 0
-        failed_count = 0
-        skipped_count = 0
-        results = []
+        try:
+            await asyncio.gather(*senders)
+        finally:
+            for task in [*senders, watcher, flusher]:
+                task.cancel()
+            await asyncio.gather(*senders, watcher, flusher, return_exceptions=True)
+            await self._flush_progress(job, run)
         
-        # Process recipients one by one (SAME PATTERN as email)
-        for i, recipient in enumerate(recipients):
+        elapsed = time.monotonic() - started
+        rate = run.processed_count / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Batch processing completed in {elapsed:.1f}s ({rate:.1f} msg/s). "
+            f"Success: {run.success_count}, Failed: {run.failed_count}"
+        )
+    
+    async def _next_recipient(self, run: BulkDispatchRun, queue: asyncio.Queue) -> Optional[Dict[str, Any]]:
+        """Next recipient to send, leasing a new chunk when the local queue runs dry"""
+        while True:
             try:
-                # Check if job was cancelled
-                current_job = await self.db[self.collection_name].find_one({"job_id": job_id})
-                if current_job.get("status") == BulkJobStatus.CANCELLED:
-                    logger.info(f"Job {job_id} was cancelled, stopping processing")
-                    break
-                
-                # Skip if already processed
-                if recipient.get("status") != RecipientStatus.PENDING:
-                    skipped_count += 1
+                return queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            
+            async with run.claim_lock:
+                if not queue.empty():
                     continue
+                if run.cancelled or run.exhausted:
+                    return None
                 
-                # Send message (SAME TRY-CATCH pattern as email)
-                result = await self._send_single_message(job, recipient)
+                chunk = await bulk_recipient_store.claim_chunk(run.job_id, run.owner)
+                if not chunk:
+                    run.exhausted = True
+                    return None
                 
-                if result["success"]:
-                    success_count += 1
-                    recipient_result = {
-                        "lead_id": recipient["lead_id"],
-                        "phone_number": recipient["phone_number"],
-                        "status": RecipientStatus.SENT,
-                        "sent_at": datetime.utcnow(),
-                        "message_id": result.get("message_id")
-                    }
-                else:
-                    failed_count += 1
-                    recipient_result = {
-                        "lead_id": recipient["lead_id"],
-                        "phone_number": recipient["phone_number"],
-                        "status": RecipientStatus.FAILED,
-                        "failed_at": datetime.utcnow(),
-                        "error_message": result.get("error", "Unknown error")
-                    }
-                
-                results.append(recipient_result)
-                
-                # Update progress in database (SAME as email progress updates)
-                await self._update_job_progress(
-                    job_id, 
-                    processed_count=i + 1,
-                    success_count=success_count,
-                    failed_count=failed_count,
-                    skipped_count=skipped_count
-                )
-                
-                # Log individual message activity (SAME as email logging)
-                await self._log_message_activity(job, recipient, result["success"])
-                
-                # Delay between messages (SAME as email delay)
-                if i < len(recipients) - 1:  # Don't delay after last message
-                    logger.debug(f"Waiting {delay_between_messages} seconds before next message")
-                    await asyncio.sleep(delay_between_messages)
+                recipients = await bulk_recipient_store.get_pending_recipients(run.job_id, chunk["chunk"])
+                run.start_chunk(chunk["chunk"], len(recipients))
+                for recipient in recipients:
+                    queue.put_nowait(recipient)
                 
+                if chunk.get("attempts", 1) > 1:
+                    logger.info(f"♻️ Job {run.job_id}: resumed chunk {chunk['chunk']} with {len(recipients)} pending recipients")
+    
+    async def _sender_lane(
+        self,
+        job: Dict[str, Any],
+        run: BulkDispatchRun,
+        queue: asyncio.Queue,
+        limiter: TokenBucket
+    ) -> None:
+        """One concurrent sender: take the next recipient, wait for a token, send"""
+        while not run.cancelled:
+            recipient = await self._next_recipient(run, queue)
+            if recipient is None:
+                return
+            
+            await limiter.acquire()
+            if run.cancelled:
+                return
+            
+            try:
+                result = await self._send_single_message(job, recipient)
             except Exception as e:
                 logger.error(f"Error processing recipient {recipient.get('phone_number')}: {str(e)}")
-                failed_count += 1
-                
-                results.append({
+                result = {"success": False, "error": str(e)}
+            
+            if result["success"]:
+                recipient_result = {
+                    "lead_id": recipient["lead_id"],
+                    "phone_number": recipient["phone_number"],
+                    "status": RecipientStatus.SENT,
+                    "sent_at": datetime.utcnow(),
+                    "message_id": result.get("message_id")
+                }
+            else:
+                recipient_result = {
                     "lead_id": recipient["lead_id"],
                     "phone_number": recipient["phone_number"],
                     "status": RecipientStatus.FAILED,
                     "failed_at": datetime.utcnow(),
-                    "error_message": str(e)
-                })
-        
-        # Update final results
-        await self.db[self.collection_name].update_one(
-            {"job_id": job_id},
-            {"$set": {"results": results, "updated_at": datetime.utcnow()}}
-        )
-        
-        logger.info(f"Batch processing completed. Success: {success_count}, Failed: {failed_count}, Skipped: {skipped_count}")
+                    "error_message": result.get("error", "Unknown error")
+                }
+            
+            run.record(recipient, recipient_result)
+            
+            if len(run.pending) >= settings.bulk_progress_flush_size:
+                await self._flush_progress(job, run)
+    
+    async def _watch_cancellation(self, run: BulkDispatchRun) -> None:
+        """Refresh the cached cancellation flag (covers cancels made by other workers)"""
+        while not run.cancelled:
+            await asyncio.sleep(settings.bulk_cancel_check_seconds)
+            try:
+                current = await self.db[self.collection_name].find_one(
+                    {"job_id": run.job_id},
+                    {"status": 1}
+                )
+                if not current or current.get("status") == BulkJobStatus.CANCELLED:
+                    logger.info(f"Job {run.job_id} was cancelled, stopping processing")
+                    run.cancelled = True
+            except Exception as e:
+                logger.warning(f"Error checking cancellation for job {run.job_id}: {str(e)}")
+    
+    async def _periodic_flush(self, job: Dict[str, Any], run: BulkDispatchRun) -> None:
+        while True:
+            await asyncio.sleep(settings.bulk_progress_flush_seconds)
+            await self._flush_progress(job, run)
+    
+    async def _flush_progress(self, job: Dict[str, Any], run: BulkDispatchRun) -> None:
+        """
+        Checkpoint buffered work: recipient status (one bulk_write), job
+        counters ($inc, so parallel workers add up), finished chunks and lease
+        renewal, then the batch of message activities.
+        """
+        async with run.flush_lock:
+            batch, run.pending = run.pending, []
+            success_delta, run.pending_success = run.pending_success, 0
+            failed_delta, run.pending_failed = run.pending_failed, 0
+            completed, run.completed_chunks = run.completed_chunks, set()
+            
+            try:
+                await bulk_recipient_store.write_results(run.job_id, [
+                    {
+                        "index": recipient["index"],
+                        **{key: value for key, value in result.items() if key not in ("lead_id", "phone_number")}
+                    }
+                    for recipient, result in batch
+                ])
+                await self.db[self.collection_name].update_one(
+                    {"job_id": run.job_id},
+                    {
+                        "$inc": {
+                            "processed_count": success_delta + failed_delta,
+                            "success_count": success_delta,
+                            "failed_count": failed_delta
+                        },
+                        "$set": {"updated_at": datetime.utcnow()}
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Error flushing progress for job {run.job_id}: {str(e)}")
+                # Keep everything so the next flush retries it (recipient writes are idempotent)
+                run.pending = batch + run.pending
+                run.pending_success += success_delta
+                run.pending_failed += failed_delta
+                run.completed_chunks |= completed
+                return
+            
+            try:
+                await bulk_recipient_store.complete_chunks(run.job_id, run.owner, completed)
+                await bulk_recipient_store.renew_leases(run.job_id, run.owner, run.chunk_remaining.keys())
+            except Exception as e:
+                logger.error(f"Error updating chunk leases for job {run.job_id}: {str(e)}")
+                run.completed_chunks |= completed
+            
+            activities = [
+                activity for activity in (
+                    self._build_message_activity(job, recipient, result["status"] == RecipientStatus.SENT)
+                    for recipient, result in batch
+                )
+                if activity
+            ]
+            if activities:
+                try:
+                    await activity_log.log_many(activities)
+                except Exception as e:
+                    logger.error(f"Error logging message activities: {e}")
     
     async def _send_single_message(self, job: Dict[str, Any], recipient: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -357,12 +546,18 @@ class BulkWhatsAppProcessor:
         else:
             final_status = BulkJobStatus.FAILED
         
-        # Update final status
-        await self._update_job_status(
-            job_id, 
-            final_status, 
-            completed_at=datetime.utcnow()
+        # Update final status (only one worker wins when several drained the job)
+        update_result = await self.db[self.collection_name].update_one(
+            {"job_id": job_id, "status": BulkJobStatus.PROCESSING},
+            {"$set": {
+                "status": final_status,
+                "completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }}
         )
+        if update_result.matched_count == 0:
+            logger.info(f"Job {job_id} already finalized or no longer processing")
+            return
         
         # Log completion activity (SAME as email completion logging)
         await self._log_job_completion_activity(job, success_count > 0)
@@ -386,6 +581,51 @@ class BulkWhatsAppProcessor:
         
         logger.error(f"Job {job_id} marked as failed: {error_message}")
     
+    def _build_message_activity(
+        self, 
+        job: Dict[str, Any], 
+        recipient: Dict[str, Any], 
+        success: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Build individual message activity document
+        
+        Args:
+            job: Job configuration
+            recipient: Recipient details
+            success: Whether message was sent successfully
+            
+        Returns:
+            Activity document, or None for custom phone numbers
+        """
+        lead_id = recipient.get("lead_id")
+        
+        # Skip custom phone numbers (not in leads database)
+        if not lead_id or lead_id.startswith("custom_"):
+            return None
+        
+        activity_type = "bulk_whatsapp_sent" if success else "bulk_whatsapp_failed"
+        description = f"WhatsApp message {'sent' if success else 'failed'} via bulk job: {job['job_name']}"
+        
+        return {
+            "_id": ObjectId(),
+            "lead_id": lead_id,
+            "activity_type": activity_type,
+            "description": description,
+            "metadata": {
+                "job_id": job["job_id"],
+                "job_name": job["job_name"],
+                "message_type": job["message_type"],
+                "template_name": job.get("template_name"),
+                "phone_number": recipient["phone_number"],
+                "bulk_campaign": True,
+                "success": success
+            },
+            "created_by": ObjectId(job["created_by"]) if job.get("created_by") else None,
+            "created_by_name": job.get("created_by_name"),
+            "created_at": datetime.utcnow()
+        }
+    
     async def _log_message_activity(
         self, 
         job: Dict[str, Any], 
@@ -401,35 +641,9 @@ class BulkWhatsAppProcessor:
             success: Whether message was sent successfully
         """
         try:
-            lead_id = recipient.get("lead_id")
-            
-            # Skip custom phone numbers (not in leads database)
-            if not lead_id or lead_id.startswith("custom_"):
-                return
-            
-            activity_type = "bulk_whatsapp_sent" if success else "bulk_whatsapp_failed"
-            description = f"WhatsApp message {'sent' if success else 'failed'} via bulk job: {job['job_name']}"
-            
-            activity = {
-                "_id": ObjectId(),
-                "lead_id": lead_id,
-                "activity_type": activity_type,
-                "description": description,
-                "metadata": {
-                    "job_id": job["job_id"],
-                    "job_name": job["job_name"],
-                    "message_type": job["message_type"],
-                    "template_name": job.get("template_name"),
-                    "phone_number": recipient["phone_number"],
-                    "bulk_campaign": True,
-                    "success": success
-                },
-                "created_by": ObjectId(job["created_by"]) if job.get("created_by") else None,
-                "created_by_name": job.get("created_by_name"),
-                "created_at": datetime.utcnow()
-            }
-            
-            await self.db.lead_activities.insert_one(activity)
+            activity = self._build_message_activity(job, recipient, success)
+            if activity:
+                await activity_log.log(activity)
             
         except Exception as e:
             logger.error(f"Error logging message activity: {e}")
@@ -444,11 +658,10 @@ class BulkWhatsAppProcessor:
         """
         try:
             activities = []
-            recipients = job.get("recipients", [])
+            lead_ids = await bulk_recipient_store.get_lead_ids(job["job_id"])
             
             # Create completion activity for each lead (SAME as email)
-            for recipient in recipients:
-                lead_id = recipient.get("lead_id")
+            for lead_id in lead_ids:
                 
                 # Skip custom phone numbers
                 if not lead_id or lead_id.startswith("custom_"):
@@ -478,12 +691,46 @@ class BulkWhatsAppProcessor:
             
             # Insert all activities (SAME as email)
             if activities:
-                await self.db.lead_activities.insert_many(activities)
+                await activity_log.log_many(activities)
                 logger.info(f"Logged {len(activities)} job completion activities")
                 
         except Exception as e:
             logger.error(f"Error logging job completion activities: {e}")
     
+    async def resume_interrupted_jobs(self) -> int:
+        """
+        Restart dispatch for processing jobs whose chunks are unleased or whose
+        leases expired (worker died mid-job), and finalize jobs that were fully
+        sent but never finalized.
+        
+        Returns:
+            Number of jobs resumed
+        """
+        resumed = 0
+        try:
+            jobs = await self.db[self.collection_name].find(
+                {"status": BulkJobStatus.PROCESSING},
+                {"job_id": 1, "recipients_stored": 1}
+            ).to_list(None)
+            
+            for job in jobs:
+                job_id = job["job_id"]
+                if job_id in self.active_jobs:
+                    continue
+                
+                if not job.get("recipients_stored") or await bulk_recipient_store.has_claimable_chunks(job_id):
+                    asyncio.create_task(self.process_bulk_job(job_id))
+                    resumed += 1
+                elif await bulk_recipient_store.count_open_chunks(job_id) == 0:
+                    await self._finalize_job(job_id)
+            
+            if resumed:
+                logger.info(f"♻️ Resumed {resumed} interrupted bulk WhatsApp jobs")
+        except Exception as e:
+            logger.error(f"Error resuming interrupted bulk jobs: {str(e)}")
+        
+        return resumed
+    
     async def get_active_jobs(self) -> Dict[str, Any]:
         """
         Get currently active jobs - SAME as your email active jobs tracking
@@ -491,7 +738,19 @@ class BulkWhatsAppProcessor:
         Returns:
             Dictionary of active jobs
         """
-        return self.active_jobs.copy()
+        active = {}
+        for job_id, info in self.active_jobs.items():
+            entry = {key: value for key, value in info.items() if key != "run"}
+            run = info.get("run")
+            if run:
+                entry.update({
+                    "processed_count": run.processed_count,
+                    "success_count": run.success_count,
+                    "failed_count": run.failed_count,
+                    "cancelled": run.cancelled
+                })
+            active[job_id] = entry
+        return active
     
     async def stop_job(self, job_id: str) -> bool:
         """
@@ -505,6 +764,11 @@ class BulkWhatsAppProcessor:
         """
         try:
             if job_id in self.active_jobs:
+                # Stop the senders immediately on this worker
+                run = self.active_jobs[job_id].get("run")
+                if run:
+                    run.cancelled = True
+                
                 # Mark as cancelled in database
                 await self._update_job_status(
                     job_id, 
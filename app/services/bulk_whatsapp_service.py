@@ -5,10 +5,13 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
 import logging
+import uuid
 from fastapi import HTTPException
 
 from app.config.database import get_database
+from app.services.activity_log_service import activity_log
 from app.services.whatsapp_message_service import WhatsAppMessageService
+from app.services.bulk_recipient_store import bulk_recipient_store
 # 🆕 ADD: Import the scheduler
 from app.utils import timezone_helper
 from app.utils.whatsapp_scheduler import get_whatsapp_scheduler
@@ -93,7 +96,8 @@ class BulkWhatsAppService:
                 logger.info(f"Job scheduled for UTC: {scheduled_utc} (original IST: {request.scheduled_time})")
             
             # 3. Generate unique job ID (SAME PATTERN as email)
-            job_id = f"bulk_whatsapp_{int(datetime.utcnow().timestamp())}"
+            # (random suffix: recipient documents are keyed by job_id, so IDs must not collide)
+            job_id = f"bulk_whatsapp_{int(datetime.utcnow().timestamp())}_{uuid.uuid4().hex[:6]}"
             
             # 4. Create job document (SIMPLIFIED STRUCTURE like your email)
             job_doc = {
@@ -106,9 +110,10 @@ class BulkWhatsAppService:
                 "template_name": request.template_name,
                 "message_content": request.message_content,
                 
-                # Recipients (simplified - just the list like email)
+                # Recipients live in bulk_whatsapp_recipients, keyed by (job_id, index)
                 "total_recipients": len(recipients),
-                "recipients": [recipient.dict() for recipient in recipients],
+                "recipients": [],
+                "recipients_stored": True,
                 "lead_ids": request.lead_ids,  # Store original lead IDs
                 
                 # Progress tracking (SAME as email)
@@ -141,7 +146,10 @@ class BulkWhatsAppService:
                 "updated_at": datetime.utcnow()
             }
             
-            # 5. Save to database (SAME as email)
+            # 5. Save recipients first, then the job (SAME as email)
+            await bulk_recipient_store.store_recipients(
+                job_id, [recipient.dict() for recipient in recipients]
+            )
             await self.db[self.collection_name].insert_one(job_doc)
             
             # 6. Log activity for scheduling (SAME as email logging)
@@ -626,7 +634,7 @@ class BulkWhatsAppService:
             
             # Insert activities (SAME as email)
             if activities:
-                await self.db.lead_activities.insert_many(activities)
+                await activity_log.log_many(activities)
                 logger.info(f"Logged {len(activities)} bulk WhatsApp activities")
                 
         except Exception as e:
@@ -0,0 +1,506 @@
+# app/services/call_record_store.py - Local warehouse of TATA call detail records
+"""
+TATA call records (CDRs) are copied into the `call_records` collection so the
+admin call analytics query MongoDB instead of paging the TATA API on every
+request.
+
+The collection is kept current two ways:
+- webhooks: every Smartflo call webhook is upserted as soon as it arrives
+- catch-up sync: a periodic job pages the TATA API from a watermark (minus an
+  overlap for calls still in progress) and upserts the authoritative records
+
+Each document keeps the raw TATA record under `record` (returned unchanged to
+callers) plus normalized fields for indexed filtering: agent, call datetime,
+date, hour, direction, status and duration.
+
+`resolve_query()` turns TATA-style params ({"from_date", "to_date", "agents",
+...}) into a MongoDB filter, or None when the range is not covered or a filter
+can only be applied by TATA; `query_page()` returns the API's {"results",
+"count"} shape and `iter_records()` streams a whole range.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Iterable, AsyncIterator
+
+from pymongo import ReplaceOne, UpdateOne, ReturnDocument
+
+from ..config.database import get_database
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RECORDS_COLLECTION = "call_records"
+SYNC_STATE_COLLECTION = "call_sync_state"
+SYNC_STATE_ID = "tata_cdr"
+
+SOURCE_API = "api"
+SOURCE_WEBHOOK = "webhook"
+
+TATA_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# TATA reports call times as IST wall-clock time (stored naive, like the API)
+TATA_TIMEZONE = timezone(timedelta(hours=5, minutes=30))
+
+# Sync lease: renewed after every page, so a stalled or crashed sync loses it quickly
+SYNC_LEASE_SECONDS = 300
+
+# TATA filters that can be answered from the normalized fields
+LOCAL_FILTERS = {
+    "from_date", "to_date", "page", "limit", "agents", "call_type", "direction",
+    "duration", "operator", "did_number", "services", "call_id"
+}
+
+DURATION_OPERATORS = {">": "$gt", "<": "$lt", ">=": "$gte", "<=": "$lte", "!=": "$ne", "=": "$eq"}
+
+
+def clean_agent_number(agent_number: Optional[str]) -> str:
+    """Digits only ('+916380480960' -> '916380480960')"""
+    return re.sub(r"[^\d]", "", str(agent_number or ""))
+
+
+def parse_tata_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:19], TATA_DATETIME_FORMAT)
+    except ValueError:
+        try:
+            return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+
+
+def tata_now() -> datetime:
+    """Current IST wall-clock time, naive like the TATA datetimes"""
+    return datetime.now(TATA_TIMEZONE).replace(tzinfo=None)
+
+
+class SyncLeaseLostError(Exception):
+    """Another worker took over the sync lease while this run was paging"""
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_call_key(record: Dict[str, Any]) -> Optional[str]:
+    """Stable identity shared by API records and webhooks for the same call"""
+    key = record.get("uuid") or record.get("call_id") or record.get("id")
+    return str(key) if key else None
+
+
+class CallRecordStore:
+    """call_records collection: ingestion, catch-up sync and local queries"""
+
+    def __init__(self, sync_minutes: int = 5):
+        self.sync_minutes = sync_minutes
+        self.is_running = False
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock = asyncio.Lock()
+        self.last_sync: Dict[str, Any] = {}
+
+    @property
+    def db(self):
+        return get_database()
+
+    @property
+    def records(self):
+        return self.db[RECORDS_COLLECTION]
+
+    @property
+    def sync_state(self):
+        return self.db[SYNC_STATE_COLLECTION]
+
+    # ============================================================================
+    # NORMALIZATION
+    # ============================================================================
+
+    def build_document(self, record: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+        """Raw TATA record -> call_records document (None when it has no identity/time)"""
+        call_key = get_call_key(record)
+        call_date = parse_tata_datetime(f"{record.get('date', '')} {record.get('time', '')}".strip())
+        if not call_key or call_date is None:
+            return None
+
+        return {
+            "call_key": call_key,
+            "call_id": record.get("call_id"),
+            "record_id": str(record.get("id")) if record.get("id") is not None else None,
+            "agent_number": clean_agent_number(record.get("agent_number")),
+            "call_date": call_date,
+            "date": call_date.strftime("%Y-%m-%d"),
+            "hour": call_date.hour,
+            "direction": record.get("direction"),
+            "status": record.get("status"),
+            "service": record.get("service"),
+            "did_number": clean_agent_number(record.get("did_number")),
+            "call_duration": _as_int(record.get("call_duration")),
+            "answered_seconds": _as_int(record.get("answered_seconds")),
+            "has_recording": bool(record.get("recording_url")),
+            "record": record,
+            "source": source,
+            "synced_at": datetime.utcnow()
+        }
+
+    def record_from_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a Smartflo webhook payload onto the TATA call record shape"""
+        answered_agent = payload.get("answered_agent") if isinstance(payload.get("answered_agent"), dict) else {}
+        missed_agents = payload.get("missed_agent") if isinstance(payload.get("missed_agent"), list) else []
+        missed_agent = missed_agents[0] if missed_agents and isinstance(missed_agents[0], dict) else {}
+
+        agent_number = (
+            answered_agent.get("number")
+            or payload.get("answered_agent_number")
+            or missed_agent.get("number")
+            or ""
+        )
+        agent_name = answered_agent.get("name") or payload.get("answered_agent_name") or missed_agent.get("name") or ""
+        if agent_name == "_name":
+            agent_name = ""
+
+        direction = payload.get("direction") or "outbound"
+        started = parse_tata_datetime(payload.get("start_stamp")) or tata_now()
+        call_status = payload.get("call_status") or "unknown"
+
+        return {
+            "uuid": payload.get("uuid"),
+            "call_id": payload.get("call_id"),
+            "direction": direction,
+            "status": "answered" if call_status == "answered" else ("missed" if call_status in ("missed", "noanswer", "no_answer") else call_status),
+            "service": payload.get("service") or "",
+            "date": started.strftime("%Y-%m-%d"),
+            "time": started.strftime("%H:%M:%S"),
+            "end_stamp": payload.get("end_stamp"),
+            "call_duration": _as_int(payload.get("duration")),
+            "answered_seconds": _as_int(payload.get("billsec")),
+            "agent_number": agent_number,
+            "agent_name": agent_name,
+            "client_number": payload.get("call_to_number") if direction == "outbound" else payload.get("caller_id_number"),
+            "did_number": payload.get("did_number") or (
+                payload.get("caller_id_number") if direction == "outbound" else payload.get("call_to_number")
+            ),
+            "recording_url": payload.get("recording_url"),
+            "hangup_cause": payload.get("hangup_cause"),
+            "circle": payload.get("circle")
+        }
+
+    # ============================================================================
+    # INGESTION
+    # ============================================================================
+
+    async def upsert_records(self, records: Iterable[Dict[str, Any]], source: str = SOURCE_API) -> int:
+        """
+        Upsert raw TATA records in one bulk_write.
+
+        API records are authoritative and replace whatever is stored; webhook
+        records only fill in calls the sync has not fetched yet.
+        """
+        operations = []
+        for record in records:
+            document = self.build_document(record, source)
+            if document is None:
+                continue
+            if source == SOURCE_API:
+                operations.append(ReplaceOne({"call_key": document["call_key"]}, document, upsert=True))
+            else:
+                operations.append(UpdateOne(
+                    {"call_key": document["call_key"], "source": {"$ne": SOURCE_API}},
+                    {"$set": document},
+                    upsert=False
+                ))
+                insert_fields = {key: value for key, value in document.items() if key != "call_key"}
+                operations.append(UpdateOne(
+                    {"call_key": document["call_key"]},
+                    {"$setOnInsert": insert_fields},
+                    upsert=True
+                ))
+
+        if not operations:
+            return 0
+        await self.records.bulk_write(operations, ordered=True)
+        return len(operations) if source == SOURCE_API else len(operations) // 2
+
+    async def ingest_webhook(self, payload: Dict[str, Any]) -> bool:
+        """Store a call webhook; never raises (webhooks must always be acknowledged)"""
+        try:
+            from .call_rollup_service import call_rollup_service
+
+            record = self.record_from_webhook(payload)
+            stored = await self.upsert_records([record], source=SOURCE_WEBHOOK)
+            if stored:
+                await call_rollup_service.refresh([record["date"]], [clean_agent_number(record["agent_number"])])
+            return stored > 0
+        except Exception as e:
+            logger.error(f"Error storing call webhook in call_records: {str(e)}")
+            return False
+
+    # ============================================================================
+    # CATCH-UP SYNC
+    # ============================================================================
+
+    async def get_sync_state(self) -> Optional[Dict[str, Any]]:
+        return await self.sync_state.find_one({"_id": SYNC_STATE_ID})
+
+    async def _acquire_sync_lease(self, owner: str) -> bool:
+        """One worker syncs at a time; a crashed worker's lease expires"""
+        now = datetime.utcnow()
+        try:
+            state = await self.sync_state.find_one_and_update(
+                {
+                    "_id": SYNC_STATE_ID,
+                    "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]
+                },
+                {"$set": {"lease_owner": owner, "lease_expires_at": now + timedelta(seconds=SYNC_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception:
+            # Upsert raced with a live lease (duplicate _id)
+            return False
+        return bool(state and state.get("lease_owner") == owner)
+
+    async def _renew_sync_lease(self, owner: str) -> None:
+        """Extend the lease while paging; raises SyncLeaseLostError when it is no longer ours"""
+        result = await self.sync_state.update_one(
+            {"_id": SYNC_STATE_ID, "lease_owner": owner},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=SYNC_LEASE_SECONDS)}}
+        )
+        if result.matched_count != 1:
+            raise SyncLeaseLostError("Sync lease was taken over by another worker")
+
+    async def _release_sync_lease(self, owner: str, updates: Dict[str, Any]) -> bool:
+        """Store the run's outcome and drop the lease; False when the lease was lost"""
+        result = await self.sync_state.update_one(
+            {"_id": SYNC_STATE_ID, "lease_owner": owner},
+            {"$set": {**updates, "lease_owner": None, "lease_expires_at": None}}
+        )
+        if result.matched_count != 1:
+            logger.warning("⚠️ Call record sync lease was lost before release, run outcome not stored")
+            return False
+        return True
+
+    async def sync_since_watermark(self) -> Dict[str, Any]:
+        """
+        Page the TATA API from the watermark (minus overlap) up to now and
+        upsert every record. The first run backfills settings.call_records_backfill_days.
+        """
+        from .tata_admin_service import tata_admin_service
+        from .call_rollup_service import call_rollup_service
+        from .realtime_broker import WORKER_ID
+
+        if self._sync_lock.locked():
+            return {"success": False, "error": "Sync already running"}
+
+        async with self._sync_lock:
+            if not await self._acquire_sync_lease(WORKER_ID):
+                return {"success": False, "skipped": True, "error": "Sync running on another worker"}
+
+            state = await self.get_sync_state() or {}
+            # TATA dates are IST wall-clock time, like the from/to dates the dashboards send
+            sync_started = tata_now()
+            watermark = state.get("watermark")
+            if watermark:
+                window_start = watermark - timedelta(minutes=settings.call_records_sync_overlap_minutes)
+                backfilled_from = state.get("backfilled_from") or window_start
+            else:
+                window_start = (sync_started - timedelta(days=settings.call_records_backfill_days)).replace(
+                    hour=0, minute=0, second=0, microsecond=0
+                )
+                backfilled_from = window_start
+
+            stored = 0
+            pages = 0
+            error = None
+            try:
+                # Pages arrive in order from the concurrent paginator and are written as they come
+                async for records in tata_admin_service.iter_call_record_pages({
+                    "from_date": window_start.strftime(TATA_DATETIME_FORMAT),
+                    "to_date": sync_started.strftime(TATA_DATETIME_FORMAT)
+                }):
+                    pages += 1
+                    stored += await self.upsert_records(records, source=SOURCE_API)
+                    await self._renew_sync_lease(WORKER_ID)
+            except Exception as e:
+                error = str(e)
+
+            if stored:
+                try:
+                    await call_rollup_service.refresh_range(window_start, sync_started)
+                except Exception as e:
+                    logger.error(f"Error refreshing call rollups after sync: {str(e)}")
+
+            finished = datetime.utcnow()
+            if error:
+                # Keep the old watermark; the next run retries the whole window
+                await self._release_sync_lease(WORKER_ID, {"last_error": error, "last_error_at": finished})
+                logger.error(f"❌ Call record sync failed after {stored} records: {error}")
+            elif await self._release_sync_lease(WORKER_ID, {
+                "watermark": sync_started,
+                "backfilled_from": backfilled_from,
+                "last_synced_at": finished,
+                "last_error": None
+            }):
+                logger.info(f"📞 Call record sync stored {stored} records ({window_start} -> {sync_started})")
+            else:
+                error = "Sync lease lost before the watermark was stored"
+
+            self.last_sync = {
+                "success": error is None,
+                "records": stored,
+                "pages": pages,
+                "window_start": window_start,
+                "window_end": sync_started,
+                "finished_at": finished,
+                "error": error
+            }
+            return self.last_sync
+
+    # ============================================================================
+    # LOCAL QUERIES
+    # ============================================================================
+
+    async def covers(self, from_date: Optional[datetime], to_date: Optional[datetime]) -> bool:
+        """
+        True when the store holds every call in [from_date, to_date]: the range
+        starts after the backfill start and either ends before the watermark or
+        the sync is current (webhooks cover the gap since the last run).
+        """
+        if not self.is_running or from_date is None or to_date is None:
+            return False
+        state = await self.get_sync_state()
+        if not state or not state.get("watermark") or not state.get("backfilled_from"):
+            return False
+        if from_date < state["backfilled_from"]:
+            return False
+        if to_date <= state["watermark"]:
+            return True
+        last_synced_at = state.get("last_synced_at")
+        max_lag = timedelta(minutes=max(self.sync_minutes * 3, 15))
+        return bool(last_synced_at and datetime.utcnow() - last_synced_at <= max_lag)
+
+    def build_filter(self, params: Dict[str, Any], agent_numbers: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """TATA params -> MongoDB filter (None when a filter needs the TATA API)"""
+        if any(value not in (None, "") and key not in LOCAL_FILTERS for key, value in params.items()):
+            return None
+
+        from_date = parse_tata_datetime(params.get("from_date"))
+        to_date = parse_tata_datetime(params.get("to_date"))
+        query: Dict[str, Any] = {"call_date": {"$gte": from_date, "$lte": to_date}}
+
+        if agent_numbers is not None:
+            query["agent_number"] = {"$in": [clean_agent_number(number) for number in agent_numbers]}
+
+        call_type = params.get("call_type")
+        if call_type == "c":
+            query["status"] = "answered"
+        elif call_type == "m":
+            query["status"] = {"$ne": "answered"}
+
+        if params.get("direction"):
+            query["direction"] = params["direction"]
+
+        if params.get("duration") not in (None, "") and params.get("operator"):
+            operator = DURATION_OPERATORS.get(params["operator"])
+            if operator is None:
+                return None
+            query["call_duration"] = {operator: _as_int(params["duration"])}
+
+        if params.get("did_number"):
+            query["did_number"] = clean_agent_number(params["did_number"])
+
+        if params.get("services"):
+            query["service"] = {"$in": [service.strip() for service in str(params["services"]).split(",")]}
+
+        if params.get("call_id"):
+            call_id = str(params["call_id"])
+            query["$or"] = [{"call_key": call_id}, {"call_id": call_id}, {"record_id": call_id}]
+
+        return query
+
+    async def resolve_query(
+        self,
+        params: Dict[str, Any],
+        agent_numbers: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        MongoDB filter for TATA-style params, or None when call_records does not
+        cover the range or a filter needs the TATA API
+
+        Args:
+            agent_numbers: Resolved agent phone numbers for the `agents` filter
+        """
+        from_date = parse_tata_datetime(params.get("from_date"))
+        to_date = parse_tata_datetime(params.get("to_date"))
+        if not await self.covers(from_date, to_date):
+            return None
+        return self.build_filter(params, agent_numbers)
+
+    async def query_page(self, query: Dict[str, Any], page: Any = 1, limit: Any = 100) -> Dict[str, Any]:
+        """One page of records, newest first, as {"results", "count"} like the TATA API"""
+        limit = max(1, _as_int(limit) or 100)
+        page = max(1, _as_int(page) or 1)
+        cursor = self.records.find(query, {"record": 1, "_id": 0}).sort("call_date", -1)
+        documents = await cursor.skip((page - 1) * limit).limit(limit).to_list(limit)
+        count = await self.records.count_documents(query)
+        return {"results": [document["record"] for document in documents], "count": count}
+
+    async def iter_records(self, query: Dict[str, Any], batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every matching record, newest first (no cap, bounded memory)"""
+        cursor = self.records.find(query, {"record": 1, "_id": 0}).sort("call_date", -1).batch_size(batch_size)
+        async for document in cursor:
+            yield document["record"]
+
+    async def get_stats(self) -> Dict[str, Any]:
+        state = await self.get_sync_state() or {}
+        return {
+            "running": self.is_running,
+            "sync_minutes": self.sync_minutes,
+            "records": await self.records.estimated_document_count(),
+            "watermark": state.get("watermark"),
+            "backfilled_from": state.get("backfilled_from"),
+            "last_synced_at": state.get("last_synced_at"),
+            "last_error": state.get("last_error"),
+            "last_sync": self.last_sync
+        }
+
+    # ============================================================================
+    # PERIODIC SYNC
+    # ============================================================================
+
+    async def start(self):
+        if self.is_running or self.sync_minutes <= 0:
+            return
+        self.is_running = True
+        self._task = asyncio.create_task(self._sync_loop())
+        logger.info("📞 Call record sync started")
+
+    async def stop(self):
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("🛑 Call record sync stopped")
+
+    async def _sync_loop(self):
+        while self.is_running:
+            try:
+                await self.sync_since_watermark()
+                await asyncio.sleep(self.sync_minutes * 60)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in call record sync loop: {e}")
+                await asyncio.sleep(60)
+
+
+# Global store instance
+call_record_store = CallRecordStore(sync_minutes=settings.call_records_sync_minutes)
@@ -0,0 +1,237 @@
+# app/services/call_rollup_service.py - Hourly/daily call rollups maintained from call_records
+"""
+Maintains per-agent rollups of the local call_records warehouse:
+
+- call_rollups_hourly: one document per (agent_number, date, hour)
+- call_rollups_daily:  one document per (agent_number, date)
+
+Rollups are recomputed per affected date from call_records with one
+aggregation, so replaying or replacing records (webhook first, authoritative
+sync record later) never double-counts. The catch-up sync refreshes the dates
+of its window; each webhook refreshes its agent's day.
+
+Analytics read the rollups instead of raw records whenever call_records covers
+the requested range; see app/utils/call_rollups.py for the document shape and
+the merge helpers.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Iterable
+
+from pymongo import DeleteOne, ReplaceOne
+
+from ..config.database import get_database
+from ..utils.call_rollups import DURATION_BUCKETS, empty_rollup
+from .call_record_store import call_record_store, parse_tata_datetime, clean_agent_number
+
+logger = logging.getLogger(__name__)
+
+HOURLY_COLLECTION = "call_rollups_hourly"
+DAILY_COLLECTION = "call_rollups_daily"
+
+ROLLUP_FIELDS = ("total", "answered", "missed", "duration", "recordings", "inbound", "outbound")
+
+# Dates refreshed per aggregation during a rebuild
+REBUILD_BATCH_DAYS = 7
+
+
+def _answered_duration_in(lower: int, upper: Optional[int]) -> Dict[str, Any]:
+    conditions = [
+        {"$eq": ["$status", "answered"]},
+        {"$gt": ["$call_duration", 0]},
+        {"$gte": ["$call_duration", lower]}
+    ]
+    if upper is not None:
+        conditions.append({"$lt": ["$call_duration", upper]})
+    return {"$sum": {"$cond": [{"$and": conditions}, 1, 0]}}
+
+
+class CallRollupService:
+    """Hourly and daily per-agent call aggregates"""
+
+    @property
+    def db(self):
+        return get_database()
+
+    @property
+    def hourly(self):
+        return self.db[HOURLY_COLLECTION]
+
+    @property
+    def daily(self):
+        return self.db[DAILY_COLLECTION]
+
+    # ============================================================================
+    # MAINTENANCE
+    # ============================================================================
+
+    def _rollup_pipeline(self, match: Dict[str, Any]) -> List[Dict[str, Any]]:
+        group: Dict[str, Any] = {
+            "_id": {"agent_number": "$agent_number", "date": "$date", "hour": "$hour"},
+            "total": {"$sum": 1},
+            "answered": {"$sum": {"$cond": [{"$eq": ["$status", "answered"]}, 1, 0]}},
+            "missed": {"$sum": {"$cond": [{"$eq": ["$status", "answered"]}, 0, 1]}},
+            "duration": {"$sum": {"$cond": [{"$eq": ["$status", "answered"]}, "$call_duration", 0]}},
+            "recordings": {"$sum": {"$cond": ["$has_recording", 1, 0]}},
+            "inbound": {"$sum": {"$cond": [{"$eq": ["$direction", "inbound"]}, 1, 0]}},
+            "outbound": {"$sum": {"$cond": [{"$eq": ["$direction", "outbound"]}, 1, 0]}}
+        }
+        for position, (lower, upper, _) in enumerate(DURATION_BUCKETS):
+            group[f"bucket_{position}"] = _answered_duration_in(lower, upper)
+        return [{"$match": match}, {"$group": group}]
+
+    async def refresh(self, dates: Iterable[str], agent_numbers: Optional[Iterable[str]] = None) -> int:
+        """
+        Recompute the rollups of the given dates (optionally only some agents)
+        from call_records. Rollups that no longer have records are removed;
+        rows this run did not produce are deleted only if nobody rewrote them
+        since they were read, so an overlapping refresh keeps its rows.
+
+        Returns:
+            Number of hourly rollups written
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return 0
+
+        scope: Dict[str, Any] = {"date": {"$in": dates}}
+        if agent_numbers is not None:
+            scope["agent_number"] = {"$in": sorted(set(agent_numbers))}
+
+        # Rows present before the aggregation; the ones this run does not
+        # produce again are the stale candidates
+        existing_hourly = await self.hourly.find(
+            scope, {"agent_number": 1, "date": 1, "hour": 1, "refreshed_at": 1}
+        ).to_list(None)
+        existing_daily = await self.daily.find(
+            scope, {"agent_number": 1, "date": 1, "refreshed_at": 1}
+        ).to_list(None)
+
+        rows = await call_record_store.records.aggregate(self._rollup_pipeline(scope)).to_list(None)
+
+        refreshed_at = datetime.utcnow()
+        hourly_docs = []
+        daily_docs: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            key = row["_id"]
+            rollup = empty_rollup(key.get("agent_number") or "", key["date"], key.get("hour"))
+            for field in ROLLUP_FIELDS:
+                rollup[field] = row.get(field, 0)
+            rollup["duration_histogram"] = [row.get(f"bucket_{position}", 0) for position in range(len(DURATION_BUCKETS))]
+            rollup["refreshed_at"] = refreshed_at
+            hourly_docs.append(rollup)
+
+            day = daily_docs.get((rollup["agent_number"], rollup["date"]))
+            if day is None:
+                day = daily_docs[(rollup["agent_number"], rollup["date"])] = {
+                    **empty_rollup(rollup["agent_number"], rollup["date"], None),
+                    "refreshed_at": refreshed_at
+                }
+                day.pop("hour")
+            for field in ROLLUP_FIELDS:
+                day[field] += rollup[field]
+            for position, count in enumerate(rollup["duration_histogram"]):
+                day["duration_histogram"][position] += count
+
+        if hourly_docs:
+            await self.hourly.bulk_write([
+                ReplaceOne(
+                    {"agent_number": doc["agent_number"], "date": doc["date"], "hour": doc["hour"]},
+                    doc,
+                    upsert=True
+                )
+                for doc in hourly_docs
+            ], ordered=False)
+            await self.daily.bulk_write([
+                ReplaceOne({"agent_number": doc["agent_number"], "date": doc["date"]}, doc, upsert=True)
+                for doc in daily_docs.values()
+            ], ordered=False)
+
+        # Buckets whose calls moved (e.g. agent corrected by the sync) or disappeared
+        produced_hourly = {(doc["agent_number"], doc["date"], doc["hour"]) for doc in hourly_docs}
+        stale_hourly = [
+            DeleteOne({"_id": doc["_id"], "refreshed_at": doc.get("refreshed_at")})
+            for doc in existing_hourly
+            if (doc.get("agent_number"), doc.get("date"), doc.get("hour")) not in produced_hourly
+        ]
+        stale_daily = [
+            DeleteOne({"_id": doc["_id"], "refreshed_at": doc.get("refreshed_at")})
+            for doc in existing_daily
+            if (doc.get("agent_number"), doc.get("date")) not in daily_docs
+        ]
+        if stale_hourly:
+            await self.hourly.bulk_write(stale_hourly, ordered=False)
+        if stale_daily:
+            await self.daily.bulk_write(stale_daily, ordered=False)
+
+        return len(hourly_docs)
+
+    async def refresh_range(self, from_date: datetime, to_date: datetime) -> int:
+        """Recompute every date between two datetimes, a batch of days at a time"""
+        written = 0
+        day = from_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= to_date:
+            batch = [
+                (day + timedelta(days=offset)).strftime("%Y-%m-%d")
+                for offset in range(REBUILD_BATCH_DAYS)
+                if day + timedelta(days=offset) <= to_date
+            ]
+            written += await self.refresh(batch)
+            day += timedelta(days=REBUILD_BATCH_DAYS)
+        return written
+
+    # ============================================================================
+    # READS
+    # ============================================================================
+
+    async def get_hourly_rollups(
+        self,
+        from_date: str,
+        to_date: str,
+        agent_numbers: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Hourly rollups for a TATA-style datetime range ("YYYY-MM-DD HH:MM:SS"),
+        or None when call_records does not cover the range.
+
+        Ranges are resolved to whole hours: a range starting or ending inside
+        an hour includes that hour.
+        """
+        start = parse_tata_datetime(from_date)
+        end = parse_tata_datetime(to_date)
+        if not await call_record_store.covers(start, end):
+            return None
+
+        query: Dict[str, Any] = {"date": {"$gte": start.strftime("%Y-%m-%d"), "$lte": end.strftime("%Y-%m-%d")}}
+        if agent_numbers is not None:
+            query["agent_number"] = {"$in": [clean_agent_number(number) for number in agent_numbers]}
+
+        rollups = await self.hourly.find(query, {"_id": 0, "refreshed_at": 0}).to_list(None)
+        first_day, last_day = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        return [
+            rollup for rollup in rollups
+            if not (rollup["date"] == first_day and (rollup.get("hour") or 0) < start.hour)
+            and not (rollup["date"] == last_day and (rollup.get("hour") or 0) > end.hour)
+        ]
+
+    async def get_daily_rollups(
+        self,
+        from_date: str,
+        to_date: str,
+        agent_numbers: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Daily rollups for whole days ("YYYY-MM-DD"), or None when not covered"""
+        start = parse_tata_datetime(f"{from_date[:10]} 00:00:00")
+        end = parse_tata_datetime(f"{to_date[:10]} 23:59:59")
+        if not await call_record_store.covers(start, end):
+            return None
+
+        query: Dict[str, Any] = {"date": {"$gte": from_date[:10], "$lte": to_date[:10]}}
+        if agent_numbers is not None:
+            query["agent_number"] = {"$in": [clean_agent_number(number) for number in agent_numbers]}
+        return await self.daily.find(query, {"_id": 0, "refreshed_at": 0}).to_list(None)
+
+
+# Global service instance
+call_rollup_service = CallRollupService()
@@ -4,6 +4,7 @@ from bson import ObjectId
 import logging
 
 from app.config.database import get_database
+from app.services.activity_log_service import activity_log
 
 logger = logging.getLogger(__name__)
 
@@ -221,8 +222,6 @@ class CommunicationService:
             message_content (str, optional): Message preview for WhatsApp
         """
         try:
-            db = get_database()
-            
             # Determine who performed this action
             created_by = None
             created_by_name = "System Generated"  # Default fallback for webhooks
@@ -294,7 +293,7 @@ class CommunicationService:
             }
             
             # Insert activity
-            await db.lead_activities.insert_one(activity_doc)
+            await activity_log.log(activity_doc)
             logger.info(f"Communication activity logged for lead {lead_id} via {method} by {created_by_name}")
             
         except Exception as e:
@@ -6,6 +6,8 @@ import logging
 from fastapi import HTTPException, status
 
 from app.config.database import get_database
+from app.services.activity_log_service import activity_log
+from app.services.user_directory_service import user_directory
 from app.models.contact import ContactCreate, ContactUpdate
 
 logger = logging.getLogger(__name__)
@@ -583,8 +585,7 @@ class ContactService:
     async def _get_user_name(self, user_id: str) -> str:
         """Get user's display name"""
         try:
-            db = get_database()  # Get database connection when needed
-            user = await db.users.find_one({"_id": ObjectId(user_id)})
+            user = await user_directory.get_by_id(user_id)
             if user:
                 first_name = user.get('first_name', '')
                 last_name = user.get('last_name', '')
@@ -600,7 +601,6 @@ class ContactService:
                                   user_id: str, user_name: str, metadata: Dict[str, Any]):
         """Log contact activity"""
         try:
-            db = get_database()  # Get database connection when needed
             activity_doc = {
                 "lead_id": lead_id,
                 "activity_type": activity_type,
@@ -610,7 +610,7 @@ class ContactService:
                 "created_at": datetime.utcnow(),
                 "metadata": metadata
             }
-            await db.lead_activities.insert_one(activity_doc)
+            await activity_log.log(activity_doc)
             logger.info(f"Contact activity logged: {activity_type}")
         except Exception as e:
             logger.warning(f"Failed to log contact activity: {e}")
@@ -0,0 +1,212 @@
+# app/services/cv_extraction_pool.py - Process pool for CV text extraction
+"""
+PyMuPDF/python-docx parsing and the regex field extraction are CPU-bound and
+used to run on the event loop. While a large PDF was parsed, every other
+request waited for it to finish.
+
+CVExtractionPool runs extraction in a bounded ProcessPoolExecutor:
+
+- at most `max_workers` CVs parse at once (one per worker process); more wait
+  in an asyncio queue, and callers are rejected once `max_queue` are pending
+- each CV gets `timeout_seconds`; a timed-out worker is terminated and the
+  pool is recycled so a pathological file cannot pin a core
+- PDFs are parsed up to `max_pdf_pages` pages
+- queue depth, wait and run latency are exposed via get_stats()
+
+Workers use the "spawn" start method: forking a process that runs Motor's
+background threads can deadlock the child.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional
+
+from ..config.settings import settings
+from .cv_extraction_service import extract_cv_in_worker
+
+logger = logging.getLogger(__name__)
+
+# Recent latencies kept for the p95 in get_stats()
+LATENCY_SAMPLES = 200
+
+
+class CVExtractionBusyError(Exception):
+    """Raised when the extraction queue is full"""
+
+
+class CVExtractionTimeoutError(Exception):
+    """Raised when a CV takes longer than the per-file timeout"""
+
+
+def _latency_summary(samples) -> Dict[str, float]:
+    if not samples:
+        return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "avg": round(sum(ordered) / len(ordered), 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1)
+    }
+
+
+class CVExtractionPool:
+    """Bounded process pool running CV extraction off the event loop"""
+
+    def __init__(self, max_workers: int, max_queue: int, timeout_seconds: float, max_pdf_pages: Optional[int]):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(self.max_workers, max_queue)
+        self.timeout_seconds = timeout_seconds
+        self.max_pdf_pages = max_pdf_pages or None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.waiting = 0
+        self.running = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.timed_out_count = 0
+        self.rejected_count = 0
+        self.restart_count = 0
+        self.wait_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.run_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    # ============================================================================
+    # LIFECYCLE
+    # ============================================================================
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor, reason: str) -> None:
+        """Terminate a pool's workers and start a fresh pool on next use"""
+        if self._executor is executor:
+            self._executor = None
+        self.restart_count += 1
+        logger.warning(f"♻️ Recycling CV extraction pool: {reason}")
+
+        # A running task cannot be cancelled; its worker has to be killed
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self) -> None:
+        self._get_executor()
+        logger.info(
+            f"🧾 CV extraction pool ready: {self.max_workers} workers, "
+            f"queue {self.max_queue}, timeout {self.timeout_seconds:.0f}s"
+        )
+
+    async def stop(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("🧾 CV extraction pool stopped")
+
+    # ============================================================================
+    # EXTRACTION
+    # ============================================================================
+
+    def ensure_capacity(self) -> None:
+        """Raise CVExtractionBusyError when no more CVs can be queued"""
+        if self.waiting + self.running >= self.max_queue:
+            self.rejected_count += 1
+            raise CVExtractionBusyError(f"CV extraction queue is full ({self.max_queue} pending), try again shortly")
+
+    async def extract(self, file_content: bytes, mime_type: str, filename: str) -> Dict[str, Any]:
+        """
+        Extract text and structured fields from one CV in a worker process.
+
+        Returns:
+            {"text_length", "file_info", "extraction_result"}
+
+        Raises:
+            CVExtractionBusyError: the queue is full
+            CVExtractionTimeoutError: the CV exceeded the per-file timeout
+        """
+        self.ensure_capacity()
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.monotonic()
+        self.running += 1
+        try:
+            result = await self._run(file_content, mime_type, filename)
+            self.completed_count += 1
+            return result
+        except Exception:
+            self.failed_count += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+            self.wait_ms.append((started - queued_at) * 1000)
+            self.run_ms.append((time.monotonic() - started) * 1000)
+
+    async def _run(self, file_content: bytes, mime_type: str, filename: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(2):
+            executor = self._get_executor()
+            future = loop.run_in_executor(
+                executor, extract_cv_in_worker, file_content, mime_type, filename, self.max_pdf_pages
+            )
+            try:
+                return await asyncio.wait_for(future, timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                self.timed_out_count += 1
+                self._recycle(executor, f"{filename} exceeded {self.timeout_seconds:.0f}s")
+                raise CVExtractionTimeoutError(f"CV extraction timed out after {self.timeout_seconds:.0f}s")
+            except BrokenProcessPool:
+                # Killed by another CV's timeout (pool already replaced): retry once on the new pool
+                if attempt == 0 and self._executor is not executor:
+                    continue
+                self._recycle(executor, "worker process died")
+                raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed_count,
+            "failed": self.failed_count,
+            "timed_out": self.timed_out_count,
+            "rejected": self.rejected_count,
+            "pool_restarts": self.restart_count,
+            "timeout_seconds": self.timeout_seconds,
+            "max_pdf_pages": self.max_pdf_pages,
+            "wait_ms": _latency_summary(self.wait_ms),
+            "run_ms": _latency_summary(self.run_ms)
+        }
+
+
+# Global pool instance
+cv_extraction_pool = CVExtractionPool(
+    max_workers=settings.cv_extraction_workers,
+    max_queue=settings.cv_extraction_max_queue,
+    timeout_seconds=settings.cv_extraction_timeout_seconds,
+    max_pdf_pages=settings.cv_max_pdf_pages
+)
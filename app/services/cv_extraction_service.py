@@ -15,13 +15,14 @@ logger = logging.getLogger(__name__)
 class CVExtractionService:
     """Service for extracting structured data from CV files"""
     
-    def __init__(self):
+    def __init__(self, max_pdf_pages: Optional[int] = None):
         self.supported_types = {
             'application/pdf': ['.pdf'],
             'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ['.docx'],
             'application/msword': ['.doc']
         }
         self.max_file_size = 10 * 1024 * 1024  # 10MB
+        self.max_pdf_pages = max_pdf_pages  # Only the first N pages are parsed (None = all)
         self.extractor_version = "1.0"
         
         # Confidence thresholds
@@ -95,12 +96,17 @@ class CVExtractionService:
             doc = fitz.open(stream=file_content, filetype="pdf")
             text_parts = []
             
+            pages_to_read = len(doc)
+            if self.max_pdf_pages and pages_to_read > self.max_pdf_pages:
+                pages_to_read = self.max_pdf_pages
+            
             file_info = {
                 "pages": len(doc),
+                "pages_processed": pages_to_read,
                 "file_type": "PDF"
             }
             
-            for page_num in range(len(doc)):
+            for page_num in range(pages_to_read):
                 page = doc[page_num]
                 page_text = page.get_text()
                 if page_text.strip():
@@ -544,4 +550,29 @@ class CVExtractionService:
         if not extracted_data.get('experience'):
             recommendations.append("Consider adding work experience details")
         
-        return recommendations
\ No newline at end of file
+        return recommendations
+
+
+# ============================================================================
+# PROCESS POOL ENTRY POINT
+# ============================================================================
+
+_worker_service: Optional[CVExtractionService] = None
+
+def extract_cv_in_worker(file_content: bytes, mime_type: str, filename: str, max_pdf_pages: Optional[int]) -> Dict[str, Any]:
+    """
+    Text extraction and field parsing for one CV, run inside a worker process
+    (see cv_extraction_pool). Returns the parsed result and the text length,
+    not the raw text, to keep the result small to pickle.
+    """
+    global _worker_service
+    if _worker_service is None or _worker_service.max_pdf_pages != max_pdf_pages:
+        _worker_service = CVExtractionService(max_pdf_pages=max_pdf_pages)
+    
+    text, file_info = _worker_service.extract_text_from_file(file_content, mime_type, filename)
+    extraction_result = _worker_service.extract_all_details(text, filename)
+    return {
+        "text_length": len(text),
+        "file_info": file_info,
+        "extraction_result": extraction_result
+    }
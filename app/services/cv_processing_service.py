@@ -20,6 +20,7 @@ from ..models.cv_processing import (
 )
 from ..models.lead import ExperienceLevel  # 🔧 ADD THIS IMPORT
 from .cv_extraction_service import CVExtractionService
+from .cv_extraction_pool import cv_extraction_pool, CVExtractionBusyError
 from .lead_service import lead_service
 
 logger = logging.getLogger(__name__)
@@ -28,7 +29,7 @@ class CVProcessingService:
     """Service for managing CV processing workflow and business logic"""
     
     def __init__(self):
-        self.extraction_service = CVExtractionService()
+        self.extraction_service = CVExtractionService(max_pdf_pages=cv_extraction_pool.max_pdf_pages)
         self.temp_file_retention_hours = 24  # Keep temp files for 24 hours
         
     def get_db(self):
@@ -146,6 +147,17 @@ class CVProcessingService:
                     "validation_errors": validation_result["errors"]
                 }
             
+            # Don't create a processing record the extraction pool cannot take
+            try:
+                cv_extraction_pool.ensure_capacity()
+            except CVExtractionBusyError as busy_error:
+                return {
+                    "success": False,
+                    "busy": True,
+                    "message": str(busy_error),
+                    "processing_id": processing_id
+                }
+            
             # Step 2: Create initial processing record
             processing_doc = {
                 "processing_id": processing_id,
@@ -172,10 +184,11 @@ class CVProcessingService:
                     "processing_id": processing_id
                 }
             
-            # Step 3: Extract text and structured data
+            # Step 3: Extract text and structured data (in a worker process)
             try:
-                text, file_info = self.extraction_service.extract_text_from_file(file_content, mime_type, filename)
-                extraction_result = self.extraction_service.extract_all_details(text, filename)
+                worker_result = await cv_extraction_pool.extract(file_content, mime_type, filename)
+                file_info = worker_result["file_info"]
+                extraction_result = worker_result["extraction_result"]
                 
                 # Step 4: Update processing record with extracted data
                 update_doc = {
@@ -184,7 +197,7 @@ class CVProcessingService:
                     "confidence_scores": extraction_result["confidence_scores"],
                     "file_metadata": file_info,
                     "extraction_metadata": extraction_result["extraction_metadata"],
-                    "raw_text_length": len(text),
+                    "raw_text_length": worker_result["text_length"],
                     "processing_time_ms": extraction_result["extraction_metadata"]["processing_time_ms"],
                     "updated_at": datetime.utcnow()
                 }
@@ -221,6 +234,7 @@ class CVProcessingService:
                 
                 return {
                     "success": False,
+                    "busy": isinstance(extraction_error, CVExtractionBusyError),
                     "message": f"CV extraction failed: {str(extraction_error)}",
                     "processing_id": processing_id,
                     "status": CVProcessingStatus.FAILED
@@ -234,6 +248,56 @@ class CVProcessingService:
                 "processing_id": processing_id
             }
     
+    async def process_uploaded_cv_batch(
+        self,
+        files: List[Tuple[bytes, str, str]],
+        uploaded_by: str,
+        uploaded_by_email: str
+    ) -> Dict[str, Any]:
+        """
+        Process several uploaded CVs concurrently.
+        
+        Args:
+            files: (file_content, filename, mime_type) per CV
+        
+        The batch keeps at most one CV per extraction worker in flight, so a
+        large batch spreads across the cores without filling the shared queue.
+        """
+        slots = asyncio.Semaphore(cv_extraction_pool.max_workers)
+        
+        async def process_one(file_content: bytes, filename: str, mime_type: str) -> Dict[str, Any]:
+            async with slots:
+                result = await self.process_uploaded_cv(
+                    file_content=file_content,
+                    filename=filename,
+                    mime_type=mime_type,
+                    uploaded_by=uploaded_by,
+                    uploaded_by_email=uploaded_by_email
+                )
+            return {
+                "filename": filename,
+                "success": result["success"],
+                "message": result["message"],
+                "processing_id": result.get("processing_id"),
+                "status": result.get("status")
+            }
+        
+        logger.info(f"Processing batch of {len(files)} CVs by {uploaded_by_email}")
+        results = await asyncio.gather(*[
+            process_one(file_content, filename, mime_type)
+            for file_content, filename, mime_type in files
+        ])
+        
+        processed_count = sum(1 for result in results if result["success"])
+        return {
+            "success": processed_count > 0,
+            "message": f"Processed {processed_count} of {len(files)} CVs",
+            "total_files": len(files),
+            "processed_count": processed_count,
+            "failed_count": len(files) - processed_count,
+            "results": results
+        }
+    
     # ============================================================================
     # CV EXTRACTION MANAGEMENT
     # ============================================================================
@@ -1,23 +1,32 @@
 # app/services/document_service.py
 import uuid
+import hashlib
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from fastapi import HTTPException, UploadFile
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
 from bson import ObjectId
+from pymongo import ReturnDocument
 import logging
 from pathlib import Path
 
 from app.config.database import get_database
+from app.services.activity_log_service import activity_log
+from app.services.user_directory_service import user_directory
 from app.models.document import DocumentCreate, DocumentResponse, DocumentStatus, DocumentType
 
 logger = logging.getLogger(__name__)
 
+# Upload/download chunk size (the GridFS default chunk size, so writes fill whole chunks)
+STREAM_CHUNK_BYTES = 255 * 1024
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+
 class DocumentService:
     def __init__(self):
         self.db = get_database()
         # GridFS bucket for file storage in MongoDB Atlas
-        self.fs_bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name="documents")
+        self.fs_bucket_name = "documents"
+        self.fs_bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.fs_bucket_name)
         
     async def upload_document(
         self, 
@@ -48,13 +57,10 @@ class DocumentService:
             # 4. Generate secure filename
             secure_filename = self._generate_secure_filename(file.filename)
             
-            # 5. Store file in GridFS (MongoDB Atlas)
-            file_content = await file.read()
-            await file.seek(0)  # Reset file pointer
-            
-            grid_file_id = await self.fs_bucket.upload_from_stream(
+            # 5. Stream file into GridFS (MongoDB Atlas), hashing and size-checking as it goes
+            grid_file_id, file_size, content_hash = await self._store_file(
+                file,
                 secure_filename,
-                file_content,
                 metadata={
                     "lead_id": lead_id,
                     "document_type": document_data.document_type.value,
@@ -68,11 +74,12 @@ class DocumentService:
             # 6. Create document record in database
             document_doc = {
                 "lead_id": lead_id,
-                "grid_file_id": grid_file_id,  # Reference to GridFS file
+                "grid_file_id": grid_file_id,  # Reference to GridFS file (shared by identical uploads)
+                "content_hash": content_hash,
                 "filename": secure_filename,
                 "original_filename": file.filename,
                 "document_type": document_data.document_type.value,
-                "file_size": len(file_content),
+                "file_size": file_size,
                 "mime_type": file.content_type,
                 "status": DocumentStatus.PENDING.value,  # Always starts as PENDING
                 "uploaded_by": ObjectId(user_id),
@@ -83,8 +90,12 @@ class DocumentService:
                 "is_active": True
             }
             
-            # 7. Insert document record
-            result = await self.db.lead_documents.insert_one(document_doc)
+            # 7. Insert document record (dropping the file reference taken in step 5 if it fails)
+            try:
+                result = await self.db.lead_documents.insert_one(document_doc)
+            except Exception:
+                await self._release_file(grid_file_id)
+                raise
             document_id = str(result.inserted_id)
             
             # 8. Auto-log activity
@@ -97,7 +108,7 @@ class DocumentService:
                 metadata={
                     "document_id": document_id,
                     "document_type": document_data.document_type.value,
-                    "file_size": len(file_content),
+                    "file_size": file_size,
                     "filename": file.filename,
                     "status": "Pending"
                 }
@@ -170,9 +181,17 @@ class DocumentService:
     async def download_document(
         self,
         document_id: str,
-        current_user: Dict[str, Any]
+        current_user: Dict[str, Any],
+        if_none_match: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Download document file from GridFS"""
+        """
+        Open a document's file in GridFS for streaming.
+        
+        Returns the open GridOut stream (read it with read_file_range) plus
+        filename, mime_type, file_size and an ETag. When `if_none_match`
+        (the request header) lists the ETag, returns {"not_modified": True,
+        "etag"} without opening the file.
+        """
         try:
             # 1. Get document record
             document = await self.db.lead_documents.find_one({"_id": ObjectId(document_id), "is_active": True})
@@ -182,19 +201,25 @@ class DocumentService:
             # 2. Check access permission
             await self._check_lead_access(document["lead_id"], current_user)
             
-            # 3. Get file from GridFS
+            # 3. Conditional request for the same content: nothing to open
+            etag = f'"{document.get("content_hash") or document["grid_file_id"]}"'
+            if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+                return {"not_modified": True, "etag": etag}
+            
+            # 4. Open the GridFS stream (content is read chunk by chunk by the caller)
             try:
                 grid_out = await self.fs_bucket.open_download_stream(document["grid_file_id"])
-                file_content = await grid_out.read()
             except Exception as e:
-                logger.error(f"Error reading file from GridFS: {e}")
+                logger.error(f"Error opening file from GridFS: {e}")
                 raise HTTPException(status_code=404, detail="File not found in storage")
             
             return {
-                "content": file_content,
+                "stream": grid_out,
                 "filename": document["original_filename"],
                 "mime_type": document["mime_type"],
-                "file_size": document["file_size"]
+                "file_size": grid_out.length,
+                "etag": etag,
+                "uploaded_at": document.get("uploaded_at")
             }
             
         except HTTPException:
@@ -348,9 +373,9 @@ class DocumentService:
                 {"$set": {"is_active": False, "deleted_at": datetime.utcnow()}}
             )
             
-            # 5. Delete file from GridFS
+            # 5. Drop this document's reference; the file goes with the last one (deduplicated upload)
             try:
-                await self.fs_bucket.delete(document["grid_file_id"])
+                await self._release_file(document["grid_file_id"])
             except Exception as e:
                 logger.warning(f"Failed to delete file from GridFS: {e}")
                 # Don't fail the operation if file deletion fails
@@ -406,7 +431,7 @@ class DocumentService:
     async def _get_user_name(self, user_id: ObjectId) -> str:
         """Get user display name (following established pattern)"""
         try:
-            user_info = await self.db.users.find_one({"_id": user_id})
+            user_info = await user_directory.get_by_id(user_id, self.db)
             if user_info:
                 first_name = user_info.get('first_name', '')
                 last_name = user_info.get('last_name', '')
@@ -439,7 +464,7 @@ class DocumentService:
                 "created_at": datetime.utcnow(),
                 "metadata": metadata
             }
-            await self.db.lead_activities.insert_one(activity_doc)
+            await activity_log.log(activity_doc)
             logger.info(f"Document activity logged: {activity_type}")
         except Exception as activity_error:
             logger.warning(f"Failed to log document activity: {activity_error}")
@@ -487,16 +512,108 @@ class DocumentService:
                 detail=f"File type '{file.content_type}' not allowed. Allowed types: PDF, DOC, DOCX, JPG, PNG, XLS, XLSX"
             )
         
-        # File size validation (10MB limit)
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-        file_content = await file.read()
-        await file.seek(0)  # Reset file pointer
+        # File size (10MB limit) is enforced while streaming in _store_file;
+        # reject early when the client declared the size
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            self._raise_file_too_large(file.size)
+    
+    def _raise_file_too_large(self, size: int):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File size ({size} bytes) exceeds maximum allowed size (10MB)"
+        )
+    
+    async def _store_file(self, file: UploadFile, filename: str, metadata: Dict[str, Any]):
+        """
+        Stream an upload into GridFS chunk by chunk, enforcing the size limit
+        and computing its SHA-256 on the way.
         
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File size ({len(file_content)} bytes) exceeds maximum allowed size (10MB)"
+        Identical content already stored (same hash and size) is reused: the
+        new copy is dropped and the existing GridFS file id returned. Every
+        document holds one reference in the file's `metadata.refs`; only files
+        with a live reference can be reused, so a concurrent delete that
+        dropped the last one cannot remove a file a new document points to.
+        
+        Returns:
+            (grid_file_id, file_size, content_hash)
+        """
+        digest = hashlib.sha256()
+        file_size = 0
+        grid_in = self.fs_bucket.open_upload_stream(filename, metadata=metadata)
+        
+        try:
+            while True:
+                chunk = await file.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    self._raise_file_too_large(file_size)
+                digest.update(chunk)
+                await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        
+        await grid_in.close()
+        content_hash = digest.hexdigest()
+        grid_file_id = grid_in._id
+        
+        files = self.db[f"{self.fs_bucket_name}.files"]
+        existing = await files.find_one_and_update(
+            {
+                "metadata.sha256": content_hash,
+                "length": file_size,
+                "_id": {"$ne": grid_file_id},
+                "metadata.refs": {"$gt": 0}
+            },
+            {"$inc": {"metadata.refs": 1}},
+            projection={"_id": 1}
+        )
+        if existing:
+            await self.fs_bucket.delete(grid_file_id)
+            logger.info(f"Deduplicated upload {filename}: reusing GridFS file {existing['_id']}")
+            return existing["_id"], file_size, content_hash
+        
+        await files.update_one(
+            {"_id": grid_file_id},
+            {"$set": {"metadata.sha256": content_hash, "metadata.refs": 1}}
+        )
+        return grid_file_id, file_size, content_hash
+    
+    async def _release_file(self, grid_file_id: ObjectId) -> None:
+        """Drop one document reference to a GridFS file and delete the file with the last one"""
+        files = self.db[f"{self.fs_bucket_name}.files"]
+        released = await files.find_one_and_update(
+            {"_id": grid_file_id, "metadata.refs": {"$gt": 0}},
+            {"$inc": {"metadata.refs": -1}},
+            projection={"metadata.refs": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if released is None:
+            # Stored before reference counting: delete unless an active document still uses it
+            shared = await self.db.lead_documents.find_one(
+                {"grid_file_id": grid_file_id, "is_active": True},
+                {"_id": 1}
             )
+            if not shared:
+                await self.fs_bucket.delete(grid_file_id)
+            return
+        if released.get("metadata", {}).get("refs", 0) <= 0:
+            await self.fs_bucket.delete(grid_file_id)
+    
+    async def read_file_range(self, grid_out, start: int = 0, end: Optional[int] = None):
+        """Yield bytes start..end (inclusive) of an open GridFS file chunk by chunk"""
+        end = grid_out.length - 1 if end is None else min(end, grid_out.length - 1)
+        remaining = end - start + 1
+        if start:
+            grid_out.seek(start)
+        while remaining > 0:
+            chunk = await grid_out.read(min(STREAM_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
     
     def _generate_secure_filename(self, original_filename: str) -> str:
         """Generate secure filename to prevent conflicts"""
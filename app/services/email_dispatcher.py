@@ -0,0 +1,414 @@
+# app/services/email_dispatcher.py - Concurrent, checkpointed ZeptoMail template dispatch
+"""
+Sends one template to many recipients through ZeptoMail.
+
+- Batch mode: when every recipient's merge data is a flat key/value map,
+  recipients go out `zeptomail_batch_size` at a time through the batch
+  template endpoint (one request, per-recipient merge_info). A batch that
+  ZeptoMail rejects as invalid is retried recipient by recipient, so one bad
+  address does not fail its neighbours.
+- Pooled mode: otherwise, `email_send_concurrency` sender lanes share the
+  pooled ZeptoMail client and send one request per recipient.
+
+Every request (batch or single) takes a token from a process-wide bucket
+refilled at `email_requests_per_second`; there are no per-message sleeps.
+(EMAIL_RATE_LIMIT keeps its old meaning and is not used for pacing.)
+
+When the send belongs to a crm_lead_emails document, recipient status and
+counters are checkpointed into it every `email_progress_flush_size` results
+or `email_progress_flush_seconds`, together with a dispatch lease. Recipients
+already sent or failed are skipped on resume, and the email scheduler picks
+up documents whose lease expired (worker restarted mid-send). A checkpoint
+that finds the lease held by another worker stops the send.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from pymongo import ReturnDocument
+
+from ..config.database import get_database
+from ..config.settings import settings
+from ..utils.rate_limiter import TokenBucket
+from .zepto_client import zepto_client
+
+logger = logging.getLogger(__name__)
+
+EMAIL_COLLECTION = "crm_lead_emails"
+
+# Merge values the batch endpoint accepts per recipient
+BATCH_MERGE_TYPES = (str, int, float, bool, type(None))
+
+# Batch responses retried recipient by recipient (request rejected as invalid)
+BATCH_FALLBACK_STATUS_CODES = (400, 422)
+
+# ZeptoMail limits are per account, so every send in this process shares them
+_email_rate_limiter: Optional[TokenBucket] = None
+
+def get_email_rate_limiter() -> TokenBucket:
+    """Get the process-wide token bucket for ZeptoMail requests"""
+    global _email_rate_limiter
+    if _email_rate_limiter is None:
+        _email_rate_limiter = TokenBucket(
+            rate=settings.email_requests_per_second,
+            capacity=settings.email_rate_limit_burst
+        )
+    return _email_rate_limiter
+
+
+def _error_text(error: Any) -> str:
+    if isinstance(error, dict):
+        return str(error.get("message") or error.get("error") or error)
+    return str(error or "Unknown error")
+
+
+class EmailDispatchRun:
+    """
+    State of one send: per-recipient results in recipient order and the
+    buffer of results (plus counter deltas) waiting to be checkpointed.
+    """
+
+    def __init__(self, email_id: Optional[str], total: int):
+        self.email_id = email_id
+        self.results: List[Optional[Dict[str, Any]]] = [None] * total
+        self.pending: List[tuple] = []
+        self.pending_sent = 0
+        self.pending_failed = 0
+        self.requests = 0
+        self.lease_lost = False
+        self.flush_lock = asyncio.Lock()
+
+    def record(self, position: int, index: int, result: Dict[str, Any]) -> None:
+        self.results[position] = result
+        self.pending.append((index, result))
+        if result["status"] == "sent":
+            self.pending_sent += 1
+        else:
+            self.pending_failed += 1
+
+    @property
+    def sent_count(self) -> int:
+        return sum(1 for result in self.results if result and result["status"] == "sent")
+
+    @property
+    def failed_count(self) -> int:
+        return sum(1 for result in self.results if result and result["status"] != "sent")
+
+
+class EmailDispatcher:
+    """Rate-limited ZeptoMail sender with batch requests and resumable progress"""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.active_sends = 0
+        self.emails_sent = 0
+        self.emails_failed = 0
+        self.batch_requests = 0
+        self.single_requests = 0
+
+    @property
+    def db(self):
+        return get_database()
+
+    @property
+    def collection(self):
+        return self.db[EMAIL_COLLECTION]
+
+    # ============================================================================
+    # CLAIMING (crm_lead_emails documents)
+    # ============================================================================
+
+    def _lease_until(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=settings.email_dispatch_lease_seconds)
+
+    async def claim(self, email_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take a pending email (or one whose dispatch lease expired)
+        and mark it processing. Returns the claimed document, or None when it
+        is finished, cancelled or being sent by another worker.
+        """
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "email_id": email_id,
+                "$or": [
+                    {"status": "pending"},
+                    {"status": "processing", "dispatch_lease_until": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "processing",
+                    "dispatch_owner": self.owner,
+                    "dispatch_lease_until": self._lease_until(),
+                    "updated_at": now
+                }
+            },
+            return_document=ReturnDocument.AFTER
+        )
+
+    # ============================================================================
+    # SENDING
+    # ============================================================================
+
+    def _can_batch(self, recipients: List[Dict[str, Any]]) -> bool:
+        if not settings.zeptomail_batch_enabled or len(recipients) < 2:
+            return False
+        return all(
+            isinstance(recipient.get("merge_data") or {}, dict)
+            and all(isinstance(value, BATCH_MERGE_TYPES) for value in (recipient.get("merge_data") or {}).values())
+            for recipient in recipients
+        )
+
+    async def send(
+        self,
+        template_key: str,
+        sender_email: str,
+        recipients: List[Dict[str, Any]],
+        email_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a template to recipients ({email, name, merge_data, status?}).
+
+        With `email_id`, the recipients are the document's `recipients` array
+        in order: progress is checkpointed into `recipients.<n>` and entries
+        already sent/failed are not sent again.
+
+        Returns the send_bulk_template_email result shape (counts cover
+        recipients finished by earlier runs too).
+        """
+        run = EmailDispatchRun(email_id, len(recipients))
+        todo = []
+        for position, recipient in enumerate(recipients):
+            status = recipient.get("status")
+            if status == "sent":
+                run.results[position] = {"recipient": recipient.get("email"), "status": "sent", "sent_at": recipient.get("sent_at")}
+            elif status == "failed":
+                run.results[position] = {"recipient": recipient.get("email"), "status": "failed", "error": recipient.get("error")}
+            else:
+                todo.append(position)
+
+        batch_mode = self._can_batch([recipients[position] for position in todo])
+        if todo:
+            skipped = len(recipients) - len(todo)
+            logger.info(
+                f"📨 Dispatching {len(todo)} emails ({'batch' if batch_mode else 'pooled'} mode"
+                f"{f', {skipped} already done' if skipped else ''}) with template {template_key}"
+            )
+
+        started = time.monotonic()
+        self.active_sends += 1
+        flusher = asyncio.create_task(self._periodic_flush(run))
+        try:
+            if batch_mode:
+                size = max(1, settings.zeptomail_batch_size)
+                work = [todo[offset:offset + size] for offset in range(0, len(todo), size)]
+                await self._run_lanes(work, lambda batch: self._send_batch(run, template_key, sender_email, recipients, batch))
+            else:
+                await self._run_lanes(todo, lambda position: self._send_one(run, template_key, sender_email, recipients, position))
+        finally:
+            self.active_sends -= 1
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            await self._flush(run)
+
+        successful_count, failed_count = run.sent_count, run.failed_count
+        if todo:
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"✅ Email dispatch finished in {elapsed:.1f}s ({run.requests} requests): "
+                f"{successful_count} sent, {failed_count} failed"
+            )
+
+        return {
+            "success": successful_count > 0,
+            "total_recipients": len(recipients),
+            "successful_count": successful_count,
+            "failed_count": failed_count,
+            "results": [result for result in run.results if result],
+            "mode": "batch" if batch_mode else "pooled",
+            "lease_lost": run.lease_lost,
+            "message": f"Bulk email completed: {successful_count} sent, {failed_count} failed"
+        }
+
+    async def drain(self, timeout: float = 30.0) -> bool:
+        """Wait for in-flight sends to finish (shutdown); False when some are still running"""
+        deadline = time.monotonic() + timeout
+        while self.active_sends and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+        return not self.active_sends
+
+    async def _run_lanes(self, items: List[Any], worker) -> None:
+        """Run `worker` over items with at most email_send_concurrency in flight"""
+        if not items:
+            return
+        remaining = iter(items)
+
+        async def lane():
+            for item in remaining:
+                await worker(item)
+
+        lanes = min(max(1, settings.email_send_concurrency), len(items))
+        await asyncio.gather(*(lane() for _ in range(lanes)))
+
+    async def _send_one(
+        self,
+        run: EmailDispatchRun,
+        template_key: str,
+        sender_email: str,
+        recipients: List[Dict[str, Any]],
+        position: int
+    ) -> None:
+        if run.lease_lost:
+            return
+        recipient = recipients[position]
+        email = recipient.get("email")
+        await get_email_rate_limiter().acquire()
+        run.requests += 1
+        self.single_requests += 1
+
+        try:
+            # A recipient without a usable address fails here instead of ending the lane
+            name = recipient.get("name") or email.split("@")[0]
+            result = await zepto_client.send_template_email(
+                template_key=template_key,
+                sender_email=sender_email,
+                recipient_email=email,
+                recipient_name=name,
+                merge_data=recipient.get("merge_data")
+            )
+        except Exception as e:
+            logger.error(f"Error processing recipient {email}: {e}")
+            result = {"success": False, "error": str(e)}
+
+        if result["success"]:
+            outcome = {"recipient": email, "status": "sent", "sent_at": datetime.utcnow()}
+        else:
+            outcome = {
+                "recipient": email,
+                "status": "failed",
+                "error": result.get("error", "Unknown error"),
+                "failed_at": datetime.utcnow()
+            }
+        await self._record(run, position, recipient.get("index", position), outcome)
+
+    async def _send_batch(
+        self,
+        run: EmailDispatchRun,
+        template_key: str,
+        sender_email: str,
+        recipients: List[Dict[str, Any]],
+        positions: List[int]
+    ) -> None:
+        if run.lease_lost:
+            return
+        batch = [recipients[position] for position in positions]
+        await get_email_rate_limiter().acquire()
+        run.requests += 1
+        self.batch_requests += 1
+
+        result = await zepto_client.send_batch_template_email(
+            template_key=template_key,
+            sender_email=sender_email,
+            recipients=batch
+        )
+
+        if not result["success"] and result.get("status_code") in BATCH_FALLBACK_STATUS_CODES:
+            logger.warning(
+                f"Batch of {len(batch)} rejected ({result.get('status_code')}), retrying recipients individually"
+            )
+            # One at a time in this lane: the other lanes already fill email_send_concurrency
+            for position in positions:
+                await self._send_one(run, template_key, sender_email, recipients, position)
+            return
+
+        now = datetime.utcnow()
+        for position, recipient in zip(positions, batch):
+            if result["success"]:
+                outcome = {"recipient": recipient.get("email"), "status": "sent", "sent_at": now}
+            else:
+                outcome = {
+                    "recipient": recipient.get("email"),
+                    "status": "failed",
+                    "error": result.get("error", "Unknown error"),
+                    "failed_at": now
+                }
+            await self._record(run, position, recipient.get("index", position), outcome)
+
+    # ============================================================================
+    # PROGRESS CHECKPOINTS
+    # ============================================================================
+
+    async def _record(self, run: EmailDispatchRun, position: int, index: int, outcome: Dict[str, Any]) -> None:
+        run.record(position, index, outcome)
+        if outcome["status"] == "sent":
+            self.emails_sent += 1
+        else:
+            self.emails_failed += 1
+        if len(run.pending) >= settings.email_progress_flush_size:
+            await self._flush(run)
+
+    async def _periodic_flush(self, run: EmailDispatchRun) -> None:
+        while True:
+            await asyncio.sleep(settings.email_progress_flush_seconds)
+            await self._flush(run)
+
+    async def _flush(self, run: EmailDispatchRun) -> None:
+        """Write buffered recipient results and counters as one update (renews the lease)"""
+        async with run.flush_lock:
+            if not run.pending:
+                return
+            pending, run.pending = run.pending, []
+            sent, failed = run.pending_sent, run.pending_failed
+            run.pending_sent = run.pending_failed = 0
+
+            if not run.email_id or run.lease_lost:
+                return
+
+            now = datetime.utcnow()
+            update_set: Dict[str, Any] = {"updated_at": now, "dispatch_lease_until": self._lease_until()}
+            for index, outcome in pending:
+                update_set[f"recipients.{index}.status"] = outcome["status"]
+                if outcome["status"] == "sent":
+                    update_set[f"recipients.{index}.sent_at"] = outcome["sent_at"]
+                    update_set[f"recipients.{index}.error"] = None
+                else:
+                    update_set[f"recipients.{index}.error"] = _error_text(outcome.get("error"))
+
+            try:
+                result = await self.collection.update_one(
+                    {"email_id": run.email_id, "dispatch_owner": self.owner},
+                    {"$set": update_set, "$inc": {"sent_count": sent, "failed_count": failed}}
+                )
+                if result.matched_count == 0:
+                    # Lease expired and another worker claimed the email; it resends these
+                    run.lease_lost = True
+                    logger.warning(f"⚠️ Lost dispatch lease on email {run.email_id}, stopping this send")
+            except Exception as e:
+                # Put the results back so the next flush retries them
+                logger.warning(f"Failed to checkpoint email {run.email_id}: {e}")
+                run.pending = pending + run.pending
+                run.pending_sent += sent
+                run.pending_failed += failed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active_sends": self.active_sends,
+            "emails_sent": self.emails_sent,
+            "emails_failed": self.emails_failed,
+            "batch_requests": self.batch_requests,
+            "single_requests": self.single_requests,
+            "concurrency": settings.email_send_concurrency,
+            "batch_size": settings.zeptomail_batch_size if settings.zeptomail_batch_enabled else None,
+            "rate_limiter": get_email_rate_limiter().get_stats()
+        }
+
+
+# Global dispatcher instance
+email_dispatcher = EmailDispatcher()
@@ -8,7 +8,9 @@ from bson import ObjectId
 from app.services.communication_service import CommunicationService
 
 from ..config.database import get_database
+from .activity_log_service import activity_log
 from ..services.zepto_client import zepto_client
+from ..services.email_dispatcher import email_dispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -54,11 +56,20 @@ class EmailSchedulerService:
         try:
             now_utc = datetime.utcnow()
             
-            # Find pending scheduled emails that are due
+            # Find pending scheduled emails that are due, plus sends whose
+            # worker stopped mid-dispatch (lease expired) so they resume
             query = {
-                "status": "pending",
-                "is_scheduled": True,
-                "scheduled_time": {"$lte": now_utc}
+                "$or": [
+                    {
+                        "status": "pending",
+                        "is_scheduled": True,
+                        "scheduled_time": {"$lte": now_utc}
+                    },
+                    {
+                        "status": "processing",
+                        "dispatch_lease_until": {"$lt": now_utc}
+                    }
+                ]
             }
             
             due_emails_cursor = self.db[self.collection_name].find(query)
@@ -79,61 +90,42 @@ class EmailSchedulerService:
             email_id = email_doc["email_id"]
             logger.info(f"📤 Sending scheduled email {email_id}")
             
-            # Mark as processing to avoid double-sending
-            await self.db[self.collection_name].update_one(
-                {"_id": email_doc["_id"]},
-                {"$set": {"status": "processing", "updated_at": datetime.utcnow()}}
-            )
+            # Claim it (pending, or processing with an expired lease) so no other worker sends it
+            claimed = await email_dispatcher.claim(email_id)
+            if not claimed:
+                logger.info(f"Email {email_id} already claimed by another worker, skipping")
+                return
             
-            recipients = email_doc.get("recipients", [])
+            recipients = claimed.get("recipients", [])
             if not recipients:
                 await self._mark_email_failed(email_id, "No recipients found")
                 return
             
-            # Send emails to all recipients
-            results = []
-            successful_count = 0
-            failed_count = 0
+            # Recipients already sent/failed by an interrupted run are skipped
+            send_result = await email_dispatcher.send(
+                template_key=claimed["template_key"],
+                sender_email=claimed["sender_email"],
+                recipients=[
+                    {
+                        "email": recipient["email"],
+                        "name": recipient["name"],
+                        "merge_data": {"username": recipient["name"]},
+                        "status": recipient.get("status"),
+                        "sent_at": recipient.get("sent_at"),
+                        "error": recipient.get("error")
+                    }
+                    for recipient in recipients
+                ],
+                email_id=email_id
+            )
+            if send_result.get("lease_lost"):
+                # Another worker took the email over and finishes it
+                logger.warning(f"Email {email_id} was taken over by another worker, leaving its status alone")
+                return
             
-            for recipient in recipients:
-                try:
-                    # Send individual email using ZeptoMail
-                    result = await self.zepto_client.send_template_email(
-                        template_key=email_doc["template_key"],
-                        sender_email=email_doc["sender_email"],
-                        recipient_email=recipient["email"],
-                        recipient_name=recipient["name"],
-                        merge_data={"username": recipient["name"]}
-                    )
-                    
-                    if result["success"]:
-                        successful_count += 1
-                        results.append({
-                            "recipient": recipient["email"],
-                            "status": "sent",
-                            "sent_at": datetime.utcnow()
-                        })
-                    else:
-                        failed_count += 1
-                        results.append({
-                            "recipient": recipient["email"], 
-                            "status": "failed",
-                            "error": result.get("error", "Unknown error"),
-                            "failed_at": datetime.utcnow()
-                        })
-                    
-                    # Small delay between emails
-                    await asyncio.sleep(0.1)
-                    
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"Error sending to {recipient['email']}: {e}")
-                    results.append({
-                        "recipient": recipient["email"],
-                        "status": "failed", 
-                        "error": str(e),
-                        "failed_at": datetime.utcnow()
-                    })
+            results = send_result["results"]
+            successful_count = send_result["successful_count"]
+            failed_count = send_result["failed_count"]
             
             # Update email status based on results
             if successful_count > 0:
@@ -145,7 +137,7 @@ class EmailSchedulerService:
                 logger.error(f"❌ Email {email_id} failed: all recipients failed")
             
             # Log activities
-            await self._log_scheduled_email_activities(email_doc, results, successful_count > 0)
+            await self._log_scheduled_email_activities(claimed, results, successful_count > 0)
             
         except Exception as e:
             logger.error(f"Error sending scheduled email {email_doc.get('email_id')}: {e}")
@@ -246,7 +238,7 @@ class EmailSchedulerService:
             
             # Insert activities
             if activities:
-                await self.db.lead_activities.insert_many(activities)
+                await activity_log.log_many(activities)
                 logger.info(f"Logged {len(activities)} scheduled email activities")
                 
         except Exception as e:
@@ -285,7 +277,8 @@ class EmailSchedulerService:
                 "pending_emails": pending_count,
                 "overdue_emails": overdue_count,
                 "next_email_time": next_email_time,
-                "current_time_utc": now_utc
+                "current_time_utc": now_utc,
+                "dispatch": email_dispatcher.get_stats()
             }
             
         except Exception as e:
@@ -301,31 +294,31 @@ class EmailSchedulerService:
                 return "Unknown Template"
             
             # Fetch template from CMS to get the display name
-            import aiohttp
+            from app.services.outbound_http import outbound_http
             from app.config.settings import settings
             
             cms_url = f"{settings.cms_base_url}/{settings.email_templates_endpoint}"
             
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.get(cms_url) as response:
-                        if response.status == 200:
-                            cms_data = await response.json()
-                            
-                            # Find template with matching key
-                            for template in cms_data.get("data", []):
-                                if template.get("key") == template_key:
-                                    return template.get("Template_Name", template_key)
-                            
-                            # If not found in CMS, return a cleaned version of the key
-                            return self._clean_template_key(template_key)
-                        else:
-                            # CMS not available, clean the key
-                            return self._clean_template_key(template_key)
-                            
-                except Exception as e:
-                    logger.error(f"Error fetching template from CMS: {e}")
+            client = outbound_http.get("cms")
+            try:
+                response = await client.get(cms_url)
+                if response.status_code == 200:
+                    cms_data = response.json()
+                    
+                    # Find template with matching key
+                    for template in cms_data.get("data", []):
+                        if template.get("key") == template_key:
+                            return template.get("Template_Name", template_key)
+                    
+                    # If not found in CMS, return a cleaned version of the key
                     return self._clean_template_key(template_key)
+                else:
+                    # CMS not available, clean the key
+                    return self._clean_template_key(template_key)
+                        
+            except Exception as e:
+                logger.error(f"Error fetching template from CMS: {e}")
+                return self._clean_template_key(template_key)
                     
         except Exception as e:
             logger.error(f"Error getting template display name: {e}")
@@ -6,6 +6,7 @@ import logging
 import asyncio
 
 from ..config.database import get_database
+from .activity_log_service import activity_log
 from app.services.communication_service import CommunicationService
 from ..config.settings import settings
 from ..models.email import (
@@ -14,6 +15,7 @@ from ..models.email import (
     ScheduledEmailItem, EmailStats
 )
 from ..services.zepto_client import zepto_client
+from ..services.email_dispatcher import email_dispatcher
 from ..utils.dependencies import get_current_active_user
 
 logger = logging.getLogger(__name__)
@@ -297,8 +299,9 @@ class EmailService:
                 # Send bulk emails
                 result = await self._send_bulk_email_via_zepto(email_doc)
             
-            # Update email document with results
-            await self._update_email_status(email_doc.email_id, result)
+            # Update email document with results (unless another worker owns the send)
+            if not result.get("lease_lost"):
+                await self._update_email_status(email_doc.email_id, result)
             
             # Log activities for each lead (following your activity logging pattern)
             await self._log_email_activities(email_doc, result)
@@ -423,7 +426,17 @@ class EmailService:
         }
     
     async def _send_bulk_email_via_zepto(self, email_doc: EmailDocument) -> Dict[str, Any]:
-        """Send bulk emails via ZeptoMail"""
+        """Send bulk emails via ZeptoMail, checkpointing recipient status as it goes"""
+        # Take the dispatch lease so a restart mid-send is resumed by the scheduler
+        if not await email_dispatcher.claim(email_doc.email_id):
+            return {
+                "success": False,
+                "successful_count": 0,
+                "failed_count": 0,
+                "error": f"Email {email_doc.email_id} is already being sent",
+                "lease_lost": True
+            }
+        
         recipients_data = []
         for recipient in email_doc.recipients:
             recipients_data.append({
@@ -432,10 +445,11 @@ class EmailService:
                 "merge_data": {"username": recipient.name}
             })
         
-        return await self.zepto_client.send_bulk_template_email(
+        return await email_dispatcher.send(
             template_key=email_doc.template_key,
             sender_email=email_doc.sender_email,
-            recipients=recipients_data
+            recipients=recipients_data,
+            email_id=email_doc.email_id
         )
     
     # ========================================================================
@@ -590,7 +604,7 @@ class EmailService:
                 
                 # Insert all activities
                 if activities:
-                    await self.db.lead_activities.insert_many(activities)
+                    await activity_log.log_many(activities)
                     logger.info(f"Logged {len(activities)} email activities")
                     
             except Exception as e:
@@ -672,7 +686,7 @@ class EmailService:
 
                 # Insert all activities
                 if activities:
-                    await self.db.lead_activities.insert_many(activities)
+                    await activity_log.log_many(activities)
                     logger.info(f"Logged {len(activities)} scheduled email activities")
                     
             except Exception as e:
@@ -685,31 +699,31 @@ class EmailService:
                 return "Unknown Template"
             
             # Fetch template from CMS to get the display name
-            import aiohttp
+            from app.services.outbound_http import outbound_http
             from app.config.settings import settings
             
             cms_url = f"{settings.cms_base_url}/{settings.email_templates_endpoint}"
             
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.get(cms_url) as response:
-                        if response.status == 200:
-                            cms_data = await response.json()
-                            
-                            # Find template with matching key
-                            for template in cms_data.get("data", []):
-                                if template.get("key") == template_key:
-                                    return template.get("Template_Name", template_key)
-                            
-                            # If not found in CMS, return a cleaned version of the key
-                            return self._clean_template_key(template_key)
-                        else:
-                            # CMS not available, clean the key
-                            return self._clean_template_key(template_key)
-                            
-                except Exception as e:
-                    logger.error(f"Error fetching template from CMS: {e}")
+            client = outbound_http.get("cms")
+            try:
+                response = await client.get(cms_url)
+                if response.status_code == 200:
+                    cms_data = response.json()
+                    
+                    # Find template with matching key
+                    for template in cms_data.get("data", []):
+                        if template.get("key") == template_key:
+                            return template.get("Template_Name", template_key)
+                    
+                    # If not found in CMS, return a cleaned version of the key
                     return self._clean_template_key(template_key)
+                else:
+                    # CMS not available, clean the key
+                    return self._clean_template_key(template_key)
+                        
+            except Exception as e:
+                logger.error(f"Error fetching template from CMS: {e}")
+                return self._clean_template_key(template_key)
                     
         except Exception as e:
             logger.error(f"Error getting template display name: {e}")
@@ -2,7 +2,6 @@
 # Facebook Leads Center Integration for LeadG CRM
 # Handles lead retrieval, webhooks, and sync with CRM
 
-import aiohttp
 import asyncio
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
@@ -20,6 +19,7 @@ from ..models.lead import (
 from ..config.database import get_database
 from ..config.settings import settings
 from .lead_service import lead_service
+from .outbound_http import outbound_http
 
 logger = logging.getLogger(__name__)
 
@@ -90,25 +90,25 @@ class FacebookLeadsService:
             return {"success": False, "error": "No access token configured"}
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Test API access
-                url = f"{self.base_url}/me"
-                params = {"access_token": self.access_token}
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "success": True,
-                            "user_info": data,
-                            "message": "Facebook API access verified"
-                        }
-                    else:
-                        error_data = await response.json()
-                        return {
-                            "success": False,
-                            "error": error_data.get("error", {}).get("message", "Unknown error")
-                        }
+            client = outbound_http.get("facebook")
+            # Test API access
+            url = f"{self.base_url}/me"
+            params = {"access_token": self.access_token}
+            
+            response = await client.get(url, params=params)
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "user_info": data,
+                    "message": "Facebook API access verified"
+                }
+            else:
+                error_data = response.json()
+                return {
+                    "success": False,
+                    "error": error_data.get("error", {}).get("message", "Unknown error")
+                }
                         
         except Exception as e:
             logger.error(f"Facebook API verification failed: {str(e)}")
@@ -122,27 +122,27 @@ class FacebookLeadsService:
             return {"success": False, "error": "Page ID or access token not configured"}
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/{target_page_id}/leadgen_forms"
-                params = {
-                    "access_token": self.access_token,
-                    "fields": "id,name,status,created_time,leads_count,page_id,context_card"
+            client = outbound_http.get("facebook")
+            url = f"{self.base_url}/{target_page_id}/leadgen_forms"
+            params = {
+                "access_token": self.access_token,
+                "fields": "id,name,status,created_time,leads_count,page_id,context_card"
+            }
+            
+            response = await client.get(url, params=params)
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "forms": data.get("data", []),
+                    "total_forms": len(data.get("data", []))
+                }
+            else:
+                error_data = response.json()
+                return {
+                    "success": False,
+                    "error": error_data.get("error", {}).get("message", "Unknown error")
                 }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            "success": True,
-                            "forms": data.get("data", []),
-                            "total_forms": len(data.get("data", []))
-                        }
-                    else:
-                        error_data = await response.json()
-                        return {
-                            "success": False,
-                            "error": error_data.get("error", {}).get("message", "Unknown error")
-                        }
                         
         except Exception as e:
             logger.error(f"Failed to get lead forms: {str(e)}")
@@ -154,37 +154,37 @@ class FacebookLeadsService:
             await self.initialize_facebook_config()
             
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/{form_id}/leads"
-                params = {
-                    "access_token": self.access_token,
-                    "limit": limit,
-                    "fields": "id,created_time,field_data,platform,ad_id,adset_id,campaign_id"
-                }
+            client = outbound_http.get("facebook")
+            url = f"{self.base_url}/{form_id}/leads"
+            params = {
+                "access_token": self.access_token,
+                "limit": limit,
+                "fields": "id,created_time,field_data,platform,ad_id,adset_id,campaign_id"
+            }
+            
+            response = await client.get(url, params=params)
+            if response.status_code == 200:
+                data = response.json()
+                leads = data.get("data", [])
                 
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        leads = data.get("data", [])
-                        
-                        # Process leads for CRM format
-                        processed_leads = []
-                        for lead in leads:
-                            processed_lead = await self._process_facebook_lead(lead, form_id)
-                            processed_leads.append(processed_lead)
-                        
-                        return {
-                            "success": True,
-                            "leads": processed_leads,
-                            "total_leads": len(processed_leads),
-                            "form_id": form_id
-                        }
-                    else:
-                        error_data = await response.json()
-                        return {
-                            "success": False,
-                            "error": error_data.get("error", {}).get("message", "Unknown error")
-                        }
+                # Process leads for CRM format
+                processed_leads = []
+                for lead in leads:
+                    processed_lead = await self._process_facebook_lead(lead, form_id)
+                    processed_leads.append(processed_lead)
+                
+                return {
+                    "success": True,
+                    "leads": processed_leads,
+                    "total_leads": len(processed_leads),
+                    "form_id": form_id
+                }
+            else:
+                error_data = response.json()
+                return {
+                    "success": False,
+                    "error": error_data.get("error", {}).get("message", "Unknown error")
+                }
                         
         except Exception as e:
             logger.error(f"Failed to get leads from form {form_id}: {str(e)}")
@@ -598,43 +598,43 @@ class FacebookLeadsService:
             return {"success": False, "error": "Facebook configuration not complete"}
         
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/{self.page_id}/subscribed_apps"
-                data = {
-                    "access_token": self.access_token,
-                    "subscribed_fields": "leadgen"
+            client = outbound_http.get("facebook")
+            url = f"{self.base_url}/{self.page_id}/subscribed_apps"
+            data = {
+                "access_token": self.access_token,
+                "subscribed_fields": "leadgen"
+            }
+            
+            response = await client.post(url, data=data)
+            if response.status_code == 200:
+                # Save webhook config to database
+                db = get_database()
+                webhook_config = {
+                    "webhook_url": webhook_url,
+                    "verify_token": verify_token,
+                    "page_id": self.page_id,
+                    "subscribed_fields": ["leadgen"],
+                    "active": True,
+                    "created_at": datetime.utcnow()
                 }
                 
-                async with session.post(url, data=data) as response:
-                    if response.status == 200:
-                        # Save webhook config to database
-                        db = get_database()
-                        webhook_config = {
-                            "webhook_url": webhook_url,
-                            "verify_token": verify_token,
-                            "page_id": self.page_id,
-                            "subscribed_fields": ["leadgen"],
-                            "active": True,
-                            "created_at": datetime.utcnow()
-                        }
-                        
-                        await db.facebook_webhooks.replace_one(
-                            {"page_id": self.page_id},
-                            webhook_config,
-                            upsert=True
-                        )
-                        
-                        return {
-                            "success": True,
-                            "message": "Webhook subscription created successfully",
-                            "webhook_url": webhook_url
-                        }
-                    else:
-                        error_data = await response.json()
-                        return {
-                            "success": False,
-                            "error": error_data.get("error", {}).get("message", "Unknown error")
-                        }
+                await db.facebook_webhooks.replace_one(
+                    {"page_id": self.page_id},
+                    webhook_config,
+                    upsert=True
+                )
+                
+                return {
+                    "success": True,
+                    "message": "Webhook subscription created successfully",
+                    "webhook_url": webhook_url
+                }
+            else:
+                error_data = response.json()
+                return {
+                    "success": False,
+                    "error": error_data.get("error", {}).get("message", "Unknown error")
+                }
                         
         except Exception as e:
             logger.error(f"Failed to setup webhook: {str(e)}")
@@ -684,23 +684,23 @@ class FacebookLeadsService:
     async def _get_single_lead(self, lead_id: str) -> Dict[str, Any]:
         """Get single lead details from Facebook"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/{lead_id}"
-                params = {
-                    "access_token": self.access_token,
-                    "fields": "id,created_time,field_data,platform,ad_id,adset_id,campaign_id"
+            client = outbound_http.get("facebook")
+            url = f"{self.base_url}/{lead_id}"
+            params = {
+                "access_token": self.access_token,
+                "fields": "id,created_time,field_data,platform,ad_id,adset_id,campaign_id"
+            }
+            
+            response = await client.get(url, params=params)
+            if response.status_code == 200:
+                lead_data = response.json()
+                return {"success": True, "lead": lead_data}
+            else:
+                error_data = response.json()
+                return {
+                    "success": False,
+                    "error": error_data.get("error", {}).get("message", "Unknown error")
                 }
-                
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        lead_data = await response.json()
-                        return {"success": True, "lead": lead_data}
-                    else:
-                        error_data = await response.json()
-                        return {
-                            "success": False,
-                            "error": error_data.get("error", {}).get("message", "Unknown error")
-                        }
                         
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -761,70 +761,70 @@ class FacebookLeadsService:
                 await self.initialize_facebook_config()
                 
             # Check token info
-            async with aiohttp.ClientSession() as session:
-                debug_url = f"https://graph.facebook.com/debug_token"
-                params = {
-                    "input_token": self.access_token,
-                    "access_token": f"{self.app_id}|{self.app_secret}"
-                }
+            client = outbound_http.get("facebook")
+            debug_url = f"https://graph.facebook.com/debug_token"
+            params = {
+                "input_token": self.access_token,
+                "access_token": f"{self.app_id}|{self.app_secret}"
+            }
+            
+            response = await client.get(debug_url, params=params)
+            if response.status_code == 200:
+                data = response.json()
+                token_data = data.get("data", {})
+                expires_at = token_data.get("expires_at")
                 
-                async with session.get(debug_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        token_data = data.get("data", {})
-                        expires_at = token_data.get("expires_at")
+                if expires_at:
+                    expires_date = datetime.fromtimestamp(expires_at)
+                    days_left = (expires_date - datetime.utcnow()).days
+                    
+                    logger.info(f"Facebook token expires in {days_left} days ({expires_date})")
+                    
+                    # Refresh if expires within 10 days
+                    if days_left <= 10:
+                        logger.info("Token expires soon, attempting refresh...")
                         
-                        if expires_at:
-                            expires_date = datetime.fromtimestamp(expires_at)
-                            days_left = (expires_date - datetime.utcnow()).days
+                        refresh_url = f"https://graph.facebook.com/oauth/access_token"
+                        refresh_params = {
+                            "grant_type": "fb_exchange_token",
+                            "client_id": self.app_id,
+                            "client_secret": self.app_secret,
+                            "fb_exchange_token": self.access_token
+                        }
+                        
+                        refresh_response = await client.get(refresh_url, params=refresh_params)
+                        if refresh_response.status_code == 200:
+                            refresh_data = refresh_response.json()
+                            new_token = refresh_data.get("access_token")
                             
-                            logger.info(f"Facebook token expires in {days_left} days ({expires_date})")
+                            # Update database config
+                            db = get_database()
+                            await db.facebook_config.update_one(
+                                {"active": True},
+                                {"$set": {
+                                    "access_token": new_token,
+                                    "last_refreshed": datetime.utcnow(),
+                                    "updated_at": datetime.utcnow()
+                                }}
+                            )
                             
-                            # Refresh if expires within 10 days
-                            if days_left <= 10:
-                                logger.info("Token expires soon, attempting refresh...")
-                                
-                                refresh_url = f"https://graph.facebook.com/oauth/access_token"
-                                refresh_params = {
-                                    "grant_type": "fb_exchange_token",
-                                    "client_id": self.app_id,
-                                    "client_secret": self.app_secret,
-                                    "fb_exchange_token": self.access_token
-                                }
-                                
-                                async with session.get(refresh_url, params=refresh_params) as refresh_response:
-                                    if refresh_response.status == 200:
-                                        refresh_data = await refresh_response.json()
-                                        new_token = refresh_data.get("access_token")
-                                        
-                                        # Update database config
-                                        db = get_database()
-                                        await db.facebook_config.update_one(
-                                            {"active": True},
-                                            {"$set": {
-                                                "access_token": new_token,
-                                                "last_refreshed": datetime.utcnow(),
-                                                "updated_at": datetime.utcnow()
-                                            }}
-                                        )
-                                        
-                                        # Update instance variable
-                                        self.access_token = new_token
-                                        
-                                        logger.info("Facebook token refreshed successfully!")
-                                        return {"success": True, "refreshed": True, "new_token": new_token}
-                                    else:
-                                        error_data = await refresh_response.json()
-                                        error_msg = error_data.get("error", {}).get("message", "Refresh failed")
-                                        logger.error(f"Token refresh failed: {error_msg}")
-                                        return {"success": False, "error": error_msg}
-                            else:
-                                return {"success": True, "valid": True, "days_left": days_left}
+                            # Update instance variable
+                            self.access_token = new_token
+                            
+                            logger.info("Facebook token refreshed successfully!")
+                            return {"success": True, "refreshed": True, "new_token": new_token}
                         else:
-                            return {"success": True, "no_expiry": True}
+                            error_data = refresh_response.json()
+                            error_msg = error_data.get("error", {}).get("message", "Refresh failed")
+                            logger.error(f"Token refresh failed: {error_msg}")
+                            return {"success": False, "error": error_msg}
                     else:
-                        error_data = await response.json()
-                        return {"success": False, "error": error_data.get("error", {}).get("message", "Token validation failed")}
+                        return {"success": True, "valid": True, "days_left": days_left}
+                else:
+                    return {"success": True, "no_expiry": True}
+            else:
+                error_data = response.json()
+                return {"success": False, "error": error_data.get("error", {}).get("message", "Token validation failed")}
                         
         except Exception as e:
             logger.error(f"Token refresh error: {str(e)}")
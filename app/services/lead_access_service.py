@@ -0,0 +1,196 @@
+# app/services/lead_access_service.py - Per-user accessible lead sets
+"""
+Scoping tasks, notes, WhatsApp messages and notifications to a non-admin
+used to load every lead the user can see ({assigned_to: email} or
+{co_assignees: email}), full documents included, just to build a
+lead_id / _id $in list. For a user with thousands of leads that was
+megabytes per request.
+
+LeadAccessIndex keeps, per user email, the lead_ids and lead ObjectIds the
+user can access, loaded with one projected query:
+
+- lead writes report (before, after) pairs through lead_stats_service;
+  users who gained or lost a lead are dropped locally and their version in
+  `lead_access_versions` is bumped so other workers reload them too
+- a cached set is re-validated against the shared versions at most every
+  `check_seconds` (one _id lookup), and reloaded after `ttl_seconds`
+  regardless, which bounds staleness from writes that bypass the feed
+- writes that do not go through the feed (update_many) call
+  `notify_changed(emails)` themselves
+- at most `max_users` sets are kept (least recently used dropped first)
+
+Only collections without assignee fields are scoped through these sets.
+Queries on leads itself keep the indexed $or on assigned_to/co_assignees,
+which is exact and never stale.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from ..config.database import get_database
+from ..config.settings import settings
+from .lead_stats_service import lead_stats_service
+
+logger = logging.getLogger(__name__)
+
+VERSION_COLLECTION = "lead_access_versions"
+
+
+def _lead_users(lead: Optional[Dict[str, Any]]) -> set:
+    """Emails that can access a lead (primary assignee and co-assignees)"""
+    users = set()
+    if not lead:
+        return users
+    if lead.get("assigned_to"):
+        users.add(lead["assigned_to"])
+    co_assignees = lead.get("co_assignees")
+    if isinstance(co_assignees, list):
+        users.update(email for email in co_assignees if email and isinstance(email, str))
+    return users
+
+
+class LeadAccessSet:
+    """Leads one user can access"""
+
+    def __init__(self, email: str, lead_ids: List[str], object_ids: List[ObjectId], version: int):
+        self.email = email
+        self.lead_ids = lead_ids
+        self.object_ids = object_ids
+        self.version = version
+        self._lead_id_set = frozenset(lead_ids)
+        self.loaded_at = time.monotonic()
+        self.checked_at = self.loaded_at
+
+    def __len__(self) -> int:
+        return len(self.lead_ids)
+
+    def __contains__(self, lead_id: str) -> bool:
+        return lead_id in self._lead_id_set
+
+
+class LeadAccessIndex:
+    """Versioned in-memory cache of per-user accessible lead sets"""
+
+    def __init__(self, check_seconds: float = 5.0, ttl_seconds: int = 300, max_users: int = 1000):
+        self.check_seconds = check_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max(1, max_users)
+        self._sets: "OrderedDict[str, LeadAccessSet]" = OrderedDict()
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+        # Bumped by every local invalidation; a load that raced one is not cached
+        self._generation = 0
+
+    # ============================================================================
+    # READING
+    # ============================================================================
+
+    async def _shared_version(self, db, email: str) -> int:
+        document = await db[VERSION_COLLECTION].find_one({"_id": email}, {"version": 1})
+        return (document or {}).get("version", 0)
+
+    async def get(self, email: str) -> LeadAccessSet:
+        """Accessible leads of a user (loaded or re-validated as needed)"""
+        now = time.monotonic()
+        cached = self._sets.get(email)
+        if cached and now - cached.loaded_at < self.ttl_seconds and now - cached.checked_at < self.check_seconds:
+            self._sets.move_to_end(email)
+            self.hits += 1
+            return cached
+
+        db = get_database()
+        generation = self._generation
+        version = await self._shared_version(db, email)
+        cached = self._sets.get(email)
+        if cached and cached.version == version and now - cached.loaded_at < self.ttl_seconds:
+            cached.checked_at = now
+            self._sets.move_to_end(email)
+            self.hits += 1
+            return cached
+
+        lead_ids, object_ids = [], []
+        async for lead in db.leads.find(
+            {"$or": [{"assigned_to": email}, {"co_assignees": email}]},
+            {"lead_id": 1}
+        ):
+            lead_ids.append(lead["lead_id"])
+            object_ids.append(lead["_id"])
+
+        access = LeadAccessSet(email, lead_ids, object_ids, version)
+        self.loads += 1
+        if generation == self._generation:
+            self._sets[email] = access
+            self._sets.move_to_end(email)
+            while len(self._sets) > self.max_users:
+                self._sets.popitem(last=False)
+        return access
+
+    async def lead_ids(self, email: str) -> List[str]:
+        return (await self.get(email)).lead_ids
+
+    async def object_ids(self, email: str) -> List[ObjectId]:
+        return (await self.get(email)).object_ids
+
+    async def can_access(self, email: str, lead_id: str) -> bool:
+        return lead_id in await self.get(email)
+
+    # ============================================================================
+    # INVALIDATION
+    # ============================================================================
+
+    def invalidate(self, emails: Optional[Iterable[str]] = None) -> None:
+        """Drop cached sets in this worker (all of them when emails is None)"""
+        if emails is None:
+            self._sets.clear()
+        else:
+            for email in emails:
+                self._sets.pop(email, None)
+        self._generation += 1
+        self.invalidations += 1
+
+    async def notify_changed(self, emails: Iterable[str]) -> None:
+        """Call after changing who can access leads: reloads these users in every worker"""
+        emails = {email for email in emails if email}
+        if not emails:
+            return
+        self.invalidate(emails)
+        try:
+            await get_database()[VERSION_COLLECTION].bulk_write([
+                UpdateOne({"_id": email}, {"$inc": {"version": 1}}, upsert=True)
+                for email in emails
+            ], ordered=False)
+        except Exception as e:
+            logger.error(f"Error bumping lead access versions: {str(e)}")
+
+    async def on_leads_changed(self, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """lead_stats_service listener: users who gained or lost a lead"""
+        affected = set()
+        for before, after in changes:
+            affected |= _lead_users(before) ^ _lead_users(after)
+        await self.notify_changed(affected)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._sets),
+            "max_users": self.max_users,
+            "hits": self.hits,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "check_seconds": self.check_seconds,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Global shared lead access index
+lead_access_index = LeadAccessIndex(
+    check_seconds=settings.lead_access_check_seconds,
+    ttl_seconds=settings.lead_access_ttl_seconds,
+    max_users=settings.lead_access_max_users
+)
+lead_stats_service.add_change_listener(lead_access_index.on_leads_changed)
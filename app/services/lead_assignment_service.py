@@ -4,10 +4,14 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import logging
 
 from ..config.database import get_database
 from .user_lead_array_service import user_lead_array_service
+from .assignment_planner_service import load_round_robin_planner
+from .lead_stats_service import lead_stats_service, apply_lead_stats_update, LEAD_STATS_PROJECTION
 
 logger = logging.getLogger(__name__)
 
@@ -35,59 +39,13 @@ class LeadAssignmentService:
         Returns:
             str: Email of selected user, or None if no valid users
         """
-        db = self.get_db()
-        
         try:
             if not selected_user_emails:
                 logger.warning("No users selected for round-robin assignment")
                 return None
             
-            # Get only the selected active users
-            active_users = await db.users.find(
-                {
-                    "email": {"$in": selected_user_emails},
-                    "role": "user", 
-                    "is_active": True
-                },
-                {"email": 1, "_id": 1, "first_name": 1, "last_name": 1, "total_assigned_leads": 1}
-            ).to_list(None)
-            
-            if not active_users:
-                logger.warning(f"No active users found from selected list: {selected_user_emails}")
-                return None
-            
-            logger.info(f"Found {len(active_users)} active users from selection for round-robin")
-            
-            # Use total_assigned_leads from user document (fast!)
-            user_lead_counts = {}
-            for user in active_users:
-                user_email = user["email"]
-                lead_count = user.get("total_assigned_leads", 0)
-                user_lead_counts[user_email] = lead_count
-                logger.info(f"Selected user {user_email} has {lead_count} leads")
-            
-            # Find user with minimum leads among selected users
-            min_leads = min(user_lead_counts.values())
-            users_with_min_leads = [
-                email for email, count in user_lead_counts.items() 
-                if count == min_leads
-            ]
-            
-            # If multiple users have same minimum, pick the one assigned longest ago
-            if len(users_with_min_leads) > 1:
-                logger.info(f"Multiple selected users with {min_leads} leads: {users_with_min_leads}")
-                
-                last_assigned_times = {}
-                for user_email in users_with_min_leads:
-                    last_lead = await db.leads.find_one(
-                        {"assigned_to": user_email},
-                        sort=[("created_at", -1)]
-                    )
-                    last_assigned_times[user_email] = last_lead["created_at"] if last_lead else datetime.min
-                
-                selected_user = min(last_assigned_times.keys(), key=lambda x: last_assigned_times[x])
-            else:
-                selected_user = users_with_min_leads[0]
+            planner = await load_round_robin_planner(selected_user_emails, self.get_db())
+            selected_user = planner.next_assignee()
             
             logger.info(f"Selective round-robin selected: {selected_user}")
             return selected_user
@@ -112,52 +70,9 @@ class LeadAssignmentService:
         if selected_user_emails:
             return await self.get_next_assignee_selective_round_robin(selected_user_emails)
         
-        # Otherwise, use original round robin logic for all active users
-        db = self.get_db()
-        
         try:
-            # Get all active users with 'user' role
-            active_users = await db.users.find(
-                {"role": "user", "is_active": True},
-                {"email": 1, "_id": 1, "first_name": 1, "last_name": 1, "total_assigned_leads": 1}
-            ).to_list(None)
-            
-            if not active_users:
-                logger.warning("No active users found for round-robin assignment")
-                return None
-            
-            logger.info(f"Found {len(active_users)} active users for round-robin")
-            
-            # Use total_assigned_leads from user document (fast!)
-            user_lead_counts = {}
-            for user in active_users:
-                user_email = user["email"]
-                lead_count = user.get("total_assigned_leads", 0)
-                user_lead_counts[user_email] = lead_count
-                logger.info(f"User {user_email} has {lead_count} leads")
-            
-            # Find user with minimum leads
-            min_leads = min(user_lead_counts.values())
-            users_with_min_leads = [
-                email for email, count in user_lead_counts.items() 
-                if count == min_leads
-            ]
-            
-            # If multiple users have same minimum, pick the one assigned longest ago
-            if len(users_with_min_leads) > 1:
-                logger.info(f"Multiple users with {min_leads} leads: {users_with_min_leads}")
-                
-                last_assigned_times = {}
-                for user_email in users_with_min_leads:
-                    last_lead = await db.leads.find_one(
-                        {"assigned_to": user_email},
-                        sort=[("created_at", -1)]
-                    )
-                    last_assigned_times[user_email] = last_lead["created_at"] if last_lead else datetime.min
-                
-                selected_user = min(last_assigned_times.keys(), key=lambda x: last_assigned_times[x])
-            else:
-                selected_user = users_with_min_leads[0]
+            planner = await load_round_robin_planner(db=self.get_db())
+            selected_user = planner.next_assignee()
             
             logger.info(f"Round-robin selected: {selected_user}")
             return selected_user
@@ -166,6 +81,159 @@ class LeadAssignmentService:
             logger.error(f"Error in round-robin assignment: {str(e)}")
             return None
     
+    async def plan_round_robin_assignments(
+        self,
+        count: int,
+        selected_user_emails: Optional[List[str]] = None,
+        preassigned_emails: Optional[List[str]] = None
+    ) -> List[Optional[str]]:
+        """
+        Plan `count` round-robin assignments for a bulk operation without writing.
+        Leads manually assigned in the same batch (`preassigned_emails`) count
+        towards their user's load. Returns one email (or None) per slot.
+        """
+        if count <= 0:
+            return []
+        
+        try:
+            planner = await load_round_robin_planner(selected_user_emails, self.get_db())
+            for email in preassigned_emails or []:
+                planner.record(email)
+            plan = planner.plan(count)
+            
+            logger.info(f"Planned {count} round-robin assignments: {planner.deltas}")
+            return plan
+            
+        except Exception as e:
+            logger.error(f"Error planning bulk round-robin assignments: {str(e)}")
+            return [None] * count
+    
+    async def assign_leads_round_robin(
+        self,
+        lead_ids: List[str],
+        assigned_by: str,
+        reason: str = "Bulk assignment",
+        selected_user_emails: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Assign existing leads by round robin in one pass: plan every assignee in
+        memory, update the leads with one bulk_write and apply user arrays and
+        total_assigned_leads with one more.
+        
+        Each lead update only applies while the lead still has the assignment
+        it had when the batch was planned; a lead reassigned concurrently is
+        reported as failed and not counted for the planned user.
+        
+        Returns one result per lead: {"lead_id", "assigned_to", "status", "error"?}
+        """
+        db = self.get_db()
+        
+        # Current assignment of every lead, used as the expected prior state
+        stats_before = {}
+        async for lead in db.leads.find(
+            {"lead_id": {"$in": list(lead_ids)}},
+            {**LEAD_STATS_PROJECTION, "lead_id": 1}
+        ):
+            stats_before[lead["lead_id"]] = lead
+        
+        planner = await load_round_robin_planner(selected_user_emails, db)
+        assignees = iter(planner.plan(sum(1 for lead_id in lead_ids if lead_id in stats_before)))
+        
+        results = []
+        operations = []
+        planned = []
+        now = datetime.utcnow()
+        for lead_id in lead_ids:
+            prior = stats_before.get(lead_id)
+            if prior is None:
+                results.append({"lead_id": lead_id, "assigned_to": None, "status": "failed", "error": "Lead not found"})
+                continue
+            assignee = next(assignees, None)
+            if not assignee:
+                results.append({"lead_id": lead_id, "assigned_to": None, "status": "failed", "error": "No assignee available"})
+                continue
+            
+            user_name = planner.get_user_name(assignee)
+            operations.append(UpdateOne(
+                {
+                    "lead_id": lead_id,
+                    "assigned_to": prior.get("assigned_to"),
+                    "co_assignees": prior.get("co_assignees")
+                },
+                {
+                    "$set": {
+                        "assigned_to": assignee,
+                        "assigned_to_name": user_name,
+                        "assignment_method": "round_robin",
+                        "co_assignees": [],  # Clear any multi-assignments
+                        "co_assignees_names": [],
+                        "is_multi_assigned": False,
+                        "updated_at": now
+                    },
+                    "$push": {
+                        "assignment_history": {
+                            "assigned_to": assignee,
+                            "assigned_to_name": user_name,
+                            "assigned_by": assigned_by,
+                            "assignment_method": "round_robin",
+                            "assigned_at": now,
+                            "reason": reason
+                        }
+                    }
+                }
+            ))
+            planned.append((lead_id, assignee))
+        
+        write_errors: Dict[int, str] = {}
+        modified = 0
+        if operations:
+            try:
+                result = await db.leads.bulk_write(operations, ordered=False)
+                modified = result.modified_count
+            except BulkWriteError as bwe:
+                modified = bwe.details.get("nModified", 0)
+                for write_error in bwe.details.get("writeErrors", []):
+                    write_errors[write_error["index"]] = write_error.get("errmsg", "Assignment update failed")
+            except Exception as e:
+                logger.error(f"Error writing bulk round-robin assignments: {str(e)}")
+                write_errors = {position: str(e) for position in range(len(operations))}
+        
+        # Every update that did not error matched its prior state unless the
+        # modified count says otherwise; then read back which ones applied
+        applied = {position for position in range(len(planned)) if position not in write_errors}
+        if modified < len(applied):
+            written = {}
+            async for lead in db.leads.find(
+                {"lead_id": {"$in": [planned[position][0] for position in applied]}, "updated_at": now},
+                {"lead_id": 1, "assigned_to": 1}
+            ):
+                written[lead["lead_id"]] = lead.get("assigned_to")
+            applied = {position for position in applied if written.get(planned[position][0]) == planned[position][1]}
+        
+        user_assignments: Dict[str, List[str]] = {}
+        for position, (lead_id, assignee) in enumerate(planned):
+            if position not in applied:
+                error = write_errors.get(position, "Lead was reassigned during bulk assignment")
+                results.append({"lead_id": lead_id, "assigned_to": None, "status": "failed", "error": error})
+                continue
+            user_assignments.setdefault(assignee, []).append(lead_id)
+            results.append({"lead_id": lead_id, "assigned_to": assignee, "status": "success"})
+        
+        # Counter deltas for the updates that applied land with one $inc per user
+        await user_lead_array_service.add_leads_to_user_arrays_bulk(user_assignments)
+        await lead_stats_service.record_changes(
+            (stats_before[lead_id], apply_lead_stats_update(stats_before[lead_id], {
+                "assigned_to": assignee,
+                "co_assignees": [],
+                "is_multi_assigned": False
+            }))
+            for position, (lead_id, assignee) in enumerate(planned)
+            if position in applied
+        )
+        
+        logger.info(f"Bulk round-robin assigned {len(applied)}/{len(lead_ids)} leads")
+        return results
+    
     # ============================================================================
     # 🆕 NEW: MULTI-USER ASSIGNMENT METHODS
     # ============================================================================
@@ -229,6 +297,7 @@ class LeadAssignmentService:
             primary_assignee = valid_user_emails[0]  # First user is primary
             co_assignees = valid_user_emails[1:] if len(valid_user_emails) > 1 else []
             
+            stats_before = await lead_stats_service.snapshot(lead_id)
             result = await db.leads.update_one(
                 {"lead_id": lead_id},
                 {
@@ -248,6 +317,12 @@ class LeadAssignmentService:
             )
             
             if result.modified_count > 0:
+                await lead_stats_service.record_update(stats_before, {
+                    "assigned_to": primary_assignee,
+                    "co_assignees": co_assignees,
+                    "is_multi_assigned": True
+                })
+                
                 # Add lead to each user's array
                 for user_email in valid_user_emails:
                     await user_lead_array_service.add_lead_to_user_array(user_email, lead_id)
@@ -363,6 +438,7 @@ class LeadAssignmentService:
             result = await db.leads.update_one({"lead_id": lead_id}, update_doc)
             
             if result.modified_count > 0:
+                await lead_stats_service.record_update(lead, update_doc["$set"])
                 # Remove lead from user's array
                 await user_lead_array_service.remove_lead_from_user_array(user_email, lead_id)
                 logger.info(f"User {user_email} removed from lead {lead_id}")
@@ -395,6 +471,8 @@ class LeadAssignmentService:
             
             user_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() or user_email
             
+            stats_before = await lead_stats_service.snapshot(lead_id)
+            
             # Update lead document (single assignment)
             result = await db.leads.update_one(
                 {"lead_id": lead_id},
@@ -422,6 +500,12 @@ class LeadAssignmentService:
             )
             
             if result.modified_count > 0:
+                await lead_stats_service.record_update(stats_before, {
+                    "assigned_to": user_email,
+                    "co_assignees": [],
+                    "is_multi_assigned": False
+                })
+                
                 # Add to user's assigned_leads array
                 await user_lead_array_service.add_lead_to_user_array(user_email, lead_id)
                 logger.info(f"Lead {lead_id} assigned to {user_email}")
@@ -484,6 +568,12 @@ class LeadAssignmentService:
             )
             
             if result.modified_count > 0:
+                await lead_stats_service.record_update(lead, {
+                    "assigned_to": new_user_email,
+                    "co_assignees": [],
+                    "is_multi_assigned": False
+                })
+                
                 # Update user arrays - remove from all previous assignees
                 if old_user_email:
                     await user_lead_array_service.remove_lead_from_user_array(old_user_email, lead_id)
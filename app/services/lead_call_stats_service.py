@@ -0,0 +1,264 @@
+# app/services/lead_call_stats_service.py - Lead call_stats from one CDR sweep
+"""
+Refreshing `call_stats` one lead at a time costs three TATA CDR requests per
+lead (one per 30-day window, filtered by callerid) plus a reload of every agent
+mapping. Refreshing the lead book that way takes O(3 x leads) API calls.
+
+LeadCallStatsService refreshes many leads together:
+
+1. load the leads and index them by normalized phone number
+   (phone -> [lead_id]); take the agent -> CRM user map from agent_directory
+2. sweep every CDR in the lookback window a single time: from call_records
+   when the local warehouse covers it, otherwise through the concurrent TATA
+   paginator, one 30-day window at a time (the API's range limit)
+3. match each record's client_number against the index and count
+   total/answered/missed per lead and per agent user in the same pass
+4. write all `call_stats` with one unordered bulk_write
+
+API cost is O(CDR pages) for the window, no matter how many leads are
+refreshed. The stats have the same shape as refresh_lead_call_count produces.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Iterable
+
+from pymongo import UpdateOne
+
+from ..config.database import get_database
+from .agent_directory_service import agent_directory, normalize_agent_number
+
+logger = logging.getLogger(__name__)
+
+# Same window as the per-lead refresh (three 30-day CDR queries)
+LOOKBACK_DAYS = 90
+# TATA rejects CDR queries spanning more than about a month
+SWEEP_WINDOW_DAYS = 30
+# Leads refreshed within this window are skipped unless forced
+RECENT_REFRESH_MINUTES = 30
+
+LEAD_PHONE_FIELDS = ("contact_number", "phone_number", "phone", "mobile")
+
+
+def normalize_phone(phone: Any) -> str:
+    """Digits only, national part (last 10 digits) of longer numbers"""
+    digits = re.sub(r"[^\d]", "", str(phone or ""))
+    return digits[-10:] if len(digits) > 10 else digits
+
+
+async def load_agent_user_index() -> Dict[str, Dict[str, Any]]:
+    """Normalized agent number -> {user_id, user_name, user_email, ...} from the agent directory"""
+    await agent_directory.ensure_loaded()
+    return {
+        normalize_agent_number(agent_number): mapping
+        for agent_number, mapping in agent_directory.agent_user_mapping.items()
+    }
+
+
+def count_calls_by_user(
+    call_records: Iterable[Dict[str, Any]],
+    agent_users: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Per-user total/answered/missed counts (records without a mapped agent are skipped)"""
+    user_call_counts: Dict[str, Dict[str, Any]] = {}
+    for call_record in call_records:
+        _count_user_call(user_call_counts, call_record, agent_users)
+    return list(user_call_counts.values())
+
+
+def _count_user_call(
+    user_call_counts: Dict[str, Dict[str, Any]],
+    call_record: Dict[str, Any],
+    agent_users: Dict[str, Dict[str, Any]]
+) -> bool:
+    agent_number = call_record.get("agent_number")
+    if not agent_number:
+        return False
+    user_info = agent_users.get(normalize_agent_number(agent_number))
+    if not user_info or not user_info.get("user_id"):
+        return False
+
+    user_id = user_info["user_id"]
+    counts = user_call_counts.get(user_id)
+    if counts is None:
+        counts = user_call_counts[user_id] = {
+            "user_id": user_id,
+            "user_name": user_info["user_name"],
+            "user_email": user_info["user_email"],
+            "total": 0,
+            "answered": 0,
+            "missed": 0
+        }
+    counts["total"] += 1
+    if (call_record.get("status") or "").lower() == "answered":
+        counts["answered"] += 1
+    else:
+        counts["missed"] += 1
+    return True
+
+
+def build_call_stats(user_call_list: List[Dict[str, Any]], last_call_date: Optional[datetime]) -> Dict[str, Any]:
+    """The `call_stats` document stored on a lead"""
+    return {
+        "total_calls": sum(user["total"] for user in user_call_list),
+        "answered_calls": sum(user["answered"] for user in user_call_list),
+        "missed_calls": sum(user["missed"] for user in user_call_list),
+        "last_call_date": last_call_date,
+        "user_calls": user_call_list,
+        "last_updated": datetime.utcnow()
+    }
+
+
+def _parse_call_date(record_date: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(record_date, "%Y-%m-%d") if record_date else None
+    except ValueError:
+        return None
+
+
+class LeadCallStatsSweep:
+    """
+    One pass over CDRs: client_number -> lead_ids via the phone index, then
+    per-lead, per-user counters and the latest call date.
+    """
+
+    def __init__(self, phone_index: Dict[str, List[str]], agent_users: Dict[str, Dict[str, Any]]):
+        self.phone_index = phone_index
+        self.agent_users = agent_users
+        self.user_counts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.last_call_dates: Dict[str, str] = {}
+        self.records_scanned = 0
+        self.records_matched = 0
+        self.records_without_agent = 0
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.records_scanned += 1
+        lead_ids = self.phone_index.get(normalize_phone(record.get("client_number")))
+        if not lead_ids:
+            return
+
+        self.records_matched += 1
+        record_date = record.get("date") or ""
+        for lead_id in lead_ids:
+            if record_date > self.last_call_dates.get(lead_id, ""):
+                self.last_call_dates[lead_id] = record_date
+            counted = _count_user_call(self.user_counts.setdefault(lead_id, {}), record, self.agent_users)
+        if not counted:
+            self.records_without_agent += 1
+
+    def call_stats(self, lead_id: str) -> Dict[str, Any]:
+        return build_call_stats(
+            list(self.user_counts.get(lead_id, {}).values()),
+            _parse_call_date(self.last_call_dates.get(lead_id))
+        )
+
+
+class LeadCallStatsService:
+    """Bulk lead call_stats refresh from a single CDR sweep"""
+
+    @property
+    def db(self):
+        return get_database()
+
+    def _build_phone_index(self, leads: List[Dict[str, Any]]) -> tuple:
+        """(normalized phone -> [lead_id], lead_ids without a usable phone)"""
+        phone_index: Dict[str, List[str]] = {}
+        missing_phone = []
+        for lead in leads:
+            phone = next((lead.get(field) for field in LEAD_PHONE_FIELDS if lead.get(field)), None)
+            key = normalize_phone(phone)
+            if not key:
+                missing_phone.append(lead.get("lead_id"))
+                continue
+            phone_index.setdefault(key, []).append(lead["lead_id"])
+        return phone_index, missing_phone
+
+    async def _sweep(self, sweep: LeadCallStatsSweep, lookback_days: int) -> int:
+        """Feed every CDR in the lookback window to the sweep; returns windows fetched"""
+        from .tata_admin_service import tata_admin_service
+
+        end = datetime.now().replace(hour=23, minute=59, second=59, microsecond=0)
+        window_start = (end - timedelta(days=lookback_days)).replace(hour=0, minute=0, second=0)
+        windows = 0
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=SWEEP_WINDOW_DAYS) - timedelta(seconds=1), end)
+            async for record in tata_admin_service.iter_all_call_records(
+                window_start.strftime("%Y-%m-%d %H:%M:%S"),
+                window_end.strftime("%Y-%m-%d %H:%M:%S")
+            ):
+                sweep.add(record)
+            windows += 1
+            window_start = window_end + timedelta(seconds=1)
+        return windows
+
+    async def refresh(
+        self,
+        lead_ids: Optional[List[str]] = None,
+        assigned_to_user: Optional[str] = None,
+        force_refresh: bool = False,
+        lookback_days: int = LOOKBACK_DAYS
+    ) -> Dict[str, Any]:
+        """
+        Refresh call_stats for the selected leads (all leads when no filter)
+
+        Returns the bulk_refresh_call_counts result shape plus sweep counters.
+        """
+        try:
+            start_time = datetime.utcnow()
+
+            query: Dict[str, Any] = {}
+            if lead_ids:
+                query["lead_id"] = {"$in": lead_ids}
+            elif assigned_to_user:
+                query["assigned_to"] = assigned_to_user
+            if not force_refresh:
+                cutoff = datetime.utcnow() - timedelta(minutes=RECENT_REFRESH_MINUTES)
+                query["call_stats.last_updated"] = {"$not": {"$gte": cutoff}}
+
+            projection = {"lead_id": 1, **{field: 1 for field in LEAD_PHONE_FIELDS}}
+            leads = await self.db.leads.find(query, projection).to_list(None)
+            phone_index, missing_phone = self._build_phone_index(leads)
+            if missing_phone:
+                logger.warning(f"⚠️ {len(missing_phone)} leads have no phone number, skipping their call stats")
+
+            logger.info(f"🔄 Refreshing call stats for {len(leads)} leads from one {lookback_days}-day CDR sweep")
+
+            sweep = LeadCallStatsSweep(phone_index, await load_agent_user_index())
+            windows = 0
+            if phone_index:
+                windows = await self._sweep(sweep, lookback_days)
+
+            refreshed_ids = [lead_id for ids in phone_index.values() for lead_id in ids]
+            if refreshed_ids:
+                await self.db.leads.bulk_write([
+                    UpdateOne({"lead_id": lead_id}, {"$set": {"call_stats": sweep.call_stats(lead_id)}})
+                    for lead_id in refreshed_ids
+                ], ordered=False)
+
+            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            logger.info(
+                f"✅ Call stats refreshed for {len(refreshed_ids)} leads in {processing_time:.1f}s: "
+                f"{sweep.records_scanned} CDRs scanned, {sweep.records_matched} matched to leads"
+            )
+
+            return {
+                "success": True,
+                "message": f"Bulk refresh completed: {len(refreshed_ids)}/{len(leads)} successful",
+                "total_leads": len(leads),
+                "successful_refreshes": len(refreshed_ids),
+                "failed_refreshes": len(missing_phone),
+                "processing_time": processing_time,
+                "failed_lead_ids": missing_phone,
+                "cdr_records_scanned": sweep.records_scanned,
+                "cdr_records_matched": sweep.records_matched,
+                "cdr_windows": windows
+            }
+
+        except Exception as e:
+            logger.error(f"Error in bulk call stats refresh: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+
+# Global service instance
+lead_call_stats_service = LeadCallStatsService()
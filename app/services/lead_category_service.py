@@ -176,7 +176,62 @@ class LeadCategoryService:
             logger.error(f"Error generating combination lead ID: {str(e)}")
             # Fallback to old format if there's an issue
             return await self.generate_lead_id_fallback(category)
-    
+
+    async def reserve_combination_numbers(self, category_short: str, source_short: str, count: int) -> int:
+        """
+        Reserve `count` consecutive sequence numbers for a category-source combination
+        with a single atomic $inc. Returns the first reserved number.
+        """
+        db = self.get_db()
+        combination_key = f"{category_short}-{source_short}"
+
+        result = await db.lead_counters.find_one_and_update(
+            {"combination_key": combination_key},
+            {
+                "$inc": {"sequence": count},
+                "$set": {
+                    "category_short": category_short,
+                    "source_short": source_short,
+                    "updated_at": datetime.utcnow()
+                },
+                "$setOnInsert": {
+                    "created_at": datetime.utcnow()
+                }
+            },
+            upsert=True,
+            return_document=True
+        )
+
+        last_sequence = result["sequence"]
+        await db.lead_counters.update_one(
+            {"combination_key": combination_key},
+            {"$set": {"last_lead_id": f"{category_short}-{source_short}-{last_sequence}"}}
+        )
+
+        first_sequence = last_sequence - count + 1
+        logger.info(f"Reserved sequences {first_sequence}-{last_sequence} for combination {combination_key}")
+        return first_sequence
+
+    async def generate_lead_ids_by_category_and_source(self, category: str, source: str, count: int) -> List[str]:
+        """
+        Generate `count` lead IDs for one category-source combination in a single
+        counter round-trip. Same format as generate_lead_id_by_category_and_source.
+        """
+        if count <= 0:
+            return []
+
+        try:
+            category_short = await self.get_category_short_form(category)
+            source_short = await self.get_source_short_form(source)
+
+            first_sequence = await self.reserve_combination_numbers(category_short, source_short, count)
+            return [f"{category_short}-{source_short}-{first_sequence + offset}" for offset in range(count)]
+
+        except Exception as e:
+            logger.error(f"Error reserving combination lead IDs: {str(e)}")
+            # Fall back to one ID at a time
+            return [await self.generate_lead_id_fallback(category) for _ in range(count)]
+
     async def generate_lead_id_fallback(self, category: str) -> str:
         """Fallback lead ID generation (old format) in case of errors"""
         try:
@@ -0,0 +1,148 @@
+# app/services/lead_duplicate_service.py - Set-based duplicate detection for bulk lead imports
+"""
+Resolve duplicates for a whole upload with a couple of $in queries.
+
+`BatchDuplicateChecker.load()` normalizes every email and phone in the batch
+and fetches matching leads in chunks; `check()` then answers per row from
+memory with the same result shape as `LeadService.check_duplicate_lead`.
+Rows accepted during the batch are registered so later rows that repeat
+them are reported as duplicates too.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Iterable
+
+from ..config.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Keep each $in list comfortably below BSON document limits
+IN_QUERY_CHUNK_SIZE = 1000
+
+DUPLICATE_PROJECTION = {"lead_id": 1, "name": 1, "email": 1, "contact_number": 1, "phone_number": 1}
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email:
+        return None
+    email = str(email).lower().strip()
+    return email or None
+
+
+def normalize_phone_number(phone: Optional[str]) -> Optional[str]:
+    """Digits only (leading + dropped); None when shorter than 10 digits"""
+    if not phone:
+        return None
+
+    # Remove all non-digit characters except +
+    normalized = ''.join(c for c in str(phone) if c.isdigit() or c == '+')
+
+    # Remove leading + for comparison
+    if normalized.startswith('+'):
+        normalized = normalized[1:]
+
+    return normalized if len(normalized) >= 10 else None
+
+
+def _chunks(values: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class BatchDuplicateChecker:
+    """In-memory duplicate index for one bulk upload"""
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
+        self._by_email: Dict[str, Dict[str, Any]] = {}
+        self._by_phone: Dict[str, Dict[str, Any]] = {}
+        self.query_count = 0
+
+    async def load(self, rows: List[Dict[str, Any]]) -> "BatchDuplicateChecker":
+        """Fetch existing leads matching any email or phone in the batch"""
+        emails = set()
+        phones = set()
+        for row in rows:
+            email = normalize_email(row.get("email"))
+            if email:
+                emails.add(email)
+            phone = normalize_phone_number(row.get("contact_number"))
+            if phone:
+                phones.add(phone)
+
+        for chunk in _chunks(sorted(emails), IN_QUERY_CHUNK_SIZE):
+            self.query_count += 1
+            async for lead in self.db.leads.find({"email": {"$in": chunk}}, DUPLICATE_PROJECTION):
+                self._by_email.setdefault(lead.get("email"), lead)
+
+        for chunk in _chunks(sorted(phones), IN_QUERY_CHUNK_SIZE):
+            self.query_count += 1
+            query = {"$or": [{"contact_number": {"$in": chunk}}, {"phone_number": {"$in": chunk}}]}
+            async for lead in self.db.leads.find(query, DUPLICATE_PROJECTION):
+                for field in ("contact_number", "phone_number"):
+                    value = lead.get(field)
+                    if value in phones:
+                        self._by_phone.setdefault(value, lead)
+
+        logger.info(
+            f"Duplicate index loaded: {len(emails)} emails, {len(phones)} phones, "
+            f"{len(self._by_email)} + {len(self._by_phone)} existing matches in {self.query_count} queries"
+        )
+        return self
+
+    def register(self, email: Optional[str], contact_number: Optional[str], lead: Dict[str, Any]) -> None:
+        """Record a row accepted in this batch so later rows repeating it are flagged"""
+        email_key = normalize_email(email)
+        if email_key:
+            self._by_email.setdefault(email_key, lead)
+        phone_key = normalize_phone_number(contact_number)
+        if phone_key:
+            self._by_phone.setdefault(phone_key, lead)
+
+    def check(self, email: Optional[str], contact_number: Optional[str] = None) -> Dict[str, Any]:
+        """Same result shape as LeadService.check_duplicate_lead, answered from memory"""
+        email_key = normalize_email(email)
+        if email_key and email_key in self._by_email:
+            match = self._by_email[email_key]
+            result = {
+                "is_duplicate": True,
+                "checked": True,
+                "existing_lead_id": match.get("lead_id"),
+                "duplicate_field": "email",
+                "duplicate_value": email,
+                "existing_lead_name": match.get("name", "Unknown"),
+                "existing_lead_phone": match.get("contact_number", ""),
+                "message": self._message("email", email, match)
+            }
+            if "batch_index" in match:
+                result["duplicate_of_index"] = match["batch_index"]
+            return result
+
+        phone_key = normalize_phone_number(contact_number)
+        if phone_key and phone_key in self._by_phone:
+            match = self._by_phone[phone_key]
+            result = {
+                "is_duplicate": True,
+                "checked": True,
+                "existing_lead_id": match.get("lead_id"),
+                "duplicate_field": "phone",
+                "duplicate_value": contact_number,
+                "existing_lead_name": match.get("name", "Unknown"),
+                "existing_lead_email": match.get("email", ""),
+                "message": self._message("phone", contact_number, match)
+            }
+            if "batch_index" in match:
+                result["duplicate_of_index"] = match["batch_index"]
+            return result
+
+        return {
+            "is_duplicate": False,
+            "checked": True,
+            "message": "No duplicates found - both email and phone are unique"
+        }
+
+    @staticmethod
+    def _message(field: str, value: Any, match: Dict[str, Any]) -> str:
+        if match.get("lead_id"):
+            return f"Lead with {field} '{value}' already exists (Lead ID: {match.get('lead_id')})"
+        return f"Lead with {field} '{value}' appears earlier in this upload (row {match.get('batch_index')})"
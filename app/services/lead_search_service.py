@@ -0,0 +1,176 @@
+# app/services/lead_search_service.py - Indexed lead search keys
+"""
+Lead search backed by a `search_keys` multikey index.
+
+Each lead stores a list of normalized, lower-cased keys (name tokens, full
+name, email, email local part and domain, lead_id, digits-only phone numbers).
+A search term is split into tokens and every token must be an anchored
+prefix of some key, which MongoDB answers with index range scans instead of
+the previous unanchored case-insensitive $regex collection scan.
+"""
+
+import logging
+import re
+from typing import Dict, Any, List, Optional
+
+from pymongo import UpdateOne
+
+from ..config.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Fields that feed search_keys; updating any of them requires a rebuild
+SEARCH_SOURCE_FIELDS = ("name", "email", "lead_id", "contact_number", "phone_number")
+
+# Minimum digits before a token is also matched as a phone number
+MIN_PHONE_DIGITS = 3
+
+_TOKEN_SPLIT = re.compile(r"[\s,;]+")
+_NAME_SPLIT = re.compile(r"[\s\.\-_']+")
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_LIKE = re.compile(r"^[\d\s\+\-\(\)\.]+$")
+
+
+def _digits(value: Any) -> str:
+    return _NON_DIGITS.sub("", str(value or ""))
+
+
+def build_lead_search_keys(lead: Dict[str, Any]) -> List[str]:
+    """Build the normalized search keys for a lead document"""
+    keys = set()
+
+    name = str(lead.get("name") or "").strip().lower()
+    if name:
+        keys.add(name)
+        keys.update(token for token in _NAME_SPLIT.split(name) if token)
+
+    email = str(lead.get("email") or "").strip().lower()
+    if email:
+        keys.add(email)
+        local_part, _, domain = email.partition("@")
+        if local_part:
+            keys.add(local_part)
+        if domain:
+            keys.add(domain)
+
+    lead_id = str(lead.get("lead_id") or "").strip().lower()
+    if lead_id:
+        keys.add(lead_id)
+
+    for field in ("contact_number", "phone_number"):
+        digits = _digits(lead.get(field))
+        if digits:
+            keys.add(digits)
+            # Numbers are often stored with a country code but searched without one
+            if len(digits) > 10:
+                keys.add(digits[-10:])
+
+    return sorted(keys)
+
+
+def needs_search_key_refresh(update_data: Dict[str, Any]) -> bool:
+    return any(field in update_data for field in SEARCH_SOURCE_FIELDS)
+
+
+def build_lead_search_query(search_term: str) -> Dict[str, Any]:
+    """
+    Build a MongoDB filter for a free-text lead search.
+
+    Every token must prefix-match a search key. Leads that have not been
+    backfilled yet (no search_keys) fall back to an escaped regex so results
+    stay complete while the migration runs.
+    """
+    term = (search_term or "").strip().lower()
+    if not term:
+        return {}
+
+    if _PHONE_LIKE.match(term) and _digits(term):
+        # "+91 98765-43210" is one phone number, not several tokens
+        tokens = [_digits(term)]
+    else:
+        tokens = [token for token in _TOKEN_SPLIT.split(term) if token]
+    conditions = []
+    for token in tokens:
+        alternatives = [{"search_keys": {"$regex": f"^{re.escape(token)}"}}]
+        digits = _digits(token)
+        if len(digits) >= MIN_PHONE_DIGITS and digits != token:
+            alternatives.append({"search_keys": {"$regex": f"^{digits}"}})
+        conditions.append(alternatives[0] if len(alternatives) == 1 else {"$or": alternatives})
+
+    indexed_query = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    escaped = re.escape(search_term.strip())
+    legacy_query = {
+        "search_keys": {"$exists": False},
+        "$or": [
+            {"name": {"$regex": escaped, "$options": "i"}},
+            {"email": {"$regex": escaped, "$options": "i"}},
+            {"lead_id": {"$regex": escaped, "$options": "i"}},
+            {"contact_number": {"$regex": escaped, "$options": "i"}},
+            {"phone_number": {"$regex": escaped, "$options": "i"}}
+        ]
+    }
+
+    return {"$or": [indexed_query, legacy_query]}
+
+
+class LeadSearchService:
+    """Maintains lead search keys"""
+
+    def get_db(self):
+        return get_database()
+
+    async def refresh_lead_search_keys(self, lead_id: str, lead: Optional[Dict[str, Any]] = None) -> bool:
+        """Recompute search_keys for one lead (pass the current document to skip the read)"""
+        try:
+            db = self.get_db()
+            if lead is None:
+                projection = {field: 1 for field in SEARCH_SOURCE_FIELDS}
+                lead = await db.leads.find_one({"lead_id": lead_id}, projection)
+                if not lead:
+                    return False
+            await db.leads.update_one(
+                {"lead_id": lead_id},
+                {"$set": {"search_keys": build_lead_search_keys(lead)}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing search keys for lead {lead_id}: {str(e)}")
+            return False
+
+    async def backfill_search_keys(self, batch_size: int = 1000, only_missing: bool = True) -> Dict[str, Any]:
+        """Populate search_keys for existing leads in batches of bulk_write"""
+        db = self.get_db()
+        query = {"search_keys": {"$exists": False}} if only_missing else {}
+        projection = {field: 1 for field in SEARCH_SOURCE_FIELDS}
+
+        updated = 0
+        batches = 0
+        operations = []
+        try:
+            async for lead in db.leads.find(query, projection):
+                operations.append(UpdateOne(
+                    {"_id": lead["_id"]},
+                    {"$set": {"search_keys": build_lead_search_keys(lead)}}
+                ))
+                if len(operations) >= batch_size:
+                    result = await db.leads.bulk_write(operations, ordered=False)
+                    updated += result.modified_count
+                    batches += 1
+                    operations = []
+
+            if operations:
+                result = await db.leads.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                batches += 1
+
+            logger.info(f"Backfilled search keys for {updated} leads in {batches} batches")
+            return {"success": True, "updated": updated, "batches": batches}
+
+        except Exception as e:
+            logger.error(f"Error backfilling lead search keys: {str(e)}")
+            return {"success": False, "updated": updated, "batches": batches, "error": str(e)}
+
+
+# Global service instance
+lead_search_service = LeadSearchService()
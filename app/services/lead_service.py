@@ -3,9 +3,12 @@
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 import logging
+import time
 
 from ..config.database import get_database
+from .activity_log_service import activity_log
 from ..models.lead import (
     LeadCreateComprehensive, ExperienceLevel,CallStatsModel
 )
@@ -15,6 +18,13 @@ from ..models.source import SourceHelper
 from .lead_assignment_service import lead_assignment_service
 from .user_lead_array_service import user_lead_array_service
 from .lead_category_service import lead_category_service  # 🆕 NEW: Import for new ID generation
+from ..utils.pagination import fetch_keyset_page, lead_count_cache
+from .lead_duplicate_service import BatchDuplicateChecker, normalize_phone_number
+from .lead_search_service import (
+    lead_search_service, build_lead_search_query, build_lead_search_keys, needs_search_key_refresh
+)
+from .user_directory_service import UserDirectoryLoader, format_user_display_name
+from .lead_stats_service import lead_stats_service, touches_lead_stats
 
 logger = logging.getLogger(__name__)
 
@@ -412,9 +422,13 @@ class LeadService:
             }
             
             # Step 8: Insert lead
+            lead_doc["search_keys"] = build_lead_search_keys(lead_doc)
+            lead_doc["timeline_bucketed"] = True  # no history to migrate
             result = await db.leads.insert_one(lead_doc)
             
             if result.inserted_id:
+                await lead_stats_service.record_created([lead_doc])
+                
                 # Step 9: Update user array if assigned
                 if assigned_to:
                     await user_lead_array_service.add_lead_to_user_array(assigned_to, lead_id)
@@ -619,9 +633,13 @@ class LeadService:
             }
             
             # Step 7: Insert lead
+            lead_doc["search_keys"] = build_lead_search_keys(lead_doc)
+            lead_doc["timeline_bucketed"] = True  # no history to migrate
             result = await db.leads.insert_one(lead_doc)
             
             if result.inserted_id:
+                await lead_stats_service.record_created([lead_doc])
+                
                 # Step 8: Update user array if assigned
                 if assigned_to:
                     await user_lead_array_service.add_lead_to_user_array(assigned_to, lead_id)
@@ -672,7 +690,13 @@ class LeadService:
         selected_user_emails: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
-        🔧 FIXED: Bulk create leads with REAL-TIME duplicate detection
+        Bulk create leads as a staged pipeline:
+
+        1. Duplicate detection and course level / source validation (once per distinct value)
+        2. Lead ID reservation - one counter $inc per category-source combination
+        3. Assignment planning in memory and one query for assignee names
+        4. A single unordered insert_many for all lead documents
+        5. One bulk_write for user assigned_leads arrays and total_assigned_leads
         """
         db = self.get_db()
         
@@ -686,215 +710,310 @@ class LeadService:
                     "validation_error": field_validation
                 }
             
-            created_leads = []
+            started_at = time.monotonic()
+            total_processed = len(leads_data)
+            row_results: List[Optional[Dict[str, Any]]] = [None] * total_processed
             failed_leads = []
-            duplicates_skipped = []  # 🔧 Track duplicates separately
-            assignment_summary = []
+            duplicate_indices = []
+            pending = []  # Rows that passed duplicate checks and validation
+            
+            def fail_row(index: int, error: str, summary_error: Optional[str] = None):
+                failed_leads.append({
+                    "index": index,
+                    "data": leads_data[index],
+                    "error": error
+                })
+                row_results[index] = {
+                    "lead_id": None,
+                    "assigned_to": None,
+                    "status": "failed",
+                    "error": summary_error or error
+                }
+            
+            logger.info(f"🚀 Processing {total_processed} leads for bulk creation...")
             
-            logger.info(f"🚀 Processing {len(leads_data)} leads for bulk creation...")
+            # ----------------------------------------------------------------
+            # Stage 1: duplicates and dynamic field validation
+            # ----------------------------------------------------------------
+            
+            # Resolve duplicates for the whole upload with a couple of $in queries
+            duplicate_checker = await BatchDuplicateChecker(db).load(leads_data)
+            validated_course_levels: Dict[Any, Optional[str]] = {}
+            validated_sources: Dict[Any, Optional[str]] = {}
             
             for i, lead_data in enumerate(leads_data):
                 try:
-                    logger.info(f"📋 Processing lead {i+1}/{len(leads_data)}: {lead_data.get('email', 'no email')}")
-                    
-                    # 🔧 CRITICAL FIX: Check for duplicates against LIVE database
-                    duplicate_check = await self.check_duplicate_lead(
+                    # Check against existing leads and rows accepted earlier in this batch
+                    duplicate_check = duplicate_checker.check(
                         email=lead_data.get("email", ""),
                         contact_number=lead_data.get("contact_number", "")
                     )
-                    
                     if duplicate_check["is_duplicate"]:
                         logger.warning(f"⚠️ DUPLICATE DETECTED for lead {i}: {duplicate_check['message']}")
-                        duplicates_skipped.append({
-                            "index": i,
-                            "data": {
-                                "name": lead_data.get("name", ""),
-                                "email": lead_data.get("email", ""),
-                                "contact_number": lead_data.get("contact_number", "")
-                            },
-                            "reason": duplicate_check["message"],
-                            "existing_lead_id": duplicate_check.get("existing_lead_id"),
-                            "duplicate_field": duplicate_check.get("duplicate_field"),
-                            "duplicate_value": duplicate_check.get("duplicate_value")
-                        })
-                        assignment_summary.append({
-                            "lead_id": None,
-                            "assigned_to": None,
-                            "status": "skipped_duplicate",
-                            "reason": duplicate_check["message"]
-                        })
-                        continue  # Skip this lead and move to next
+                        duplicate_indices.append(i)
+                        continue
                     
-                    logger.info(f"✅ No duplicate found for lead {i}, proceeding with creation...")
+                    course_level = lead_data.get("course_level")
+                    if course_level not in validated_course_levels:
+                        validated_course_levels[course_level] = await self.validate_and_set_course_level(course_level)
+                    source = lead_data.get("source")
+                    if source not in validated_sources:
+                        validated_sources[source] = await self.validate_and_set_source(source)
                     
-                    # Validate and set dynamic fields
-                    validated_course_level = await self.validate_and_set_course_level(
-                        lead_data.get("course_level")
-                    )
-                    validated_source = await self.validate_and_set_source(
-                        lead_data.get("source")
+                    # Registered before insertion so later rows repeating it are flagged;
+                    # lead_id is filled in once IDs are reserved
+                    batch_entry = {
+                        "lead_id": None,
+                        "name": lead_data.get("name", ""),
+                        "email": lead_data.get("email", "").lower(),
+                        "contact_number": lead_data.get("contact_number", ""),
+                        "batch_index": i
+                    }
+                    duplicate_checker.register(
+                        lead_data.get("email", ""),
+                        lead_data.get("contact_number", ""),
+                        batch_entry
                     )
                     
-                    # Generate lead ID using category-source combination
-                    lead_id = await self.generate_lead_id_by_category_and_source(
-                        category=lead_data.get("category", "General"),
-                        source=validated_source
+                    pending.append({
+                        "index": i,
+                        "data": lead_data,
+                        "category": lead_data.get("category", "General"),
+                        "course_level": validated_course_levels[course_level],
+                        "source": validated_sources[source],
+                        "batch_entry": batch_entry
+                    })
+                    
+                except Exception as e:
+                    logger.error(f"❌ Error preparing lead at index {i}: {str(e)}")
+                    fail_row(i, str(e))
+            
+            # ----------------------------------------------------------------
+            # Stage 2: reserve lead IDs per category-source combination
+            # ----------------------------------------------------------------
+            
+            combinations: Dict[tuple, List[Dict[str, Any]]] = {}
+            for row in pending:
+                combinations.setdefault((row["category"], row["source"]), []).append(row)
+            
+            for (category, source), rows in combinations.items():
+                try:
+                    lead_ids = await lead_category_service.generate_lead_ids_by_category_and_source(
+                        category=category,
+                        source=source,
+                        count=len(rows)
                     )
+                    for row, lead_id in zip(rows, lead_ids):
+                        row["lead_id"] = lead_id
+                        row["batch_entry"]["lead_id"] = lead_id
+                except Exception as e:
+                    logger.error(f"❌ Error reserving lead IDs for {category}/{source}: {str(e)}")
+                    for row in rows:
+                        fail_row(row["index"], str(e))
+            
+            pending = [row for row in pending if row.get("lead_id")]
+            
+            # Duplicate details are built now so in-batch matches carry their lead ID
+            duplicates_skipped = []
+            for i in duplicate_indices:
+                lead_data = leads_data[i]
+                duplicate_check = duplicate_checker.check(
+                    email=lead_data.get("email", ""),
+                    contact_number=lead_data.get("contact_number", "")
+                )
+                duplicates_skipped.append({
+                    "index": i,
+                    "data": {
+                        "name": lead_data.get("name", ""),
+                        "email": lead_data.get("email", ""),
+                        "contact_number": lead_data.get("contact_number", "")
+                    },
+                    "reason": duplicate_check["message"],
+                    "existing_lead_id": duplicate_check.get("existing_lead_id"),
+                    "duplicate_field": duplicate_check.get("duplicate_field"),
+                    "duplicate_value": duplicate_check.get("duplicate_value")
+                })
+                row_results[i] = {
+                    "lead_id": None,
+                    "assigned_to": None,
+                    "status": "skipped_duplicate",
+                    "reason": duplicate_check["message"]
+                }
+            
+            # ----------------------------------------------------------------
+            # Stage 3: plan assignments in memory
+            # ----------------------------------------------------------------
+            
+            use_selected_users = assignment_method == "selected_users" and bool(selected_user_emails)
+            auto_method = "selective_round_robin" if use_selected_users else "round_robin"
+            auto_rows = []
+            manual_emails = []
+            
+            for row in pending:
+                lead_assigned_to = row["data"].get("assigned_to")
+                if lead_assigned_to == "unassigned":
+                    row["assigned_to"] = None
+                    row["method"] = "unassigned"
+                elif lead_assigned_to:
+                    row["assigned_to"] = lead_assigned_to
+                    row["method"] = "manual"
+                    manual_emails.append(lead_assigned_to)
+                else:
+                    row["method"] = auto_method
+                    auto_rows.append(row)
+            
+            planned_assignees = await lead_assignment_service.plan_round_robin_assignments(
+                len(auto_rows),
+                selected_user_emails=selected_user_emails if use_selected_users else None,
+                preassigned_emails=manual_emails
+            )
+            for row, assignee in zip(auto_rows, planned_assignees):
+                row["assigned_to"] = assignee
+            
+            # Resolve every assignee name with one query
+            user_loader = UserDirectoryLoader(db)
+            for row in pending:
+                user_loader.add_email(row["assigned_to"])
+            await user_loader.load()
+            
+            # ----------------------------------------------------------------
+            # Stage 4: insert all lead documents with one unordered insert_many
+            # ----------------------------------------------------------------
+            
+            lead_docs = []
+            for row in pending:
+                lead_data = row["data"]
+                lead_id = row["lead_id"]
+                assigned_to = row["assigned_to"]
+                method = row["method"]
+                validated_course_level = row["course_level"]
+                validated_source = row["source"]
+                
+                assignee = user_loader.get_by_email(assigned_to) if assigned_to else None
+                assigned_to_name = format_user_display_name(assignee, "Unknown") if assignee else None
+                
+                now = datetime.utcnow()
+                lead_doc = {
+                    "lead_id": lead_id,
+                    "status": lead_data.get("status", "New"),
+                    "name": lead_data.get("name", ""),
+                    "email": lead_data.get("email", "").lower(),
+                    "contact_number": lead_data.get("contact_number", ""),
+                    "phone_number": lead_data.get("contact_number", ""),  # Legacy compatibility
+                    "source": validated_source,
+                    "category": row["category"],
+                    "course_level": validated_course_level,
                     
-                    # Handle assignment logic
-                    lead_assigned_to = lead_data.get("assigned_to")
+                    # Optional fields
+                    "age": lead_data.get("age"),
+                    "experience": lead_data.get("experience"),
+                    "nationality": lead_data.get("nationality"),
+                    "current_location": lead_data.get("current_location"),
+                    "date_of_birth": lead_data.get("date_of_birth"),
+                    "call_stats": CallStatsModel.create_default().model_dump(),
                     
-                    if lead_assigned_to == "unassigned":
-                        assigned_to = None
-                        assigned_to_name = None
-                        method = "unassigned"
-                        logger.info(f"Lead {i} explicitly set to unassigned")
-                    elif lead_assigned_to and lead_assigned_to != "unassigned":
-                        assigned_to = lead_assigned_to
-                        method = "manual"
-                        logger.info(f"Lead {i} manually assigned to: {assigned_to}")
-                    else:
-                        if assignment_method == "selected_users" and selected_user_emails:
-                            assigned_to = await lead_assignment_service.get_next_assignee_selective_round_robin(
-                                selected_user_emails
-                            )
-                            method = "selective_round_robin"
-                        else:
-                            assigned_to = await lead_assignment_service.get_next_assignee_round_robin()
-                            method = "round_robin"
-                        logger.info(f"Lead {i} auto-assigned to: {assigned_to} using {method}")
+                    # Status and tags
+                    "stage": lead_data.get("stage", "Pending"),
+                    "lead_score": lead_data.get("lead_score", 0),
+                    "priority": lead_data.get("priority", "medium"),
+                    "tags": lead_data.get("tags", []),
                     
-                    # Get assignee name
-                    assigned_to_name = None
-                    if assigned_to:
-                        assignee = await db.users.find_one({"email": assigned_to})
-                        if assignee:
-                            assigned_to_name = f"{assignee.get('first_name', '')} {assignee.get('last_name', '')}".strip()
-                            if not assigned_to_name:
-                                assigned_to_name = assignee.get('email', 'Unknown')
+                    # Assignment
+                    "assigned_to": assigned_to,
+                    "assigned_to_name": assigned_to_name,
+                    "assignment_method": method,
                     
-                    # Create lead document with all required fields
-                    lead_doc = {
-                        "lead_id": lead_id,
-                        "status": lead_data.get("status", "New"),
-                        "name": lead_data.get("name", ""),
-                        "email": lead_data.get("email", "").lower(),
-                        "contact_number": lead_data.get("contact_number", ""),
-                        "phone_number": lead_data.get("contact_number", ""),  # Legacy compatibility
-                        "source": validated_source,
-                        "category": lead_data.get("category", "General"),
-                        "course_level": validated_course_level,
-                        
-                        # Optional fields
-                        "age": lead_data.get("age"),
-                        "experience": lead_data.get("experience"),
-                        "nationality": lead_data.get("nationality"),
-                        "current_location": lead_data.get("current_location"),
-                        "date_of_birth": lead_data.get("date_of_birth"),
-                        "call_stats": CallStatsModel.create_default().model_dump(),
-                        
-                        # Status and tags
-                        "stage": lead_data.get("stage", "Pending"),
-                        "lead_score": lead_data.get("lead_score", 0),
-                        "priority": lead_data.get("priority", "medium"),
-                        "tags": lead_data.get("tags", []),
-                        
-                        # Assignment
+                    # Multi-assignment fields (for future compatibility)
+                    "co_assignees": [],
+                    "co_assignees_names": [],
+                    "is_multi_assigned": False,
+                    
+                    # Assignment history
+                    "assignment_history": [{
                         "assigned_to": assigned_to,
                         "assigned_to_name": assigned_to_name,
+                        "assigned_by": created_by,
                         "assignment_method": method,
-                        
-                        # Multi-assignment fields (for future compatibility)
-                        "co_assignees": [],
-                        "co_assignees_names": [],
-                        "is_multi_assigned": False,
-                        
-                        # Assignment history
-                        "assignment_history": [{
-                            "assigned_to": assigned_to,
-                            "assigned_to_name": assigned_to_name,
-                            "assigned_by": created_by,
-                            "assignment_method": method,
-                            "assigned_at": datetime.utcnow(),
-                            "reason": f"Bulk creation ({assignment_method})",
-                            "bulk_index": i,
-                            "selected_users_pool": selected_user_emails if assignment_method == "selected_users" else None,
-                            "validated_course_level": validated_course_level,
-                            "validated_source": validated_source,
-                            "lead_id_format": "category_source_combination"
-                        }],
-                        
-                        # Additional info
-                        "notes": lead_data.get("notes", ""),
-                        "created_by": created_by,
-                        "created_at": datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                        
-                        # WhatsApp fields (initialize to defaults)
-                        "last_whatsapp_activity": None,
-                        "last_whatsapp_message": None,
-                        "whatsapp_message_count": 0,
-                        "unread_whatsapp_count": 0
-                    }
-                    
-                    # Insert lead into database
-                    result = await db.leads.insert_one(lead_doc)
+                        "assigned_at": now,
+                        "reason": f"Bulk creation ({assignment_method})",
+                        "bulk_index": row["index"],
+                        "selected_users_pool": selected_user_emails if assignment_method == "selected_users" else None,
+                        "validated_course_level": validated_course_level,
+                        "validated_source": validated_source,
+                        "lead_id_format": "category_source_combination"
+                    }],
                     
-                    if result.inserted_id:
-                        # Update user array if assigned
-                        if assigned_to:
-                            await user_lead_array_service.add_lead_to_user_array(assigned_to, lead_id)
-                        
-                        created_leads.append(lead_id)
-                        assignment_summary.append({
-                            "lead_id": lead_id,
-                            "assigned_to": assigned_to,
-                            "validated_course_level": validated_course_level,
-                            "validated_source": validated_source,
-                            "lead_id_format": "category_source_combination",
-                            "status": "success"
-                        })
-                        
-                        logger.info(f"✅ Successfully created lead {lead_id} (index {i})")
-                    else:
-                        failed_leads.append({
-                            "index": i,
-                            "data": lead_data,
-                            "error": "Failed to insert to database"
-                        })
-                        assignment_summary.append({
-                            "lead_id": None,
-                            "assigned_to": None,
-                            "status": "failed",
-                            "error": "Database insertion failed"
-                        })
-                        logger.error(f"❌ Failed to insert lead at index {i}")
+                    # Additional info
+                    "notes": lead_data.get("notes", ""),
+                    "created_by": created_by,
+                    "created_at": now,
+                    "updated_at": now,
                     
+                    # WhatsApp fields (initialize to defaults)
+                    "last_whatsapp_activity": None,
+                    "last_whatsapp_message": None,
+                    "whatsapp_message_count": 0,
+                    "unread_whatsapp_count": 0
+                }
+                lead_doc["search_keys"] = build_lead_search_keys(lead_doc)
+                lead_doc["timeline_bucketed"] = True  # no history to migrate
+                lead_docs.append(lead_doc)
+            
+            insert_errors: Dict[int, str] = {}
+            if lead_docs:
+                try:
+                    await db.leads.insert_many(lead_docs, ordered=False)
+                except BulkWriteError as bwe:
+                    # Unordered: every document without a write error was inserted
+                    for write_error in bwe.details.get("writeErrors", []):
+                        insert_errors[write_error["index"]] = write_error.get("errmsg", "Failed to insert to database")
                 except Exception as e:
-                    logger.error(f"❌ Error creating lead at index {i}: {str(e)}")
-                    failed_leads.append({
-                        "index": i,
-                        "data": lead_data,
-                        "error": str(e)
-                    })
-                    assignment_summary.append({
-                        "lead_id": None,
-                        "assigned_to": None,
-                        "status": "failed",
-                        "error": str(e)
-                    })
+                    logger.error(f"❌ insert_many failed for bulk creation: {str(e)}")
+                    insert_errors = {position: str(e) for position in range(len(lead_docs))}
+            
+            created_leads = []
+            user_assignments: Dict[str, List[str]] = {}
+            for position, row in enumerate(pending):
+                if position in insert_errors:
+                    logger.error(f"❌ Failed to insert lead at index {row['index']}: {insert_errors[position]}")
+                    fail_row(row["index"], insert_errors[position], "Database insertion failed")
+                    continue
+                
+                created_leads.append(row["lead_id"])
+                if row["assigned_to"]:
+                    user_assignments.setdefault(row["assigned_to"], []).append(row["lead_id"])
+                row_results[row["index"]] = {
+                    "lead_id": row["lead_id"],
+                    "assigned_to": row["assigned_to"],
+                    "validated_course_level": row["course_level"],
+                    "validated_source": row["source"],
+                    "lead_id_format": "category_source_combination",
+                    "status": "success"
+                }
+            
+            # ----------------------------------------------------------------
+            # Stage 5: user assigned_leads arrays and counters in one bulk_write
+            # ----------------------------------------------------------------
+            
+            await user_lead_array_service.add_leads_to_user_arrays_bulk(user_assignments)
+            await lead_stats_service.record_created(
+                [doc for position, doc in enumerate(lead_docs) if position not in insert_errors]
+            )
             
             # Final summary
-            total_processed = len(leads_data)
+            failed_leads.sort(key=lambda failure: failure["index"])
+            assignment_summary = [result for result in row_results if result is not None]
             successfully_created = len(created_leads)
             duplicates_count = len(duplicates_skipped)
             failed_count = len(failed_leads)
+            elapsed = time.monotonic() - started_at
             
             logger.info(f"🏁 Bulk creation completed:")
             logger.info(f"   📊 Total processed: {total_processed}")
             logger.info(f"   ✅ Successfully created: {successfully_created}")
             logger.info(f"   ⚠️ Duplicates skipped: {duplicates_count}")
             logger.info(f"   ❌ Failed: {failed_count}")
+            logger.info(f"   ⏱️ {elapsed:.2f}s ({total_processed / elapsed if elapsed else 0:.0f} rows/s)")
             
             return {
                 "success": failed_count == 0,  # Success if no failures (duplicates are expected)
@@ -1383,17 +1502,7 @@ class LeadService:
         
     def _normalize_phone_number(self, phone: str) -> str:
             """Normalize phone number for consistent duplicate checking"""
-            if not phone:
-                return None
-                
-            # Remove all non-digit characters except +
-            normalized = ''.join(c for c in phone if c.isdigit() or c == '+')
-
-            # Remove leading + for comparison
-            if normalized.startswith('+'):
-                normalized = normalized[1:]
-            
-            return normalized if len(normalized) >= 10 else None
+            return normalize_phone_number(phone)
 
     async def log_lead_activity(
         self,
@@ -1424,7 +1533,7 @@ class LeadService:
                 "metadata": metadata or {}
             }
             
-            await db.lead_activities.insert_one(activity_doc)
+            await activity_log.log(activity_doc)
             logger.info(f"✅ Activity logged: {activity_type} for lead {lead_id}")
             
         except Exception as e:
@@ -1469,11 +1578,19 @@ class LeadService:
             # Add updated timestamp
             update_data["updated_at"] = datetime.utcnow()
             
+            stats_before = await lead_stats_service.snapshot(lead_id) if touches_lead_stats(update_data) else None
+            
             # Update the lead
             result = await db.leads.update_one(
                 {"lead_id": lead_id},
                 {"$set": update_data}
             )
+            if result.modified_count > 0:
+                await lead_stats_service.record_update(stats_before, update_data)
+            
+            # Keep indexed search keys in step with name/email/phone changes
+            if needs_search_key_refresh(update_data):
+                await lead_search_service.refresh_lead_search_keys(lead_id)
             
             if result.modified_count > 0:
                 # Log activity
@@ -1551,6 +1668,7 @@ class LeadService:
             result = await db.leads.delete_one({"lead_id": lead_id})
             
             if result.deleted_count > 0:
+                await lead_stats_service.record_deleted(lead)
                 return {
                     "success": True,
                     "message": f"Lead {lead_id} deleted successfully"
@@ -1719,21 +1837,22 @@ class LeadService:
         user_email: str,
         user_role: str,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        use_cursor: bool = False,
+        include_total: bool = True
     ) -> Dict[str, Any]:
-        """Search leads by name, email, or lead ID"""
+        """
+        Search leads by name, email, or lead ID
+        
+        With `use_cursor` (or a `cursor`) results are keyset-paginated on
+        (created_at, _id) and the total, if requested, comes from a short-lived cache.
+        """
         try:
             db = self.get_db()
             
-            # Build search query
-            search_query = {
-                "$or": [
-                    {"name": {"$regex": search_term, "$options": "i"}},
-                    {"email": {"$regex": search_term, "$options": "i"}},
-                    {"lead_id": {"$regex": search_term, "$options": "i"}},
-                    {"contact_number": {"$regex": search_term, "$options": "i"}}
-                ]
-            }
+            # Build search query (indexed prefix match on search_keys)
+            search_query = build_lead_search_query(search_term)
             
             # Add role-based filtering
             if user_role != "admin":
@@ -1749,6 +1868,22 @@ class LeadService:
                     ]
                 }
             
+            if cursor or use_cursor:
+                page_result = await fetch_keyset_page(db.leads, search_query, limit, cursor)
+                total_count = await lead_count_cache.count(db.leads, search_query) if include_total else None
+                
+                return {
+                    "success": True,
+                    "leads": [self.format_lead_response(lead) for lead in page_result["documents"]],
+                    "total_count": total_count,
+                    "limit": limit,
+                    "next_cursor": page_result["next_cursor"],
+                    "prev_cursor": page_result["prev_cursor"],
+                    "has_next": page_result["has_next"],
+                    "has_prev": page_result["has_prev"],
+                    "search_term": search_term
+                }
+            
             # Get total count
             total_count = await db.leads.count_documents(search_query)
             
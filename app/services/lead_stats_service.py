@@ -0,0 +1,530 @@
+# app/services/lead_stats_service.py - Materialized lead statistics
+"""
+Lead statistics kept as counters in the `lead_stats` collection.
+
+One `global` document holds the totals, status/stage breakdowns, unassigned
+and multi-assigned counts. One `user:<email>` document per user holds the
+same breakdowns twice: `primary` (assigned_to) and `involved` (assigned_to or
+co_assignees), which are the two scopes /leads/stats reports.
+
+Lead writes call `record_created` / `record_update` / `record_deleted`, which
+turn the before/after difference of the stats fields into $inc operations
+applied with one bulk_write. The same (before, after) pairs are passed to
+change listeners (the lead access index) registered with add_change_listener. `reconcile()` recomputes everything from the
+leads collection with a single $facet aggregation; it runs periodically,
+on first read, and whenever a bulk update marks the counters dirty.
+
+Every counter write also increments the document's `revision`.
+Reconciliation runs under a lease (one worker at a time) and corrects the
+counters with $inc deltas (computed minus observed), guarded on the
+revision it read. Counters that moved while the aggregation ran, and
+documents written between the read and the correction, are left for the
+next run instead of overwriting the concurrent $inc.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Callable, Awaitable
+
+from pymongo import UpdateOne, DeleteOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from ..config.database import get_database
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_STATS_ID = "global"
+RECONCILE_LEASE_ID = "reconcile_lease"
+# Longest a reconciliation may hold the lease before another worker takes over
+RECONCILE_LEASE_SECONDS = 600
+DUPLICATE_KEY_ERROR = 11000
+
+# Lead fields that feed the counters
+LEAD_STATS_FIELDS = ("status", "stage", "assigned_to", "co_assignees", "is_multi_assigned")
+LEAD_STATS_PROJECTION = {field: 1 for field in LEAD_STATS_FIELDS}
+
+
+def _encode_key(value: Any) -> str:
+    """Make a status/stage value safe to use as a field name"""
+    key = str(value).replace("%", "%25").replace(".", "%2E")
+    return "%24" + key[1:] if key.startswith("$") else key
+
+
+def _decode_key(key: str) -> str:
+    if key.startswith("%24"):
+        key = "$" + key[3:]
+    return key.replace("%2E", ".").replace("%25", "%")
+
+
+def _user_stats_id(email: str) -> str:
+    return f"user:{email}"
+
+
+def touches_lead_stats(update_data: Dict[str, Any]) -> bool:
+    return any(field in update_data for field in LEAD_STATS_FIELDS)
+
+
+def apply_lead_stats_update(before: Dict[str, Any], set_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """The stats fields of a lead after a $set of `set_fields`"""
+    after = {field: before.get(field) for field in LEAD_STATS_FIELDS}
+    for field in LEAD_STATS_FIELDS:
+        if field in set_fields:
+            after[field] = set_fields[field]
+    return after
+
+
+def _involved_users(lead: Dict[str, Any]) -> set:
+    users = set()
+    if lead.get("assigned_to"):
+        users.add(lead["assigned_to"])
+    co_assignees = lead.get("co_assignees")
+    if isinstance(co_assignees, list):
+        users.update(email for email in co_assignees if email and isinstance(email, str))
+    return users
+
+
+def lead_stats_contributions(lead: Optional[Dict[str, Any]]) -> Dict[str, Counter]:
+    """Counter increments one lead contributes, keyed by lead_stats document id"""
+    contributions: Dict[str, Counter] = {}
+    if not lead:
+        return contributions
+
+    status_value = lead.get("status")
+    stage_value = lead.get("stage")
+
+    def add(doc_id: str, prefix: str = "") -> None:
+        counter = contributions.setdefault(doc_id, Counter())
+        counter[f"{prefix}total"] += 1
+        if status_value:
+            counter[f"{prefix}status.{_encode_key(status_value)}"] += 1
+        if stage_value:
+            counter[f"{prefix}stage.{_encode_key(stage_value)}"] += 1
+
+    add(GLOBAL_STATS_ID)
+    global_counter = contributions[GLOBAL_STATS_ID]
+    if lead.get("assigned_to") is None:
+        global_counter["unassigned"] += 1
+    if lead.get("is_multi_assigned") is True:
+        global_counter["multi_assigned"] += 1
+
+    if lead.get("assigned_to"):
+        add(_user_stats_id(lead["assigned_to"]), "primary.")
+    for email in _involved_users(lead):
+        add(_user_stats_id(email), "involved.")
+
+    return contributions
+
+
+def _counter_values(doc: Dict[str, Any]) -> Dict[str, int]:
+    """Flatten the counters of a lead_stats document to {dotted path: count}"""
+    values = {}
+    roots = ("primary", "involved") if doc.get("scope") == "user" else ("",)
+    for root in roots:
+        bucket = (doc.get(root) or {}) if root else doc
+        prefix = f"{root}." if root else ""
+        for field in ("total", "unassigned", "multi_assigned"):
+            if isinstance(bucket.get(field), int):
+                values[f"{prefix}{field}"] = bucket[field]
+        for field in ("status", "stage"):
+            for key, count in (bucket.get(field) or {}).items():
+                if isinstance(count, int):
+                    values[f"{prefix}{field}.{key}"] = count
+    return values
+
+
+def _decode_bucket(bucket: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Decode a {total, status, stage} bucket into plain breakdowns (largest first)"""
+    bucket = bucket or {}
+
+    def breakdown(values: Optional[Dict[str, int]]) -> Dict[str, int]:
+        items = [(_decode_key(key), count) for key, count in (values or {}).items() if count > 0]
+        items.sort(key=lambda item: item[1], reverse=True)
+        return dict(items)
+
+    return {
+        "total": max(bucket.get("total", 0), 0),
+        "status_breakdown": breakdown(bucket.get("status")),
+        "stage_breakdown": breakdown(bucket.get("stage"))
+    }
+
+
+class LeadStatsService:
+    """Maintains and serves the lead_stats counters"""
+
+    def __init__(self, reconcile_minutes: int = 30):
+        self.reconcile_minutes = reconcile_minutes
+        self._dirty = False
+        self._ready = False
+        self._reconcile_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self._change_listeners: List[Callable[[List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]], Awaitable[None]]] = []
+
+    def get_db(self):
+        return get_database()
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    async def snapshot(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        """Current stats fields of a lead, read before updating it"""
+        try:
+            return await self.get_db().leads.find_one({"lead_id": lead_id}, LEAD_STATS_PROJECTION)
+        except Exception as e:
+            logger.error(f"Error reading lead stats snapshot for {lead_id}: {str(e)}")
+            self.mark_dirty()
+            return None
+
+    def add_change_listener(self, listener: Callable[[List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]], Awaitable[None]]) -> None:
+        """Register an async callback receiving the (before, after) pairs of every recorded lead write"""
+        self._change_listeners.append(listener)
+
+    async def _notify_listeners(self, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        for listener in self._change_listeners:
+            try:
+                await listener(changes)
+            except Exception as e:
+                logger.error(f"Error in lead change listener: {str(e)}")
+
+    async def record_changes(self, changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Apply the counter deltas of many (before, after) lead pairs with one bulk_write"""
+        changes = list(changes)
+        await self._notify_listeners(changes)
+
+        deltas: Dict[str, Counter] = {}
+        for before, after in changes:
+            for doc_id, counter in lead_stats_contributions(after).items():
+                deltas.setdefault(doc_id, Counter()).update(counter)
+            for doc_id, counter in lead_stats_contributions(before).items():
+                deltas.setdefault(doc_id, Counter()).subtract(counter)
+
+        now = datetime.utcnow()
+        operations = []
+        for doc_id, counter in deltas.items():
+            increments = {path: count for path, count in counter.items() if count}
+            if not increments:
+                continue
+            if doc_id == GLOBAL_STATS_ID:
+                on_insert = {"scope": "global"}
+            else:
+                on_insert = {"scope": "user", "email": doc_id[len("user:"):]}
+            operations.append(UpdateOne(
+                {"_id": doc_id},
+                {"$inc": {**increments, "revision": 1}, "$set": {"updated_at": now}, "$setOnInsert": on_insert},
+                upsert=True
+            ))
+
+        if not operations:
+            return
+
+        try:
+            await self.get_db().lead_stats.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error updating lead stats counters: {str(e)}")
+            self.mark_dirty()
+
+    async def record_change(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+        await self.record_changes([(before, after)])
+
+    async def record_created(self, leads: List[Dict[str, Any]]) -> None:
+        await self.record_changes((None, lead) for lead in leads)
+
+    async def record_deleted(self, lead: Optional[Dict[str, Any]]) -> None:
+        if lead:
+            await self.record_change(lead, None)
+
+    async def record_update(self, before: Optional[Dict[str, Any]], set_fields: Dict[str, Any]) -> None:
+        """Record a $set applied to a lead whose prior stats fields are `before`"""
+        if before is None or not touches_lead_stats(set_fields):
+            return
+        await self.record_change(before, apply_lead_stats_update(before, set_fields))
+
+    def mark_dirty(self) -> None:
+        """Counters may have drifted (e.g. after update_many) - reconcile before the next read"""
+        self._dirty = True
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    async def _acquire_reconcile_lease(self, owner: str) -> bool:
+        """One worker reconciles at a time; a crashed worker's lease expires"""
+        now = datetime.utcnow()
+        try:
+            lease = await self.get_db().lead_stats.find_one_and_update(
+                {
+                    "_id": RECONCILE_LEASE_ID,
+                    "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]
+                },
+                {"$set": {"lease_owner": owner, "lease_expires_at": now + timedelta(seconds=RECONCILE_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception:
+            # Upsert raced with a live lease (duplicate _id)
+            return False
+        return bool(lease and lease.get("lease_owner") == owner)
+
+    async def _release_reconcile_lease(self, owner: str) -> None:
+        try:
+            await self.get_db().lead_stats.update_one(
+                {"_id": RECONCILE_LEASE_ID, "lease_owner": owner},
+                {"$set": {"lease_owner": None, "lease_expires_at": None}}
+            )
+        except Exception as e:
+            logger.error(f"Error releasing lead stats reconcile lease: {str(e)}")
+
+    async def _load_counter_docs(self, db) -> Dict[str, Dict[str, Any]]:
+        docs = await db.lead_stats.find({"$or": [{"_id": GLOBAL_STATS_ID}, {"scope": "user"}]}).to_list(None)
+        return {doc["_id"]: doc for doc in docs}
+
+    async def _compute_counter_docs(self, db) -> Dict[str, Dict[str, Any]]:
+        """Counter documents recomputed from the leads collection, keyed by _id"""
+        pipeline = [
+            {"$project": {
+                "status": 1,
+                "stage": 1,
+                "assigned_to": 1,
+                "is_multi_assigned": 1,
+                "involved": {"$setUnion": [
+                    {"$cond": [{"$in": [{"$ifNull": ["$assigned_to", ""]}, [""]]}, [], ["$assigned_to"]]},
+                    {"$cond": [{"$isArray": "$co_assignees"}, "$co_assignees", []]}
+                ]}
+            }},
+            {"$facet": {
+                "global": [{"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "unassigned": {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$assigned_to", None]}, None]}, 1, 0]}},
+                    "multi_assigned": {"$sum": {"$cond": [{"$eq": ["$is_multi_assigned", True]}, 1, 0]}}
+                }}],
+                "by_status_stage": [
+                    {"$group": {"_id": {"status": "$status", "stage": "$stage"}, "count": {"$sum": 1}}}
+                ],
+                "primary": [
+                    {"$match": {"assigned_to": {"$nin": [None, ""]}}},
+                    {"$group": {"_id": {"user": "$assigned_to", "status": "$status", "stage": "$stage"}, "count": {"$sum": 1}}}
+                ],
+                "involved": [
+                    {"$unwind": "$involved"},
+                    {"$group": {"_id": {"user": "$involved", "status": "$status", "stage": "$stage"}, "count": {"$sum": 1}}}
+                ]
+            }}
+        ]
+        facets = (await db.leads.aggregate(pipeline, allowDiskUse=True).to_list(None))[0]
+
+        totals = facets["global"][0] if facets["global"] else {}
+        global_doc = {
+            "_id": GLOBAL_STATS_ID,
+            "scope": "global",
+            "total": totals.get("total", 0),
+            "unassigned": totals.get("unassigned", 0),
+            "multi_assigned": totals.get("multi_assigned", 0),
+            "status": {},
+            "stage": {}
+        }
+
+        def add_counts(bucket: Dict[str, Any], group: Dict[str, Any], count: int) -> None:
+            bucket["total"] = bucket.get("total", 0) + count
+            if group.get("status"):
+                key = _encode_key(group["status"])
+                bucket["status"][key] = bucket["status"].get(key, 0) + count
+            if group.get("stage"):
+                key = _encode_key(group["stage"])
+                bucket["stage"][key] = bucket["stage"].get(key, 0) + count
+
+        for row in facets["by_status_stage"]:
+            group = row["_id"]
+            for field in ("status", "stage"):
+                if group.get(field):
+                    key = _encode_key(group[field])
+                    global_doc[field][key] = global_doc[field].get(key, 0) + row["count"]
+
+        docs = {GLOBAL_STATS_ID: global_doc}
+        for scope in ("primary", "involved"):
+            for row in facets[scope]:
+                email = row["_id"].get("user")
+                if not email or not isinstance(email, str):
+                    continue
+                doc = docs.setdefault(_user_stats_id(email), {
+                    "_id": _user_stats_id(email),
+                    "scope": "user",
+                    "email": email,
+                    "primary": {"total": 0, "status": {}, "stage": {}},
+                    "involved": {"total": 0, "status": {}, "stage": {}}
+                })
+                add_counts(doc[scope], row["_id"], row["count"])
+        return docs
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Recompute every counter from the leads collection and correct lead_stats with deltas"""
+        from .realtime_broker import WORKER_ID
+
+        async with self._reconcile_lock:
+            db = self.get_db()
+            if not await self._acquire_reconcile_lease(WORKER_ID):
+                return {"success": False, "skipped": True, "error": "Reconciliation running on another worker"}
+
+            started_at = datetime.utcnow()
+            self._dirty = False
+
+            try:
+                observed_before = await self._load_counter_docs(db)
+                computed = await self._compute_counter_docs(db)
+                observed = await self._load_counter_docs(db)
+
+                operations = []
+                skipped = 0
+                for doc_id in set(computed) | set(observed):
+                    before, current, target = observed_before.get(doc_id), observed.get(doc_id), computed.get(doc_id)
+                    if (before is None) != (current is None):
+                        # Created or removed while the aggregation ran; the next run corrects it
+                        skipped += 1
+                        continue
+
+                    if target is None:
+                        if before.get("revision") == current.get("revision"):
+                            operations.append(DeleteOne({"_id": doc_id, "revision": current.get("revision")}))
+                        else:
+                            skipped += 1
+                        continue
+
+                    # Only counters that did not move while the aggregation ran are corrected
+                    target_values = _counter_values(target)
+                    before_values = _counter_values(before or {})
+                    current_values = _counter_values(current or {})
+                    delta = {}
+                    for path in set(target_values) | set(current_values) | set(before_values):
+                        if before_values.get(path, 0) != current_values.get(path, 0):
+                            skipped += 1
+                        elif target_values.get(path, 0) != current_values.get(path, 0):
+                            delta[path] = target_values.get(path, 0) - current_values.get(path, 0)
+                    if not delta and doc_id != GLOBAL_STATS_ID:
+                        continue
+
+                    update: Dict[str, Any] = {
+                        "$inc": {**delta, "revision": 1},
+                        "$set": {"updated_at": started_at, "reconciled_at": started_at}
+                    }
+                    if current is None:
+                        update["$set"].update({key: target[key] for key in ("scope", "email") if key in target})
+                        operations.append(UpdateOne({"_id": doc_id, "revision": {"$exists": False}}, update, upsert=True))
+                    else:
+                        # A $inc landing after the read makes this miss instead of being overwritten
+                        operations.append(UpdateOne({"_id": doc_id, "revision": current.get("revision")}, update))
+
+                corrected = 0
+                if operations:
+                    try:
+                        result = await db.lead_stats.bulk_write(operations, ordered=False)
+                        corrected = result.modified_count + result.upserted_count + result.deleted_count
+                    except BulkWriteError as bwe:
+                        # Duplicate _id: the document was created concurrently; the next run corrects it
+                        errors = bwe.details.get("writeErrors", [])
+                        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                            raise
+                        corrected = bwe.details.get("nModified", 0) + len(bwe.details.get("upserted", [])) + bwe.details.get("nRemoved", 0)
+                        skipped += len(errors)
+
+                self._ready = True
+                users = sum(1 for doc_id in computed if doc_id != GLOBAL_STATS_ID)
+                logger.info(
+                    f"📊 Lead stats reconciled: {computed[GLOBAL_STATS_ID]['total']} leads, {users} users, "
+                    f"{corrected} documents corrected, {skipped} counters left for the next run"
+                )
+                return {
+                    "success": True,
+                    "total_leads": computed[GLOBAL_STATS_ID]["total"],
+                    "users": users,
+                    "corrected_documents": corrected,
+                    "skipped_counters": skipped
+                }
+
+            except Exception as e:
+                logger.error(f"Error reconciling lead stats: {str(e)}")
+                self._dirty = True
+                return {"success": False, "error": str(e)}
+            finally:
+                await self._release_reconcile_lease(WORKER_ID)
+
+    async def _ensure_ready(self) -> None:
+        """Reconcile when counters were never built or are marked dirty"""
+        if self._ready and not self._dirty:
+            return
+        if not self._dirty:
+            global_doc = await self.get_db().lead_stats.find_one({"_id": GLOBAL_STATS_ID}, {"reconciled_at": 1})
+            if global_doc and global_doc.get("reconciled_at"):
+                self._ready = True
+                return
+        await self.reconcile()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def get_user_stats(self, email: str, include_co_assigned: bool = True) -> Dict[str, Any]:
+        """Breakdown for one user's leads - one document read"""
+        await self._ensure_ready()
+        user_doc = await self.get_db().lead_stats.find_one({"_id": _user_stats_id(email)}) or {}
+        return _decode_bucket(user_doc.get("involved" if include_co_assigned else "primary"))
+
+    async def get_all_stats(self) -> Dict[str, Any]:
+        """Global counters plus every user's counters - one query"""
+        await self._ensure_ready()
+        docs = await self.get_db().lead_stats.find({}).to_list(None)
+
+        global_doc = next((doc for doc in docs if doc["_id"] == GLOBAL_STATS_ID), None) or {}
+        overall = _decode_bucket(global_doc)
+        overall["unassigned"] = max(global_doc.get("unassigned", 0), 0)
+        overall["multi_assigned"] = max(global_doc.get("multi_assigned", 0), 0)
+
+        users = {}
+        for doc in docs:
+            if doc.get("scope") == "user" and doc.get("email"):
+                users[doc["email"]] = {
+                    "primary": _decode_bucket(doc.get("primary")),
+                    "involved": _decode_bucket(doc.get("involved"))
+                }
+
+        return {"global": overall, "users": users}
+
+    # ------------------------------------------------------------------
+    # Periodic reconciliation
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        if self.is_running or self.reconcile_minutes <= 0:
+            return
+        self.is_running = True
+        self._task = asyncio.create_task(self._reconcile_loop())
+        logger.info("📊 Lead stats reconciliation started")
+
+    async def stop(self):
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("🛑 Lead stats reconciliation stopped")
+
+    async def _reconcile_loop(self):
+        while self.is_running:
+            try:
+                await self.reconcile()
+                await asyncio.sleep(self.reconcile_minutes * 60)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in lead stats reconciliation loop: {e}")
+                await asyncio.sleep(60)
+
+
+# Global service instance
+lead_stats_service = LeadStatsService(reconcile_minutes=settings.lead_stats_reconcile_minutes)
@@ -6,6 +6,8 @@ import logging
 from collections import Counter
 
 from ..config.database import get_database
+from .activity_log_service import activity_log
+from .lead_access_service import lead_access_index
 from ..models.note import NoteCreate, NoteUpdate, NoteType, NoteSearchRequest
 # from ..models.lead import LeadStatus
 
@@ -97,7 +99,8 @@ class NoteService:
                             "is_important": note_data.is_important
                         }
                     }
-                    await db.lead_activities.insert_one(activity_doc)
+                    # Written synchronously: the duplicate check above reads it back
+                    await activity_log.log(activity_doc, sync=True)
                     logger.info("✅ Activity logged successfully")
                 else:
                     logger.info("⚠️ Activity already exists, skipping duplicate")
@@ -494,7 +497,7 @@ class NoteService:
                                     "updated_fields": list(update_data.keys())  # Keep for backward compatibility
                                 }
                             }
-                            await db.lead_activities.insert_one(activity_doc)
+                            await activity_log.log(activity_doc, sync=True)
                             logger.info(f"✅ Note update activity logged with {len(changes)} changes")
                         else:
                             logger.info("⚠️ Recent update activity exists, skipping duplicate")
@@ -553,7 +556,7 @@ class NoteService:
                             "note_type": note.get('note_type')
                         }
                     }
-                    await db.lead_activities.insert_one(activity_doc)
+                    await activity_log.log(activity_doc)
                     logger.info("✅ Note deletion activity logged")
                 except Exception as activity_error:
                     logger.warning(f"⚠️ Failed to log note deletion activity: {activity_error}")
@@ -579,15 +582,7 @@ class NoteService:
                 user_email = user_info.get("email", "") if user_info else ""
                 
                 # ✅ FIX: Get user's assigned leads (PRIMARY + CO-ASSIGNEES)
-                assigned_leads = await db.leads.find({
-                    "$or": [
-                        {"assigned_to": user_email},
-                        {"co_assignees": user_email}  # 🆕 Added missing co-assignees check
-                    ]
-                }).to_list(None)
-                
-                lead_object_ids = [lead["_id"] for lead in assigned_leads]
-                base_query["lead_object_id"] = {"$in": lead_object_ids}
+                base_query["lead_object_id"] = {"$in": await lead_access_index.object_ids(user_email)}
             
             # Rest of the search logic remains the same...
             search_conditions = []
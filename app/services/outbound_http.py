@@ -0,0 +1,364 @@
+# app/services/outbound_http.py - Pooled outbound HTTP clients for third-party integrations
+"""
+One long-lived httpx.AsyncClient per provider (WhatsApp, Tata, Facebook, CMS,
+ZeptoMail) instead of a new client/session per call, so DNS, TCP and TLS setup
+is paid once per connection rather than once per request.
+
+Each provider client adds:
+- keep-alive pool with connection limits and default timeouts
+- HTTP/2 when the optional `h2` package is installed
+- retry with exponential backoff (idempotent methods, or any method when the
+  connection was never established)
+- a circuit breaker that fails fast after repeated failures
+- latency histogram, error/retry counters and pool-saturation metrics
+
+The registry is started and closed by the application lifespan (app/main.py).
+"""
+
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from typing import Dict, Any, Optional, List
+
+import httpx
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+# Errors raised before the request reached the server: safe to retry for any method
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Provider defaults: timeout (seconds) and pool size
+PROVIDER_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "whatsapp": {"timeout": 30.0, "max_connections": None},  # settings.whatsapp_http_max_connections
+    "tata": {"timeout": None, "max_connections": 20},          # settings.tata_api_timeout
+    "facebook": {"timeout": 30.0, "max_connections": 10},
+    "cms": {"timeout": 10.0, "max_connections": 10},
+    "zeptomail": {"timeout": 30.0, "max_connections": 20},
+}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+
+class ClientClosedError(RuntimeError):
+    """Raised when a provider client is used after the registry was stopped"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open (cooldown) -> half-open (one trial)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Let another half-open trial through when one ended without an outcome"""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.open_count += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.open_count
+        }
+
+
+class ProviderClient:
+    """Pooled client for one provider; mirrors the httpx.AsyncClient request API"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_connections: int,
+        max_retries: int,
+        breaker: CircuitBreaker
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.breaker = breaker
+        self._client: Optional[httpx.AsyncClient] = None
+        self._closed = False
+
+        # Metrics
+        self.request_count = 0
+        self.error_count = 0
+        self.retry_count = 0
+        self.rejected_count = 0
+        self.status_counts: Dict[str, int] = {}
+        self.latency_buckets: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_total_ms = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated_count = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._closed:
+            raise ClientClosedError(f"{self.name} HTTP client used after shutdown")
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=HTTP2_AVAILABLE and settings.outbound_http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=settings.outbound_keepalive_seconds
+                )
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ------------------------------------------------------------------
+    # Request API
+    # ------------------------------------------------------------------
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        retry: Optional[bool] = None,
+        max_retries: Optional[int] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request through the pool with breaker, retry and metrics.
+
+        Args:
+            retry: Force retries on/off (default: on for idempotent methods;
+                   connection failures are always retried)
+            max_retries: Override the retry budget; 0 for callers that retry
+                         themselves, so the two layers do not multiply
+        """
+        method = method.upper()
+        retry_responses = retry if retry is not None else method in IDEMPOTENT_METHODS
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+
+        while True:
+            if not self.breaker.allow():
+                self.rejected_count += 1
+                raise CircuitOpenError(f"{self.name} circuit breaker is open")
+
+            try:
+                response = await self._send(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                retryable = isinstance(e, CONNECT_ERRORS) or retry_responses
+                if retryable and attempt < max_retries:
+                    attempt += 1
+                    await self._backoff(attempt, max_retries, e)
+                    continue
+                raise
+            except BaseException:
+                # Cancelled or failed without reaching the provider: no verdict,
+                # but a half-open trial must not stay claimed forever
+                self.breaker.release_trial()
+                raise
+
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if response.status_code in RETRY_STATUS_CODES and retry_responses and attempt < max_retries:
+                attempt += 1
+                await response.aclose()
+                await self._backoff(
+                    attempt, max_retries, f"HTTP {response.status_code}", response.headers.get("Retry-After")
+                )
+                continue
+
+            return response
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        self.request_count += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.in_flight > self.max_connections:
+            # More requests than pooled connections: callers are queueing for the pool
+            self.saturated_count += 1
+
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status_class = f"{response.status_code // 100}xx"
+            self.status_counts[status_class] = self.status_counts.get(status_class, 0) + 1
+            if response.status_code >= 500:
+                self.error_count += 1
+            return response
+        except Exception:
+            self.error_count += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._observe_latency((time.monotonic() - started) * 1000)
+
+    async def _backoff(
+        self,
+        attempt: int,
+        max_retries: int,
+        reason: Any,
+        retry_after: Optional[str] = None
+    ) -> None:
+        self.retry_count += 1
+        delay = settings.outbound_retry_backoff_seconds * (2 ** (attempt - 1))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        delay = min(delay, 30.0) * (0.5 + random.random() / 2)
+        logger.warning(f"🔁 {self.name} request retry {attempt}/{max_retries} in {delay:.2f}s ({reason})")
+        await asyncio.sleep(delay)
+
+    def _observe_latency(self, elapsed_ms: float) -> None:
+        self.latency_total_ms += elapsed_ms
+        for position, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.latency_buckets[position] += 1
+                return
+        self.latency_buckets[-1] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        observed = sum(self.latency_buckets)
+        histogram = {f"le_{bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.latency_buckets)}
+        histogram["gt_10000ms"] = self.latency_buckets[-1]
+        return {
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "retries": self.retry_count,
+            "rejected_by_breaker": self.rejected_count,
+            "status_counts": dict(self.status_counts),
+            "latency_avg_ms": round(self.latency_total_ms / observed, 1) if observed else 0.0,
+            "latency_histogram": histogram,
+            "pool": {
+                "max_connections": self.max_connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "saturation": round(self.in_flight / self.max_connections, 2) if self.max_connections else 0.0,
+                "saturated_requests": self.saturated_count,
+                "http2": HTTP2_AVAILABLE and settings.outbound_http2
+            },
+            "circuit_breaker": self.breaker.get_stats()
+        }
+
+
+class OutboundHttpRegistry:
+    """Lifespan-managed registry of per-provider pooled clients"""
+
+    def __init__(self):
+        self._clients: Dict[str, ProviderClient] = {}
+
+    def get(self, provider: str) -> ProviderClient:
+        """Get (creating on first use) the pooled client for a provider"""
+        client = self._clients.get(provider)
+        if client is None:
+            client = self._build(provider)
+            self._clients[provider] = client
+        return client
+
+    def _build(self, provider: str) -> ProviderClient:
+        defaults = PROVIDER_DEFAULTS.get(provider, {})
+        timeout = defaults.get("timeout") or (
+            float(settings.tata_api_timeout or 30) if provider == "tata" else 30.0
+        )
+        max_connections = defaults.get("max_connections") or (
+            settings.whatsapp_http_max_connections if provider == "whatsapp" else settings.outbound_http_max_connections
+        )
+        return ProviderClient(
+            name=provider,
+            timeout=timeout,
+            max_connections=max_connections,
+            max_retries=settings.outbound_http_max_retries,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.outbound_breaker_failure_threshold,
+                reset_seconds=settings.outbound_breaker_reset_seconds
+            )
+        )
+
+    async def start(self) -> None:
+        for provider in PROVIDER_DEFAULTS:
+            self.get(provider)
+        logger.info(
+            f"🌐 Outbound HTTP clients ready: {', '.join(self._clients)} "
+            f"(http2 {'on' if HTTP2_AVAILABLE and settings.outbound_http2 else 'off'})"
+        )
+
+    async def stop(self) -> None:
+        for client in self._clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {client.name} HTTP client: {str(e)}")
+        logger.info("🌐 Outbound HTTP clients closed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: client.get_stats() for name, client in self._clients.items()}
+
+
+# Global registry instance
+outbound_http = OutboundHttpRegistry()
@@ -11,6 +11,7 @@ from bson import ObjectId
 
 from ..config.database import get_database
 from ..config.settings import settings
+from .user_directory_service import user_directory
 from ..utils.security import SecurityManager, get_password_hash, verify_password
 from ..services.zepto_client import zepto_client
 from ..models.password_reset import (
@@ -434,6 +435,7 @@ class PasswordResetService:
                 {"_id": ObjectId(user_id)},
                 {"$set": update_data}
             )
+            await user_directory.notify_changed(user_id)
             
             if user_update.modified_count == 0:
                 return ResetPasswordResponse(
@@ -532,6 +534,7 @@ class PasswordResetService:
                     {"_id": ObjectId(target_user_id)},
                     {"$set": update_data}
                 )
+                await user_directory.notify_changed(target_user_id)
                 
                 logger.info(f"Admin {admin_email} set temporary password for {target_user_email}")
                 
@@ -8,6 +8,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from fastapi import HTTPException
 from ..config.database import get_database
+from .user_directory_service import user_directory
 from bson import ObjectId
 import logging
 
@@ -98,6 +99,7 @@ class PermissionService:
                 {"email": user_email},
                 {"$set": update_data}
             )
+            await user_directory.notify_changed(email=user_email)
             
             if result.modified_count == 0:
                 logger.warning(f"No changes made to permissions for {user_email}")
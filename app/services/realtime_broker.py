@@ -0,0 +1,264 @@
+# app/services/realtime_broker.py - Pluggable event broker for real-time notifications
+"""
+Delivers real-time events to every API worker.
+
+`RealtimeNotificationManager` publishes events through a broker; every worker
+runs the same broker and hands each event to its local handler, which fans it
+out to the SSE queues connected to that worker.
+
+Backends (settings.realtime_broker_backend):
+- "memory"              in-process only, the default for a single worker
+- "mongo_capped"        tails a capped collection with a tailable-await cursor
+- "mongo_change_stream" watches inserts on a TTL collection (needs a replica set)
+
+Mongo backends deliver a worker's own events locally at publish time and skip
+them when they come back from MongoDB.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from ..config.database import get_database
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+CAPPED_EVENTS_COLLECTION = "realtime_events"
+STREAM_EVENTS_COLLECTION = "realtime_event_log"
+
+# Unique per process so a worker can recognise its own events
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# A re-tailed capped cursor starts this far before the newest event seen, so
+# events stamped by a worker with a lagging clock are not skipped
+RETAIL_OVERLAP = timedelta(seconds=60)
+# Event ids remembered to drop events the overlap delivers twice
+SEEN_EVENT_IDS = 20000
+
+
+class RealtimeBroker:
+    """Base broker: delivers events straight to the local handler"""
+
+    backend = "memory"
+
+    def __init__(self):
+        self._handler: Optional[EventHandler] = None
+        self.is_running = False
+        self.published_count = 0
+        self.received_count = 0
+
+    async def start(self, handler: EventHandler) -> None:
+        self._handler = handler
+        self.is_running = True
+        logger.info(f"📡 Real-time broker started ({self.backend}, worker {WORKER_ID})")
+
+    async def stop(self) -> None:
+        self.is_running = False
+        logger.info(f"🛑 Real-time broker stopped ({self.backend})")
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        self.published_count += 1
+        await self._deliver(event)
+
+    async def _deliver(self, event: Dict[str, Any]) -> None:
+        if not self._handler:
+            return
+        try:
+            await self._handler(event)
+        except Exception as e:
+            logger.error(f"Error handling real-time event {event.get('kind')}: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "worker_id": WORKER_ID,
+            "running": self.is_running,
+            "published": self.published_count,
+            "received": self.received_count
+        }
+
+
+class InProcessBroker(RealtimeBroker):
+    """Single-worker broker (no cross-process delivery)"""
+
+    backend = "memory"
+
+
+class _MongoBroker(RealtimeBroker, ABC):
+    """Shared publish path and listener task for MongoDB backends"""
+
+    collection_name = CAPPED_EVENTS_COLLECTION
+
+    def __init__(self):
+        super().__init__()
+        self._task: Optional[asyncio.Task] = None
+
+    def get_collection(self):
+        return get_database()[self.collection_name]
+
+    async def prepare(self) -> None:
+        """Create the backing collection / indexes"""
+
+    async def start(self, handler: EventHandler) -> None:
+        await self.prepare()
+        await super().start(handler)
+        self._task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        self.published_count += 1
+        # Local connections get the event immediately
+        await self._deliver(event)
+        try:
+            await self.get_collection().insert_one({
+                "origin": WORKER_ID,
+                "event": event,
+                "created_at": datetime.utcnow()
+            })
+        except Exception as e:
+            logger.error(f"Error publishing real-time event to {self.collection_name}: {str(e)}")
+
+    async def _receive(self, document: Dict[str, Any]) -> None:
+        if document.get("origin") == WORKER_ID:
+            return
+        self.received_count += 1
+        await self._deliver(document.get("event") or {})
+
+    @abstractmethod
+    async def _listen(self) -> None:
+        """Receive events from MongoDB until the cursor or stream ends"""
+
+    async def _listen_loop(self) -> None:
+        while self.is_running:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Real-time broker listener error ({self.backend}): {str(e)}")
+                await asyncio.sleep(2)
+
+
+class MongoCappedCollectionBroker(_MongoBroker):
+    """
+    Workers tail a capped collection with a tailable-await cursor.
+
+    The cursor follows insertion (natural) order. When it has to be re-opened
+    it cannot resume by _id, because ObjectIds generated by different workers
+    are not ordered by insertion. It resumes from the newest created_at seen
+    minus RETAIL_OVERLAP instead, and events already delivered are dropped
+    by _id.
+    """
+
+    backend = "mongo_capped"
+    collection_name = CAPPED_EVENTS_COLLECTION
+
+    def __init__(self, size_bytes: int = 16 * 1024 * 1024):
+        super().__init__()
+        self.size_bytes = size_bytes
+        self._resume_from: Optional[datetime] = None
+        self._seen: "OrderedDict[Any, None]" = OrderedDict()
+        self.duplicate_count = 0
+
+    def _remember(self, event_id: Any) -> bool:
+        """Record an event id; False when it was already seen"""
+        if event_id in self._seen:
+            return False
+        self._seen[event_id] = None
+        while len(self._seen) > SEEN_EVENT_IDS:
+            self._seen.popitem(last=False)
+        return True
+
+    async def prepare(self) -> None:
+        db = get_database()
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+            logger.info(f"Created capped collection {self.collection_name}")
+        except (CollectionInvalid, OperationFailure):
+            # Already exists
+            pass
+
+        # Start after the newest event: events inside the overlap window are
+        # marked as seen so they are not replayed
+        latest = await db[self.collection_name].find_one({}, sort=[("$natural", -1)])
+        self._resume_from = latest.get("created_at") if latest else None
+        if self._resume_from is not None:
+            async for document in db[self.collection_name].find(
+                {"created_at": {"$gte": self._resume_from - RETAIL_OVERLAP}}, {"_id": 1}
+            ):
+                self._remember(document["_id"])
+
+    async def _listen(self) -> None:
+        collection = self.get_collection()
+        query = {"created_at": {"$gte": self._resume_from - RETAIL_OVERLAP}} if self._resume_from else {}
+        cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+
+        while self.is_running and cursor.alive:
+            async for document in cursor:
+                created_at = document.get("created_at")
+                if created_at and (self._resume_from is None or created_at > self._resume_from):
+                    self._resume_from = created_at
+                if not self._remember(document["_id"]):
+                    self.duplicate_count += 1
+                    continue
+                await self._receive(document)
+
+        # Cursor died (e.g. empty collection) - back off before re-tailing
+        await asyncio.sleep(1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), "duplicates_dropped": self.duplicate_count}
+
+
+class MongoChangeStreamBroker(_MongoBroker):
+    """Workers watch inserts on an event log collection via a change stream"""
+
+    backend = "mongo_change_stream"
+    collection_name = STREAM_EVENTS_COLLECTION
+
+    def __init__(self, retention_seconds: int = 3600):
+        super().__init__()
+        self.retention_seconds = retention_seconds
+        self._resume_token = None
+
+    async def prepare(self) -> None:
+        await self.get_collection().create_index("created_at", expireAfterSeconds=self.retention_seconds)
+
+    async def _listen(self) -> None:
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        async with self.get_collection().watch(pipeline, resume_after=self._resume_token) as stream:
+            async for change in stream:
+                self._resume_token = stream.resume_token
+                await self._receive(change.get("fullDocument") or {})
+
+
+def create_realtime_broker(backend: str, capped_size_mb: int = 16) -> RealtimeBroker:
+    """Build the broker for a configured backend name"""
+    backend = (backend or "memory").lower()
+    if backend == MongoCappedCollectionBroker.backend:
+        return MongoCappedCollectionBroker(size_bytes=capped_size_mb * 1024 * 1024)
+    if backend == MongoChangeStreamBroker.backend:
+        return MongoChangeStreamBroker()
+    if backend != InProcessBroker.backend:
+        logger.warning(f"Unknown realtime broker backend '{backend}', using in-process broker")
+    return InProcessBroker()
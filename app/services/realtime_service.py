@@ -8,23 +8,35 @@ from typing import Dict, Set, List, Any, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from ..config.settings import settings
+from .realtime_broker import RealtimeBroker, create_realtime_broker, WORKER_ID
+
 logger = logging.getLogger(__name__)
 
 class RealtimeNotificationManager:
     """
     Real-time notification manager using Server-Sent Events (SSE)
     Handles WhatsApp message notifications with zero polling
+    
+    Every event is published through a RealtimeBroker so that, with several
+    workers, each one delivers it to the SSE connections it holds. Unread
+    state is kept only by the worker(s) where a user is connected and is
+    reloaded from MongoDB on connect, so it is sharded by connection rather
+    than duplicated in every worker.
     """
     
     def __init__(self):
-        # Track active SSE connections per user
+        # Track active SSE connections per user (this worker only)
         # Format: {user_email: Set[asyncio.Queue]}
         self.user_connections: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
         
-        # Track unread message states per user
+        # Track unread message states for locally connected users
         # Format: {user_email: Set[lead_id]}
         self.user_unread_leads: Dict[str, Set[str]] = defaultdict(set)
         
+        # Cross-worker event delivery (started with the application)
+        self.broker: Optional[RealtimeBroker] = None
+        
         # Connection metadata for debugging and monitoring
         # Format: {user_email: {connection_id: connection_info}}
         self.connection_metadata: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
@@ -90,6 +102,79 @@ class RealtimeNotificationManager:
         except Exception as e:
             logger.error(f"Error cleaning up stale connections: {str(e)}")
     
+    # ============================================================================
+    # EVENT BROKER
+    # ============================================================================
+    
+    async def start_broker(self, backend: Optional[str] = None):
+        """Start cross-worker event delivery using the configured backend"""
+        if self.broker and self.broker.is_running:
+            return
+        self.broker = create_realtime_broker(
+            backend or settings.realtime_broker_backend,
+            capped_size_mb=settings.realtime_capped_collection_size_mb
+        )
+        await self.broker.start(self._handle_event)
+    
+    async def stop_broker(self):
+        if self.broker:
+            await self.broker.stop()
+    
+    async def _publish(self, event: Dict[str, Any]):
+        """Publish an event to every worker (delivered locally when no broker is running)"""
+        if self.broker and self.broker.is_running:
+            await self.broker.publish(event)
+        else:
+            await self._handle_event(event)
+    
+    async def _handle_event(self, event: Dict[str, Any]):
+        """Deliver a broker event to the connections held by this worker"""
+        kind = event.get("kind")
+        
+        if kind == "new_message":
+            lead_id = event["lead_id"]
+            message_data = event.get("message_data", {})
+            for user_email in event.get("users", []):
+                if user_email not in self.user_connections:
+                    continue
+                self.user_unread_leads[user_email].add(lead_id)
+                notification = {
+                    "type": "new_whatsapp_message",
+                    "lead_id": lead_id,
+                    "lead_name": message_data.get("lead_name"),
+                    "message_preview": message_data.get("message_preview", ""),
+                    "timestamp": message_data.get("timestamp"),
+                    "direction": message_data.get("direction"),
+                    "message_id": message_data.get("message_id"),
+                    "unread_leads": list(self.user_unread_leads[user_email])
+                }
+                await self._send_to_user(user_email, notification)
+        
+        elif kind == "lead_read":
+            user_emails = [event["user_email"]] if event.get("user_email") else list(self.user_connections.keys())
+            lead_id = event["lead_id"]
+            for user_email in user_emails:
+                if user_email not in self.user_connections:
+                    continue
+                self.user_unread_leads[user_email].discard(lead_id)
+                notification = {
+                    "type": "lead_marked_read",
+                    "lead_id": lead_id,
+                    "marked_by_user": user_email,
+                    "unread_leads": list(self.user_unread_leads[user_email])
+                }
+                await self._send_to_user(user_email, notification)
+                logger.info(f"📋 Lead {lead_id} marked as read for user {user_email}")
+        
+        elif kind == "notify":
+            target_users = event.get("users")
+            user_emails = target_users if target_users is not None else list(self.user_connections.keys())
+            for user_email in user_emails:
+                await self._send_to_user(user_email, dict(event.get("notification", {})))
+        
+        else:
+            logger.warning(f"Unknown real-time event kind: {kind}")
+    
     # ============================================================================
     # CONNECTION MANAGEMENT
     # ============================================================================
@@ -175,8 +260,8 @@ class RealtimeNotificationManager:
                 # If no more connections, clean up user data
                 if not self.user_connections[user_email]:
                     del self.user_connections[user_email]
-                    # Keep unread state for when user reconnects
-                    # del self.user_unread_leads[user_email]
+                    # Unread state is reloaded from the database on reconnect
+                    self.user_unread_leads.pop(user_email, None)
                     if user_email in self.connection_metadata:
                         del self.connection_metadata[user_email]
                     
@@ -187,8 +272,8 @@ class RealtimeNotificationManager:
         except Exception as e:
             logger.error(f"Error disconnecting user {user_email}: {str(e)}")
     
-    async def _load_user_unread_leads(self, user_email: str):
-        """Load user's unread leads from database"""
+    async def _load_user_unread_leads(self, user_email: str) -> Set[str]:
+        """Load user's unread leads from database (kept in memory only while connected here)"""
         try:
             from ..config.database import get_database
             
@@ -197,7 +282,7 @@ class RealtimeNotificationManager:
             # Get user info to determine role
             user = await db.users.find_one({"email": user_email})
             if not user:
-                return
+                return set()
             
             user_role = user.get("role", "user")
             
@@ -221,13 +306,18 @@ class RealtimeNotificationManager:
                 {"lead_id": 1}
             ).to_list(None)
             
+            unread_lead_ids = {lead["lead_id"] for lead in unread_leads}
+            
             # Update user's unread leads set
-            self.user_unread_leads[user_email] = {lead["lead_id"] for lead in unread_leads}
+            if user_email in self.user_connections:
+                self.user_unread_leads[user_email] = unread_lead_ids
             
-            logger.debug(f"📖 Loaded {len(self.user_unread_leads[user_email])} unread leads for {user_email}")
+            logger.debug(f"📖 Loaded {len(unread_lead_ids)} unread leads for {user_email}")
+            return unread_lead_ids
             
         except Exception as e:
             logger.error(f"Error loading unread leads for {user_email}: {str(e)}")
+            return set(self.user_unread_leads.get(user_email, set()))
     
     # ============================================================================
     # NOTIFICATION BROADCASTING
@@ -239,32 +329,15 @@ class RealtimeNotificationManager:
         This is called by WhatsApp message service when incoming messages are processed
         """
         try:
-            for user in authorized_users:
-                user_email = user["email"]
-                
-                # Add to user's unread leads
-                if user_email in self.user_unread_leads:
-                    self.user_unread_leads[user_email].add(lead_id)
-                else:
-                    self.user_unread_leads[user_email] = {lead_id}
-                
-                # Create notification
-                notification = {
-                    "type": "new_whatsapp_message",
-                    "lead_id": lead_id,
-                    "lead_name": message_data.get("lead_name"),
-                    "message_preview": message_data.get("message_preview", ""),
-                    "timestamp": message_data.get("timestamp"),
-                    "direction": message_data.get("direction"),
-                    "message_id": message_data.get("message_id"),
-                    "unread_leads": list(self.user_unread_leads[user_email])
-                }
-                
-                # 🆕 NEW: Save notification to history
-                await self._save_notification_to_history(lead_id, message_data)
-                
-                # Send to all user's connections
-                await self._send_to_user(user_email, notification)
+            # 🆕 NEW: Save notification to history (once, by the publishing worker)
+            await self._save_notification_to_history(lead_id, message_data)
+            
+            await self._publish({
+                "kind": "new_message",
+                "lead_id": lead_id,
+                "message_data": message_data,
+                "users": [user["email"] for user in authorized_users]
+            })
             
             logger.info(f"🔔 New message notification sent to {len(authorized_users)} users for lead {lead_id}")
             
@@ -274,29 +347,24 @@ class RealtimeNotificationManager:
     async def mark_lead_as_read(self, user_email: str, lead_id: str):
         """
         Mark lead as read for user (icon changes from green to grey)
-        Broadcasts update to all user's connections
+        Broadcasts update to all user's connections on every worker
         """
         try:
-            # Remove from user's unread leads
-            if user_email in self.user_unread_leads:
-                self.user_unread_leads[user_email].discard(lead_id)
-                
-                # Create notification
-                notification = {
-                    "type": "lead_marked_read",
-                    "lead_id": lead_id,
-                    "marked_by_user": user_email,
-                    "unread_leads": list(self.user_unread_leads[user_email])
-                }
-                
-                # Send to user's connections
-                await self._send_to_user(user_email, notification)
-                
-                logger.info(f"📋 Lead {lead_id} marked as read for user {user_email}")
-            
+            await self._publish({"kind": "lead_read", "user_email": user_email, "lead_id": lead_id})
         except Exception as e:
             logger.error(f"Error marking lead as read: {str(e)}")
     
+    async def mark_lead_as_read_for_all(self, lead_id: str):
+        """Mark a lead as read for every connected user on every worker"""
+        try:
+            await self._publish({"kind": "lead_read", "user_email": None, "lead_id": lead_id})
+        except Exception as e:
+            logger.error(f"Error marking lead as read for all users: {str(e)}")
+    
+    async def send_to_user(self, user_email: str, notification: Dict[str, Any]):
+        """Send a notification to a user's connections on every worker"""
+        await self._publish({"kind": "notify", "users": [user_email], "notification": notification})
+    
     async def _send_to_user(self, user_email: str, notification: Dict[str, Any]):
         """
         Send notification to all of user's active connections
@@ -447,6 +515,8 @@ class RealtimeNotificationManager:
                 "total_unread_leads": total_unread_leads,
                 "average_connections_per_user": round(avg_connections, 2),
                 "top_connected_users": [{"user": user, "connections": count} for user, count in top_users],
+                "worker_id": WORKER_ID,
+                "broker": self.broker.get_stats() if self.broker else {"backend": "memory", "running": False},
                 "last_updated": datetime.utcnow().isoformat()
             }
             
@@ -496,17 +566,19 @@ class RealtimeNotificationManager:
         If target_users is None, sends to all connected users
         """
         try:
-            target_user_emails = target_users if target_users else list(self.user_connections.keys())
-            
             notification.update({
                 "type": "system_notification",
                 "timestamp": datetime.utcnow().isoformat()
             })
             
-            for user_email in target_user_emails:
-                await self._send_to_user(user_email, notification)
+            # None targets every connected user on every worker
+            await self._publish({
+                "kind": "notify",
+                "users": target_users if target_users else None,
+                "notification": notification
+            })
             
-            logger.info(f"📢 System notification sent to {len(target_user_emails)} users")
+            logger.info(f"📢 System notification sent to {len(target_users) if target_users else 'all connected'} users")
             
         except Exception as e:
             logger.error(f"Error broadcasting system notification: {str(e)}")
@@ -5,6 +5,8 @@ from bson import ObjectId
 import logging
 
 from ..config.database import get_database
+from .activity_log_service import activity_log
+from .lead_access_service import lead_access_index
 from ..models.task import TaskCreate, TaskUpdate, TaskStatus, TaskPriority
 # from ..models.lead import LeadStatus
 
@@ -175,8 +177,9 @@ class TaskService:
                     }
                     
                     # Insert timeline activity
-                    activity_result = await db.lead_activities.insert_one(activity_doc)
-                    logger.info(f"✅ Timeline activity logged successfully: {activity_result.inserted_id}")
+                    # Written synchronously: the duplicate check above reads it back
+                    activity_id = await activity_log.log(activity_doc, sync=True)
+                    logger.info(f"✅ Timeline activity logged successfully: {activity_id}")
                 else:
                     logger.info("⚠️ Timeline activity already exists, skipping duplicate")
                     
@@ -282,7 +285,7 @@ class TaskService:
                         "metadata": activity_metadata
                     }
                     
-                    await db.lead_activities.insert_one(activity_doc)
+                    await activity_log.log(activity_doc)
                     logger.info("✅ Task completion timeline activity logged")
                     
                 except Exception as activity_error:
@@ -464,7 +467,7 @@ class TaskService:
                         "metadata": activity_metadata
                     }
                     
-                    await db.lead_activities.insert_one(activity_doc)
+                    await activity_log.log(activity_doc)
                     logger.info(f"✅ Task update timeline activity logged with {len(changes)} changes")
                     
                 except Exception as activity_error:
@@ -972,14 +975,8 @@ class TaskService:
                 
                 user_email = user_info.get("email", "")
                 
-                # Find all leads the user has access to
-                accessible_leads_cursor = db.leads.find({
-                    "$or": [
-                        {"assigned_to": user_email},
-                        {"co_assignees": user_email}
-                    ]
-                })
-                accessible_leads = await accessible_leads_cursor.to_list(None)
+                # Leads the user has access to (cached per-user id set)
+                accessible_leads = await lead_access_index.get(user_email)
                 
                 if not accessible_leads:
                     return {
@@ -987,11 +984,8 @@ class TaskService:
                         "due_today": 0, "completed_tasks": 0
                     }
                 
-                # Get all lead ObjectIds user has access to
-                accessible_lead_object_ids = [lead["_id"] for lead in accessible_leads]
-                
                 # Base query: only tasks from leads user has access to
-                base_query = {"lead_object_id": {"$in": accessible_lead_object_ids}}
+                base_query = {"lead_object_id": {"$in": accessible_leads.object_ids}}
                 logger.info(f"User {user_email} has access to {len(accessible_leads)} leads")
             
             # Add status filter if provided
@@ -1,17 +1,26 @@
 # UPDATED Admin Service with optimized TATA API filtering
 # Added fetch_call_records_with_filters() method for direct TATA parameter support
 
-import aiohttp
 import asyncio
 import logging
+import random
+import httpx
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
 from collections import defaultdict
-from bson import ObjectId
+from functools import lru_cache
 import calendar
 
 from ..config.database import get_database
+from ..config.settings import settings
 from ..services.tata_auth_service import tata_auth_service
+from ..services.outbound_http import outbound_http
+from ..services.call_record_store import call_record_store, clean_agent_number
+from ..services.call_rollup_service import call_rollup_service
+from ..services.agent_directory_service import agent_directory
+from ..utils.rate_limiter import AdaptiveConcurrency
+from ..utils.call_rollups import rollups_from_records, merge_by_agent
+from ..utils.performance_calculator import performance_calculator
 from ..models.admin_dashboard import (
     CallRecord, UserCallStats, DashboardFilters, 
     CallStatusFilter, CallDirectionFilter, AdminActivityLog
@@ -19,6 +28,22 @@ from ..models.admin_dashboard import (
 
 logger = logging.getLogger(__name__)
 
+# Records per TATA API page when walking a whole date range
+CDR_PAGE_SIZE = 200
+
+
+@lru_cache(maxsize=4096)
+def _week_label(record_date: str) -> str:
+    """ISO week label ("YYYY-Www") of a record date, parsed once per distinct date"""
+    date_obj = datetime.strptime(record_date, "%Y-%m-%d")
+    week_num = date_obj.isocalendar()[1]
+    return f"{date_obj.year}-W{week_num:02d}"
+
+
+class CallRecordFetchError(Exception):
+    """A TATA call record page could not be fetched after retries"""
+
+
 class TataAdminService:
     """
     UPDATED Admin Service for Call Analytics Dashboard
@@ -30,9 +55,13 @@ class TataAdminService:
     
     def __init__(self):
         self.base_url = "https://api-smartflo.tatateleservices.com/v1"
-        self.agent_user_mapping = {}
         self.db = None
     
+    @property
+    def agent_user_mapping(self) -> Dict[str, Dict[str, Any]]:
+        """Stored agent number -> mapped CRM user (see agent_directory)"""
+        return agent_directory.agent_user_mapping
+    
     def _get_db(self):
         """Lazy database initialization with proper None checking"""
         if self.db is None:
@@ -88,48 +117,78 @@ class TataAdminService:
     
     async def initialize_agent_mapping(self):
         """
-        Initialize agent-to-user mapping from database
+        Make sure the agent-to-user directory is loaded (reloads only when the
+        mappings changed)
         """
+        await agent_directory.ensure_loaded()
+    
+    def resolve_agent_numbers(self, agents: Optional[str]) -> Optional[List[str]]:
+        """
+        Turn a TATA `agents` param (agent IDs or phone numbers) into phone numbers
+        for the local call_records filter. None when an agent cannot be resolved.
+        """
+        numbers = []
+        for agent in [a.strip() for a in str(agents).split(',') if a.strip()]:
+            clean_agent = clean_agent_number(agent)
+            mapping = agent_directory.get_by_agent_id(agent) or agent_directory.get_by_agent_number(agent)
+            resolved = mapping["agent_number"] if mapping else None
+            if resolved is None and len(clean_agent) >= 10 and clean_agent == agent.lstrip('+'):
+                resolved = clean_agent
+            if resolved is None:
+                return None
+            numbers.append(resolved)
+        return numbers
+
+    async def _resolve_local_call_record_query(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """MongoDB filter for TATA params when call_records can answer them, else None"""
         try:
-            db = self._get_db()
-            if db is None:
-                logger.warning("Database not available for agent mapping")
-                return
-            
-            mappings = await db.tata_user_mappings.find({}).to_list(None)
-            self.agent_user_mapping = {}
-            
-            for mapping in mappings:
-                agent_phone = mapping.get("tata_phone")
-                user_id = mapping.get("crm_user_id")
-                
-                if agent_phone and user_id:
-                    user = await db.users.find_one({"_id": ObjectId(user_id)})
-                    if user:
-                        user_name = (
-                            user.get('full_name') or 
-                            f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() or
-                            user.get('username') or 
-                            user.get('email', '').split('@')[0] or
-                            'Unknown'
-                        )
-                        
-                        self.agent_user_mapping[agent_phone] = {
-                            "user_id": str(user_id),
-                            "user_name": user_name,
-                            "user_email": user.get('email', ''),
-                            "tata_agent_id": mapping.get("tata_agent_id"),
-                            "tata_extension": mapping.get("tata_extension") or mapping.get("tata_caller_id")
-                        }
-            
-            logger.info(f"Initialized agent mapping for {len(self.agent_user_mapping)} agents")
-            
+            agent_numbers = None
+            if params.get('agents'):
+                agent_numbers = self.resolve_agent_numbers(params['agents'])
+                if agent_numbers is None:
+                    return None
+            return await call_record_store.resolve_query(params, agent_numbers=agent_numbers)
         except Exception as e:
-            logger.error(f"Error initializing agent mapping: {e}")
-    
+            logger.warning(f"Local call record lookup failed, using TATA API: {e}")
+            return None
+
+    async def _query_local_call_records(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer TATA params from the local call_records warehouse when it covers them"""
+        query = await self._resolve_local_call_record_query(params)
+        if query is None:
+            return None
+        try:
+            return await call_record_store.query_page(query, params.get('page'), params.get('limit'))
+        except Exception as e:
+            logger.warning(f"Local call record query failed, using TATA API: {e}")
+            return None
+
     async def fetch_call_records_with_filters(
         self, 
         params: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """
+        Fetch call records with TATA API parameters, served from the local
+        call_records warehouse when it covers the range and filters, otherwise
+        from the TATA API. Returns the same shape either way.
+        """
+        data = await self._query_local_call_records(params)
+        if data is not None:
+            logger.info(f"Served {len(data['results'])} of {data['count']} call records from call_records")
+            return {
+                "success": True,
+                "data": data,
+                "filters_applied": params,
+                "records_returned": len(data["results"]),
+                "total_available": data["count"],
+                "source": "local"
+            }
+        return await self.fetch_call_records_from_api(params)
+
+    async def fetch_call_records_from_api(
+        self, 
+        params: Dict[str, str],
+        http_retries: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         NEW: Fetch call records using TATA API with direct parameter support
@@ -140,6 +199,8 @@ class TataAdminService:
                 - from_date, to_date (required)
                 - page, limit (pagination)
                 - agents, call_type, direction, etc. (filters)
+            http_retries: Retry budget of the pooled client (default: its own);
+                0 when the caller retries on "retryable" results itself
         
         Returns:
             Dict containing success status, data from TATA API, and error info
@@ -184,67 +245,83 @@ class TataAdminService:
             
             logger.info(f"TATA API call with parameters: {params}")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/call/records",
-                    headers=headers,
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=60)  # Increased timeout
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results_count = len(data.get('results', []))
-                        total_count = data.get('count', 0)
-                        
-                        logger.info(f"TATA API success: {results_count} records returned, {total_count} total available")
-                        
-                        return {
-                            "success": True,
-                            "data": data,
-                            "filters_applied": params,
-                            "records_returned": results_count,
-                            "total_available": total_count
-                        }
-                        
-                    elif response.status == 401:
-                        logger.warning("TATA API authentication failed - token expired")
-                        # Try to refresh token
-                        refresh_result = await tata_auth_service.refresh_token()
-                        if refresh_result.get("success"):
-                            logger.info("Token refreshed, retry the request")
-                        
-                        return {
-                            "success": False,
-                            "error": "Authentication failed - token expired",
-                            "data": {"results": [], "count": 0},
-                            "retry_suggested": True
-                        }
-                        
-                    elif response.status == 400:
-                        error_text = await response.text()
-                        logger.error(f"TATA API bad request: {error_text}")
-                        return {
-                            "success": False,
-                            "error": f"Bad request - invalid parameters: {error_text}",
-                            "data": {"results": [], "count": 0},
-                            "invalid_params": params
-                        }
-                        
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"TATA API error: {response.status} - {error_text}")
-                        return {
-                            "success": False,
-                            "error": f"API Error {response.status}: {error_text}",
-                            "data": {"results": [], "count": 0}
-                        }
+            client = outbound_http.get("tata")
+            response = await client.get(
+                f"{self.base_url}/call/records",
+                headers=headers,
+                params=params,
+                timeout=60,  # Increased timeout
+                max_retries=http_retries
+            )
+            if response.status_code == 200:
+                data = response.json()
+                results_count = len(data.get('results', []))
+                total_count = data.get('count', 0)
+                
+                logger.info(f"TATA API success: {results_count} records returned, {total_count} total available")
+                
+                return {
+                    "success": True,
+                    "data": data,
+                    "filters_applied": params,
+                    "records_returned": results_count,
+                    "total_available": total_count
+                }
+                
+            elif response.status_code == 401:
+                logger.warning("TATA API authentication failed - token expired")
+                # Try to refresh token
+                refresh_result = await tata_auth_service.refresh_token()
+                if refresh_result.get("success"):
+                    logger.info("Token refreshed, retry the request")
+                
+                return {
+                    "success": False,
+                    "error": "Authentication failed - token expired",
+                    "data": {"results": [], "count": 0},
+                    "retry_suggested": True,
+                    "status_code": 401,
+                    "retryable": True
+                }
+                
+            elif response.status_code == 400:
+                error_text = response.text
+                logger.error(f"TATA API bad request: {error_text}")
+                return {
+                    "success": False,
+                    "error": f"Bad request - invalid parameters: {error_text}",
+                    "data": {"results": [], "count": 0},
+                    "invalid_params": params,
+                    "status_code": 400,
+                    "retryable": False
+                }
+                
+            else:
+                error_text = response.text
+                logger.error(f"TATA API error: {response.status_code} - {error_text}")
+                return {
+                    "success": False,
+                    "error": f"API Error {response.status_code}: {error_text}",
+                    "data": {"results": [], "count": 0},
+                    "status_code": response.status_code,
+                    "retryable": response.status_code == 429 or response.status_code >= 500
+                }
                         
-        except asyncio.TimeoutError:
+        except httpx.TimeoutException:
             logger.error("TATA API request timeout")
             return {
                 "success": False,
                 "error": "Request timeout - TATA API took too long to respond",
-                "data": {"results": [], "count": 0}
+                "data": {"results": [], "count": 0},
+                "retryable": True
+            }
+        except httpx.TransportError as e:
+            logger.error(f"TATA API connection error: {e}")
+            return {
+                "success": False,
+                "error": f"Connection error: {str(e)}",
+                "data": {"results": [], "count": 0},
+                "retryable": True
             }
         except Exception as e:
             logger.error(f"Error in TATA API call: {e}")
@@ -305,6 +382,151 @@ class TataAdminService:
         else:
             return {"results": [], "count": 0, "error": result.get("error")}
     
+    def _build_call_record_params(
+        self,
+        from_date: str,
+        to_date: str,
+        filters: Optional[Dict] = None
+    ) -> Dict[str, str]:
+        """Legacy filter dict -> TATA API parameters (without page/limit)"""
+        params = {
+            "from_date": from_date,
+            "to_date": to_date
+        }
+        
+        if filters:
+            if filters.get("agents"):
+                if isinstance(filters["agents"], list):
+                    params["agents"] = ",".join(filters["agents"])
+                else:
+                    params["agents"] = filters["agents"]
+            
+            if filters.get("call_type"):
+                if filters["call_type"] == "answered":
+                    params["call_type"] = "c"
+                elif filters["call_type"] == "missed":
+                    params["call_type"] = "m"
+            
+            if filters.get("direction"):
+                params["direction"] = filters["direction"]
+            
+            # Add other TATA filters
+            for filter_key in ["department", "duration", "operator", "callerid", 
+                             "destination", "services", "did_number", "broadcast", "ivr"]:
+                if filters.get(filter_key):
+                    params[filter_key] = filters[filter_key]
+        
+        return params
+    
+    async def _fetch_page_with_backoff(
+        self,
+        params: Dict[str, str],
+        page: int,
+        page_size: int,
+        concurrency: AdaptiveConcurrency
+    ) -> Dict[str, Any]:
+        """Fetch one page; on 429/5xx/timeouts shrink the fan-out and retry with backoff"""
+        page_params = {**params, "page": str(page), "limit": str(page_size)}
+        max_retries = settings.tata_cdr_fetch_max_retries
+        
+        for attempt in range(max_retries + 1):
+            # Retries happen here only (with the fan-out backoff), not in the client
+            result = await self.fetch_call_records_from_api(dict(page_params), http_retries=0)
+            if result.get("success"):
+                concurrency.on_success()
+                return result.get("data", {})
+            
+            if not result.get("retryable") or attempt >= max_retries:
+                raise CallRecordFetchError(f"page {page}: {result.get('error')}")
+            
+            concurrency.on_throttle()
+            delay = settings.tata_cdr_fetch_backoff_seconds * (2 ** attempt) * (0.5 + random.random() / 2)
+            logger.warning(
+                f"🔁 TATA page {page} failed ({result.get('error')}), retry {attempt + 1}/{max_retries} "
+                f"in {delay:.2f}s, concurrency {concurrency.limit}"
+            )
+            await asyncio.sleep(delay)
+    
+    async def iter_call_record_pages(
+        self,
+        params: Dict[str, str],
+        page_size: int = CDR_PAGE_SIZE,
+        max_records: Optional[int] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of TATA call records in page order.
+        
+        Page 1 returns the total count, so the remaining page numbers are known
+        up front and fetched concurrently through a sliding window sized by an
+        adaptive concurrency limit. Only the pages inside the window are held
+        in memory.
+        
+        Raises:
+            CallRecordFetchError: A page still failed after its retries
+        """
+        concurrency = AdaptiveConcurrency(settings.tata_cdr_fetch_concurrency)
+        params = {key: value for key, value in params.items() if key not in ("page", "limit")}
+        
+        first_page = await self._fetch_page_with_backoff(params, 1, page_size, concurrency)
+        records = first_page.get("results", [])
+        total_count = first_page.get("count", 0) or 0
+        if max_records is not None:
+            total_count = min(total_count, max_records)
+        
+        if records:
+            yield records
+        if not records or len(records) < page_size:
+            return
+        
+        last_page = (total_count + page_size - 1) // page_size
+        next_page = 2
+        pending: Dict[int, asyncio.Task] = {}
+        
+        try:
+            while next_page <= last_page or pending:
+                while next_page <= last_page and len(pending) < concurrency.limit:
+                    pending[next_page] = asyncio.create_task(
+                        self._fetch_page_with_backoff(params, next_page, page_size, concurrency)
+                    )
+                    next_page += 1
+                
+                page = min(pending)
+                data = await pending.pop(page)
+                records = data.get("results", [])
+                if records:
+                    yield records
+        finally:
+            for task in pending.values():
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending.values(), return_exceptions=True)
+        
+        if concurrency.throttle_count:
+            logger.info(f"TATA pagination throttled {concurrency.throttle_count} times ({last_page} pages)")
+    
+    async def iter_all_call_records(
+        self,
+        from_date: str,
+        to_date: str,
+        filters: Optional[Dict] = None,
+        max_records: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream every call record for the date range: from call_records when it
+        covers the range (uncapped), otherwise from the concurrent TATA paginator
+        """
+        params = self._build_call_record_params(from_date, to_date, filters)
+        
+        local_query = await self._resolve_local_call_record_query(params)
+        if local_query is not None:
+            async for record in call_record_store.iter_records(local_query):
+                yield record
+            return
+        
+        async for page in self.iter_call_record_pages(params, max_records=max_records):
+            for record in page:
+                yield record
+    
     async def fetch_all_call_records(
         self, 
         from_date: str, 
@@ -313,78 +535,18 @@ class TataAdminService:
         max_records: int = 10000
     ) -> List[Dict]:
         """
-        Fetch ALL call records for the date range (handles pagination)
-        Uses the optimized filtering method
+        Fetch ALL call records for the date range as a list
+        Served uncapped from call_records when covered; the TATA API fallback
+        stops at max_records. Prefer iter_all_call_records for large ranges.
         """
         all_records = []
-        page = 1
-        limit = 200  # Increased page size for efficiency
-        
-        while len(all_records) < max_records:
-            # Build parameters
-            params = {
-                "from_date": from_date,
-                "to_date": to_date,
-                "page": str(page),
-                "limit": str(limit)
-            }
-            
-            # Add filters if provided
-            if filters:
-                if filters.get("agents"):
-                    if isinstance(filters["agents"], list):
-                        params["agents"] = ",".join(filters["agents"])
-                    else:
-                        params["agents"] = filters["agents"]
-                
-                if filters.get("call_type"):
-                    if filters["call_type"] == "answered":
-                        params["call_type"] = "c"
-                    elif filters["call_type"] == "missed":
-                        params["call_type"] = "m"
-                
-                if filters.get("direction"):
-                    params["direction"] = filters["direction"]
-                
-                # Add other TATA filters
-                for filter_key in ["department", "duration", "operator", "callerid", 
-                                 "destination", "services", "did_number", "broadcast", "ivr"]:
-                    if filters.get(filter_key):
-                        params[filter_key] = filters[filter_key]
-            
-            # Fetch batch using optimized method
-            batch_result = await self.fetch_call_records_with_filters(params)
-            
-            if not batch_result.get("success"):
-                logger.error(f"Failed to fetch batch on page {page}: {batch_result.get('error')}")
-                break
-            
-            batch_data = batch_result.get("data", {})
-            records = batch_data.get("results", [])
-            
-            if not records:
-                logger.info("No more records available")
-                break
-                
-            all_records.extend(records)
-            
-            # Check if we've got all available records
-            total_count = batch_data.get("count", 0)
-            if len(all_records) >= total_count:
-                logger.info(f"Retrieved all {total_count} available records")
-                break
-                
-            page += 1
-            
-            # Safety limit
-            if page > 50:  # Max 10,000 records (50 pages * 200 per page)
-                logger.warning("Reached pagination safety limit (50 pages)")
-                break
-            
-            # API-friendly delay
-            await asyncio.sleep(0.1)
+        try:
+            async for record in self.iter_all_call_records(from_date, to_date, filters, max_records=max_records):
+                all_records.append(record)
+        except CallRecordFetchError as e:
+            logger.error(f"Failed to fetch all call records: {e}")
         
-        logger.info(f"Fetched total {len(all_records)} call records using optimized method")
+        logger.info(f"Fetched total {len(all_records)} call records")
         return all_records
     
     async def fetch_all_user_call_records(
@@ -397,39 +559,13 @@ class TataAdminService:
         Fetch ALL call records for a specific user within date range
         """
         all_records = []
-        page = 1
-        limit = 200
-        
-        while True:
-            params = {
-                "from_date": from_date,
-                "to_date": to_date,
-                "agents": user_agent_number,
-                "page": str(page),
-                "limit": str(limit)
-            }
-            
-            batch_result = await self.fetch_call_records_with_filters(params)
-            
-            if not batch_result.get("success"):
-                break
-                
-            batch_data = batch_result.get("data", {})
-            records = batch_data.get("results", [])
-            
-            if not records:
-                break
-                
-            all_records.extend(records)
-            
-            total_count = batch_data.get("count", 0)
-            if len(all_records) >= total_count:
-                break
-                
-            page += 1
-            if page > 50:
-                logger.warning("Reached pagination limit")
-                break
+        try:
+            async for record in self.iter_all_call_records(
+                from_date, to_date, {"agents": user_agent_number}, max_records=10000
+            ):
+                all_records.append(record)
+        except CallRecordFetchError as e:
+            logger.error(f"Failed to fetch call records for agent {user_agent_number}: {e}")
         
         return all_records
 
@@ -485,16 +621,11 @@ class TataAdminService:
                 "tata_extension": None
             }
         
-        # Clean agent number for mapping
-        clean_number = agent_number
-        if clean_number.startswith('+'):
-            clean_number = clean_number[1:]
+        mapping = agent_directory.get_by_agent_number(agent_number)
+        if mapping:
+            return mapping
         
-        # Try multiple formats for mapping
-        for search_format in [agent_number, f"+{clean_number}", clean_number]:
-            mapping = self.agent_user_mapping.get(search_format)
-            if mapping:
-                return mapping
+        clean_number = agent_number[1:] if agent_number.startswith('+') else agent_number
         
         # Return unknown user with cleaned number
         return {
@@ -965,11 +1096,7 @@ class TataAdminService:
                 return record_date == period_value
             
             elif period_type == "weekly":
-                date_obj = datetime.strptime(record_date, "%Y-%m-%d")
-                week_num = date_obj.isocalendar()[1]
-                year = date_obj.year
-                expected_week = f"{year}-W{week_num:02d}"
-                return expected_week == period_value
+                return _week_label(record_date) == period_value
             
             elif period_type == "monthly":
                 record_month = record_date[:7]  # YYYY-MM
@@ -981,6 +1108,114 @@ class TataAdminService:
             logger.error(f"Error checking period: {e}")
             return False
     
+    async def get_period_rollups(
+        self,
+        from_date: str,
+        to_date: str,
+        agent_numbers: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hourly call rollups for a TATA datetime range: read from
+        call_rollups_hourly when call_records covers the range, otherwise
+        aggregated from the TATA API records
+        """
+        try:
+            rollups = await call_rollup_service.get_hourly_rollups(from_date, to_date, agent_numbers)
+            if rollups is not None:
+                return rollups
+        except Exception as e:
+            logger.warning(f"Call rollups unavailable, aggregating TATA records: {e}")
+        
+        filters = {"agents": ",".join(agent_numbers)} if agent_numbers else None
+        return rollups_from_records(await self.fetch_all_call_records(from_date, to_date, filters))
+    
+    def calculate_user_stats_from_rollups(self, rollups: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Per-user call stats (mapped CRM users only) from call rollups"""
+        user_stats = {}
+        
+        for agent_number, agent_stats in merge_by_agent(rollups).items():
+            user_mapping = self.map_agent_to_user(agent_number)
+            user_id = user_mapping.get("user_id")
+            if not user_id or user_id.startswith("unknown_"):
+                continue
+            
+            stats = user_stats.setdefault(user_id, {
+                "user_id": user_id,
+                "user_name": user_mapping.get("user_name", "Unknown"),
+                "agent_number": agent_number,
+                "total_calls": 0,
+                "answered_calls": 0,
+                "missed_calls": 0,
+                "total_duration": 0,
+                "recordings_count": 0
+            })
+            for field in ("total_calls", "answered_calls", "missed_calls", "total_duration", "recordings_count"):
+                stats[field] += agent_stats[field]
+        
+        for stats in user_stats.values():
+            stats["success_rate"] = round(
+                (stats["answered_calls"] / stats["total_calls"]) * 100, 2
+            ) if stats["total_calls"] > 0 else 0.0
+            stats["avg_call_duration"] = round(
+                stats["total_duration"] / stats["answered_calls"], 2
+            ) if stats["answered_calls"] > 0 else 0.0
+        
+        return user_stats
+    
+    async def get_period_performers(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        top_n: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank users for a period from the hourly rollups
+        """
+        await self.initialize_agent_mapping()
+        rollups = await self.get_period_rollups(
+            start_date.strftime("%Y-%m-%d 00:00:00"),
+            end_date.strftime("%Y-%m-%d 23:59:59")
+        )
+        user_stats = self.calculate_user_stats_from_rollups(rollups)
+        ranked = performance_calculator.rank_performers(list(user_stats.values()), top_n)
+        
+        return [
+            {
+                "rank": performer["rank"],
+                "user_id": performer["user_id"],
+                "user_name": performer["user_name"],
+                "agent_number": performer.get("agent_number"),
+                "score": performer.get("composite_score", 0.0),
+                "total_calls": performer["total_calls"],
+                "success_rate": performer["success_rate"],
+                "total_duration": performer["total_duration"],
+                "avg_duration": performer["avg_call_duration"],
+                "recordings_count": performer["recordings_count"]
+            }
+            for performer in ranked
+        ]
+    
+    async def get_weekly_performers_optimized(
+        self, 
+        week_start: datetime, 
+        week_end: datetime,
+        top_n: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Top performers for a week (Monday-Sunday) from call rollups"""
+        return await self.get_period_performers(week_start, week_end, top_n)
+    
+    async def get_monthly_performers_optimized(
+        self, 
+        year: int, 
+        month: int,
+        top_n: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Top performers for a calendar month from call rollups"""
+        last_day = calendar.monthrange(year, month)[1]
+        return await self.get_period_performers(
+            datetime(year, month, 1), datetime(year, month, last_day), top_n
+        )
+    
     async def get_weekly_performers(
         self, 
         week_start: datetime, 
@@ -1017,11 +1252,8 @@ class TataAdminService:
             from_date = start_date.strftime("%Y-%m-%d 00:00:00")
             to_date = end_date.strftime("%Y-%m-%d 23:59:59")
 
-            user_agent = None
-            for agent, mapping in self.agent_user_mapping.items():
-                if mapping.get("user_id") == user_id:
-                    user_agent = mapping.get("tata_agent_id")
-                    break
+            mapping = agent_directory.get_by_user_id(user_id)
+            user_agent = mapping.get("tata_agent_id") if mapping else None
             
             # Build TATA API params with user filter
             params = {
@@ -9,6 +9,7 @@ import json
 
 from ..config.settings import get_settings
 from ..config.database import get_database  # Import but don't call immediately
+from .outbound_http import outbound_http
 
 logger = logging.getLogger(__name__)
 
@@ -100,69 +101,69 @@ class TataAuthService:
                 "password": login_password
             }
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/auth/login",
-                    json=login_payload,
-                    headers={"Content-Type": "application/json"}
-                )
+            client = outbound_http.get("tata")
+            response = await client.post(
+                f"{self.base_url}/v1/auth/login",
+                json=login_payload,
+                headers={"Content-Type": "application/json"}
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                access_token = data.get("access_token")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    access_token = data.get("access_token")
+                if access_token:
+                    # Calculate expiry time
+                    expires_at = datetime.utcnow() + timedelta(seconds=data.get("expires_in", 3600))
                     
-                    if access_token:
-                        # Calculate expiry time
-                        expires_at = datetime.utcnow() + timedelta(seconds=data.get("expires_in", 3600))
-                        
-                        # Encrypt and store token
-                        encrypted_token = self._encrypt_token(access_token)
-                        
-                        # Store in database (if available)
-                        db = self._get_db()
-                        if db is not None:  # 🔧 FIXED: Use 'is not None'
-                            token_doc = {
-                                "user_id": "system",  # System-wide token
-                                "access_token": encrypted_token,
-                                "expires_at": expires_at,
-                                "created_at": datetime.utcnow()
-                            }
-                            
-                            # Upsert token document
-                            await db.tata_tokens.update_one(
-                                {"user_id": "system"},
-                                {"$set": token_doc},
-                                upsert=True
-                            )
-                        else:
-                            logger.warning("Database not available, token stored in memory only")
-                        
-                        # Log successful login
-                        await self._log_event("login", "success", "Tata login successful")
-                        
-                        logger.info("✅ Tata login successful")
-                        return {
-                                "success": data.get("success", True),
-                                "access_token": access_token,  # Return actual token
-                                "token_type": data.get("token_type", "bearer"),
-                                "expires_in": data.get("expires_in", 3600),
-                                "expires_at": expires_at,
-                                "number_of_days_left": data.get("number_of_days_left")
+                    # Encrypt and store token
+                    encrypted_token = self._encrypt_token(access_token)
+                    
+                    # Store in database (if available)
+                    db = self._get_db()
+                    if db is not None:  # 🔧 FIXED: Use 'is not None'
+                        token_doc = {
+                            "user_id": "system",  # System-wide token
+                            "access_token": encrypted_token,
+                            "expires_at": expires_at,
+                            "created_at": datetime.utcnow()
                         }
+                        
+                        # Upsert token document
+                        await db.tata_tokens.update_one(
+                            {"user_id": "system"},
+                            {"$set": token_doc},
+                            upsert=True
+                        )
                     else:
-                        await self._log_event("login", "error", "No access token in response")
-                        return {
-                            "success": False,
-                            "message": "No access token received"
-                        }
+                        logger.warning("Database not available, token stored in memory only")
+                    
+                    # Log successful login
+                    await self._log_event("login", "success", "Tata login successful")
+                    
+                    logger.info("✅ Tata login successful")
+                    return {
+                            "success": data.get("success", True),
+                            "access_token": access_token,  # Return actual token
+                            "token_type": data.get("token_type", "bearer"),
+                            "expires_in": data.get("expires_in", 3600),
+                            "expires_at": expires_at,
+                            "number_of_days_left": data.get("number_of_days_left")
+                    }
                 else:
-                    error_msg = f"Login failed with status {response.status_code}: {response.text}"
-                    await self._log_event("login", "error", error_msg)
-                    logger.warning(error_msg)
+                    await self._log_event("login", "error", "No access token in response")
                     return {
                         "success": False,
-                        "message": error_msg
+                        "message": "No access token received"
                     }
+            else:
+                error_msg = f"Login failed with status {response.status_code}: {response.text}"
+                await self._log_event("login", "error", error_msg)
+                logger.warning(error_msg)
+                return {
+                    "success": False,
+                    "message": error_msg
+                }
                     
         except httpx.TimeoutException:
             error_msg = "Tata API timeout during login"
@@ -278,14 +279,14 @@ class TataAuthService:
             # Call API logout if we have a token
             if current_token:
                 try:
-                    async with httpx.AsyncClient(timeout=self.timeout) as client:
-                        await client.post(
-                            f"{self.base_url}/v1/auth/logout",
-                            headers={
-                                "Authorization": f"Bearer {current_token}",
-                                "Content-Type": "application/json"
-                            }
-                        )
+                    client = outbound_http.get("tata")
+                    await client.post(
+                        f"{self.base_url}/v1/auth/logout",
+                        headers={
+                            "Authorization": f"Bearer {current_token}",
+                            "Content-Type": "application/json"
+                        }
+                    )
                 except Exception as e:
                     logger.warning(f"API logout failed: {e}")
             
@@ -346,17 +347,18 @@ class TataAuthService:
                 
                 # Test API connectivity with actual token
                 try:
-                    async with httpx.AsyncClient(timeout=10) as client:
-                        response = await client.get(
-                            f"{self.base_url}/v1/users",
-                            headers={"Authorization": f"Bearer {token}"}
-                        )
-                        if response.status_code == 200:
-                            health_status["api_connectivity"] = True
-                            health_status["tata_api_status"] = "connected"
-                            health_status["health_score"] += 30
-                        else:
-                            health_status["tata_api_status"] = "error"
+                    client = outbound_http.get("tata")
+                    response = await client.get(
+                        f"{self.base_url}/v1/users",
+                        headers={"Authorization": f"Bearer {token}"},
+                        timeout=10
+                    )
+                    if response.status_code == 200:
+                        health_status["api_connectivity"] = True
+                        health_status["tata_api_status"] = "connected"
+                        health_status["health_score"] += 30
+                    else:
+                        health_status["tata_api_status"] = "error"
                 except Exception as e:
                     health_status["tata_api_status"] = "timeout"
                     logger.warning(f"API connectivity test failed: {e}")
@@ -3,7 +3,6 @@
 # Handles click-to-call and support calls without local database storage
 # Direct TATA API calls only - no logging, no call tracking
 
-import httpx
 import logging
 import asyncio
 import re
@@ -14,6 +13,7 @@ from ..config.database import get_database
 from ..config.settings import get_settings
 from ..models.tata_integration import TataIntegrationLog
 from .tata_auth_service import tata_auth_service
+from .outbound_http import outbound_http
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -261,49 +261,49 @@ class TataCallService:
             logger.info(f"📋 Request headers: {headers}")
             logger.info(f"📦 Request data: {data}")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                if method.upper() == "GET":
-                    response = await client.get(url, headers=headers)
-                elif method.upper() == "POST":
-                    if content_type == "application/x-www-form-urlencoded":
-                        response = await client.post(url, headers=headers, data=data)
-                    else:
-                        response = await client.post(url, headers=headers, json=data)
-                elif method.upper() == "PUT":
-                    response = await client.put(url, headers=headers, json=data)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(url, headers=headers)
+            client = outbound_http.get("tata")
+            if method.upper() == "GET":
+                response = await client.get(url, headers=headers)
+            elif method.upper() == "POST":
+                if content_type == "application/x-www-form-urlencoded":
+                    response = await client.post(url, headers=headers, data=data)
                 else:
-                    return False, {"error": f"Unsupported HTTP method: {method}"}
+                    response = await client.post(url, headers=headers, json=data)
+            elif method.upper() == "PUT":
+                response = await client.put(url, headers=headers, json=data)
+            elif method.upper() == "DELETE":
+                response = await client.delete(url, headers=headers)
+            else:
+                return False, {"error": f"Unsupported HTTP method: {method}"}
+            
+            logger.info(f"📡 Response status: {response.status_code}")
+            
+            if response.status_code == 200:
+                response_data = response.json()
+                logger.info(f"✅ Tata API success response: {response_data}")
+                return True, response_data
+            else:
+                # Enhanced error logging for debugging
+                try:
+                    error_response = response.json()
+                except:
+                    error_response = response.text
                 
-                logger.info(f"📡 Response status: {response.status_code}")
+                logger.error(f"❌ Tata API error {response.status_code}: {error_response}")
                 
-                if response.status_code == 200:
-                    response_data = response.json()
-                    logger.info(f"✅ Tata API success response: {response_data}")
-                    return True, response_data
-                else:
-                    # Enhanced error logging for debugging
-                    try:
-                        error_response = response.json()
-                    except:
-                        error_response = response.text
-                    
-                    logger.error(f"❌ Tata API error {response.status_code}: {error_response}")
-                    
-                    # Special handling for 422 errors (our main issue)
-                    if response.status_code == 422:
-                        logger.error(f"🔍 422 Debug - Request URL: {url}")
-                        logger.error(f"🔍 422 Debug - Request Headers: {headers}")
-                        logger.error(f"🔍 422 Debug - Request Data: {data}")
-                        logger.error(f"🔍 422 Debug - Response: {error_response}")
-                    
-                    return False, {
-                        "error": f"API request failed with status {response.status_code}",
-                        "message": error_response.get("message", "Unknown error") if isinstance(error_response, dict) else str(error_response),
-                        "status_code": response.status_code,
-                        "response_body": error_response
-                    }
+                # Special handling for 422 errors (our main issue)
+                if response.status_code == 422:
+                    logger.error(f"🔍 422 Debug - Request URL: {url}")
+                    logger.error(f"🔍 422 Debug - Request Headers: {headers}")
+                    logger.error(f"🔍 422 Debug - Request Data: {data}")
+                    logger.error(f"🔍 422 Debug - Response: {error_response}")
+                
+                return False, {
+                    "error": f"API request failed with status {response.status_code}",
+                    "message": error_response.get("message", "Unknown error") if isinstance(error_response, dict) else str(error_response),
+                    "status_code": response.status_code,
+                    "response_body": error_response
+                }
                     
         except Exception as e:
             logger.error(f"❌ Request error: {str(e)}")
@@ -855,17 +855,14 @@ class TataCallService:
                 logger.info(f"Params: {params}")
                 
                 try:
-                    import aiohttp
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url, params=params, headers=headers) as response:
-                            if response.status == 200:
-                                response_data = await response.json()
-                                month_records = response_data.get("results", [])
-                                all_call_records.extend(month_records)
-                                logger.info(f"📊 Found {len(month_records)} records for month {month_offset + 1}")
-                            else:
-                                error_text = await response.text()
-                                logger.warning(f"❌ Month {month_offset + 1} query failed: HTTP {response.status} - {error_text}")
+                    response = await outbound_http.get("tata").get(url, params=params, headers=headers)
+                    if response.status_code == 200:
+                        response_data = response.json()
+                        month_records = response_data.get("results", [])
+                        all_call_records.extend(month_records)
+                        logger.info(f"📊 Found {len(month_records)} records for month {month_offset + 1}")
+                    else:
+                        logger.warning(f"❌ Month {month_offset + 1} query failed: HTTP {response.status_code} - {response.text}")
                 except Exception as e:
                     logger.warning(f"❌ Month {month_offset + 1} query failed: {str(e)}")
                     continue
@@ -906,93 +903,13 @@ class TataCallService:
             if db is None:
                 return []
             
-            # Get agent-to-user mapping with user details
-            user_mappings = {}
-            async for mapping in db.tata_user_mappings.find({}):
-                tata_phone = mapping.get("tata_phone", "")
-                if tata_phone:
-                    # Clean phone number for matching
-                    clean_phone = tata_phone
-                    if clean_phone.startswith('+91'):
-                        clean_phone = clean_phone[3:]
-                    elif clean_phone.startswith('91'):
-                        clean_phone = clean_phone[2:]
-                    
-                    # Get user details from CRM
-                    user_id = mapping.get("crm_user_id")
-                    user_details = await db.users.find_one({"_id": ObjectId(user_id)}) if user_id else None
-                    
-                    user_name = "Unknown User"
-                    user_email = mapping.get("crm_user_email", "")
-                    
-                    if user_details:
-                        user_name = (
-                            user_details.get("full_name") or 
-                            f"{user_details.get('first_name', '')} {user_details.get('last_name', '')}".strip() or
-                            user_details.get("username") or
-                            user_details.get("email", "").split('@')[0] or
-                            "Unknown User"
-                        )
-                        user_email = user_details.get("email", user_email)
-                    
-                    user_mappings[clean_phone] = {
-                        "user_id": user_id,
-                        "user_name": user_name,
-                        "user_email": user_email
-                    }
+            from .lead_call_stats_service import load_agent_user_index, count_calls_by_user
             
+            # Agent-to-user mapping with user details (shared agent directory)
+            user_mappings = await load_agent_user_index()
             logger.info(f"📋 User mappings loaded: {list(user_mappings.keys())}")
             
-            # Count calls by user (using user_id as internal key)
-            user_call_counts = {}
-            
-            for call_record in call_records:
-                agent_number = call_record.get("agent_number")
-                call_status = call_record.get("status", "").lower()
-                agent_name = call_record.get("agent_name", "Unknown")
-                
-                # Skip records with null agent_number
-                if not agent_number:
-                    logger.warning(f"⚠️ Skipping call record with null agent_number: {agent_name}, Status: {call_status}")
-                    continue
-                
-                # Clean the agent number from call record for matching
-                clean_agent_number = agent_number
-                if clean_agent_number.startswith('+91'):
-                    clean_agent_number = clean_agent_number[3:]
-                elif clean_agent_number.startswith('91'):
-                    clean_agent_number = clean_agent_number[2:]
-                
-                # Find user for this agent using cleaned number
-                user_info = user_mappings.get(clean_agent_number)
-                
-                if not user_info or not user_info.get("user_id"):
-                    logger.warning(f"❌ No user mapping found for cleaned agent number: {clean_agent_number}")
-                    continue
-                
-                user_id = user_info["user_id"]
-                
-                # Initialize user counts if not exists
-                if user_id not in user_call_counts:
-                    user_call_counts[user_id] = {
-                        "user_id": user_id,
-                        "user_name": user_info["user_name"],
-                        "user_email": user_info["user_email"],
-                        "total": 0,
-                        "answered": 0,
-                        "missed": 0
-                    }
-                
-                # Count the call
-                user_call_counts[user_id]["total"] += 1
-                
-                if call_status == "answered":
-                    user_call_counts[user_id]["answered"] += 1
-                else:
-                    user_call_counts[user_id]["missed"] += 1
-            
-            # Convert to list format for frontend
-            user_call_list = list(user_call_counts.values())
+            user_call_list = count_calls_by_user(call_records, user_mappings)
             
             logger.info(f"📈 Final call counts by user: {user_call_list}")
             return user_call_list
@@ -1025,79 +942,22 @@ class TataCallService:
 
     async def bulk_refresh_call_counts(self, lead_ids: List[str] = None, assigned_to_user: str = None, 
                                      force_refresh: bool = False, batch_size: int = 50) -> Dict[str, Any]:
-        """Bulk refresh call counts for multiple leads"""
-        try:
-            db = self._get_db()
-            if db is None:
-                return {"success": False, "error": "Database not available"}
-            
-            start_time = datetime.utcnow()
-            logger.info(f"🔄 Starting bulk call count refresh")
-            
-            # Build query for leads to refresh
-            query = {}
-            if lead_ids:
-                query["lead_id"] = {"$in": lead_ids}
-            elif assigned_to_user:
-                query["assigned_to"] = assigned_to_user
-            
-            # Get leads to process
-            leads_cursor = db.leads.find(query, {"lead_id": 1, "contact_number": 1, "phone_number": 1})
-            leads_to_process = await leads_cursor.to_list(None)
-            
-            total_leads = len(leads_to_process)
-            successful_refreshes = 0
-            failed_refreshes = 0
-            failed_lead_ids = []
-            
-            logger.info(f"📊 Processing {total_leads} leads in batches of {batch_size}")
-            
-            # Process in batches
-            for i in range(0, total_leads, batch_size):
-                batch = leads_to_process[i:i + batch_size]
-                batch_tasks = []
-                
-                for lead in batch:
-                    lead_id = lead.get("lead_id")
-                    phone = lead.get("contact_number") or lead.get("phone_number")
-                    
-                    # Create refresh task for this lead
-                    task = self.refresh_lead_call_count(lead_id, phone, force_refresh)
-                    batch_tasks.append((lead_id, task))
-                
-                # Execute batch concurrently
-                batch_results = await asyncio.gather(*[task for _, task in batch_tasks], return_exceptions=True)
-                
-                # Process results
-                for j, (lead_id, result) in enumerate(zip([lead_id for lead_id, _ in batch_tasks], batch_results)):
-                    if isinstance(result, Exception):
-                        failed_refreshes += 1
-                        failed_lead_ids.append(lead_id)
-                        logger.error(f"❌ Failed to refresh {lead_id}: {str(result)}")
-                    elif result.get("success"):
-                        successful_refreshes += 1
-                    else:
-                        failed_refreshes += 1
-                        failed_lead_ids.append(lead_id)
-                        logger.error(f"❌ Failed to refresh {lead_id}: {result.get('error')}")
-                
-                logger.info(f"✅ Completed batch {i//batch_size + 1}/{(total_leads-1)//batch_size + 1}")
-            
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
-            
-            return {
-                "success": True,
-                "message": f"Bulk refresh completed: {successful_refreshes}/{total_leads} successful",
-                "total_leads": total_leads,
-                "successful_refreshes": successful_refreshes,
-                "failed_refreshes": failed_refreshes,
-                "processing_time": processing_time,
-                "failed_lead_ids": failed_lead_ids
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in bulk refresh: {str(e)}")
-            return {"success": False, "error": str(e)}
+        """
+        Bulk refresh call counts for multiple leads
+        
+        All selected leads are refreshed from one CDR sweep of the lookback
+        window (see lead_call_stats_service), so `batch_size` no longer
+        affects how many TATA requests are made.
+        """
+        from .lead_call_stats_service import lead_call_stats_service
+        
+        logger.info(f"🔄 Starting bulk call count refresh")
+        return await lead_call_stats_service.refresh(
+            lead_ids=lead_ids,
+            assigned_to_user=assigned_to_user,
+            force_refresh=force_refresh
+        )
+
     async def fix_user_mappings_with_phone_numbers(self) -> Dict[str, Any]:
         """
         One-time fix to update existing user mappings with actual phone numbers
@@ -1163,6 +1023,10 @@ class TataCallService:
                     failed_count += 1
                     logger.error(f"Error updating mapping {mapping.get('_id')}: {str(e)}")
             
+            if updated_count:
+                from .agent_directory_service import agent_directory
+                await agent_directory.notify_changed()
+            
             return {
                 "success": True,
                 "message": f"Updated {updated_count} mappings, {failed_count} failed",
@@ -8,10 +8,11 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Tuple
 from bson import ObjectId
 import re
-import httpx
 
 from ..config.database import get_database
 from ..config.settings import get_settings
+from .user_directory_service import user_directory
+from .agent_directory_service import agent_directory
 from ..models.tata_user import (
     TataUserMapping, TataUserMappingCreate, TataUserMappingUpdate, TataUserMappingResponse,
     SyncStatus, TataUserType, UserStatus, BulkUserSyncRequest, BulkUserSyncResponse,
@@ -20,6 +21,7 @@ from ..models.tata_user import (
 )
 from ..models.tata_integration import TataUserData, TataUsersListResponse, TataIntegrationLog
 from .tata_auth_service import tata_auth_service
+from .outbound_http import outbound_http
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -382,6 +384,7 @@ class TataUserService:
                 await db.tata_user_mappings.insert_one(mapping_data)
                 logger.info(f"Created new mapping for user {user_id}")
             
+            await agent_directory.notify_changed()
             return True
             
         except Exception as e:
@@ -421,6 +424,7 @@ class TataUserService:
                 {"_id": ObjectId(user_id)},
                 {"$set": update_data}
             )
+            await user_directory.notify_changed(user_id)
             
             if result.modified_count > 0:
                 logger.info(f"Updated calling status for user {user_id}: enabled={calling_enabled}")
@@ -476,26 +480,26 @@ class TataUserService:
                 "Accept": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                if method.upper() == "GET":
-                    response = await client.get(url, headers=headers)
-                elif method.upper() == "POST":
-                    response = await client.post(url, headers=headers, json=data)
-                elif method.upper() == "PUT":
-                    response = await client.put(url, headers=headers, json=data)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(url, headers=headers)
-                else:
-                    return False, {"error": "Unsupported HTTP method"}
-                
-                if response.status_code == 200:
-                    return True, response.json()
-                else:
-                    logger.error(f"API request failed: {response.status_code} - {response.text}")
-                    return False, {
-                        "error": f"API request failed with status {response.status_code}",
-                        "message": response.text
-                    }
+            client = outbound_http.get("tata")
+            if method.upper() == "GET":
+                response = await client.get(url, headers=headers)
+            elif method.upper() == "POST":
+                response = await client.post(url, headers=headers, json=data)
+            elif method.upper() == "PUT":
+                response = await client.put(url, headers=headers, json=data)
+            elif method.upper() == "DELETE":
+                response = await client.delete(url, headers=headers)
+            else:
+                return False, {"error": "Unsupported HTTP method"}
+            
+            if response.status_code == 200:
+                return True, response.json()
+            else:
+                logger.error(f"API request failed: {response.status_code} - {response.text}")
+                return False, {
+                    "error": f"API request failed with status {response.status_code}",
+                    "message": response.text
+                }
                     
         except Exception as e:
             logger.error(f"Request error: {str(e)}")
@@ -794,6 +798,7 @@ class TataUserService:
             
             # Insert mapping
             result = await db.tata_user_mappings.insert_one(mapping_doc)
+            await agent_directory.notify_changed()
             
             # Get the created mapping
             created_mapping = await db.tata_user_mappings.find_one({"_id": result.inserted_id})
@@ -1079,6 +1084,8 @@ class TataUserService:
                         actions_taken.append("create_user_failed")
                         raise Exception(f"Failed to create Tata user: {response.get('message')}")
                 
+                await agent_directory.notify_changed()
+                
                 # Log successful sync
                 await self._log_sync_event(
                     event_type="user_sync_success",
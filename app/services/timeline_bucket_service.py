@@ -0,0 +1,396 @@
+# app/services/timeline_bucket_service.py - Time-bucketed lead timeline storage
+"""
+lead_activities holds one document per activity, and the timeline endpoints
+paged it with count_documents plus skip/limit. For noisy leads (thousands of
+WhatsApp, call and email activities) every page scanned the whole history.
+
+lead_timeline_buckets is the read tier. lead_activities stays the raw log
+that duplicate checks and other readers query. A bucket holds one lead's
+activities for one UTC day, at most `bucket_size` of them, and a header:
+
+    {lead_id, day: "YYYY-MM-DD", count, start, end,
+     type_counts: {activity_type: n}, type_latest: {activity_type: datetime},
+     activities: [...full activity documents...]}
+
+- appends are upserts on {lead_id, day, count <= bucket_size - n} for n
+  entries, split against the room left in the day's open bucket; when no
+  bucket has room the filter stops matching and the upsert opens the next one
+- every appended activity first claims its key in lead_timeline_entries
+  (_id = the activity _id, so unique per lead and activity); an activity
+  that is already claimed is not pushed again, which keeps the activity log
+  writer and a concurrent migrate_lead from adding it twice
+- the activity log writer appends every activity it stores
+- timeline pages read the headers (no entries), take totals from their
+  counts, and load only the days that cover the requested page; a day is
+  scanned entry by entry only for search or a partial date range
+- leads get `timeline_bucketed: True` once their history is in buckets
+  (new leads at creation, existing leads through migrate_all()); leads
+  without it are still served from lead_activities
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..config.database import get_database
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Activities read from lead_activities per append during migration
+MIGRATION_CHUNK_SIZE = 1000
+# Leads migrated concurrently
+MIGRATION_CONCURRENCY = 8
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _type_key(activity_type: Any) -> str:
+    """Activity type usable as a field name in type_counts/type_latest"""
+    return str(activity_type or "unknown").replace(".", "_").lstrip("$") or "unknown"
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; query bounds may carry a timezone"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _created_at(activity: Dict[str, Any]) -> datetime:
+    created_at = activity.get("created_at")
+    return created_at if isinstance(created_at, datetime) else datetime.min
+
+
+class TimelineBucketService:
+    """Writes and reads the bucketed lead timeline"""
+
+    def __init__(self, bucket_size: int = 200):
+        self.bucket_size = max(1, bucket_size)
+
+    @property
+    def collection(self):
+        return get_database().lead_timeline_buckets
+
+    @property
+    def entries(self):
+        return get_database().lead_timeline_entries
+
+    # ============================================================================
+    # WRITING
+    # ============================================================================
+
+    def _bucket_operation(self, lead_id: Any, day: str, chunk: List[Dict[str, Any]]) -> UpdateOne:
+        type_counts: Dict[str, int] = {}
+        type_latest: Dict[str, datetime] = {}
+        for entry in chunk:
+            key = _type_key(entry.get("activity_type"))
+            type_counts[key] = type_counts.get(key, 0) + 1
+            type_latest[key] = max(type_latest.get(key, datetime.min), _created_at(entry))
+
+        # Only a bucket with room for the whole chunk matches; otherwise a new one is opened
+        return UpdateOne(
+            {"lead_id": lead_id, "day": day, "count": {"$lte": self.bucket_size - len(chunk)}},
+            {
+                "$push": {"activities": {"$each": chunk}},
+                "$inc": {"count": len(chunk), **{f"type_counts.{key}": n for key, n in type_counts.items()}},
+                "$min": {"start": _created_at(chunk[0])},
+                "$max": {"end": _created_at(chunk[-1]), **{f"type_latest.{key}": latest for key, latest in type_latest.items()}}
+            },
+            upsert=True
+        )
+
+    def _bucket_operations(
+        self,
+        activities: List[Dict[str, Any]],
+        open_counts: Optional[Dict[Tuple[Any, str], int]] = None
+    ) -> List[UpdateOne]:
+        """
+        Bucket writes for activities; open_counts holds the entry count of
+        each (lead_id, day)'s open bucket, whose remaining room the first
+        chunk is cut to.
+        """
+        groups: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+        for activity in activities:
+            lead_id = activity.get("lead_id")
+            if not lead_id:
+                continue
+            day = _created_at(activity).strftime("%Y-%m-%d")
+            groups.setdefault((lead_id, day), []).append(activity)
+
+        operations = []
+        for (lead_id, day), entries in groups.items():
+            entries.sort(key=_created_at)
+            room = self.bucket_size - (open_counts or {}).get((lead_id, day), 0)
+            start = 0
+            while start < len(entries):
+                size = room if start == 0 and room > 0 else self.bucket_size
+                operations.append(self._bucket_operation(lead_id, day, entries[start:start + size]))
+                start += size
+        return operations
+
+    async def _open_counts(self, activities: List[Dict[str, Any]]) -> Dict[Tuple[Any, str], int]:
+        """Entry count of the fullest not-yet-full bucket per (lead_id, day)"""
+        keys = {
+            (activity["lead_id"], _created_at(activity).strftime("%Y-%m-%d"))
+            for activity in activities if activity.get("lead_id")
+        }
+        counts: Dict[Tuple[Any, str], int] = {}
+        if not keys:
+            return counts
+        query = {
+            "$or": [{"lead_id": lead_id, "day": day} for lead_id, day in keys],
+            "count": {"$lt": self.bucket_size}
+        }
+        async for bucket in self.collection.find(query, {"lead_id": 1, "day": 1, "count": 1}):
+            key = (bucket["lead_id"], bucket["day"])
+            counts[key] = max(counts.get(key, 0), bucket.get("count", 0))
+        return counts
+
+    async def _claim(self, activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Activities not in the bucketed timeline yet; claims their lead_timeline_entries keys"""
+        activities = [activity for activity in activities if activity.get("lead_id") and activity.get("_id") is not None]
+        if not activities:
+            return []
+        try:
+            await self.entries.insert_many(
+                [{"_id": activity["_id"], "lead_id": activity["lead_id"]} for activity in activities],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                raise
+            claimed_before = {error["index"] for error in write_errors}
+            return [activity for index, activity in enumerate(activities) if index not in claimed_before]
+        return activities
+
+    async def append(self, activities: List[Dict[str, Any]]) -> int:
+        """Add stored activities to their day buckets, once each; returns how many were added"""
+        activities = await self._claim(activities)
+        if not activities:
+            return 0
+        operations = self._bucket_operations(activities, await self._open_counts(activities))
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception:
+            # Release the claims so a retry or migrate_lead can add them
+            await self.entries.delete_many({"_id": {"$in": [activity["_id"] for activity in activities]}})
+            raise
+        return len(activities)
+
+    # ============================================================================
+    # READING
+    # ============================================================================
+
+    async def _load_headers(self, lead_id: str, date_from: Optional[datetime], date_to: Optional[datetime]) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"lead_id": lead_id}
+        if date_from:
+            query["end"] = {"$gte": date_from}
+        if date_to:
+            query["start"] = {"$lte": date_to}
+        return await self.collection.find(query, {"activities": 0}).sort("day", -1).to_list(None)
+
+    async def _load_entries(self, bucket_ids: List[Any]) -> Dict[Any, List[Dict[str, Any]]]:
+        entries = {}
+        if bucket_ids:
+            async for bucket in self.collection.find({"_id": {"$in": bucket_ids}}, {"activities": 1}):
+                entries[bucket["_id"]] = bucket.get("activities", [])
+        return entries
+
+    async def get_page(
+        self,
+        lead_id: str,
+        page: int,
+        limit: int,
+        activity_type: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        search: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        One timeline page (newest first) and the total number of matches.
+
+        Filters match the legacy query: exact activity_type, created_at within
+        [date_from, date_to], case-insensitive substring of the description.
+        """
+        date_from, date_to = _naive_utc(date_from), _naive_utc(date_to)
+        needle = search.lower() if search else None
+        type_key = _type_key(activity_type) if activity_type else None
+
+        def matches(entry: Dict[str, Any]) -> bool:
+            created_at = _created_at(entry)
+            if activity_type and entry.get("activity_type") != activity_type:
+                return False
+            if date_from and created_at < date_from:
+                return False
+            if date_to and created_at > date_to:
+                return False
+            if needle and needle not in str(entry.get("description") or "").lower():
+                return False
+            return True
+
+        def header_count(header: Dict[str, Any]) -> Optional[int]:
+            """Matches in a bucket from its header alone, None when it must be scanned"""
+            if needle:
+                return None
+            if (date_from and header["start"] < date_from) or (date_to and header["end"] > date_to):
+                return None
+            if type_key:
+                return header.get("type_counts", {}).get(type_key, 0)
+            return header.get("count", 0)
+
+        # Days in newest-first order; buckets of one day may overlap in time
+        days: List[Tuple[str, List[Dict[str, Any]]]] = []
+        for header in await self._load_headers(lead_id, date_from, date_to):
+            if days and days[-1][0] == header["day"]:
+                days[-1][1].append(header)
+            else:
+                days.append((header["day"], [header]))
+
+        scanned = await self._load_entries([
+            header["_id"] for _, headers in days for header in headers if header_count(header) is None
+        ])
+
+        day_counts = []
+        for _, headers in days:
+            count = 0
+            for header in headers:
+                exact = header_count(header)
+                count += exact if exact is not None else sum(1 for entry in scanned[header["_id"]] if matches(entry))
+            day_counts.append(count)
+        total = sum(day_counts)
+
+        # Load only the days that overlap [skip, skip + limit)
+        skip = (page - 1) * limit
+        page_days, position = [], 0
+        for (_, headers), count in zip(days, day_counts):
+            if position + count > skip and position < skip + limit:
+                page_days.append((headers, position))
+            position += count
+            if position >= skip + limit:
+                break
+
+        missing = [header["_id"] for headers, _ in page_days for header in headers if header["_id"] not in scanned]
+        scanned.update(await self._load_entries(missing))
+
+        activities = []
+        for headers, day_start in page_days:
+            seen = set()
+            day_entries = []
+            for header in headers:
+                for entry in scanned.get(header["_id"], []):
+                    if entry.get("_id") in seen or not matches(entry):
+                        continue
+                    seen.add(entry.get("_id"))
+                    day_entries.append(entry)
+            day_entries.sort(key=_created_at, reverse=True)
+            offset = max(0, skip - day_start)
+            activities.extend(day_entries[offset:offset + limit - len(activities)])
+
+        return activities, total
+
+    async def get_type_stats(self, lead_id: str, start_date: datetime) -> Dict[str, Dict[str, Any]]:
+        """activity_type -> {count, latest} for activities since start_date"""
+        stats: Dict[str, Dict[str, Any]] = {}
+
+        def add(activity_type: str, count: int, latest: Optional[datetime]):
+            stat = stats.setdefault(activity_type, {"count": 0, "latest": None})
+            stat["count"] += count
+            if latest and (stat["latest"] is None or latest > stat["latest"]):
+                stat["latest"] = latest
+
+        headers = await self._load_headers(lead_id, start_date, None)
+        partial = [header["_id"] for header in headers if header["start"] < start_date]
+        for header in headers:
+            if header["start"] >= start_date:
+                for activity_type, count in header.get("type_counts", {}).items():
+                    add(activity_type, count, header.get("type_latest", {}).get(activity_type))
+
+        for entries in (await self._load_entries(partial)).values():
+            for entry in entries:
+                if _created_at(entry) >= start_date:
+                    add(_type_key(entry.get("activity_type")), 1, _created_at(entry))
+
+        return stats
+
+    # ============================================================================
+    # MIGRATION
+    # ============================================================================
+
+    async def migrate_lead(self, lead_id: str) -> int:
+        """
+        Copy a lead's lead_activities into buckets and mark the lead bucketed.
+
+        The flag is set only after the last append succeeded, so a lead whose
+        migration failed keeps being served from lead_activities and is picked
+        up again by migrate_all(). Activities the log writer appends while the
+        scan runs are claimed by whichever of the two gets there first, so each
+        is stored once. Activities already in a bucket are skipped, so it can
+        be re-run to repair a lead. Returns the number of activities added.
+        """
+        db = get_database()
+        existing = set()
+        async for bucket in self.collection.find({"lead_id": lead_id}, {"activities._id": 1}):
+            existing.update(entry.get("_id") for entry in bucket.get("activities", []))
+
+        added = 0
+        pending = []
+        async for activity in db.lead_activities.find({"lead_id": lead_id}):
+            if activity["_id"] in existing:
+                continue
+            pending.append(activity)
+            if len(pending) >= MIGRATION_CHUNK_SIZE:
+                added += await self.append(pending)
+                pending = []
+        if pending:
+            added += await self.append(pending)
+
+        await db.leads.update_one({"lead_id": lead_id}, {"$set": {"timeline_bucketed": True}})
+        return added
+
+    async def migrate_all(self, only_missing: bool = True) -> Dict[str, Any]:
+        """Migrate every lead (only leads not bucketed yet by default)"""
+        db = get_database()
+        query = {"timeline_bucketed": {"$ne": True}} if only_missing else {}
+        semaphore = asyncio.Semaphore(MIGRATION_CONCURRENCY)
+
+        migrated = 0
+        activities = 0
+        failed = []
+
+        async def migrate(lead_id: str):
+            nonlocal migrated, activities
+            async with semaphore:
+                try:
+                    activities += await self.migrate_lead(lead_id)
+                    migrated += 1
+                except Exception as e:
+                    logger.error(f"Error migrating timeline for lead {lead_id}: {str(e)}")
+                    failed.append(lead_id)
+
+        try:
+            batch = []
+            async for lead in db.leads.find(query, {"lead_id": 1}):
+                batch.append(migrate(lead["lead_id"]))
+                if len(batch) >= MIGRATION_CONCURRENCY * 10:
+                    await asyncio.gather(*batch)
+                    batch = []
+            if batch:
+                await asyncio.gather(*batch)
+
+            logger.info(f"Timeline buckets: migrated {migrated} leads ({activities} activities), {len(failed)} failed")
+            return {"success": True, "migrated_leads": migrated, "activities": activities, "failed_lead_ids": failed}
+
+        except Exception as e:
+            logger.error(f"Error migrating timelines to buckets: {str(e)}")
+            return {"success": False, "migrated_leads": migrated, "activities": activities,
+                    "failed_lead_ids": failed, "error": str(e)}
+
+
+# Global service instance
+timeline_buckets = TimelineBucketService(bucket_size=settings.timeline_bucket_size)
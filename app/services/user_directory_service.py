@@ -0,0 +1,433 @@
+# app/services/user_directory_service.py - Process-wide user cache and batched per-request user lookups
+
+from typing import Dict, Any, Optional, List, Iterable, Tuple, Callable
+from collections import OrderedDict
+from bson import ObjectId
+import asyncio
+import copy
+import logging
+import time
+
+from ..config.database import get_database
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+VERSION_COLLECTION = "cache_versions"
+VERSION_ID = "user_directory"
+# Changed users kept on the version document; a worker further behind clears everything
+MAX_TRACKED_CHANGES = 200
+
+
+def format_user_display_name(user: Optional[Dict[str, Any]], fallback: str) -> str:
+    """Return "First Last" for a user document, falling back to email then the given fallback"""
+    if not user:
+        return fallback
+    full_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
+    return full_name if full_name else user.get("email", fallback)
+
+
+class UserDirectoryCache:
+    """
+    Process-wide user directory keyed by _id and email.
+
+    Entries expire after `ttl_seconds` and the least recently used entries are
+    evicted beyond `max_entries`. Callers always receive a copy, so mutating
+    the result is safe.
+
+    Any code that writes to the users collection must call
+    `await notify_changed()` for the affected user. It drops the user here
+    and records the change on a shared version document (one version per
+    changed user, the latest MAX_TRACKED_CHANGES users kept on the document).
+    Every worker compares its version with the shared one at most every
+    `check_seconds` in `ensure_fresh()`, which the read paths call, and drops
+    the users changed since; a worker that fell further behind clears the
+    whole directory. Invalidation listeners (cached principals, the agent
+    directory) are notified for both local and remote changes.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 5000, check_seconds: float = 5.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.check_seconds = check_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._email_index: Dict[str, str] = {}
+        self._admins: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+        self._invalidation_listeners: List[Callable[[Optional[str], Optional[str]], None]] = []
+        self.version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.remote_invalidations = 0
+
+    # ------------------------------------------------------------------
+    # Internal storage
+    # ------------------------------------------------------------------
+
+    def _lookup(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._drop(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def _drop(self, user_id: str) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            email = entry[1].get("email")
+            if email and self._email_index.get(email) == user_id:
+                self._email_index.pop(email, None)
+
+    def put(self, user: Optional[Dict[str, Any]]) -> None:
+        """Store a full user document"""
+        if not user or user.get("_id") is None:
+            return
+        user_id = str(user["_id"])
+        self._drop(user_id)
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(user))
+        if user.get("email"):
+            self._email_index[user["email"]] = user_id
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._drop(oldest_id)
+
+    # ------------------------------------------------------------------
+    # Cache-only lookups (no database access)
+    # ------------------------------------------------------------------
+
+    def peek_by_id(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        if not user_id:
+            return None
+        user = self._lookup(str(user_id))
+        return copy.deepcopy(user) if user else None
+
+    def peek_by_email(self, email: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not email:
+            return None
+        user_id = self._email_index.get(email)
+        return self.peek_by_id(user_id) if user_id else None
+
+    # ------------------------------------------------------------------
+    # Read-through lookups
+    # ------------------------------------------------------------------
+
+    async def get_by_id(self, user_id: Any, db=None) -> Optional[Dict[str, Any]]:
+        """Get a user by _id, reading through to MongoDB on a miss"""
+        if not user_id or not ObjectId.is_valid(str(user_id)):
+            return None
+        await self.ensure_fresh(db)
+        user = self.peek_by_id(user_id)
+        if user:
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        db = db if db is not None else get_database()
+        user = await db.users.find_one({"_id": ObjectId(str(user_id))})
+        self.put(user)
+        return user
+
+    async def get_by_email(self, email: Optional[str], db=None) -> Optional[Dict[str, Any]]:
+        """Get a user by email, reading through to MongoDB on a miss"""
+        if not email:
+            return None
+        await self.ensure_fresh(db)
+        user = self.peek_by_email(email)
+        if user:
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        db = db if db is not None else get_database()
+        user = await db.users.find_one({"email": email})
+        self.put(user)
+        return user
+
+    async def get_admin_users(self, db=None) -> List[Dict[str, Any]]:
+        """Get all admin users (cached as a single list)"""
+        await self.ensure_fresh(db)
+        if self._admins and self._admins[0] >= time.monotonic():
+            self.hits += 1
+            return copy.deepcopy(self._admins[1])
+
+        self.misses += 1
+        db = db if db is not None else get_database()
+        admins = await db.users.find({"role": "admin"}).to_list(None)
+        for admin in admins:
+            self.put(admin)
+        self._admins = (time.monotonic() + self.ttl_seconds, copy.deepcopy(admins))
+        return admins
+
+    # ------------------------------------------------------------------
+    # Cross-worker versioning
+    # ------------------------------------------------------------------
+
+    async def ensure_fresh(self, db=None) -> None:
+        """Apply user changes made by other workers since the last check"""
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return
+
+        async with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return
+            try:
+                db = db if db is not None else get_database()
+                document = await db[VERSION_COLLECTION].find_one({"_id": VERSION_ID}, {"version": 1})
+                shared_version = (document or {}).get("version", 0)
+                if self.version is None:
+                    # First check: nothing cached can be trusted against an unknown version
+                    self.invalidate_all()
+                elif shared_version != self.version:
+                    document = await db[VERSION_COLLECTION].find_one({"_id": VERSION_ID})
+                    shared_version = (document or {}).get("version", 0)
+                    self._apply_changes(shared_version, (document or {}).get("changes", []))
+                self.version = shared_version
+            except Exception as e:
+                # Entries still expire after ttl_seconds; retry after the check interval
+                logger.error(f"Error checking user directory version: {str(e)}")
+            finally:
+                self._checked_at = time.monotonic()
+
+    def _apply_changes(self, shared_version: int, changes: List[Dict[str, Any]]) -> None:
+        """changes[-1] belongs to shared_version, changes[-2] to the one before, ..."""
+        missed = shared_version - self.version
+        if missed <= 0 or missed > len(changes):
+            self.invalidate_all()
+        else:
+            for change in changes[-missed:]:
+                self.invalidate(change.get("user_id"), change.get("email"))
+        self.remote_invalidations += 1
+
+    async def notify_changed(self, user_id: Any = None, email: Optional[str] = None) -> None:
+        """Call after writing a user document: drops the user here and in every other worker"""
+        await self.notify_many_changed([(user_id, email)])
+
+    async def notify_many_changed(self, users: Iterable[Any]) -> None:
+        """Like notify_changed for several users; items are emails or (user_id, email) pairs"""
+        changes = []
+        for user in users:
+            user_id, email = user if isinstance(user, tuple) else (None, user)
+            if not user_id and not email:
+                continue
+            self.invalidate(user_id, email)
+            changes.append({"user_id": str(user_id) if user_id else None, "email": email})
+        if not changes:
+            return
+        try:
+            await get_database()[VERSION_COLLECTION].update_one(
+                {"_id": VERSION_ID},
+                {
+                    "$inc": {"version": len(changes)},
+                    "$push": {"changes": {"$each": changes, "$slice": -MAX_TRACKED_CHANGES}}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error bumping user directory version: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Local invalidation
+    # ------------------------------------------------------------------
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[str], Optional[str]], None]) -> None:
+        """
+        Register a callback run as listener(user_id, email) on invalidation.
+        Both arguments are None when the whole directory is cleared.
+        """
+        self._invalidation_listeners.append(listener)
+
+    def _notify(self, user_id: Optional[str], email: Optional[str]) -> None:
+        for listener in self._invalidation_listeners:
+            try:
+                listener(user_id, email)
+            except Exception as e:
+                logger.error(f"User directory invalidation listener failed: {str(e)}")
+
+    def invalidate(self, user_id: Any = None, email: Optional[str] = None) -> None:
+        """Drop a user from this worker's cache (use notify_changed after a write)"""
+        if email:
+            indexed_id = self._email_index.get(email)
+            if indexed_id:
+                self._drop(indexed_id)
+        if user_id:
+            user_id = str(user_id)
+            self._drop(user_id)
+        self._notify(user_id or None, email)
+        # Role or activation changes may affect the admin list
+        self._admins = None
+
+    def invalidate_all(self) -> None:
+        self._entries.clear()
+        self._email_index.clear()
+        self._admins = None
+        self._notify(None, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0.0,
+            "version": self.version,
+            "remote_invalidations": self.remote_invalidations,
+            "check_seconds": self.check_seconds
+        }
+
+
+class UserDirectoryLoader:
+    """
+    Per-request user directory.
+
+    Collect every user reference on a page of leads (created_by, assigned_to,
+    co_assignees), serve what the shared `user_directory` already holds and
+    resolve the rest with one $in query. `query_count` records how many
+    round-trips were made so N+1 regressions are easy to spot.
+    """
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
+        self._by_email: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._by_id: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending_emails: set = set()
+        self._pending_ids: set = set()
+        self.query_count = 0
+
+    # ------------------------------------------------------------------
+    # Collection
+    # ------------------------------------------------------------------
+
+    def add_email(self, email: Optional[str]) -> None:
+        if email and isinstance(email, str) and email not in self._by_email:
+            self._pending_emails.add(email)
+
+    def add_reference(self, reference: Any) -> None:
+        """Add a created_by style reference which may be an ObjectId or a legacy email"""
+        if not reference:
+            return
+        reference = str(reference)
+        if ObjectId.is_valid(reference):
+            if reference not in self._by_id:
+                self._pending_ids.add(reference)
+        else:
+            self.add_email(reference)
+
+    def collect_from_lead(self, lead: Dict[str, Any]) -> None:
+        self.add_reference(lead.get("created_by"))
+        self.add_email(lead.get("assigned_to"))
+        for email in lead.get("co_assignees") or []:
+            self.add_email(email)
+
+    def collect_from_leads(self, leads: Iterable[Dict[str, Any]]) -> "UserDirectoryLoader":
+        for lead in leads:
+            self.collect_from_lead(lead)
+        return self
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def load(self) -> "UserDirectoryLoader":
+        """Resolve all pending references with a single query"""
+        if not self._pending_emails and not self._pending_ids:
+            return self
+
+        await user_directory.ensure_fresh(self.db)
+        emails = []
+        for email in self._pending_emails:
+            cached = user_directory.peek_by_email(email)
+            if cached:
+                self.prime(cached)
+            else:
+                emails.append(email)
+        object_ids = []
+        for user_id in self._pending_ids:
+            cached = user_directory.peek_by_id(user_id)
+            if cached:
+                self.prime(cached)
+            else:
+                object_ids.append(ObjectId(user_id))
+        self._pending_emails = set()
+        self._pending_ids = set()
+
+        if not emails and not object_ids:
+            return self
+
+        conditions = []
+        if emails:
+            conditions.append({"email": {"$in": emails}})
+        if object_ids:
+            conditions.append({"_id": {"$in": object_ids}})
+        query = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+        # Mark everything as looked up so misses are not re-queried
+        for email in emails:
+            self._by_email.setdefault(email, None)
+        for object_id in object_ids:
+            self._by_id.setdefault(str(object_id), None)
+
+        try:
+            self.query_count += 1
+            users = await self.db.users.find(query).to_list(None)
+            for user in users:
+                user_directory.put(user)
+                self.prime(user)
+        except Exception as e:
+            logger.error(f"Error loading user directory: {str(e)}")
+
+        return self
+
+    def prime(self, user: Dict[str, Any]) -> None:
+        """Register an already fetched user document"""
+        if not user:
+            return
+        if user.get("_id") is not None:
+            self._by_id[str(user["_id"])] = user
+        if user.get("email"):
+            self._by_email[user["email"]] = user
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_by_email(self, email: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not email:
+            return None
+        return self._by_email.get(email)
+
+    def get_by_reference(self, reference: Any) -> Optional[Dict[str, Any]]:
+        if not reference:
+            return None
+        reference = str(reference)
+        if ObjectId.is_valid(reference):
+            return self._by_id.get(reference)
+        return self._by_email.get(reference)
+
+    def get_name_by_email(self, email: Optional[str], fallback: Optional[str] = None) -> str:
+        return format_user_display_name(self.get_by_email(email), fallback if fallback is not None else email)
+
+    def get_names_by_emails(self, emails: List[str]) -> List[str]:
+        return [self.get_name_by_email(email) for email in emails or []]
+
+
+async def load_user_directory_for_leads(leads: List[Dict[str, Any]], db=None) -> UserDirectoryLoader:
+    """Build and load a per-request user directory for a page of leads"""
+    loader = UserDirectoryLoader(db)
+    loader.collect_from_leads(leads)
+    await loader.load()
+    return loader
+
+
+# Global shared user directory
+user_directory = UserDirectoryCache(
+    ttl_seconds=settings.user_cache_ttl_seconds,
+    max_entries=settings.user_cache_max_entries,
+    check_seconds=settings.user_cache_check_seconds
+)
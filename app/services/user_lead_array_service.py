@@ -2,8 +2,10 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 import logging
+from pymongo import UpdateOne
 
 from ..config.database import get_database
+from .user_directory_service import user_directory
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,7 @@ class UserLeadArrayService:
                     "$inc": {"total_assigned_leads": 1}
                 }
             )
+            await user_directory.notify_changed(email=user_email)
             
             if result.modified_count > 0:
                 logger.info(f"Added lead {lead_id} to user {user_email} array")
@@ -46,6 +49,42 @@ class UserLeadArrayService:
             logger.error(f"Error adding lead to user array: {str(e)}")
             return False
     
+    async def add_leads_to_user_arrays_bulk(self, assignments: Dict[str, List[str]]) -> Dict[str, Any]:
+        """
+        Add many leads to many users' assigned_leads arrays with one bulk_write.
+
+        Args:
+            assignments: user email -> lead_ids to add
+        """
+        db = self.get_db()
+        operations = [
+            UpdateOne(
+                {"email": user_email, "is_active": True},
+                {
+                    "$addToSet": {"assigned_leads": {"$each": lead_ids}},
+                    "$inc": {"total_assigned_leads": len(lead_ids)}
+                }
+            )
+            for user_email, lead_ids in assignments.items()
+            if user_email and lead_ids
+        ]
+        if not operations:
+            return {"success": True, "users_updated": 0}
+
+        try:
+            result = await db.users.bulk_write(operations, ordered=False)
+            await user_directory.notify_many_changed(assignments.keys())
+            logger.info(
+                f"Added {sum(len(ids) for ids in assignments.values())} leads to "
+                f"{result.modified_count} user arrays in one bulk write"
+            )
+            return {"success": True, "users_updated": result.modified_count}
+
+        except Exception as e:
+            logger.error(f"Error bulk adding leads to user arrays: {str(e)}")
+            await user_directory.notify_many_changed(assignments.keys())
+            return {"success": False, "users_updated": 0, "error": str(e)}
+    
     async def remove_lead_from_user_array(self, user_email: str, lead_id: str) -> bool:
         """Remove lead_id from user's assigned_leads array"""
         db = self.get_db()
@@ -64,6 +103,7 @@ class UserLeadArrayService:
                 {"email": user_email, "total_assigned_leads": {"$lt": 0}},
                 {"$set": {"total_assigned_leads": 0}}
             )
+            await user_directory.notify_changed(email=user_email)
             
             if result.modified_count > 0:
                 logger.info(f"Removed lead {lead_id} from user {user_email} array")
@@ -111,6 +151,8 @@ class UserLeadArrayService:
                         session=session
                     )
             
+            await user_directory.notify_many_changed([old_user_email, new_user_email])
+            
             logger.info(f"Moved lead {lead_id} from {old_user_email} to {new_user_email}")
             return True
             
@@ -194,6 +236,7 @@ class UserLeadArrayService:
                             }
                         }
                     )
+                    await user_directory.notify_changed(user["_id"])
                     
                     sync_results.append({
                         "user": user_email,
@@ -4,12 +4,14 @@ import logging
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from bson import ObjectId
-import httpx
 
 from app.services.communication_service import CommunicationService
 
 from ..config.database import get_database
+from .activity_log_service import activity_log
 from ..config.settings import settings
+from .user_directory_service import user_directory
+from .outbound_http import outbound_http
 
 # ✅ FIXED: Use only schemas import (remove the models import)
 from ..schemas.whatsapp_chat import (
@@ -29,6 +31,10 @@ from ..models.whatsapp_message import (
 
 logger = logging.getLogger(__name__)
 
+def get_whatsapp_http_client():
+    """Get the pooled HTTP client used for all WhatsApp API calls"""
+    return outbound_http.get("whatsapp")
+
 class WhatsAppMessageService:
     """Service class for WhatsApp message operations with real-time capabilities"""
     
@@ -280,7 +286,7 @@ class WhatsAppMessageService:
             
             # Add assigned user (if any)
             if lead.get("assigned_to"):
-                assigned_user = await db.users.find_one({"email": lead["assigned_to"]})
+                assigned_user = await user_directory.get_by_email(lead["assigned_to"], db)
                 if assigned_user:
                     users_to_notify.append({
                         "email": assigned_user["email"],
@@ -291,7 +297,7 @@ class WhatsAppMessageService:
             # Add co-assignees (if any)
             co_assignees = lead.get("co_assignees", [])
             for co_assignee_email in co_assignees:
-                co_assignee_user = await db.users.find_one({"email": co_assignee_email})
+                co_assignee_user = await user_directory.get_by_email(co_assignee_email, db)
                 if co_assignee_user and co_assignee_user not in users_to_notify:
                     users_to_notify.append({
                         "email": co_assignee_user["email"],
@@ -300,7 +306,7 @@ class WhatsAppMessageService:
                     })
             
             # Add all admin users (they can see all leads)
-            admin_users = await db.users.find({"role": "admin"}).to_list(None)
+            admin_users = await user_directory.get_admin_users(db)
             for admin in admin_users:
                 admin_data = {
                     "email": admin["email"],
@@ -508,15 +514,14 @@ class WhatsAppMessageService:
         url = f"{self.whatsapp_config['base_url']}/{endpoint}"
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                # Parse response - handle both JSON and text responses
-                try:
-                    return response.json()
-                except:
-                    return {"status": "success", "message": response.text}
+            response = await get_whatsapp_http_client().get(url, params=params, retry=False)
+            response.raise_for_status()
+            
+            # Parse response - handle both JSON and text responses
+            try:
+                return response.json()
+            except:
+                return {"status": "success", "message": response.text}
                     
         except Exception as e:
             logger.error(f"WhatsApp API request failed: {str(e)}")
@@ -967,7 +972,7 @@ class WhatsAppMessageService:
                 "created_at": datetime.utcnow()
             }
             
-            await db.lead_activities.insert_one(activity_doc)
+            await activity_log.log(activity_doc)
             
         except Exception as e:
             logger.error(f"Error logging WhatsApp activity: {str(e)}")
@@ -983,21 +988,20 @@ class WhatsAppMessageService:
                 "Message": message
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                # Parse response (adjust based on actual API response format)
-                try:
-                    result = response.json()
-                except:
-                    result = {"status": "success", "message": response.text}
-                
-                return {
-                    "success": True,
-                    "message_id": result.get("message_id", f"msg_{int(datetime.utcnow().timestamp())}"),
-                    "data": result
-                }
+            response = await get_whatsapp_http_client().get(url, params=params, retry=False)
+            response.raise_for_status()
+            
+            # Parse response (adjust based on actual API response format)
+            try:
+                result = response.json()
+            except:
+                result = {"status": "success", "message": response.text}
+            
+            return {
+                "success": True,
+                "message_id": result.get("message_id", f"msg_{int(datetime.utcnow().timestamp())}"),
+                "data": result
+            }
                 
         except Exception as e:
             logger.error(f"WhatsApp API error: {str(e)}")
@@ -1,12 +1,11 @@
 # app/services/zepto_client.py
-import aiohttp
-import asyncio
+import httpx
 from typing import Dict, List, Any, Optional
 import logging
 import json
-from datetime import datetime
 
 from ..config.settings import settings
+from .outbound_http import outbound_http
 
 logger = logging.getLogger(__name__)
 
@@ -71,34 +70,34 @@ class ZeptoMailClient:
             logger.debug(f"ZeptoMail payload: {json.dumps(payload, indent=2)}")
             
             # Send request to ZeptoMail API
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/v1.1/email/template"
-                
-                async with session.post(url, json=payload, headers=self.headers) as response:
-                    response_data = await response.json()
-                    
-                    # ZeptoMail returns 200/201 for success, not just 200
-                    if response.status in [200, 201]:
-                        logger.info(f"Email sent successfully to {recipient_email}")
-                        return {
-                            "success": True,
-                            "data": response_data,
-                            "recipient": recipient_email,
-                            "template": template_key,
-                            "status_code": response.status
-                        }
-                    else:
-                        error_msg = f"ZeptoMail API error: {response.status} - {response_data}"
-                        logger.error(error_msg)
-                        return {
-                            "success": False,
-                            "error": response_data,
-                            "recipient": recipient_email,
-                            "template": template_key,
-                            "status_code": response.status
-                        }
+            client = outbound_http.get("zeptomail")
+            url = f"{self.base_url}/v1.1/email/template"
+            
+            response = await client.post(url, json=payload, headers=self.headers)
+            response_data = response.json()
+            
+            # ZeptoMail returns 200/201 for success, not just 200
+            if response.status_code in [200, 201]:
+                logger.info(f"Email sent successfully to {recipient_email}")
+                return {
+                    "success": True,
+                    "data": response_data,
+                    "recipient": recipient_email,
+                    "template": template_key,
+                    "status_code": response.status_code
+                }
+            else:
+                error_msg = f"ZeptoMail API error: {response.status_code} - {response_data}"
+                logger.error(error_msg)
+                return {
+                    "success": False,
+                    "error": response_data,
+                    "recipient": recipient_email,
+                    "template": template_key,
+                    "status_code": response.status_code
+                }
                         
-        except aiohttp.ClientError as e:
+        except httpx.HTTPError as e:
             error_msg = f"Network error sending email to {recipient_email}: {str(e)}"
             logger.error(error_msg)
             return {
@@ -117,6 +116,74 @@ class ZeptoMailClient:
                 "template": template_key
             }
     
+    async def send_batch_template_email(
+        self,
+        template_key: str,
+        sender_email: str,
+        recipients: List[Dict[str, Any]]  # List of {email, name, merge_data}
+    ) -> Dict[str, Any]:
+        """
+        Send one template to several recipients in a single request using the
+        batch template API. Each recipient gets a separate email rendered with
+        its own merge_info (flat key/value data only).
+        """
+        try:
+            payload = {
+                "mail_template_key": template_key,
+                "from": {
+                    "address": sender_email,
+                    "name": "Skillang"
+                },
+                "to": [
+                    {
+                        "email_address": {
+                            "address": recipient["email"],
+                            "name": recipient.get("name") or recipient["email"].split('@')[0]
+                        },
+                        "merge_info": recipient.get("merge_data") or {
+                            "username": recipient.get("name") or recipient["email"].split('@')[0]
+                        }
+                    }
+                    for recipient in recipients
+                ]
+            }
+            
+            logger.info(f"Sending batch email to {len(recipients)} recipients with template {template_key}")
+            
+            client = outbound_http.get("zeptomail")
+            url = f"{self.base_url}/v1.1/email/template/batch"
+            
+            response = await client.post(url, json=payload, headers=self.headers)
+            response_data = response.json()
+            
+            if response.status_code in [200, 201]:
+                return {
+                    "success": True,
+                    "data": response_data,
+                    "recipient_count": len(recipients),
+                    "template": template_key,
+                    "status_code": response.status_code
+                }
+            
+            logger.error(f"ZeptoMail batch API error: {response.status_code} - {response_data}")
+            return {
+                "success": False,
+                "error": response_data,
+                "recipient_count": len(recipients),
+                "template": template_key,
+                "status_code": response.status_code
+            }
+        
+        except Exception as e:
+            error_msg = f"Error sending batch email to {len(recipients)} recipients: {str(e)}"
+            logger.error(error_msg)
+            return {
+                "success": False,
+                "error": error_msg,
+                "recipient_count": len(recipients),
+                "template": template_key
+            }
+    
     async def send_bulk_template_email(
         self,
         template_key: str,
@@ -124,70 +191,19 @@ class ZeptoMailClient:
         recipients: List[Dict[str, Any]]  # List of {email, name, merge_data}
     ) -> Dict[str, Any]:
         """
-        Send bulk emails using ZeptoMail template API
-        Process each recipient individually for better error handling
+        Send bulk emails using ZeptoMail template API.
+        Recipients are dispatched concurrently under the shared rate limit,
+        in batch requests when their merge data allows (see email_dispatcher).
         """
-        results = []
-        successful_count = 0
-        failed_count = 0
+        from .email_dispatcher import email_dispatcher
         
         logger.info(f"Starting bulk email send to {len(recipients)} recipients")
         
-        # Process each recipient individually (like your existing mailer)
-        for recipient_data in recipients:
-            try:
-                email = recipient_data.get("email")
-                name = recipient_data.get("name", email.split('@')[0])
-                merge_data = recipient_data.get("merge_data", {})
-                
-                # Send individual email
-                result = await self.send_template_email(
-                    template_key=template_key,
-                    sender_email=sender_email,
-                    recipient_email=email,
-                    recipient_name=name,
-                    merge_data=merge_data
-                )
-                
-                if result["success"]:
-                    successful_count += 1
-                    results.append({
-                        "recipient": email,
-                        "status": "sent",
-                        "sent_at": datetime.utcnow()
-                    })
-                else:
-                    failed_count += 1
-                    results.append({
-                        "recipient": email,
-                        "status": "failed",
-                        "error": result.get("error", "Unknown error"),
-                        "failed_at": datetime.utcnow()
-                    })
-                
-                # Small delay between emails to avoid rate limiting
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Error processing recipient {recipient_data}: {e}")
-                results.append({
-                    "recipient": recipient_data.get("email", "unknown"),
-                    "status": "failed",
-                    "error": str(e),
-                    "failed_at": datetime.utcnow()
-                })
-        
-        logger.info(f"Bulk email completed: {successful_count} sent, {failed_count} failed")
-        
-        return {
-            "success": successful_count > 0,
-            "total_recipients": len(recipients),
-            "successful_count": successful_count,
-            "failed_count": failed_count,
-            "results": results,
-            "message": f"Bulk email completed: {successful_count} sent, {failed_count} failed"
-        }
+        return await email_dispatcher.send(
+            template_key=template_key,
+            sender_email=sender_email,
+            recipients=recipients
+        )
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test ZeptoMail API connection and authentication"""
@@ -195,38 +211,38 @@ class ZeptoMailClient:
             logger.info("Testing ZeptoMail API connection...")
             
             # Use a simple API call to test connection
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/v1.1/email/template"  # This will fail but shows auth works
-                
-                # Send empty request to test auth
-                async with session.post(url, json={}, headers=self.headers) as response:
-                    response_data = await response.json()
-                    
-                    if response.status == 400:
-                        # 400 Bad Request means auth worked but request is invalid (expected)
-                        logger.info("ZeptoMail API connection successful (auth working)")
-                        return {
-                            "success": True,
-                            "message": "ZeptoMail API connection successful",
-                            "authenticated": True
-                        }
-                    elif response.status == 401:
-                        # 401 Unauthorized means auth failed
-                        logger.error("ZeptoMail API authentication failed")
-                        return {
-                            "success": False,
-                            "message": "ZeptoMail API authentication failed",
-                            "authenticated": False,
-                            "error": response_data
-                        }
-                    else:
-                        logger.warning(f"Unexpected response from ZeptoMail API: {response.status}")
-                        return {
-                            "success": True,
-                            "message": f"ZeptoMail API responded with status {response.status}",
-                            "authenticated": True,
-                            "response": response_data
-                        }
+            client = outbound_http.get("zeptomail")
+            url = f"{self.base_url}/v1.1/email/template"  # This will fail but shows auth works
+            
+            # Send empty request to test auth
+            response = await client.post(url, json={}, headers=self.headers)
+            response_data = response.json()
+            
+            if response.status_code == 400:
+                # 400 Bad Request means auth worked but request is invalid (expected)
+                logger.info("ZeptoMail API connection successful (auth working)")
+                return {
+                    "success": True,
+                    "message": "ZeptoMail API connection successful",
+                    "authenticated": True
+                }
+            elif response.status_code == 401:
+                # 401 Unauthorized means auth failed
+                logger.error("ZeptoMail API authentication failed")
+                return {
+                    "success": False,
+                    "message": "ZeptoMail API authentication failed",
+                    "authenticated": False,
+                    "error": response_data
+                }
+            else:
+                logger.warning(f"Unexpected response from ZeptoMail API: {response.status_code}")
+                return {
+                    "success": True,
+                    "message": f"ZeptoMail API responded with status {response.status_code}",
+                    "authenticated": True,
+                    "response": response_data
+                }
                         
         except Exception as e:
             error_msg = f"Failed to test ZeptoMail connection: {str(e)}"
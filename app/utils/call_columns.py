@@ -0,0 +1,248 @@
+# app/utils/call_columns.py - Columnar (NumPy) batches of call records
+"""
+A CallColumns batch holds call records as parallel NumPy arrays, one element
+per call:
+
+    agent      int32   index into `agents` (agent numbers, "" when missing)
+    day        int64   epoch day of the record's local date
+    dated      bool    False when the record had no parseable date
+    seconds    int64   seconds since midnight of the record's local time
+    timed      bool    False when the record had no parseable time
+    duration   int64   call_duration in seconds
+    answered   bool    status == "answered"
+    direction  int8    0 unknown, 1 inbound, 2 outbound
+    recording  bool    record has a recording_url
+
+Date and time are independent keys: a record without a time still counts
+for its day, and one without a date still counts for its hour.
+
+Records are read once into the columns. After that, grouping (bincount over a
+combined key), histograms and correlations run as vectorized operations and
+do not loop over dicts in Python.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable, Optional
+
+import numpy as np
+
+from .call_rollups import DURATION_BUCKETS, empty_rollup
+
+DIRECTION_CODES = {"inbound": 1, "outbound": 2}
+
+# Hour slot for records without a parseable time (rollup hour None)
+NO_HOUR = 24
+
+# Upper bounds of the closed DURATION_BUCKETS ranges, for np.digitize
+DURATION_EDGES = np.array([upper for _, upper, _ in DURATION_BUCKETS if upper is not None])
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _day_epoch(record_date: str) -> Optional[int]:
+    try:
+        return (datetime.strptime(record_date, "%Y-%m-%d") - _EPOCH).days
+    except (TypeError, ValueError):
+        return None
+
+
+def _time_seconds(record_time: Any) -> Optional[int]:
+    parts = str(record_time or "").split(":")
+    try:
+        hour = int(parts[0])
+    except ValueError:
+        return None
+    if not 0 <= hour < 24:
+        return None
+    try:
+        minute = int(parts[1]) if len(parts) > 1 else 0
+        second = int(parts[2]) if len(parts) > 2 else 0
+    except ValueError:
+        minute = second = 0
+    return hour * 3600 + minute * 60 + second
+
+
+def _as_seconds(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def read_answered_durations(call_records: Iterable[Dict[str, Any]]) -> np.ndarray:
+    """
+    Durations of answered calls with a non-zero duration, reading only the
+    status and call_duration of each record (date and time are not needed)
+    """
+    durations = np.fromiter(
+        (_as_seconds(record.get("call_duration", 0)) for record in call_records if record.get("status") == "answered"),
+        dtype=np.int64
+    )
+    return durations[durations > 0]
+
+
+class CallColumns:
+    """Call records as parallel NumPy arrays"""
+
+    def __init__(
+        self,
+        agents: List[str],
+        agent: np.ndarray,
+        day: np.ndarray,
+        dated: np.ndarray,
+        seconds: np.ndarray,
+        timed: np.ndarray,
+        duration: np.ndarray,
+        answered: np.ndarray,
+        direction: np.ndarray,
+        recording: np.ndarray
+    ):
+        self.agents = agents
+        self.agent = agent
+        self.day = day
+        self.dated = dated
+        self.seconds = seconds
+        self.timed = timed
+        self.duration = duration
+        self.answered = answered
+        self.direction = direction
+        self.recording = recording
+
+    def __len__(self) -> int:
+        return len(self.agent)
+
+    @classmethod
+    def from_records(cls, call_records: Iterable[Dict[str, Any]]) -> "CallColumns":
+        """
+        Read raw TATA call records into columns in a single pass. A missing
+        or unparseable date or time only clears `dated` / `timed`; the record
+        is kept.
+        """
+        agent_codes: Dict[str, int] = {}
+        day_epochs: Dict[Any, Optional[int]] = {}
+        time_seconds: Dict[Any, Optional[int]] = {}
+        agent, day, dated, seconds, timed, duration, answered, direction, recording = (
+            [], [], [], [], [], [], [], [], []
+        )
+
+        for record in call_records:
+            record_date = record.get("date")
+            if record_date not in day_epochs:
+                day_epochs[record_date] = _day_epoch(record_date)
+            record_day = day_epochs[record_date]
+
+            record_time = record.get("time")
+            if record_time not in time_seconds:
+                time_seconds[record_time] = _time_seconds(record_time)
+            record_seconds = time_seconds[record_time]
+            agent_number = record.get("agent_number") or ""
+            code = agent_codes.get(agent_number)
+            if code is None:
+                code = agent_codes[agent_number] = len(agent_codes)
+
+            agent.append(code)
+            day.append(record_day or 0)
+            dated.append(record_day is not None)
+            seconds.append(record_seconds or 0)
+            timed.append(record_seconds is not None)
+            duration.append(_as_seconds(record.get("call_duration", 0)))
+            answered.append(record.get("status") == "answered")
+            direction.append(DIRECTION_CODES.get(record.get("direction"), 0))
+            recording.append(bool(record.get("recording_url")))
+
+        return cls(
+            agents=list(agent_codes),
+            agent=np.array(agent, dtype=np.int32),
+            day=np.array(day, dtype=np.int64),
+            dated=np.array(dated, dtype=bool),
+            seconds=np.array(seconds, dtype=np.int64),
+            timed=np.array(timed, dtype=bool),
+            duration=np.array(duration, dtype=np.int64),
+            answered=np.array(answered, dtype=bool),
+            direction=np.array(direction, dtype=np.int8),
+            recording=np.array(recording, dtype=bool)
+        )
+
+    # ============================================================================
+    # DERIVED COLUMNS
+    # ============================================================================
+
+    @property
+    def hour(self) -> np.ndarray:
+        """Hour of day of each call (NO_HOUR when the record had no time)"""
+        return np.where(self.timed, self.seconds // 3600, NO_HOUR)
+
+    def answered_durations(self) -> np.ndarray:
+        """Durations of answered calls with a non-zero duration"""
+        return self.duration[self.answered & (self.duration > 0)]
+
+    # ============================================================================
+    # AGGREGATION
+    # ============================================================================
+
+    def to_rollups(self) -> List[Dict[str, Any]]:
+        """
+        Group calls by (agent, date, hour) into rollup dicts (see
+        app/utils/call_rollups.py) with bincount over a combined group key.
+        Rollups of undated calls have date None, of untimed calls hour None.
+        """
+        if not len(self):
+            return []
+
+        # Undated calls get their own day slot, after every real day
+        days, day_position = np.unique(self.day[self.dated], return_inverse=True)
+        day_slot = np.full(len(self), len(days), dtype=np.int64)
+        day_slot[self.dated] = day_position
+        day_slots = len(days) + 1
+        hour_slots = NO_HOUR + 1
+        key = (self.agent.astype(np.int64) * day_slots + day_slot) * hour_slots + self.hour
+        keys, first_seen, group = np.unique(key, return_index=True, return_inverse=True)
+        groups = len(keys)
+
+        def count(mask: np.ndarray) -> List[int]:
+            return np.bincount(group[mask], minlength=groups).tolist()
+
+        answered_duration = np.bincount(
+            group[self.answered], weights=self.duration[self.answered], minlength=groups
+        )
+
+        with_duration = self.answered & (self.duration > 0)
+        bucket = np.digitize(self.duration[with_duration], DURATION_EDGES)
+        bucket_count = len(DURATION_BUCKETS)
+        histogram = np.bincount(
+            group[with_duration] * bucket_count + bucket, minlength=groups * bucket_count
+        ).reshape(groups, bucket_count)
+
+        totals = np.bincount(group, minlength=groups).tolist()
+        answered = count(self.answered)
+        recordings = count(self.recording)
+        inbound = count(self.direction == DIRECTION_CODES["inbound"])
+        outbound = count(self.direction == DIRECTION_CODES["outbound"])
+        durations = np.rint(answered_duration).astype(np.int64).tolist()
+        histograms = histogram.tolist()
+
+        hours = (keys % hour_slots).tolist()
+        day_keys = ((keys // hour_slots) % day_slots).tolist()
+        agent_keys = ((keys // hour_slots) // day_slots).tolist()
+        date_labels = [(_EPOCH + timedelta(days=int(day))).strftime("%Y-%m-%d") for day in days] + [None]
+
+        # Same order as the calls first appear in, like a dict built record by record
+        rollups = []
+        for position in np.argsort(first_seen, kind="stable").tolist():
+            hour = hours[position]
+            rollup = empty_rollup(
+                self.agents[agent_keys[position]],
+                date_labels[day_keys[position]],
+                None if hour == NO_HOUR else hour
+            )
+            rollup["total"] = totals[position]
+            rollup["answered"] = answered[position]
+            rollup["missed"] = totals[position] - answered[position]
+            rollup["duration"] = durations[position]
+            rollup["recordings"] = recordings[position]
+            rollup["inbound"] = inbound[position]
+            rollup["outbound"] = outbound[position]
+            rollup["duration_histogram"] = histograms[position]
+            rollups.append(rollup)
+
+        return rollups
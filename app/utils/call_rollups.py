@@ -0,0 +1,171 @@
+# app/utils/call_rollups.py - Per-agent, per-hour call rollups and merge helpers
+"""
+A rollup is the aggregate of one agent's calls in one hour of one day:
+
+    {"agent_number", "date", "hour", "total", "answered", "missed",
+     "duration", "recordings", "inbound", "outbound", "duration_histogram"}
+
+`duration` sums the call_duration of answered calls and `duration_histogram`
+counts answered calls with a non-zero duration per DURATION_BUCKETS range.
+Rollups built from records without a date have date None, without a time
+hour None; merge_by_date and merge_by_hour skip only those.
+
+The same shape is stored in MongoDB (call_rollups_hourly) and built in memory
+from raw TATA records, so analytics code works on rollups whichever source the
+data came from. The merge helpers collapse rollups by hour, date, agent or in
+total; a day or a week is a few hundred small documents instead of thousands
+of raw records.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Any, Iterable, Optional
+
+# (min seconds, max seconds, label) - max is exclusive, None is open-ended
+DURATION_BUCKETS = [
+    (0, 30, "0-30s"),
+    (30, 60, "30-60s"),
+    (60, 120, "60-120s"),
+    (120, 300, "120-300s"),
+    (300, None, "300s+"),
+]
+
+
+def duration_bucket(seconds: float) -> int:
+    for position, (_, upper, _) in enumerate(DURATION_BUCKETS):
+        if upper is None or seconds < upper:
+            return position
+    return len(DURATION_BUCKETS) - 1
+
+
+def empty_rollup(agent_number: str, date: Optional[str], hour: Optional[int]) -> Dict[str, Any]:
+    return {
+        "agent_number": agent_number,
+        "date": date,
+        "hour": hour,
+        "total": 0,
+        "answered": 0,
+        "missed": 0,
+        "duration": 0,
+        "recordings": 0,
+        "inbound": 0,
+        "outbound": 0,
+        "duration_histogram": [0] * len(DURATION_BUCKETS)
+    }
+
+
+def rollups_from_records(call_records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aggregate raw TATA call records into rollups (vectorized, see call_columns)"""
+    from .call_columns import CallColumns
+    return CallColumns.from_records(call_records).to_rollups()
+
+
+def merge_by_hour(rollups: Iterable[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """{hour: {"calls", "answered", "missed", "duration", "recordings", "agents", "duration_histogram"}}"""
+    hourly = defaultdict(lambda: {
+        "calls": 0,
+        "answered": 0,
+        "missed": 0,
+        "duration": 0,
+        "recordings": 0,
+        "agents": set(),
+        "duration_histogram": [0] * len(DURATION_BUCKETS)
+    })
+    for rollup in rollups:
+        if rollup.get("hour") is None:
+            continue
+        stats = hourly[rollup["hour"]]
+        stats["calls"] += rollup["total"]
+        stats["answered"] += rollup["answered"]
+        stats["missed"] += rollup["missed"]
+        stats["duration"] += rollup["duration"]
+        stats["recordings"] += rollup["recordings"]
+        if rollup.get("agent_number"):
+            stats["agents"].add(rollup["agent_number"])
+        for position, count in enumerate(rollup.get("duration_histogram") or []):
+            stats["duration_histogram"][position] += count
+    return dict(hourly)
+
+
+def merge_by_date(rollups: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """{date: {"total_calls", "answered_calls", "missed_calls", "total_duration", "recordings", "unique_agents"}}"""
+    daily = defaultdict(lambda: {
+        "total_calls": 0,
+        "answered_calls": 0,
+        "missed_calls": 0,
+        "total_duration": 0,
+        "recordings": 0,
+        "unique_agents": set()
+    })
+    for rollup in rollups:
+        if rollup.get("date") is None:
+            continue
+        stats = daily[rollup["date"]]
+        stats["total_calls"] += rollup["total"]
+        stats["answered_calls"] += rollup["answered"]
+        stats["missed_calls"] += rollup["missed"]
+        stats["total_duration"] += rollup["duration"]
+        stats["recordings"] += rollup["recordings"]
+        if rollup.get("agent_number"):
+            stats["unique_agents"].add(rollup["agent_number"])
+    return dict(daily)
+
+
+def merge_by_agent(rollups: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """{agent_number: {"total_calls", "answered_calls", "missed_calls", "total_duration", "recordings_count"}}"""
+    agents = defaultdict(lambda: {
+        "total_calls": 0,
+        "answered_calls": 0,
+        "missed_calls": 0,
+        "total_duration": 0,
+        "recordings_count": 0
+    })
+    for rollup in rollups:
+        if not rollup.get("agent_number"):
+            continue
+        stats = agents[rollup["agent_number"]]
+        stats["total_calls"] += rollup["total"]
+        stats["answered_calls"] += rollup["answered"]
+        stats["missed_calls"] += rollup["missed"]
+        stats["total_duration"] += rollup["duration"]
+        stats["recordings_count"] += rollup["recordings"]
+    return dict(agents)
+
+
+def merge_totals(rollups: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    totals = {
+        "total_calls": 0,
+        "answered_calls": 0,
+        "missed_calls": 0,
+        "total_duration": 0,
+        "recordings": 0,
+        "agents": set(),
+        "duration_histogram": [0] * len(DURATION_BUCKETS)
+    }
+    for rollup in rollups:
+        totals["total_calls"] += rollup["total"]
+        totals["answered_calls"] += rollup["answered"]
+        totals["missed_calls"] += rollup["missed"]
+        totals["total_duration"] += rollup["duration"]
+        totals["recordings"] += rollup["recordings"]
+        if rollup.get("agent_number"):
+            totals["agents"].add(rollup["agent_number"])
+        for position, count in enumerate(rollup.get("duration_histogram") or []):
+            totals["duration_histogram"][position] += count
+    return totals
+
+
+def histogram_quantile(histogram: List[int], quantile: float = 0.5) -> float:
+    """Estimate a duration quantile by linear interpolation inside its bucket"""
+    total = sum(histogram)
+    if total == 0:
+        return 0.0
+    target = total * quantile
+    seen = 0
+    for position, count in enumerate(histogram):
+        if count and seen + count >= target:
+            lower, upper, _ = DURATION_BUCKETS[position]
+            if upper is None:
+                return float(lower)
+            return lower + (upper - lower) * (target - seen) / count
+        seen += count
+    return float(DURATION_BUCKETS[-1][0])
@@ -1,10 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, Dict, Any
-from datetime import datetime
-from bson import ObjectId
 from ..config.database import get_database
 from ..utils.security import security
+from ..services.user_directory_service import user_directory
+from ..services.auth_session_service import principal_cache, token_blacklist_mirror, last_activity_writer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,9 +38,9 @@ async def get_current_user(
     if payload.get("type") != "access":
         raise AuthenticationError("Invalid token type")
     
-    # Check if token is blacklisted
+    # Check if token is blacklisted (local mirror, refreshed incrementally)
     token_jti = payload.get("jti")
-    if token_jti and await security.is_token_blacklisted(token_jti):
+    if token_jti and await token_blacklist_mirror.is_blacklisted(token_jti):
         raise AuthenticationError("Token has been revoked")
     
     # Get user from database
@@ -48,8 +48,16 @@ async def get_current_user(
     if user_id is None:
         raise AuthenticationError("Invalid token payload")
     
+    # Recently resolved principal for this token (after applying user changes
+    # made by other workers, which also drop their cached principals)
+    await user_directory.ensure_fresh()
+    cached_user = principal_cache.get(token_jti)
+    if cached_user is not None and cached_user.get("_id") == user_id:
+        last_activity_writer.touch(user_id)
+        return cached_user
+    
     db = get_database()
-    user_data = await db.users.find_one({"_id": ObjectId(user_id)})
+    user_data = await user_directory.get_by_id(user_id, db)
     
     if user_data is None:
         raise AuthenticationError("User not found")
@@ -69,14 +77,12 @@ async def get_current_user(
             "last_modified_at": None
         }
     
-    # Update last activity
-    await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"last_activity": datetime.utcnow()}}
-    )
+    # Update last activity (buffered, flushed periodically with one bulk_write)
+    last_activity_writer.touch(user_id)
     
     # Convert ObjectId to string for JSON serialization
     user_data["_id"] = str(user_data["_id"])
+    principal_cache.put(token_jti, user_data)
     return user_data
 
 async def get_current_active_user(
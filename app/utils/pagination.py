@@ -0,0 +1,174 @@
+# app/utils/pagination.py - Keyset (cursor) pagination helpers for lead listings
+"""
+Opaque cursors keyed on (created_at, _id).
+
+A cursor encodes the sort key of the boundary document plus the direction to
+read in. Pages are fetched with a range condition on the compound sort key
+instead of skip(), so deep pages cost the same as the first one.
+"""
+
+import base64
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NEXT = "next"
+CURSOR_PREV = "prev"
+
+# Sort used by every keyset-paginated lead listing (newest first)
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded"""
+
+
+def encode_cursor(document: Dict[str, Any], direction: str = CURSOR_NEXT) -> Optional[str]:
+    """Build an opaque cursor from a raw lead document"""
+    created_at = document.get("created_at")
+    doc_id = document.get("_id")
+    if not isinstance(created_at, datetime) or doc_id is None:
+        return None
+    payload = {"t": created_at.isoformat(), "id": str(doc_id), "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId, str]:
+    """Decode a cursor into (created_at, _id, direction)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["t"])
+        doc_id = ObjectId(payload["id"])
+        direction = payload.get("d", CURSOR_NEXT)
+        if direction not in (CURSOR_NEXT, CURSOR_PREV):
+            raise ValueError(f"Unknown direction {direction}")
+        return created_at, doc_id, direction
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}")
+
+
+def build_keyset_condition(created_at: datetime, doc_id: ObjectId, direction: str) -> Dict[str, Any]:
+    """Range condition selecting documents after (next) or before (prev) the boundary"""
+    op = "$lt" if direction == CURSOR_NEXT else "$gt"
+    return {
+        "$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: doc_id}}
+        ]
+    }
+
+
+def combine_with_query(query: Dict[str, Any], condition: Dict[str, Any]) -> Dict[str, Any]:
+    if not query:
+        return condition
+    return {"$and": [query, condition]}
+
+
+async def fetch_keyset_page(
+    collection,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one page of documents using keyset pagination.
+
+    Returns the raw documents (newest first) together with `next_cursor`,
+    `prev_cursor`, `has_next` and `has_prev`. Raises InvalidCursorError for
+    malformed cursors.
+    """
+    direction = CURSOR_NEXT
+    find_query = query
+    if cursor:
+        created_at, doc_id, direction = decode_cursor(cursor)
+        find_query = combine_with_query(query, build_keyset_condition(created_at, doc_id, direction))
+
+    if direction == CURSOR_NEXT:
+        sort = KEYSET_SORT
+    else:
+        # Walk backwards in ascending order, then flip the page back
+        sort = [(field, -order) for field, order in KEYSET_SORT]
+
+    documents = await collection.find(find_query).sort(sort).limit(limit + 1).to_list(None)
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+
+    if direction == CURSOR_PREV:
+        documents.reverse()
+        has_prev = has_more
+        has_next = True
+    else:
+        has_next = has_more
+        has_prev = cursor is not None
+
+    next_cursor = encode_cursor(documents[-1], CURSOR_NEXT) if documents and has_next else None
+    prev_cursor = encode_cursor(documents[0], CURSOR_PREV) if documents and has_prev else None
+
+    return {
+        "documents": documents,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "has_next": has_next,
+        "has_prev": has_prev
+    }
+
+
+class CountCache:
+    """Short-lived cache of count_documents results keyed by collection and filter"""
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, int]] = {}
+
+    @staticmethod
+    def _key(collection, query: Dict[str, Any]) -> str:
+        return f"{collection.name}:{json.dumps(query, sort_keys=True, default=str)}"
+
+    async def count(self, collection, query: Dict[str, Any]) -> int:
+        key = self._key(collection, query)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry and entry[0] > now:
+            return entry[1]
+
+        if query:
+            total = await collection.count_documents(query)
+        else:
+            # Unfiltered totals come from collection metadata
+            total = await collection.estimated_document_count()
+
+        if len(self._entries) >= self.max_entries:
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[key] = (now + self.ttl_seconds, total)
+        return total
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def build_cursor_pagination(page_result: Dict[str, Any], limit: int, total: Optional[int]) -> Dict[str, Any]:
+    """Pagination metadata for cursor mode responses"""
+    return {
+        "mode": "cursor",
+        "limit": limit,
+        "total": total,
+        "next_cursor": page_result["next_cursor"],
+        "prev_cursor": page_result["prev_cursor"],
+        "has_next": page_result["has_next"],
+        "has_prev": page_result["has_prev"]
+    }
+
+
+# Global count cache shared by lead listings
+lead_count_cache = CountCache()
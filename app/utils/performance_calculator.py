@@ -5,9 +5,9 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict
-import statistics
-import math
+import numpy as np
+
+from .call_rollups import rollups_from_records, merge_by_date, merge_by_hour
 
 logger = logging.getLogger(__name__)
 
@@ -80,35 +80,19 @@ class PerformanceCalculator:
         """
         Enhanced trend analysis for the specified period
         """
+        return self.calculate_trend_analysis_from_rollups(rollups_from_records(call_records), period_days)
+    
+    def calculate_trend_analysis_from_rollups(
+        self,
+        rollups: List[Dict],
+        period_days: int = 7
+    ) -> Dict[str, Any]:
+        """
+        Trend analysis from hourly/daily call rollups (see utils/call_rollups)
+        """
         try:
             # Group by date
-            daily_stats = defaultdict(lambda: {
-                "total_calls": 0,
-                "answered_calls": 0,
-                "total_duration": 0,
-                "unique_agents": set()
-            })
-            
-            for record in call_records:
-                record_date = record.get("date", "")
-                if not record_date:
-                    continue
-                
-                stats = daily_stats[record_date]
-                stats["total_calls"] += 1
-                
-                # Track agent activity
-                agent = record.get("agent_number", "")
-                if agent:
-                    stats["unique_agents"].add(agent)
-                
-                if record.get("status") == "answered":
-                    stats["answered_calls"] += 1
-                    stats["total_duration"] += record.get("call_duration", 0)
-            
-            # Convert sets to counts
-            for date_stats in daily_stats.values():
-                date_stats["unique_agents"] = len(date_stats["unique_agents"])
+            daily_stats = merge_by_date(rollups)
             
             # Calculate trends
             sorted_dates = sorted(daily_stats.keys())
@@ -197,35 +181,17 @@ class PerformanceCalculator:
         """
         Enhanced peak calling hours calculation
         """
+        return self.calculate_peak_hours_from_rollups(rollups_from_records(call_records))
+    
+    def calculate_peak_hours_from_rollups(
+        self,
+        rollups: List[Dict]
+    ) -> Dict[str, Any]:
+        """
+        Peak calling hours from call rollups
+        """
         try:
-            hourly_stats = defaultdict(lambda: {
-                "calls": 0,
-                "answered": 0,
-                "duration": 0,
-                "agents": set()
-            })
-            
-            for record in call_records:
-                call_time = record.get("time", "")
-                if not call_time:
-                    continue
-                
-                try:
-                    hour = int(call_time.split(":")[0])
-                    stats = hourly_stats[hour]
-                    stats["calls"] += 1
-                    
-                    # Track agents per hour
-                    agent = record.get("agent_number", "")
-                    if agent:
-                        stats["agents"].add(agent)
-                    
-                    if record.get("status") == "answered":
-                        stats["answered"] += 1
-                        stats["duration"] += record.get("call_duration", 0)
-                        
-                except (ValueError, IndexError):
-                    continue
+            hourly_stats = merge_by_hour(rollups)
             
             if not hourly_stats:
                 return {"peak_hours": [], "total_calls": 0}
@@ -286,64 +252,42 @@ class PerformanceCalculator:
         """
         Enhanced comprehensive peak hours analysis with advanced metrics
         """
+        return self.calculate_comprehensive_peak_hours_from_rollups(rollups_from_records(call_records))
+    
+    def calculate_comprehensive_peak_hours_from_rollups(
+        self,
+        rollups: List[Dict]
+    ) -> Dict[str, Any]:
+        """
+        Comprehensive peak hours analysis from call rollups
+        """
         try:
-            hourly_total_stats = defaultdict(int)
-            hourly_answered_stats = defaultdict(int)
-            hourly_missed_stats = defaultdict(int)
-            hourly_duration_stats = defaultdict(list)
-            hourly_agent_stats = defaultdict(set)
-            
-            total_calls = 0
-            total_answered = 0
-            total_missed = 0
-            
-            # Process each call record with enhanced tracking
-            for record in call_records:
-                call_time = record.get("time", "")
-                call_status = record.get("status", "")
-                
-                if not call_time:
-                    continue
-                
-                try:
-                    hour = int(call_time.split(":")[0])
-                    
-                    # Track totals
-                    hourly_total_stats[hour] += 1
-                    total_calls += 1
-                    
-                    # Track agents
-                    agent = record.get("agent_number", "")
-                    if agent:
-                        hourly_agent_stats[hour].add(agent)
-                    
-                    # Track by status with duration
-                    if call_status == "answered":
-                        hourly_answered_stats[hour] += 1
-                        total_answered += 1
-                        duration = record.get("call_duration", 0)
-                        hourly_duration_stats[hour].append(duration)
-                    else:
-                        hourly_missed_stats[hour] += 1
-                        total_missed += 1
-                        
-                except (ValueError, IndexError):
-                    continue
+            hourly_stats = merge_by_hour(rollups)
+            
+            hourly_total_stats = {hour: stats["calls"] for hour, stats in hourly_stats.items() if stats["calls"]}
+            hourly_answered_stats = {hour: stats["answered"] for hour, stats in hourly_stats.items() if stats["answered"]}
+            hourly_missed_stats = {hour: stats["missed"] for hour, stats in hourly_stats.items() if stats["missed"]}
+            hourly_duration_stats = {hour: stats["duration"] for hour, stats in hourly_stats.items()}
+            hourly_agent_stats = {hour: stats["agents"] for hour, stats in hourly_stats.items() if stats["agents"]}
+            
+            total_calls = sum(hourly_total_stats.values())
+            total_answered = sum(hourly_answered_stats.values())
+            total_missed = sum(hourly_missed_stats.values())
             
             # Enhanced formatting function
-            def format_comprehensive_peak_hours(hourly_stats: defaultdict, total_count: int, calls_type: str) -> List[Dict]:
-                if not hourly_stats or total_count == 0:
+            def format_comprehensive_peak_hours(hourly_counts: Dict[int, int], total_count: int, calls_type: str) -> List[Dict]:
+                if not hourly_counts or total_count == 0:
                     return []
                 
                 formatted_hours = []
-                for hour, calls in hourly_stats.items():
+                for hour, calls in hourly_counts.items():
                     # Calculate additional metrics
                     success_rate = (calls / hourly_total_stats[hour] * 100) if hourly_total_stats[hour] > 0 else 0
                     agent_count = len(hourly_agent_stats.get(hour, set()))
                     
-                    # Average duration for this hour
-                    durations = hourly_duration_stats.get(hour, [])
-                    avg_duration = statistics.mean(durations) if durations else 0
+                    # Average duration of answered calls in this hour
+                    answered = hourly_answered_stats.get(hour, 0)
+                    avg_duration = hourly_duration_stats.get(hour, 0) / answered if answered else 0
                     
                     # Efficiency score
                     efficiency = self._calculate_hourly_efficiency(calls, success_rate, avg_duration, agent_count)
@@ -429,16 +373,24 @@ class PerformanceCalculator:
             if not values:
                 return {"mean": 0, "median": 0, "std_dev": 0, "variance": 0, "min": 0, "max": 0}
             
+            data = np.asarray(values, dtype=float)
+            has_spread = len(data) > 1
+            if len(data) >= 4:
+                # "weibull" matches statistics.quantiles' default exclusive method
+                q1, q3 = np.quantile(data, [0.25, 0.75], method="weibull")
+            else:
+                q1, q3 = data.min(), data.max()
+            
             return {
-                "mean": round(statistics.mean(values), 2),
-                "median": round(statistics.median(values), 2),
-                "std_dev": round(statistics.stdev(values) if len(values) > 1 else 0, 2),
-                "variance": round(statistics.variance(values) if len(values) > 1 else 0, 2),
-                "min": round(min(values), 2),
-                "max": round(max(values), 2),
-                "range": round(max(values) - min(values), 2),
-                "q1": round(statistics.quantiles(values, n=4)[0] if len(values) >= 4 else min(values), 2),
-                "q3": round(statistics.quantiles(values, n=4)[2] if len(values) >= 4 else max(values), 2)
+                "mean": round(float(data.mean()), 2),
+                "median": round(float(np.median(data)), 2),
+                "std_dev": round(float(data.std(ddof=1)) if has_spread else 0, 2),
+                "variance": round(float(data.var(ddof=1)) if has_spread else 0, 2),
+                "min": round(float(data.min()), 2),
+                "max": round(float(data.max()), 2),
+                "range": round(float(data.max() - data.min()), 2),
+                "q1": round(float(q1), 2),
+                "q3": round(float(q3), 2)
             }
             
         except Exception as e:
@@ -457,17 +409,11 @@ class PerformanceCalculator:
             if len(x_values) != len(y_values) or len(x_values) < 2:
                 return 0.0
             
-            n = len(x_values)
-            sum_x = sum(x_values)
-            sum_y = sum(y_values)
-            sum_xy = sum(x * y for x, y in zip(x_values, y_values))
-            sum_x2 = sum(x * x for x in x_values)
-            sum_y2 = sum(y * y for y in y_values)
-            
-            numerator = n * sum_xy - sum_x * sum_y
-            denominator = math.sqrt((n * sum_x2 - sum_x * sum_x) * (n * sum_y2 - sum_y * sum_y))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                correlation = np.corrcoef(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))[0, 1]
             
-            return round(numerator / denominator if denominator != 0 else 0, 3)
+            # A constant series has no correlation (corrcoef gives nan)
+            return round(float(correlation), 3) if np.isfinite(correlation) else 0.0
             
         except Exception as e:
             logger.error(f"Error calculating correlation: {e}")
@@ -0,0 +1,93 @@
+# app/utils/rate_limiter.py - Async token bucket and adaptive concurrency for outbound provider limits
+"""
+Token bucket shared by every coroutine that calls a rate-limited provider.
+
+Tokens refill continuously at `rate` per second up to `capacity` (the burst
+size). `acquire()` waits only as long as needed for the next token, so a pool
+of concurrent senders runs at the provider limit without per-message sleeps.
+
+AdaptiveConcurrency sizes a fan-out (e.g. concurrent page fetches) to what the
+provider tolerates, backing off when it answers 429/5xx.
+"""
+
+import asyncio
+import time
+from typing import Dict, Any
+
+
+class TokenBucket:
+    """Asyncio token bucket (not thread-safe; one per event loop)"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired_count = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int = 1) -> None:
+        """Wait until `tokens` are available and consume them"""
+        # The lock keeps waiters in FIFO order so no sender starves
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.acquired_count += tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "available_tokens": round(self._tokens, 2),
+            "acquired": self.acquired_count,
+            "waited_seconds": round(self.waited_seconds, 2)
+        }
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit for fan-out against a provider: halve the limit when
+    the provider throttles or fails (429/5xx), grow it by one after a run of
+    successes, up to `max_limit`.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, increase_after: int = 4):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.increase_after = max(1, int(increase_after))
+        self.limit = self.max_limit
+        self._successes = 0
+        self.throttle_count = 0
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.increase_after and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self) -> None:
+        self.throttle_count += 1
+        self._successes = 0
+        self.limit = max(self.min_limit, self.limit // 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "max_limit": self.max_limit,
+            "throttled": self.throttle_count
+        }
@@ -4,6 +4,8 @@ import jwt
 from passlib.context import CryptContext
 from ..config.settings import settings
 from ..config.database import get_database
+from ..services.user_directory_service import user_directory
+from ..services.auth_session_service import principal_cache, token_blacklist_mirror
 import uuid
 import logging
 import secrets
@@ -101,6 +103,8 @@ class SecurityManager:
                 "expires_at": expires_at,
                 "blacklisted_at": datetime.utcnow()
             })
+            token_blacklist_mirror.add(token_jti, expires_at)
+            principal_cache.invalidate_token(token_jti)
             logger.info(f"Token {token_jti} blacklisted successfully")
         except Exception as e:
             logger.error(f"Failed to blacklist token: {e}")
@@ -138,6 +142,7 @@ class SecurityManager:
                     {"_id": ObjectId(user_id)},
                     {"$set": {"permissions": default_permissions}}
                 )
+                await user_directory.notify_changed(user_id)
                 
                 # Add to current user data
                 user_data["permissions"] = default_permissions
@@ -186,6 +191,7 @@ class SecurityManager:
                 {"email": user_email},
                 {"$set": update_data}
             )
+            await user_directory.notify_changed(email=user_email)
             
             success = result.modified_count > 0
             if success:
@@ -12,7 +12,9 @@ from bson import ObjectId
 import pytz
 
 from app.config.database import get_database
+from app.config.settings import settings
 from app.services.bulk_whatsapp_processor import get_bulk_whatsapp_processor
+from app.services.bulk_recipient_store import bulk_recipient_store
 from app.utils.timezone_helper import TimezoneHandler
 from app.models.bulk_whatsapp import BulkJobStatus
 from app.services.facebook_leads_service import facebook_leads_service  # ADD: Facebook service import
@@ -60,6 +62,9 @@ class WhatsAppJobScheduler:
                 # Load existing scheduled jobs from database (same as email recovery)
                 await self._load_pending_scheduled_jobs()
                 
+                # Resume bulk jobs interrupted mid-dispatch (expired chunk leases)
+                await self.start_bulk_job_recovery()
+                
                 logger.info("✅ WhatsApp Job Scheduler started successfully")
             else:
                 logger.warning("Scheduler already running")
@@ -128,6 +133,26 @@ class WhatsAppJobScheduler:
         except Exception as e:
             logger.error(f"❌ Facebook scheduler setup failed: {str(e)}")
     
+    async def start_bulk_job_recovery(self):
+        """Periodically resume processing jobs whose chunk leases were abandoned"""
+        try:
+            self.scheduler.add_job(
+                func=self.processor.resume_interrupted_jobs,
+                trigger='interval',
+                minutes=settings.bulk_job_recovery_minutes,
+                id='bulk_whatsapp_job_recovery',
+                name='Bulk WhatsApp Job Recovery',
+                replace_existing=True
+            )
+            
+            logger.info(f"✅ Bulk job recovery started (runs every {settings.bulk_job_recovery_minutes} minutes)")
+            
+            # Run immediately to pick up jobs interrupted by the restart
+            await self.processor.resume_interrupted_jobs()
+            
+        except Exception as e:
+            logger.error(f"❌ Bulk job recovery setup failed: {str(e)}")
+    
     async def schedule_whatsapp_job(self, job_id: str, scheduled_time_utc: datetime) -> bool:
         """
         Schedule a WhatsApp bulk job - SAME LOGIC as your email scheduleEmailJob()
@@ -452,12 +477,17 @@ class WhatsAppJobScheduler:
         """
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days_old)
-            
-            # Delete old completed/failed jobs
-            result = await self.db.bulk_whatsapp_jobs.delete_many({
+            old_jobs_query = {
                 "status": {"$in": [BulkJobStatus.COMPLETED, BulkJobStatus.FAILED]},
                 "completed_at": {"$lt": cutoff_date}
-            })
+            }
+            
+            # Delete per-recipient state of the old jobs first
+            old_job_ids = await self.db.bulk_whatsapp_jobs.distinct("job_id", old_jobs_query)
+            await bulk_recipient_store.delete_jobs(old_job_ids)
+            
+            # Delete old completed/failed jobs
+            result = await self.db.bulk_whatsapp_jobs.delete_many(old_jobs_query)
             
             cleaned_count = result.deleted_count
             logger.info(f"✅ Cleaned up {cleaned_count} old WhatsApp jobs (older than {days_old} days)")
@@ -0,0 +1,86 @@
+# benchmarks/_common.py - Shared helpers for the benchmark scripts
+"""
+Benchmarks that need MongoDB run against a scratch database on the
+configured server (MONGODB_URL). They refuse to touch the application
+database and drop the scratch database when done unless --keep is given.
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.config import database
+from app.config.settings import settings
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to the server (round trips), by command name"""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def started(self, event):
+        self.counts[event.command_name] = self.counts.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self) -> None:
+        self.counts = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def add_database_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--url", default=settings.mongodb_url, help="MongoDB URL (default: MONGODB_URL)")
+    parser.add_argument("--database", default=f"{settings.database_name}_bench", help="Scratch database name")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+
+
+async def connect(args: argparse.Namespace) -> CommandCounter:
+    """Point app.config.database at the scratch database; returns its command counter"""
+    if args.database == settings.database_name:
+        raise SystemExit(f"Refusing to benchmark against the application database '{args.database}'")
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(args.url, event_listeners=[counter])
+    database._client = client
+    database._database = client[args.database]
+    await database._database.command("ping")
+    return counter
+
+
+async def disconnect(args: argparse.Namespace) -> None:
+    if database._client is None:
+        return
+    if not args.keep:
+        await database._client.drop_database(args.database)
+    database._client.close()
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def summarize_ms(samples: List[float]) -> str:
+    """p50 / p95 / max of durations given in seconds"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"p50 {statistics.median(ordered) * 1000:8.2f} ms  "
+        f"p95 {p95 * 1000:8.2f} ms  max {ordered[-1] * 1000:8.2f} ms"
+    )
@@ -0,0 +1,110 @@
+# benchmarks/bulk_lead_create.py - Rows per second of the staged bulk lead pipeline
+"""
+Seeds a scratch database with agents, course levels, sources and categories,
+then pushes synthetic uploads through
+LeadService.bulk_create_leads_with_selective_assignment in batches the size
+the /leads/bulk-create endpoint receives.
+
+For every batch size it prints rows/s and the server commands issued per
+batch by command name. The pipeline's round trips do not grow with the
+batch size (one insert_many, one users bulk_write, one counter $inc per
+category-source combination, ...), where the per-row path made several per
+lead.
+
+    python -m benchmarks.bulk_lead_create --rows 20000 --batch-sizes 50 500 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.config.database import get_database
+from app.services.lead_service import lead_service
+
+from ._common import Timer, add_database_arguments, connect, disconnect
+
+CATEGORIES = [("Nursing", "NS"), ("Study Abroad", "SA"), ("Work Abroad", "WA")]
+SOURCES = [("website", "WB"), ("referral", "RF"), ("social_media", "SM")]
+COURSE_LEVELS = ["bachelor", "master", "diploma"]
+
+
+async def seed_reference_data(agents: int) -> str:
+    db = get_database()
+    now = datetime.utcnow()
+    await db.lead_categories.insert_many([
+        {"name": name, "short_form": short, "is_active": True, "created_at": now} for name, short in CATEGORIES
+    ])
+    await db.sources.insert_many([
+        {"name": name, "short_form": short, "is_active": True, "created_at": now} for name, short in SOURCES
+    ])
+    await db.course_levels.insert_many([
+        {"name": name, "is_active": True, "is_default": index == 0, "sort_order": index, "created_at": now}
+        for index, name in enumerate(COURSE_LEVELS)
+    ])
+    await db.users.insert_many([
+        {"email": f"agent{i}@example.com", "first_name": "Agent", "last_name": str(i), "role": "user",
+         "is_active": True, "assigned_leads": [], "total_assigned_leads": 0, "created_at": now}
+        for i in range(agents)
+    ])
+    admin_id = ObjectId()
+    await db.users.insert_one({"_id": admin_id, "email": "admin@example.com", "first_name": "Bench",
+                               "last_name": "Admin", "role": "admin", "is_active": True})
+    return str(admin_id)
+
+
+def synthetic_rows(start: int, count: int) -> list:
+    return [
+        {
+            "name": f"Bench Lead {i}",
+            "email": f"bench.lead{i}@example.com",
+            "contact_number": f"+91{9000000000 + i}",
+            "category": random.choice(CATEGORIES)[0],
+            "source": random.choice(SOURCES)[0],
+            "course_level": random.choice(COURSE_LEVELS)
+        }
+        for i in range(start, start + count)
+    ]
+
+
+async def main(args: argparse.Namespace) -> None:
+    counter = await connect(args)
+    try:
+        created_by = await seed_reference_data(args.agents)
+        next_row = 0
+        print(f"\n{args.agents} agents, round-robin assignment\n")
+        for batch_size in args.batch_sizes:
+            batches = max(1, args.rows // batch_size)
+            created = 0
+            elapsed = 0.0
+            commands = {}
+            for _ in range(batches):
+                rows = synthetic_rows(next_row, batch_size)
+                next_row += batch_size
+                counter.reset()
+                with Timer() as timer:
+                    result = await lead_service.bulk_create_leads_with_selective_assignment(rows, created_by)
+                elapsed += timer.elapsed
+                created += result.get("successfully_created", 0)
+                for name, count in counter.counts.items():
+                    commands[name] = commands.get(name, 0) + count
+            per_batch = ", ".join(f"{name} {count / batches:.0f}" for name, count in sorted(commands.items()))
+            print(f"batch {batch_size:5}: {created} created in {elapsed:.2f}s "
+                  f"({created / elapsed if elapsed else 0:,.0f} rows/s)")
+            print(f"             commands per batch: {per_batch}")
+    finally:
+        await disconnect(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_arguments(parser)
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per batch size")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--agents", type=int, default=20, help="Active users to assign to")
+    # The pipeline logs every stage at INFO; keep the benchmark output readable
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
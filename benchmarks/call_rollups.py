@@ -0,0 +1,103 @@
+# benchmarks/call_rollups.py - Call analytics from raw CDRs vs from hourly rollups
+"""
+Builds synthetic TATA call records for a date range and times the analytics
+a call dashboard request computes (temporal trends, hourly heatmap, peak
+hours, duration distribution, trend analysis) two ways:
+
+- records: from raw records, as when the range is not covered by call_rollups
+- rollups: from the hourly per-agent rollups call_rollups_hourly serves
+
+Runs in memory (no MongoDB); the rollups are built once up front, like the
+stored ones. A share of the records has no time or no date, which both paths
+must still count.
+
+    python -m benchmarks.call_rollups --days 30 --calls-per-day 5000 --agents 40
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.services.analytics_service import analytics_service
+from app.utils.call_rollups import rollups_from_records
+from app.utils.performance_calculator import performance_calculator
+
+FIRST_DAY = datetime(2026, 1, 1)
+
+
+def synthetic_records(days: int, calls_per_day: int, agents: int, untimed_share: float) -> list:
+    records = []
+    for day in range(days):
+        date = (FIRST_DAY + timedelta(days=day)).strftime("%Y-%m-%d")
+        for _ in range(calls_per_day):
+            answered = random.random() < 0.6
+            record = {
+                "date": date,
+                "time": f"{random.randrange(8, 21):02d}:{random.randrange(60):02d}:{random.randrange(60):02d}",
+                "agent_number": f"91{9000000000 + random.randrange(agents)}",
+                "status": "answered" if answered else "missed",
+                "call_duration": random.randrange(1, 600) if answered else 0,
+                "direction": random.choice(["inbound", "outbound"]),
+                "recording_url": "https://example.invalid/r.mp3" if answered and random.random() < 0.5 else ""
+            }
+            if random.random() < untimed_share:
+                record["time" if random.random() < 0.5 else "date"] = ""
+            records.append(record)
+    return records
+
+
+def dashboard_from_records(records: list, date_from: str, date_to: str) -> None:
+    analytics_service.calculate_temporal_trends(records, date_from, date_to)
+    analytics_service.generate_hourly_heatmap(records)
+    analytics_service.analyze_peak_hours(records)
+    analytics_service.calculate_duration_distribution(records)
+    performance_calculator.calculate_trend_analysis(records)
+
+
+def dashboard_from_rollups(rollups: list, date_from: str, date_to: str) -> None:
+    analytics_service.calculate_temporal_trends_from_rollups(rollups, date_from, date_to)
+    analytics_service.generate_hourly_heatmap_from_rollups(rollups)
+    analytics_service.analyze_peak_hours_from_rollups(rollups)
+    analytics_service.calculate_duration_distribution_from_rollups(rollups)
+    performance_calculator.calculate_trend_analysis_from_rollups(rollups)
+
+
+def measure(function, *args, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    records = synthetic_records(args.days, args.calls_per_day, args.agents, args.untimed_share)
+    date_from = FIRST_DAY.strftime("%Y-%m-%d")
+    date_to = (FIRST_DAY + timedelta(days=args.days - 1)).strftime("%Y-%m-%d")
+
+    started = time.perf_counter()
+    rollups = rollups_from_records(records)
+    build_seconds = time.perf_counter() - started
+    print(f"\n{len(records):,} records -> {len(rollups):,} hourly rollups (built in {build_seconds * 1000:.0f} ms)\n")
+
+    for label, function, source in (
+        ("records", dashboard_from_records, records),
+        ("rollups", dashboard_from_rollups, rollups)
+    ):
+        timings = measure(function, source, date_from, date_to, repeat=args.repeat)
+        print(f"{label:8} median {statistics.median(timings) * 1000:9.2f} ms  max {max(timings) * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--calls-per-day", type=int, default=5000)
+    parser.add_argument("--agents", type=int, default=40)
+    parser.add_argument("--untimed-share", type=float, default=0.02, help="Records missing their time or date")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,124 @@
+# benchmarks/cv_extraction_pool.py - CV upload latency under concurrent uploads, inline vs process pool
+"""
+Fires N concurrent CV uploads at the extraction step and measures, for
+extraction on the event loop (the previous behaviour) and through
+CVExtractionPool:
+
+- upload latency: queued -> parsed, per CV
+- event loop lag: how late a 10 ms heartbeat task wakes up while the
+  uploads run, i.e. what every other request on the worker waits
+
+The CV is a generated multi-page PDF (PyMuPDF), or the files passed with
+--files. No MongoDB needed.
+
+    python -m benchmarks.cv_extraction_pool --uploads 16 --pages 15 --workers 2 4
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+from app.services.cv_extraction_pool import CVExtractionPool
+from app.services.cv_extraction_service import extract_cv_in_worker
+
+from ._common import summarize_ms
+
+PDF_MIME = "application/pdf"
+HEARTBEAT_SECONDS = 0.01
+
+SAMPLE_LINES = [
+    "Priya Nair",
+    "priya.nair@example.com  +91 98765 43210",
+    "Registered Nurse - 6 years of experience in critical care and emergency departments",
+    "Education: B.Sc Nursing, Government College of Nursing, 2017",
+    "Skills: patient assessment, IV therapy, wound care, ventilator management, BLS, ACLS",
+]
+
+
+def sample_pdf(pages: int) -> bytes:
+    document = fitz.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        lines = SAMPLE_LINES + [f"Page {page_number + 1}: " + "clinical rotation notes " * 8] * 40
+        page.insert_text((40, 40), "\n".join(lines), fontsize=8)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+async def heartbeat(lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_SECONDS
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_uploads(files: List[bytes], extract) -> dict:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    async def upload(position: int, content: bytes) -> float:
+        queued = time.perf_counter()
+        await extract(content, PDF_MIME, f"cv_{position}.pdf")
+        return time.perf_counter() - queued
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(upload(position, content) for position, content in enumerate(files)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return {"latencies": list(latencies), "lags": lags or [0.0], "elapsed": elapsed}
+
+
+async def extract_inline(content: bytes, mime_type: str, filename: str) -> dict:
+    # What the upload endpoint did before the pool: parse on the event loop
+    await asyncio.sleep(0)
+    return extract_cv_in_worker(content, mime_type, filename, None)
+
+
+def report(label: str, result: dict) -> None:
+    print(f"{label:18} {len(result['latencies'])} CVs in {result['elapsed']:.2f}s")
+    print(f"  upload latency   {summarize_ms(result['latencies'])}")
+    print(f"  event loop lag   {summarize_ms(result['lags'])}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.files:
+        samples = [Path(path).read_bytes() for path in args.files]
+    else:
+        samples = [sample_pdf(args.pages)]
+    files = [samples[position % len(samples)] for position in range(args.uploads)]
+    print(f"\n{args.uploads} concurrent uploads, {len(samples)} distinct file(s)\n")
+
+    report("inline", await run_uploads(files, extract_inline))
+
+    for workers in args.workers:
+        pool = CVExtractionPool(
+            max_workers=workers,
+            max_queue=max(args.uploads, workers),
+            timeout_seconds=args.timeout,
+            max_pdf_pages=args.max_pdf_pages
+        )
+        await pool.start()
+        try:
+            # Spawned workers import the app on first use; keep that out of the timings
+            await asyncio.gather(*(pool.extract(files[0], PDF_MIME, "warmup.pdf") for _ in range(workers)))
+            report(f"pool ({workers} workers)", await run_uploads(files, pool.extract))
+        finally:
+            await pool.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=16, help="Concurrent uploads")
+    parser.add_argument("--pages", type=int, default=15, help="Pages of the generated CV")
+    parser.add_argument("--files", nargs="+", help="Use these PDF files instead of the generated CV")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="Pool sizes to compare")
+    parser.add_argument("--max-pdf-pages", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,122 @@
+# benchmarks/lead_search.py - Indexed search_keys vs the old unanchored $regex lead search
+"""
+Seeds a scratch database with synthetic leads (1M by default) and runs the
+same search terms through both query shapes the /leads/ search used:
+
+- regex: the previous five-field case-insensitive unanchored $regex $or
+- indexed: build_lead_search_query() over the search_keys multikey index
+
+Each search is measured like the endpoint runs it: count_documents plus the
+first page (sorted by created_at, 20 rows). Prints latency percentiles per
+term kind and the documents examined for one sample of each.
+
+    python -m benchmarks.lead_search --leads 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import re
+from datetime import datetime, timedelta
+
+from app.config.database import get_database
+from app.services.lead_search_service import build_lead_search_keys, build_lead_search_query
+
+from ._common import Timer, add_database_arguments, connect, disconnect, summarize_ms
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Reyansh", "Krishna", "Ishaan", "Rohan",
+               "Ananya", "Diya", "Priya", "Saanvi", "Aadhya", "Kavya", "Meera", "Riya", "Nisha", "Pooja"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Nair", "Reddy", "Iyer", "Menon", "Gupta", "Singh", "Das",
+              "Joseph", "Thomas", "Kumar", "Pillai", "Rao", "Shah", "Bose", "Mehta", "Jain", "Khan"]
+SEED_BATCH = 10000
+PAGE_SIZE = 20
+
+
+def synthetic_lead(index: int, now: datetime) -> dict:
+    first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+    phone = f"9{random.randrange(10 ** 8, 10 ** 9)}"
+    lead = {
+        "lead_id": f"NS-WB-{index + 1}",
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+        "contact_number": f"+91{phone}",
+        "phone_number": phone,
+        "status": "New",
+        "created_at": now - timedelta(minutes=index)
+    }
+    lead["search_keys"] = build_lead_search_keys(lead)
+    return lead
+
+
+def regex_query(term: str) -> dict:
+    escaped = re.escape(term)
+    return {"$or": [{field: {"$regex": escaped, "$options": "i"}}
+                    for field in ("name", "email", "lead_id", "contact_number", "phone_number")]}
+
+
+async def seed(count: int) -> None:
+    db = get_database()
+    existing = await db.leads.estimated_document_count()
+    if existing >= count:
+        print(f"Using {existing} existing leads")
+        return
+    now = datetime.utcnow()
+    for start in range(existing, count, SEED_BATCH):
+        batch = [synthetic_lead(i, now) for i in range(start, min(count, start + SEED_BATCH))]
+        await db.leads.insert_many(batch, ordered=False)
+        print(f"\rSeeded {start + len(batch)}/{count} leads", end="", flush=True)
+    print()
+    await db.leads.create_index("search_keys")
+    await db.leads.create_index([("created_at", -1), ("_id", -1)])
+
+
+async def search_terms(samples: int) -> dict:
+    leads = await get_database().leads.aggregate([{"$sample": {"size": samples}}]).to_list(None)
+    return {
+        "name": [lead["name"].split()[0] for lead in leads],
+        "full name": [lead["name"] for lead in leads],
+        "email": [lead["email"].split("@")[0] for lead in leads],
+        "phone": [lead["phone_number"] for lead in leads],
+        "lead_id": [lead["lead_id"] for lead in leads],
+    }
+
+
+async def run_search(query: dict) -> None:
+    db = get_database()
+    await db.leads.count_documents(query)
+    await db.leads.find(query).sort("created_at", -1).limit(PAGE_SIZE).to_list(None)
+
+
+async def docs_examined(query: dict) -> int:
+    explain = await get_database().command({
+        "explain": {"count": "leads", "query": query},
+        "verbosity": "executionStats"
+    })
+    return explain.get("executionStats", {}).get("totalDocsExamined", -1)
+
+
+async def main(args: argparse.Namespace) -> None:
+    await connect(args)
+    try:
+        await seed(args.leads)
+        terms = await search_terms(args.samples)
+        print(f"\n{args.samples} searches per kind, count + first page of {PAGE_SIZE}\n")
+        for kind, values in terms.items():
+            for label, build in (("regex", regex_query), ("indexed", build_lead_search_query)):
+                timings = []
+                for term in values:
+                    with Timer() as timer:
+                        await run_search(build(term))
+                    timings.append(timer.elapsed)
+                examined = await docs_examined(build(values[0]))
+                print(f"{kind:10} {label:8} {summarize_ms(timings)}  docs examined {examined}")
+    finally:
+        await disconnect(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_arguments(parser)
+    parser.add_argument("--leads", type=int, default=1000000, help="Synthetic leads to seed")
+    parser.add_argument("--samples", type=int, default=50, help="Search terms per kind")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,31 @@
+"""Column-based call metrics count every record that has the columns they need"""
+
+import numpy as np
+
+from app.services.analytics_service import analytics_service
+from app.utils.call_columns import CallColumns
+
+RECORDS = [
+    {"date": "2026-10-01", "time": "10:15:00", "status": "answered", "call_duration": 40},
+    {"date": "", "time": "", "status": "answered", "call_duration": 400},
+    {"status": "answered", "call_duration": "75"},
+    {"date": "2026-10-01", "time": "10:20:00", "status": "missed", "call_duration": 0},
+    {"date": "not a date", "status": "answered", "call_duration": 0},
+]
+
+
+def test_answered_calls_without_a_date_count_in_the_duration_distribution():
+    distribution = analytics_service.calculate_duration_distribution(RECORDS)
+
+    assert distribution["total_analyzed"] == 3
+    assert distribution["median_duration"] == 75
+    assert {bucket["range"]: bucket["count"] for bucket in distribution["buckets"]}["300s+"] == 1
+
+
+def test_columns_keep_date_and_time_validity_separately():
+    columns = CallColumns.from_records(RECORDS)
+
+    assert len(columns) == len(RECORDS)
+    assert columns.dated.tolist() == [True, False, False, True, False]
+    assert columns.timed.tolist() == [True, False, False, True, False]
+    assert np.array_equal(columns.answered_durations(), np.array([40, 400, 75]))
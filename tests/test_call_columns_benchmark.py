@@ -0,0 +1,101 @@
+"""
+pytest-benchmark timings of the columnar call analytics against the
+per-record loops they replaced (pip install pytest-benchmark):
+
+    python -m pytest tests/test_call_columns_benchmark.py --benchmark-group-by=param:size
+"""
+
+import random
+import statistics
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services.analytics_service import analytics_service  # noqa: E402
+from app.utils.call_rollups import (  # noqa: E402
+    DURATION_BUCKETS, duration_bucket, empty_rollup, rollups_from_records
+)
+
+SIZES = [10000, 100000]
+
+
+def synthetic_records(size: int) -> list:
+    generator = random.Random(size)
+    records = []
+    for _ in range(size):
+        answered = generator.random() < 0.6
+        records.append({
+            "date": f"2026-10-{generator.randrange(1, 31):02d}",
+            "time": f"{generator.randrange(24):02d}:{generator.randrange(60):02d}:00",
+            "agent_number": f"91{9000000000 + generator.randrange(50)}",
+            "status": "answered" if answered else "missed",
+            "call_duration": generator.randrange(1, 900) if answered else 0,
+            "direction": generator.choice(["inbound", "outbound"]),
+            "recording_url": "https://example.invalid/r.mp3" if answered and generator.random() < 0.5 else "",
+        })
+    return records
+
+
+def rollups_by_loop(records: list) -> list:
+    """Reference: the same rollups with one dict update per record"""
+    groups = {}
+    for record in records:
+        hour = int(record["time"][:2]) if record.get("time") else None
+        key = (record.get("agent_number") or "", record.get("date"), hour)
+        rollup = groups.get(key)
+        if rollup is None:
+            rollup = groups[key] = empty_rollup(*key)
+        rollup["total"] += 1
+        direction = record.get("direction")
+        if direction in ("inbound", "outbound"):
+            rollup[direction] += 1
+        if record.get("recording_url"):
+            rollup["recordings"] += 1
+        if record.get("status") != "answered":
+            rollup["missed"] += 1
+            continue
+        rollup["answered"] += 1
+        duration = record.get("call_duration", 0)
+        rollup["duration"] += duration
+        if duration > 0:
+            rollup["duration_histogram"][duration_bucket(duration)] += 1
+    return list(groups.values())
+
+
+def duration_distribution_by_loop(records: list) -> dict:
+    durations = [record["call_duration"] for record in records
+                 if record.get("status") == "answered" and record.get("call_duration", 0) > 0]
+    counts = [0] * len(DURATION_BUCKETS)
+    for duration in durations:
+        counts[duration_bucket(duration)] += 1
+    return {"counts": counts, "avg": statistics.mean(durations), "median": statistics.median(durations)}
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"size={size}")
+def records(request):
+    return synthetic_records(request.param)
+
+
+@pytest.mark.benchmark(group="rollups")
+def test_rollups_columnar(benchmark, records):
+    rollups = benchmark(rollups_from_records, records)
+    assert sum(rollup["total"] for rollup in rollups) == len(records)
+
+
+@pytest.mark.benchmark(group="rollups")
+def test_rollups_loop(benchmark, records):
+    rollups = benchmark(rollups_by_loop, records)
+    assert sorted(map(str, rollups)) == sorted(map(str, rollups_from_records(records)))
+
+
+@pytest.mark.benchmark(group="duration_distribution")
+def test_duration_distribution_columnar(benchmark, records):
+    distribution = benchmark(analytics_service.calculate_duration_distribution, records)
+    assert distribution["total_analyzed"] == sum(duration_distribution_by_loop(records)["counts"])
+
+
+@pytest.mark.benchmark(group="duration_distribution")
+def test_duration_distribution_loop(benchmark, records):
+    distribution = benchmark(duration_distribution_by_loop, records)
+    assert distribution["counts"]
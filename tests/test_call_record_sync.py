@@ -0,0 +1,107 @@
+"""The call record sync renews its lease per page and never stores a watermark it lost"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from app.services import call_record_store as store_module  # noqa: E402
+from app.services.call_record_store import CallRecordStore, SYNC_STATE_ID  # noqa: E402
+
+
+class SyncStateCollection:
+    """Single call_sync_state document; filters on _id and lease_owner only"""
+
+    def __init__(self):
+        self.doc = {"_id": SYNC_STATE_ID}
+        self.renewals = 0
+
+    async def find_one(self, query):
+        return dict(self.doc)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        self.doc.update(update["$set"])
+        return dict(self.doc)
+
+    async def update_one(self, query, update):
+        if self.doc.get("lease_owner") != query.get("lease_owner"):
+            return SimpleNamespace(matched_count=0)
+        if set(update["$set"]) == {"lease_expires_at"}:
+            self.renewals += 1
+        self.doc.update(update["$set"])
+        return SimpleNamespace(matched_count=1)
+
+
+def _install_fake_tata(monkeypatch, pages, on_page=None):
+    async def iter_call_record_pages(params):
+        for number, records in enumerate(pages, start=1):
+            yield records
+            if on_page:
+                on_page(number)
+
+    tata = ModuleType("app.services.tata_admin_service")
+    tata.tata_admin_service = SimpleNamespace(iter_call_record_pages=iter_call_record_pages)
+    monkeypatch.setitem(sys.modules, "app.services.tata_admin_service", tata)
+
+    rollups = ModuleType("app.services.call_rollup_service")
+
+    async def refresh_range(start, end):
+        return None
+
+    rollups.call_rollup_service = SimpleNamespace(refresh_range=refresh_range)
+    monkeypatch.setitem(sys.modules, "app.services.call_rollup_service", rollups)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    state = SyncStateCollection()
+    store = CallRecordStore()
+    monkeypatch.setattr(CallRecordStore, "sync_state", property(lambda self: state))
+
+    async def upsert_records(records, source=None):
+        return len(records)
+
+    monkeypatch.setattr(store, "upsert_records", upsert_records)
+    return store, state
+
+
+def test_lease_is_renewed_after_every_page(store, monkeypatch):
+    store, state = store
+    _install_fake_tata(monkeypatch, [[{"id": 1}], [{"id": 2}], [{"id": 3}]])
+
+    result = asyncio.run(store.sync_since_watermark())
+
+    assert result["success"]
+    assert state.renewals == 3
+    assert state.doc["watermark"] == result["window_end"]
+    assert state.doc["lease_owner"] is None
+
+
+def test_lost_lease_stops_the_sync_without_a_watermark(store, monkeypatch):
+    store, state = store
+
+    def take_over(page):
+        if page == 1:
+            state.doc["lease_owner"] = "another-worker"
+
+    _install_fake_tata(monkeypatch, [[{"id": 1}], [{"id": 2}]], on_page=take_over)
+
+    result = asyncio.run(store.sync_since_watermark())
+
+    assert not result["success"]
+    assert result["pages"] == 2
+    assert state.renewals == 1
+    assert "watermark" not in state.doc
+    assert state.doc["lease_owner"] == "another-worker"
+
+
+def test_watermark_is_ist_wall_clock():
+    now = store_module.tata_now()
+    expected = datetime.utcnow() + timedelta(hours=5, minutes=30)
+    assert now.tzinfo is None
+    assert abs((now - expected).total_seconds()) < 5
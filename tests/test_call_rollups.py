@@ -0,0 +1,121 @@
+"""Rollups keep date and hour as separate keys and refreshes only drop their own stale rows"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.analytics_service import analytics_service
+from app.utils.call_rollups import rollups_from_records
+from app.utils.performance_calculator import performance_calculator
+
+RECORDS = [
+    {"date": "2026-10-01", "time": "10:15:00", "status": "answered", "call_duration": 40, "agent_number": "9101"},
+    {"date": "2026-10-01", "time": "", "status": "missed", "agent_number": "9101"},
+    {"date": "2026-10-02", "time": "not a time", "status": "answered", "call_duration": 90, "agent_number": "9102"},
+    {"date": "", "time": "10:45:00", "status": "answered", "call_duration": 20, "agent_number": "9102"},
+    {"time": "11:05:00", "status": "missed", "agent_number": "9101"},
+]
+
+
+def test_untimed_records_count_in_the_daily_series():
+    trends = analytics_service.calculate_temporal_trends(RECORDS, "2026-10-01", "2026-10-02")
+
+    daily = {day["date"]: day["total_calls"] for day in trends["daily_series"]}
+    assert daily == {"2026-10-01": 2, "2026-10-02": 1}
+
+
+def test_undated_records_count_in_the_hourly_views():
+    trends = analytics_service.calculate_temporal_trends(RECORDS, "2026-10-01", "2026-10-02")
+    heatmap = analytics_service.generate_hourly_heatmap(RECORDS)
+    peaks = analytics_service.analyze_peak_hours(RECORDS)
+    peak_hours = performance_calculator.calculate_peak_hours(RECORDS)
+    comprehensive = performance_calculator.calculate_comprehensive_peak_hours(RECORDS)
+
+    assert {hour["hour"]: hour["calls"] for hour in trends["hourly_series"]} == {10: 2, 11: 1}
+    assert {hour["hour"]: hour["call_count"] for hour in heatmap["data"] if hour["call_count"]} == {10: 2, 11: 1}
+    assert {hour["hour"]: hour["total_calls"] for hour in peaks["hourly_data"] if hour["total_calls"]} == {10: 2, 11: 1}
+    assert peak_hours["hourly_distribution"] == {10: 2, 11: 1}
+    assert comprehensive["analysis_metadata"]["hours_with_calls"] == 2
+
+
+def test_trend_analysis_counts_untimed_records():
+    trend = performance_calculator.calculate_trend_analysis(RECORDS)
+
+    assert trend["daily_averages"]["avg_calls_per_day"] == 1.5
+
+
+def test_rollups_keep_every_record():
+    rollups = rollups_from_records(RECORDS)
+
+    assert sum(rollup["total"] for rollup in rollups) == len(RECORDS)
+    assert {(rollup["date"], rollup["hour"]) for rollup in rollups} == {
+        ("2026-10-01", 10), ("2026-10-01", None), ("2026-10-02", None), (None, 10), (None, 11)
+    }
+
+
+class RollupCollection:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.next_id = len(docs) + 1
+
+    def find(self, query, projection=None):
+        documents = [dict(doc) for doc in self.docs.values()]
+
+        async def to_list(length=None):
+            return documents
+
+        return SimpleNamespace(to_list=to_list)
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            query = operation._filter
+            if "_id" in query:
+                doc = self.docs.get(query["_id"])
+                if doc is not None and doc.get("refreshed_at") == query.get("refreshed_at"):
+                    del self.docs[query["_id"]]
+                continue
+            match = next((doc for doc in self.docs.values() if all(doc.get(k) == v for k, v in query.items())), None)
+            if match is None:
+                self.docs[self.next_id] = {"_id": self.next_id, **operation._doc}
+                self.next_id += 1
+            else:
+                match.clear()
+                match.update({"_id": match.get("_id"), **operation._doc})
+
+
+@pytest.mark.parametrize("rewritten_meanwhile", [False, True])
+def test_refresh_deletes_only_rows_it_did_not_produce(monkeypatch, rewritten_meanwhile):
+    pytest.importorskip("motor")
+    pytest.importorskip("pydantic_settings")
+    from app.services import call_rollup_service as service_module
+
+    hourly = RollupCollection([
+        {"_id": 1, "agent_number": "9101", "date": "2026-10-01", "hour": 10, "refreshed_at": "old"},
+        {"_id": 2, "agent_number": "9101", "date": "2026-10-01", "hour": 9, "refreshed_at": "old"},
+    ])
+    daily = RollupCollection([{"_id": 1, "agent_number": "9101", "date": "2026-10-01", "refreshed_at": "old"}])
+    service = service_module.CallRollupService()
+    monkeypatch.setattr(service_module.CallRollupService, "hourly", property(lambda self: hourly))
+    monkeypatch.setattr(service_module.CallRollupService, "daily", property(lambda self: daily))
+
+    rows = [{"_id": {"agent_number": "9101", "date": "2026-10-01", "hour": 10}, "total": 3, "answered": 2}]
+
+    def aggregate(pipeline):
+        if rewritten_meanwhile:
+            # An overlapping refresh rewrites the 09:00 row while this one aggregates
+            hourly.docs[2]["refreshed_at"] = "concurrent"
+
+        async def to_list(length=None):
+            return rows
+
+        return SimpleNamespace(to_list=to_list)
+
+    monkeypatch.setattr(service_module, "call_record_store", SimpleNamespace(records=SimpleNamespace(aggregate=aggregate)))
+
+    written = asyncio.run(service.refresh(["2026-10-01"]))
+
+    assert written == 1
+    assert sorted(doc["hour"] for doc in hourly.docs.values()) == ([9, 10] if rewritten_meanwhile else [10])
+    assert next(doc for doc in hourly.docs.values() if doc["hour"] == 10)["total"] == 3
+    assert len(daily.docs) == 1
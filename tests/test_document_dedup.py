@@ -0,0 +1,198 @@
+"""Deduplicated GridFS files are reference counted and conditional downloads open nothing"""
+
+import asyncio
+import io
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+
+from bson import ObjectId  # noqa: E402
+
+from app.services.document_service import DocumentService  # noqa: E402
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        doc = (doc or {}).get(part)
+    return doc
+
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _matches(doc, query):
+    for path, condition in query.items():
+        value = _get(doc, path)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$gt" in condition and (value is None or not value > condition["$gt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FilesCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        doc = next((doc for doc in self.docs.values() if _matches(doc, query)), None)
+        if doc is None:
+            return None
+        for path, amount in update.get("$inc", {}).items():
+            _set(doc, path, (_get(doc, path) or 0) + amount)
+        return {"_id": doc["_id"], "metadata": dict(doc.get("metadata") or {})}
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        for path, value in update.get("$set", {}).items():
+            _set(doc, path, value)
+
+
+class LeadDocuments:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        doc["_id"] = ObjectId()
+        self.docs.append(doc)
+        return type("InsertResult", (), {"inserted_id": doc["_id"]})()
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs if all(doc.get(k) == v for k, v in query.items())), None)
+
+    async def update_one(self, query, update):
+        doc = await self.find_one(query)
+        if doc is not None:
+            doc.update(update.get("$set", {}))
+
+
+class FakeGridIn:
+    def __init__(self, files, filename, metadata):
+        self.files = files
+        self._id = ObjectId()
+        self.metadata = dict(metadata)
+        self.content = b""
+
+    async def write(self, chunk):
+        self.content += chunk
+
+    async def close(self):
+        self.files.docs[self._id] = {"_id": self._id, "length": len(self.content), "metadata": self.metadata}
+
+    async def abort(self):
+        pass
+
+
+class FakeBucket:
+    def __init__(self, files):
+        self.files = files
+        self.opened = 0
+
+    def open_upload_stream(self, filename, metadata=None):
+        return FakeGridIn(self.files, filename, metadata or {})
+
+    async def delete(self, file_id):
+        del self.files.docs[file_id]
+
+    async def open_download_stream(self, file_id):
+        self.opened += 1
+        return type("GridOut", (), {"length": self.files.docs[file_id]["length"]})()
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.files = FilesCollection()
+        self.lead_documents = LeadDocuments()
+
+    def __getitem__(self, name):
+        assert name == "documents.files"
+        return self.files
+
+
+class FakeUpload:
+    def __init__(self, content):
+        self.stream = io.BytesIO(content)
+
+    async def read(self, size):
+        return self.stream.read(size)
+
+
+@pytest.fixture
+def service():
+    db = FakeDatabase()
+    service = DocumentService.__new__(DocumentService)
+    service.db = db
+    service.fs_bucket_name = "documents"
+    service.fs_bucket = FakeBucket(db.files)
+    return service
+
+
+def _store(service, content=b"%PDF passport scan"):
+    return asyncio.run(service._store_file(FakeUpload(content), "scan.pdf", {"lead_id": "LD-1"}))[0]
+
+
+def test_identical_uploads_share_one_file_until_the_last_reference_goes(service):
+    first = _store(service)
+    second = _store(service)
+
+    assert first == second
+    assert service.db.files.docs[first]["metadata"]["refs"] == 2
+
+    asyncio.run(service._release_file(first))
+    assert service.db.files.docs[first]["metadata"]["refs"] == 1
+
+    asyncio.run(service._release_file(first))
+    assert first not in service.db.files.docs
+
+
+def test_upload_after_the_last_reference_was_released_stores_its_own_copy(service):
+    first = _store(service)
+    # Delete dropped the last reference; the file is about to be removed
+    service.db.files.docs[first]["metadata"]["refs"] = 0
+
+    second = _store(service)
+
+    assert second != first
+    assert service.db.files.docs[second]["metadata"]["refs"] == 1
+
+
+def test_file_stored_before_reference_counting_is_kept_while_shared(service):
+    legacy_id = ObjectId()
+    service.db.files.docs[legacy_id] = {"_id": legacy_id, "length": 3, "metadata": {"sha256": "abc"}}
+    service.db.lead_documents.docs.append({"_id": ObjectId(), "grid_file_id": legacy_id, "is_active": True})
+
+    asyncio.run(service._release_file(legacy_id))
+    assert legacy_id in service.db.files.docs
+
+    service.db.lead_documents.docs[0]["is_active"] = False
+    asyncio.run(service._release_file(legacy_id))
+    assert legacy_id not in service.db.files.docs
+
+
+def test_matching_if_none_match_does_not_open_the_file(service, monkeypatch):
+    async def allow(lead_id, current_user):
+        return {}
+
+    monkeypatch.setattr(service, "_check_lead_access", allow)
+    grid_file_id = _store(service)
+    document_id = ObjectId()
+    service.db.lead_documents.docs.append({
+        "_id": document_id, "lead_id": "LD-1", "grid_file_id": grid_file_id, "content_hash": "abc",
+        "original_filename": "scan.pdf", "mime_type": "application/pdf", "is_active": True
+    })
+
+    cached = asyncio.run(service.download_document(str(document_id), {}, if_none_match='"abc"'))
+    fresh = asyncio.run(service.download_document(str(document_id), {}, if_none_match='"other"'))
+
+    assert cached == {"not_modified": True, "etag": '"abc"'}
+    assert fresh["etag"] == '"abc"' and "stream" in fresh
+    assert service.fs_bucket.opened == 1
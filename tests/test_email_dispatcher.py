@@ -0,0 +1,115 @@
+"""Email dispatch checkpoints only under its own lease and keeps bad recipients to themselves"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from app.services import email_dispatcher as dispatcher_module  # noqa: E402
+from app.services.email_dispatcher import EmailDispatcher  # noqa: E402
+
+
+class EmailCollection:
+    """One crm_lead_emails document; update_one filters on email_id and dispatch_owner"""
+
+    def __init__(self, owner):
+        self.doc = {"email_id": "EM-1", "dispatch_owner": owner, "sent_count": 0}
+        self.updates = 0
+
+    async def update_one(self, query, update):
+        if any(self.doc.get(key) != value for key, value in query.items()):
+            return SimpleNamespace(matched_count=0)
+        self.updates += 1
+        self.doc.update(update["$set"])
+        for key, amount in update["$inc"].items():
+            self.doc[key] = self.doc.get(key, 0) + amount
+        return SimpleNamespace(matched_count=1)
+
+
+class FakeZepto:
+    def __init__(self, on_send=None, batch_status_code=None):
+        self.singles = []
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.on_send = on_send
+        self.batch_status_code = batch_status_code
+
+    async def send_template_email(self, template_key, sender_email, recipient_email, recipient_name, merge_data=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        self.singles.append(recipient_email)
+        if self.on_send:
+            self.on_send(len(self.singles))
+        return {"success": True}
+
+    async def send_batch_template_email(self, template_key, sender_email, recipients):
+        self.batches.append([recipient["email"] for recipient in recipients])
+        return {"success": False, "status_code": self.batch_status_code, "error": "invalid"}
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    dispatcher = EmailDispatcher()
+    collection = EmailCollection(dispatcher.owner)
+    monkeypatch.setattr(EmailDispatcher, "collection", property(lambda self: collection))
+    monkeypatch.setattr(dispatcher_module, "_email_rate_limiter", SimpleNamespace(acquire=lambda: asyncio.sleep(0)))
+    monkeypatch.setattr(dispatcher_module.settings, "email_progress_flush_size", 1)
+    monkeypatch.setattr(dispatcher_module.settings, "email_send_concurrency", 2)
+    return dispatcher, collection
+
+
+def _recipients(count):
+    return [{"email": f"lead{n}@example.com", "name": f"Lead {n}", "merge_data": [n]} for n in range(count)]
+
+
+def test_send_stops_when_another_worker_took_the_lease(dispatcher, monkeypatch):
+    dispatcher, collection = dispatcher
+
+    def take_over(sent):
+        if sent == 2:
+            collection.doc["dispatch_owner"] = "another-worker"
+
+    zepto = FakeZepto(on_send=take_over)
+    monkeypatch.setattr(dispatcher_module, "zepto_client", zepto)
+
+    result = asyncio.run(dispatcher.send("tpl", "crm@example.com", _recipients(10), email_id="EM-1"))
+
+    assert result["lease_lost"]
+    assert len(zepto.singles) < 10
+    assert collection.doc["sent_count"] == collection.updates < 2
+    assert collection.doc["dispatch_owner"] == "another-worker"
+
+
+def test_recipient_without_an_address_fails_alone(dispatcher, monkeypatch):
+    dispatcher, collection = dispatcher
+    zepto = FakeZepto()
+    monkeypatch.setattr(dispatcher_module, "zepto_client", zepto)
+    recipients = _recipients(3)
+    recipients[1] = {"email": None, "merge_data": [1]}
+
+    result = asyncio.run(dispatcher.send("tpl", "crm@example.com", recipients, email_id="EM-1"))
+
+    assert [outcome["status"] for outcome in result["results"]] == ["sent", "failed", "sent"]
+    assert collection.doc["recipients.1.status"] == "failed"
+
+
+def test_rejected_batch_is_retried_within_its_lane(dispatcher, monkeypatch):
+    dispatcher, collection = dispatcher
+    monkeypatch.setattr(dispatcher_module.settings, "zeptomail_batch_enabled", True)
+    monkeypatch.setattr(dispatcher_module.settings, "zeptomail_batch_size", 3)
+    zepto = FakeZepto(batch_status_code=422)
+    monkeypatch.setattr(dispatcher_module, "zepto_client", zepto)
+    recipients = [dict(recipient, merge_data={"n": n}) for n, recipient in enumerate(_recipients(6))]
+
+    result = asyncio.run(dispatcher.send("tpl", "crm@example.com", recipients, email_id="EM-1"))
+
+    assert len(zepto.batches) == 2
+    assert zepto.max_in_flight == 2
+    assert result["successful_count"] == 6
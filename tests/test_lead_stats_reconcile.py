@@ -0,0 +1,167 @@
+"""Reconciliation must not undo counter increments that land while it runs"""
+
+import asyncio
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from app.services.lead_stats_service import LeadStatsService, GLOBAL_STATS_ID, RECONCILE_LEASE_ID  # noqa: E402
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        doc = (doc or {}).get(part)
+    return doc
+
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, option) for option in condition):
+                return False
+        elif isinstance(condition, dict) and "$exists" in condition:
+            if (field in doc) != condition["$exists"]:
+                return False
+        elif isinstance(condition, dict) and "$lt" in condition:
+            if doc.get(field) is None or not doc[field] < condition["$lt"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+class StatsCollection:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    def _apply(self, doc, update):
+        for path, amount in update.get("$inc", {}).items():
+            _set(doc, path, (_get(doc, path) or 0) + amount)
+        for path, value in update.get("$set", {}).items():
+            _set(doc, path, value)
+
+    def find(self, query):
+        return SimpleNamespace(to_list=self._to_list([copy.deepcopy(d) for d in self.docs.values() if _matches(d, query)]))
+
+    @staticmethod
+    def _to_list(documents):
+        async def to_list(length=None):
+            return documents
+        return to_list
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None and upsert:
+            doc = self.docs[query["_id"]] = {"_id": query["_id"]}
+        elif doc is None or not _matches(doc, query):
+            return None
+        self._apply(doc, update)
+        return copy.deepcopy(doc)
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and _matches(doc, query):
+            self._apply(doc, update)
+
+    async def bulk_write(self, operations, ordered=True):
+        modified = upserted = deleted = 0
+        for operation in operations:
+            doc = self.docs.get(operation._filter["_id"])
+            if getattr(operation, "_doc", None) is None:
+                if doc is not None and _matches(doc, operation._filter):
+                    del self.docs[doc["_id"]]
+                    deleted += 1
+            elif doc is not None and _matches(doc, operation._filter):
+                self._apply(doc, operation._doc)
+                modified += 1
+            elif doc is None and operation._upsert:
+                doc = self.docs[operation._filter["_id"]] = {"_id": operation._filter["_id"]}
+                self._apply(doc, operation._doc)
+                upserted += 1
+        return SimpleNamespace(modified_count=modified, upserted_count=upserted, deleted_count=deleted)
+
+
+class Leads:
+    def __init__(self, facets, during_aggregate=None):
+        self.facets = facets
+        self.during_aggregate = during_aggregate
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        async def to_list(length=None):
+            if self.during_aggregate:
+                await self.during_aggregate()
+            return [self.facets]
+        return SimpleNamespace(to_list=to_list)
+
+
+def _facets(total, new_count, users):
+    return {
+        "global": [{"total": total, "unassigned": 0, "multi_assigned": 0}],
+        "by_status_stage": [{"_id": {"status": "New"}, "count": new_count}],
+        "primary": [{"_id": {"user": email, "status": "New"}, "count": count} for email, count in users.items()],
+        "involved": [{"_id": {"user": email, "status": "New"}, "count": count} for email, count in users.items()],
+    }
+
+
+def _service(stats, leads):
+    service = LeadStatsService(reconcile_minutes=0)
+    service.get_db = lambda: SimpleNamespace(lead_stats=stats, leads=leads)
+    return service
+
+
+def test_drifted_counters_are_corrected_with_deltas():
+    stats = StatsCollection([
+        {"_id": GLOBAL_STATS_ID, "scope": "global", "total": 7, "status": {"New": 7}, "revision": 3},
+        {"_id": "user:gone@example.com", "scope": "user", "email": "gone@example.com",
+         "primary": {"total": 1, "status": {"New": 1}}, "revision": 1},
+    ])
+    result = asyncio.run(_service(stats, Leads(_facets(10, 10, {"a@example.com": 10}))).reconcile())
+
+    assert result["success"] is True
+    assert stats.docs[GLOBAL_STATS_ID]["total"] == 10
+    assert stats.docs[GLOBAL_STATS_ID]["status"]["New"] == 10
+    assert stats.docs["user:a@example.com"]["primary"]["total"] == 10
+    assert "user:gone@example.com" not in stats.docs
+    assert stats.docs[RECONCILE_LEASE_ID]["lease_owner"] is None
+
+
+def test_increment_during_aggregation_is_kept():
+    stats = StatsCollection([
+        {"_id": GLOBAL_STATS_ID, "scope": "global", "total": 10, "status": {"New": 10}, "revision": 5},
+    ])
+    service = None
+
+    async def lead_created_meanwhile():
+        # A lead created after the aggregation scanned the collection
+        await service.record_changes([(None, {"status": "New"})])
+
+    service = _service(stats, Leads(_facets(10, 10, {}), during_aggregate=lead_created_meanwhile))
+    result = asyncio.run(service.reconcile())
+
+    assert result["success"] is True
+    assert stats.docs[GLOBAL_STATS_ID]["total"] == 11
+    assert stats.docs[GLOBAL_STATS_ID]["status"]["New"] == 11
+
+
+def test_other_worker_holding_the_lease_skips():
+    from datetime import datetime, timedelta
+
+    stats = StatsCollection([{
+        "_id": RECONCILE_LEASE_ID, "lease_owner": "other-worker",
+        "lease_expires_at": datetime.utcnow() + timedelta(minutes=5)
+    }])
+    result = asyncio.run(_service(stats, Leads(_facets(1, 1, {}))).reconcile())
+
+    assert result["skipped"] is True
+    assert GLOBAL_STATS_ID not in stats.docs
@@ -0,0 +1,37 @@
+"""Provider client breaker trials and lifecycle"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("pydantic_settings")
+
+from app.services.outbound_http import CircuitBreaker, ClientClosedError, ProviderClient  # noqa: E402
+
+
+def _half_open_client():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    return ProviderClient("test", timeout=1.0, max_connections=1, max_retries=0, breaker=breaker)
+
+
+def test_cancelled_half_open_trial_is_released(monkeypatch):
+    client = _half_open_client()
+
+    async def cancelled_send(method, url, **kwargs):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(client, "_send", cancelled_send)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(client.request("GET", "https://example.invalid"))
+
+    assert client.breaker.allow()
+
+
+def test_client_cannot_be_used_after_close():
+    client = _half_open_client()
+    asyncio.run(client.aclose())
+
+    with pytest.raises(ClientClosedError):
+        client.client
@@ -0,0 +1,84 @@
+"""Re-tailing the capped event collection must not skip or replay events"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from bson import ObjectId  # noqa: E402
+
+from app.services import realtime_broker  # noqa: E402
+from app.services.realtime_broker import MongoCappedCollectionBroker, _MongoBroker  # noqa: E402
+
+
+class FakeTailableCursor:
+    """Yields the matching documents once, then reports itself dead"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.alive = True
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+        self.alive = False
+
+
+class FakeEventsCollection:
+    def __init__(self):
+        self.documents = []
+
+    def find(self, query, *args, **kwargs):
+        since = (query.get("created_at") or {}).get("$gte")
+        return FakeTailableCursor([
+            document for document in self.documents if since is None or document["created_at"] >= since
+        ])
+
+
+def _event(created_at, name):
+    return {"_id": ObjectId(), "origin": "other-worker", "event": {"kind": name}, "created_at": created_at}
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    collection = FakeEventsCollection()
+    monkeypatch.setattr(realtime_broker.asyncio, "sleep", _no_sleep)
+    broker = MongoCappedCollectionBroker()
+    broker.get_collection = lambda: collection
+    broker.is_running = True
+    received = []
+
+    async def handler(event):
+        received.append(event["kind"])
+
+    broker._handler = handler
+    return broker, collection, received
+
+
+async def _no_sleep(seconds):
+    return None
+
+
+def test_retail_delivers_events_with_lagging_timestamps_once(broker):
+    broker, collection, received = broker
+    now = datetime.utcnow()
+    collection.documents.append(_event(now, "first"))
+    asyncio.run(broker._listen())
+
+    # Another worker's clock lags: its event sorts before the last one seen
+    collection.documents.append(_event(now - timedelta(seconds=5), "lagging"))
+    asyncio.run(broker._listen())
+
+    assert received == ["first", "lagging"]
+    assert broker.duplicate_count == 1
+
+
+def test_listen_is_abstract():
+    with pytest.raises(TypeError):
+        _MongoBroker()
@@ -0,0 +1,119 @@
+"""Bulk round-robin assignment must count only the lead updates that applied"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from app.services import lead_assignment_service as assignment_module  # noqa: E402
+from app.services.lead_assignment_service import LeadAssignmentService  # noqa: E402
+
+
+class LeadsCollection:
+    """Applies UpdateOne $set on an exact-match filter, like the server would"""
+
+    def __init__(self, leads, before_write=None):
+        self.leads = {lead["lead_id"]: lead for lead in leads}
+        self.before_write = before_write
+
+    def find(self, query, projection=None):
+        lead_ids = query["lead_id"]["$in"]
+        updated_at = query.get("updated_at")
+        return Cursor([
+            dict(self.leads[lead_id]) for lead_id in lead_ids
+            if lead_id in self.leads and (updated_at is None or self.leads[lead_id].get("updated_at") == updated_at)
+        ])
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.before_write:
+            self.before_write(self.leads)
+        modified = 0
+        for operation in operations:
+            lead = self.leads.get(operation._filter["lead_id"])
+            if lead and all(lead.get(field) == value for field, value in operation._filter.items()):
+                lead.update(operation._doc["$set"])
+                modified += 1
+        return SimpleNamespace(modified_count=modified, matched_count=modified)
+
+
+class Cursor:
+    def __init__(self, documents):
+        self.documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class Planner:
+    def __init__(self, emails):
+        self.emails = emails
+
+    def plan(self, count):
+        return [self.emails[i % len(self.emails)] for i in range(count)]
+
+    def get_user_name(self, email):
+        return email.split("@")[0]
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    recorded = {"arrays": None, "stats": None}
+
+    async def load_planner(selected_user_emails=None, db=None):
+        return Planner(["a@example.com", "b@example.com"])
+
+    async def add_arrays(assignments):
+        recorded["arrays"] = assignments
+
+    async def record_changes(changes):
+        recorded["stats"] = list(changes)
+
+    monkeypatch.setattr(assignment_module, "load_round_robin_planner", load_planner)
+    monkeypatch.setattr(assignment_module.user_lead_array_service, "add_leads_to_user_arrays_bulk", add_arrays)
+    monkeypatch.setattr(assignment_module.lead_stats_service, "record_changes", record_changes)
+    return recorded
+
+
+def _service(leads_collection):
+    service = LeadAssignmentService()
+    service.get_db = lambda: SimpleNamespace(leads=leads_collection)
+    return service
+
+
+def _leads():
+    return [{"lead_id": f"L{i}", "assigned_to": None, "co_assignees": []} for i in range(4)]
+
+
+def test_all_updates_applied(recorded):
+    results = asyncio.run(_service(LeadsCollection(_leads())).assign_leads_round_robin(
+        ["L0", "L1", "L2", "L3"], "admin@example.com"
+    ))
+
+    assert [result["status"] for result in results] == ["success"] * 4
+    assert recorded["arrays"] == {"a@example.com": ["L0", "L2"], "b@example.com": ["L1", "L3"]}
+    assert len(recorded["stats"]) == 4
+
+
+def test_concurrently_reassigned_lead_is_not_counted(recorded):
+    def reassign_l1(leads):
+        leads["L1"]["assigned_to"] = "someone@example.com"
+
+    collection = LeadsCollection(_leads(), before_write=reassign_l1)
+    results = {result["lead_id"]: result for result in asyncio.run(
+        _service(collection).assign_leads_round_robin(["L0", "L1", "L2", "L3", "missing"], "admin@example.com")
+    )}
+
+    assert results["L1"]["status"] == "failed"
+    assert results["missing"]["status"] == "failed"
+    assert collection.leads["L1"]["assigned_to"] == "someone@example.com"
+    assert recorded["arrays"] == {"a@example.com": ["L0", "L2"], "b@example.com": ["L3"]}
+    assert [after["assigned_to"] for _, after in recorded["stats"]] == ["a@example.com", "a@example.com", "b@example.com"]
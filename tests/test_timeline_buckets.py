@@ -0,0 +1,209 @@
+"""Timeline buckets never exceed bucket_size and store each activity once"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from bson import ObjectId  # noqa: E402
+from pymongo.errors import BulkWriteError  # noqa: E402
+
+from app.services import timeline_bucket_service as bucket_module  # noqa: E402
+from app.services.timeline_bucket_service import TimelineBucketService  # noqa: E402
+
+DAY = datetime(2026, 10, 1, 9, 0)
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, option) for option in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(key, 0)
+            if "$lte" in condition and not value <= condition["$lte"]:
+                return False
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class BucketCollection:
+    def __init__(self):
+        self.docs = []
+
+    def find(self, query, projection=None):
+        return Cursor([dict(doc) for doc in self.docs if _matches(doc, query)])
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            doc = next((doc for doc in self.docs if _matches(doc, operation._filter)), None)
+            if doc is None:
+                doc = {"_id": ObjectId(), "lead_id": operation._filter["lead_id"], "day": operation._filter["day"],
+                       "count": 0, "activities": []}
+                self.docs.append(doc)
+            update = operation._doc
+            doc["activities"].extend(update["$push"]["activities"]["$each"])
+            doc["count"] += update["$inc"]["count"]
+
+
+class EntryCollection:
+    def __init__(self):
+        self.ids = set()
+
+    async def insert_many(self, docs, ordered=True):
+        errors = []
+        for index, doc in enumerate(docs):
+            if doc["_id"] in self.ids:
+                errors.append({"index": index, "code": 11000})
+            self.ids.add(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    async def delete_many(self, query):
+        self.ids.difference_update(query["_id"]["$in"])
+
+
+class LeadActivities:
+    def __init__(self, activities, on_read=None):
+        self.activities = activities
+        self.on_read = on_read
+
+    def find(self, query):
+        return self._read()
+
+    async def _read(self):
+        for activity in self.activities:
+            if self.on_read:
+                self.on_read(activity)
+            await asyncio.sleep(0)
+            yield activity
+
+
+class Leads:
+    def __init__(self):
+        self.docs = [{"lead_id": "LD-1"}]
+
+    def find(self, query, projection=None):
+        return Cursor([dict(doc) for doc in self.docs if doc.get("timeline_bucketed") != query["timeline_bucketed"]["$ne"]])
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if doc["lead_id"] == query["lead_id"]:
+                doc.update(update["$set"])
+
+    @property
+    def bucketed(self):
+        return [doc["lead_id"] for doc in self.docs if doc.get("timeline_bucketed")]
+
+
+class FakeDatabase:
+    def __init__(self, activities, on_read=None):
+        self.lead_timeline_buckets = BucketCollection()
+        self.lead_timeline_entries = EntryCollection()
+        self.lead_activities = LeadActivities(activities, on_read)
+        self.leads = Leads()
+
+
+def _activities(count, start=DAY):
+    return [
+        {"_id": ObjectId(), "lead_id": "LD-1", "activity_type": "call", "created_at": start + timedelta(seconds=n)}
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def install(monkeypatch):
+    def install(activities=(), on_read=None):
+        db = FakeDatabase(list(activities), on_read)
+        monkeypatch.setattr(bucket_module, "get_database", lambda: db)
+        return db
+    return install
+
+
+def test_chunk_is_split_against_the_open_buckets_room(install):
+    db = install()
+    service = TimelineBucketService(bucket_size=200)
+
+    asyncio.run(service.append(_activities(199)))
+    asyncio.run(service.append(_activities(200, start=DAY + timedelta(hours=1))))
+
+    assert sorted(bucket["count"] for bucket in db.lead_timeline_buckets.docs) == [199, 200]
+    assert all(len(bucket["activities"]) == bucket["count"] for bucket in db.lead_timeline_buckets.docs)
+
+
+def test_activity_appended_twice_is_stored_once(install):
+    db = install()
+    service = TimelineBucketService(bucket_size=200)
+    activities = _activities(3)
+
+    assert asyncio.run(service.append(activities)) == 3
+    assert asyncio.run(service.append(activities[1:])) == 0
+
+    assert sum(bucket["count"] for bucket in db.lead_timeline_buckets.docs) == 3
+
+
+def test_migration_overlapping_the_log_writer_adds_each_activity_once(install):
+    service = TimelineBucketService(bucket_size=200)
+    activities = _activities(5)
+
+    def writer_appends(activity):
+        # The log writer buckets the newest activity while the scan is running
+        if activity is activities[0]:
+            assert db.leads.bucketed == []
+            asyncio.get_running_loop().create_task(service.append([activities[-1]]))
+
+    db = install(activities, on_read=writer_appends)
+
+    added = asyncio.run(service.migrate_lead("LD-1"))
+
+    stored = [entry["_id"] for bucket in db.lead_timeline_buckets.docs for entry in bucket["activities"]]
+    assert sorted(stored) == sorted(activity["_id"] for activity in activities)
+    assert added == 4
+    assert db.leads.bucketed == ["LD-1"]
+
+
+def test_failed_migration_leaves_the_lead_unflagged_for_the_next_run(install, monkeypatch):
+    activities = _activities(5)
+    db = install(activities)
+    service = TimelineBucketService(bucket_size=200)
+    monkeypatch.setattr(bucket_module, "MIGRATION_CHUNK_SIZE", 2)
+    real_bulk_write = db.lead_timeline_buckets.bulk_write
+    writes = []
+
+    async def failing_bulk_write(operations, ordered=True):
+        writes.append(operations)
+        if len(writes) == 2:
+            raise RuntimeError("connection reset")
+        await real_bulk_write(operations, ordered=ordered)
+
+    monkeypatch.setattr(db.lead_timeline_buckets, "bulk_write", failing_bulk_write)
+
+    first = asyncio.run(service.migrate_all())
+
+    assert first["failed_lead_ids"] == ["LD-1"]
+    assert db.leads.bucketed == []
+
+    second = asyncio.run(service.migrate_all())
+
+    assert second["migrated_leads"] == 1 and second["activities"] == 3
+    assert db.leads.bucketed == ["LD-1"]
+    stored = [entry["_id"] for bucket in db.lead_timeline_buckets.docs for entry in bucket["activities"]]
+    assert sorted(stored) == sorted(activity["_id"] for activity in activities)
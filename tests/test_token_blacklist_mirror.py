@@ -0,0 +1,89 @@
+"""Revocations stamped out of order must still reach the blacklist mirror"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from app.services import auth_session_service  # noqa: E402
+from app.services.auth_session_service import TokenBlacklistMirror, BLACKLIST_OVERLAP  # noqa: E402
+
+
+class BlacklistCursor:
+    def __init__(self, entries):
+        self.entries = iter(entries)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.entries)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class BlacklistCollection:
+    def __init__(self):
+        self.entries = []
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        since = query.get("blacklisted_at", {}).get("$gte")
+        return BlacklistCursor([
+            dict(entry) for entry in self.entries
+            if since is None or entry["blacklisted_at"] >= since
+        ])
+
+
+class BlacklistDatabase:
+    def __init__(self):
+        self.token_blacklist = BlacklistCollection()
+
+
+@pytest.fixture
+def database(monkeypatch):
+    db = BlacklistDatabase()
+    monkeypatch.setattr(auth_session_service, "get_database", lambda: db)
+    return db
+
+
+def _revoke(db, jti, blacklisted_at):
+    db.token_blacklist.entries.append({
+        "token_jti": jti,
+        "blacklisted_at": blacklisted_at,
+        "expires_at": datetime.utcnow() + timedelta(hours=1)
+    })
+
+
+def test_entry_stamped_behind_the_watermark_is_picked_up(database):
+    mirror = TokenBlacklistMirror(refresh_seconds=0, full_reload_seconds=3600)
+    now = datetime.utcnow()
+    _revoke(database, "first", now)
+
+    async def scenario():
+        assert await mirror.is_blacklisted("first")
+        # Another worker's clock lags: its revocation is older than our watermark
+        _revoke(database, "lagging", now - BLACKLIST_OVERLAP / 2)
+        return await mirror.is_blacklisted("lagging")
+
+    assert asyncio.run(scenario())
+    assert database.token_blacklist.queries[-1] == {"blacklisted_at": {"$gte": now - BLACKLIST_OVERLAP}}
+
+
+def test_periodic_full_reload_catches_entries_beyond_the_overlap(database):
+    mirror = TokenBlacklistMirror(refresh_seconds=0, full_reload_seconds=0)
+    now = datetime.utcnow()
+    _revoke(database, "first", now)
+
+    async def scenario():
+        await mirror.refresh()
+        _revoke(database, "very-late", now - BLACKLIST_OVERLAP * 10)
+        return await mirror.is_blacklisted("very-late")
+
+    assert asyncio.run(scenario())
+    assert database.token_blacklist.queries[-1] == {}
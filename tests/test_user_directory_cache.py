@@ -0,0 +1,112 @@
+"""User changes made in one worker must reach the user directory of the others"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from bson import ObjectId  # noqa: E402
+
+from app.services import user_directory_service  # noqa: E402
+from app.services.user_directory_service import UserDirectoryCache, MAX_TRACKED_CHANGES  # noqa: E402
+
+
+class VersionCollection:
+    """cache_versions with the $inc / $push-$slice update the directory issues"""
+
+    def __init__(self):
+        self.document = None
+
+    async def find_one(self, query, projection=None):
+        if self.document is None:
+            return None
+        if projection:
+            return {"_id": self.document["_id"], "version": self.document["version"]}
+        return {**self.document, "changes": list(self.document["changes"])}
+
+    async def update_one(self, query, update, upsert=False):
+        if self.document is None:
+            self.document = {"_id": query["_id"], "version": 0, "changes": []}
+        self.document["version"] += update["$inc"]["version"]
+        push = update["$push"]["changes"]
+        self.document["changes"] = (self.document["changes"] + push["$each"])[push["$slice"]:]
+
+
+class UsersCollection:
+    def __init__(self, users):
+        self.users = {user["_id"]: user for user in users}
+        self.find_one_calls = 0
+
+    async def find_one(self, query, *args, **kwargs):
+        self.find_one_calls += 1
+        if "_id" in query:
+            user = self.users.get(query["_id"])
+        else:
+            user = next((user for user in self.users.values() if user.get("email") == query.get("email")), None)
+        return dict(user) if user else None
+
+
+class SharedDatabase:
+    def __init__(self, users):
+        self.users = UsersCollection(users)
+        self.versions = VersionCollection()
+
+    def __getitem__(self, name):
+        return self.versions
+
+
+@pytest.fixture
+def database(monkeypatch):
+    user = {"_id": ObjectId(), "email": "agent@example.com", "first_name": "Agent", "is_active": True}
+    db = SharedDatabase([user])
+    monkeypatch.setattr(user_directory_service, "get_database", lambda: db)
+    return db, user
+
+
+def test_change_in_one_worker_reaches_the_other(database):
+    db, user = database
+    worker_a = UserDirectoryCache(check_seconds=0)
+    worker_b = UserDirectoryCache(check_seconds=0)
+    removed = []
+    worker_a.add_invalidation_listener(lambda user_id, email: removed.append((user_id, email)))
+
+    async def scenario():
+        assert (await worker_a.get_by_id(user["_id"]))["is_active"] is True
+        db.users.users[user["_id"]]["is_active"] = False
+        await worker_b.notify_changed(user["_id"])
+        return await worker_a.get_by_id(user["_id"])
+
+    assert asyncio.run(scenario())["is_active"] is False
+    assert (str(user["_id"]), None) in removed
+
+
+def test_worker_behind_the_tracked_changes_clears_everything(database):
+    db, user = database
+    worker_a = UserDirectoryCache(check_seconds=0)
+    worker_b = UserDirectoryCache(check_seconds=0)
+
+    async def scenario():
+        await worker_a.get_by_id(user["_id"])
+        await worker_b.notify_many_changed(f"other{i}@example.com" for i in range(MAX_TRACKED_CHANGES + 1))
+        calls = db.users.find_one_calls
+        await worker_a.get_by_id(user["_id"])
+        return db.users.find_one_calls - calls
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_unrelated_change_keeps_cached_user(database):
+    db, user = database
+    worker_a = UserDirectoryCache(check_seconds=0)
+    worker_b = UserDirectoryCache(check_seconds=0)
+
+    async def scenario():
+        await worker_a.get_by_id(user["_id"])
+        await worker_b.notify_changed(email="someone-else@example.com")
+        calls = db.users.find_one_calls
+        await worker_a.get_by_id(user["_id"])
+        return db.users.find_one_calls - calls
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,141 @@
+"""Lead list pages must resolve user names with one users query per page"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("pydantic_settings")
+
+from bson import ObjectId  # noqa: E402
+
+from app.services.user_directory_service import (  # noqa: E402
+    load_user_directory_for_leads, user_directory
+)
+
+
+class CountingUsersCollection:
+    """In-memory stand-in for db.users that counts every query"""
+
+    def __init__(self, users):
+        self.users = users
+        self.find_calls = 0
+        self.find_one_calls = 0
+
+    def _matches(self, user, query):
+        if "$or" in query:
+            return any(self._matches(user, condition) for condition in query["$or"])
+        for field, condition in query.items():
+            if isinstance(condition, dict) and "$in" in condition:
+                if user.get(field) not in condition["$in"]:
+                    return False
+            elif user.get(field) != condition:
+                return False
+        return True
+
+    def find(self, query, *args, **kwargs):
+        self.find_calls += 1
+        return CountingCursor([user for user in self.users if self._matches(user, query)])
+
+    async def find_one(self, query, *args, **kwargs):
+        self.find_one_calls += 1
+        return next((user for user in self.users if self._matches(user, query)), None)
+
+    @property
+    def query_count(self):
+        return self.find_calls + self.find_one_calls
+
+
+class CountingCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return list(self.documents)
+
+
+class EmptyVersionCollection:
+    async def find_one(self, query, *args, **kwargs):
+        return None
+
+
+class FakeDatabase:
+    def __init__(self, users):
+        self.users = CountingUsersCollection(users)
+
+    def __getitem__(self, name):
+        return EmptyVersionCollection()
+
+
+def _make_page(user_count=12, lead_count=50):
+    users = [
+        {"_id": ObjectId(), "email": f"user{i}@example.com", "first_name": f"First{i}", "last_name": f"Last{i}"}
+        for i in range(user_count)
+    ]
+    leads = []
+    for i in range(lead_count):
+        creator = users[i % user_count]
+        leads.append({
+            "_id": ObjectId(),
+            "lead_id": f"LD-{i:04d}",
+            "name": f"Lead {i}",
+            # Mix of ObjectId and legacy email references
+            "created_by": str(creator["_id"]) if i % 2 else creator["email"],
+            "assigned_to": users[(i + 1) % user_count]["email"],
+            "co_assignees": [users[(i + 2) % user_count]["email"], users[(i + 3) % user_count]["email"]],
+        })
+    return users, leads
+
+
+@pytest.fixture(autouse=True)
+def empty_user_directory():
+    user_directory.invalidate_all()
+    yield
+    user_directory.invalidate_all()
+
+
+def test_page_of_leads_resolves_users_with_one_query():
+    users, leads = _make_page()
+    db = FakeDatabase(users)
+
+    loader = asyncio.run(load_user_directory_for_leads(leads, db))
+
+    assert loader.query_count == 1
+    assert db.users.query_count == 1
+    for lead in leads:
+        assert loader.get_by_reference(lead["created_by"]) is not None
+        assert loader.get_name_by_email(lead["assigned_to"]).startswith("First")
+        assert all(name.startswith("First") for name in loader.get_names_by_emails(lead["co_assignees"]))
+
+
+def test_unknown_references_are_not_requeried():
+    users, leads = _make_page()
+    leads[0]["assigned_to"] = "missing@example.com"
+    leads[1]["created_by"] = str(ObjectId())
+    db = FakeDatabase(users)
+
+    loader = asyncio.run(load_user_directory_for_leads(leads, db))
+    asyncio.run(loader.load())
+
+    assert db.users.query_count == 1
+    assert loader.get_name_by_email("missing@example.com") == "missing@example.com"
+    assert loader.get_by_reference(leads[1]["created_by"]) is None
+
+
+def test_processing_a_page_makes_no_per_lead_user_queries():
+    pytest.importorskip("fastapi")
+    from app.routers.leads import process_lead_for_response
+
+    users, leads = _make_page()
+    db = FakeDatabase(users)
+
+    async def process_page():
+        loader = await load_user_directory_for_leads(leads, db)
+        return [await process_lead_for_response(dict(lead), db, None, loader) for lead in leads]
+
+    processed = asyncio.run(process_page())
+
+    assert db.users.query_count == 1
+    assert len(processed) == len(leads)
+    assert all(lead["created_by_name"].startswith("First") for lead in processed)
+    assert all(lead["assigned_to_name"].startswith("First") for lead in processed)